@@ -0,0 +1,194 @@
+"""Helpers shared by the benchmark scripts."""
+
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tomllib
+import tracemalloc
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Ensure the benchmarks can find the sfr_box_core module
+sys.path.insert(0, _ROOT)
+from sfr_tv_box_core.simulator import SimulatorFleet  # noqa: E402
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Returns the nearest-rank percentile of samples (0 for no samples)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, float]:
+    """Summarizes durations given in seconds, reported in milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": 1000 * sum(samples) / len(samples) if samples else 0.0,
+        "p50_ms": 1000 * percentile(samples, 50),
+        "p95_ms": 1000 * percentile(samples, 95),
+        "p99_ms": 1000 * percentile(samples, 99),
+        "max_ms": 1000 * max(samples, default=0.0),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Describes the machine and the code a report was produced with."""
+    with open(os.path.join(_ROOT, "pyproject.toml"), "rb") as pyproject:
+        version = tomllib.load(pyproject)["project"]["version"]
+    return {
+        "package_version": version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def add_output_argument(parser: argparse.ArgumentParser) -> None:
+    """Adds the `--json` option shared by every benchmark."""
+    parser.add_argument(
+        "--json",
+        metavar="PATH",
+        default=None,
+        help="Write the machine-readable report to PATH ('-' for stdout).",
+    )
+
+
+def write_report(report: Dict[str, Any], json_path: Optional[str]) -> None:
+    """Writes a report as JSON, if requested."""
+    if json_path is None:
+        return
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if json_path == "-":
+        print(text)
+    else:
+        with open(json_path, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+
+
+def measure(operation: Callable[[], Any], iterations: int, repeat: int) -> Dict[str, float]:
+    """Measures the time and allocations of one operation.
+
+    Args:
+        operation: The operation to measure.
+        iterations: The number of calls per timed run.
+        repeat: The number of timed runs, the fastest one is kept.
+
+    Returns:
+        The nanoseconds per operation, memory blocks kept per operation and peak
+        transient bytes of one operation.
+    """
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(iterations):
+                operation()
+            best = min(best, time.perf_counter_ns() - start)
+
+        # Keep every result alive so the blocks they hold are counted.
+        results = [None] * iterations
+        blocks = sys.getallocatedblocks()
+        for index in range(iterations):
+            results[index] = operation()
+        kept_blocks = (sys.getallocatedblocks() - blocks) / iterations
+        del results
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        operation()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ns_per_op": best / iterations,
+        "blocks_per_op": kept_blocks,
+        "peak_bytes_per_op": peak,
+    }
+
+
+class SimulatorProcess:
+    """A `SimulatorFleet` served from a child process.
+
+    Keeping the simulated boxes out of the measured process means their CPU and
+    memory do not pollute the figures of the driver stack.
+    """
+
+    def __init__(self, count: int, **options: Any):
+        """Initializes the process.
+
+        Args:
+            count: The number of simulated boxes.
+            **options: Options of every `STB8Simulator`.
+        """
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_serve_fleet, args=(child_conn, count, options), daemon=True)
+        self.addresses: List[Tuple[str, int]] = []
+
+    def __enter__(self) -> "SimulatorProcess":
+        """Starts the fleet and waits until every box listens."""
+        self._process.start()
+        self.addresses = self._conn.recv()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stops the fleet."""
+        self._conn.send(("stop", None))
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.kill()
+
+    def disconnect(self, index: int) -> None:
+        """Drops the client connections of one box and waits until it is done."""
+        self._conn.send(("disconnect", index))
+        self._conn.recv()
+
+    def notify_power(self, index: int, power: str) -> None:
+        """Makes one box push a power notification and waits until it is sent."""
+        self._conn.send(("notify_power", (index, power)))
+        self._conn.recv()
+
+
+def _serve_fleet(conn: Any, count: int, options: Dict[str, Any]) -> None:
+    """Entry point of the child process of `SimulatorProcess`."""
+    asyncio.run(_serve_fleet_async(conn, count, options))
+
+
+async def _serve_fleet_async(conn: Any, count: int, options: Dict[str, Any]) -> None:
+    """Serves the fleet and executes the commands of the parent process."""
+    loop = asyncio.get_running_loop()
+    async with SimulatorFleet(count, **options) as fleet:
+        conn.send(fleet.addresses)
+        while True:
+            command, argument = await loop.run_in_executor(None, conn.recv)
+            if command == "stop":
+                return
+            if command == "disconnect":
+                await fleet.simulators[argument].disconnect_clients()
+            elif command == "notify_power":
+                index, power = argument
+                await fleet.simulators[index].notify_power(power)
+            conn.send(None)
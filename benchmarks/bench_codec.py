@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Microbenchmarks of frame encoding and decoding.
+
+Covers every CommandType and KeyCode of the STB8 builder and of the STB7/LaBox
+`{"Params": ...}` codec, the parsing of their replies and notifications, and the
+raw cost of each installed `serializer` backend on the same frames. Each case reports
+nanoseconds per operation and its allocations: memory blocks kept per operation
+and the transient peak of bytes one operation needs.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+# Ensure the script can find the sfr_box_core and benchmarks modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks._common import add_output_argument  # noqa: E402
+from benchmarks._common import environment  # noqa: E402
+from benchmarks._common import measure  # noqa: E402
+from benchmarks._common import write_report  # noqa: E402
+from sfr_tv_box_core import serializer  # noqa: E402
+from sfr_tv_box_core.constants import CommandType  # noqa: E402
+from sfr_tv_box_core.constants import KeyCode  # noqa: E402
+from sfr_tv_box_core.labox_driver import LaBoxDriver  # noqa: E402
+from sfr_tv_box_core.stb7_driver import STB7Driver  # noqa: E402
+from sfr_tv_box_core.stb8_driver import STB8Driver  # noqa: E402
+
+Case = Tuple[str, Callable[[], Any]]
+
+# Representative frames received from each protocol family.
+_STB8_FRAMES = {
+    "reply": '{"action": "buttonEvent", "requestId": 1700000000000, "remoteResponseCode": "OK", "data": {}}',
+    "status": '{"action": "getStatus", "requestId": 1700000000000, "remoteResponseCode": "OK", "data": {"power": "on"}}',
+    "notification": '{"data": {"status": "standby"}}',
+}
+_PARAMS_FRAMES = {
+    "reply": '{"Action": "ButtonEvent", "RemoteResponseCode": "OK", "Data": {}}',
+    "status": '{"Action": "GetSessionsStatus", "RemoteResponseCode": "OK", "Data": {"Sessions": []}}',
+    "notification": '{"Notification": {"Power": "on", "Channel": 6}}',
+}
+
+
+def _driver_cases(label: str, driver: Any, frames: Dict[str, str]) -> List[Case]:
+    """Lists the encode cases of every command and key of a driver, and its decode cases."""
+    cases: List[Case] = []
+    for command_type in CommandType:
+        if command_type == CommandType.SEND_KEY:
+            continue
+        cases.append((f"{label}.encode.{command_type.name}", lambda c=command_type: driver._build_command(c)))
+    for key in KeyCode:
+        # Keys the model does not support have no frame to build.
+        if driver._build_command(CommandType.SEND_KEY, key=key) is None:
+            continue
+        cases.append((f"{label}.encode.SEND_KEY.{key.name}", lambda k=key: driver._build_command(CommandType.SEND_KEY, key=k)))
+    for name, frame in frames.items():
+        cases.append((f"{label}.decode.{name}", lambda f=frame: driver._parse_message(f)))
+    return cases
+
+
+def _backend_cases(backend: str, dumps: Callable[[Any], Any], loads: Callable[[Any], Any]) -> List[Case]:
+    """Lists the raw encode and decode cases of a JSON backend on the protocol frames."""
+    cases: List[Case] = []
+    for family, frames in (("stb8", _STB8_FRAMES), ("params", _PARAMS_FRAMES)):
+        for name, frame in frames.items():
+            obj = json.loads(frame)
+            cases.append((f"backend.{backend}.dumps.{family}.{name}", lambda o=obj: dumps(o)))
+            cases.append((f"backend.{backend}.loads.{family}.{name}", lambda f=frame: loads(f)))
+    return cases
+
+
+def all_cases() -> List[Case]:
+    """Lists every benchmark case."""
+    cases = _driver_cases("stb8", STB8Driver(host="localhost"), _STB8_FRAMES)
+    cases += _driver_cases("stb7", STB7Driver(host="localhost"), _PARAMS_FRAMES)
+    cases += _driver_cases("labox", LaBoxDriver(host="localhost"), _PARAMS_FRAMES)
+    for backend in serializer.available_backends().values():
+        cases += _backend_cases(backend.name, backend.dumps, backend.loads)
+    return cases
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Microbenchmarks of frame encoding and decoding.")
+    parser.add_argument("-n", "--iterations", type=int, default=20000, help="Calls per timed run. Default is 20000.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed runs per case, the fastest is kept.")
+    parser.add_argument(
+        "--backend",
+        default=None,
+        help="Serializer backend used by the drivers (json or orjson). Default is the fastest installed.",
+    )
+    parser.add_argument("-k", "--filter", default="", help="Only run the cases whose name contains this text.")
+    add_output_argument(parser)
+    return parser.parse_args()
+
+
+def main() -> Dict[str, Any]:
+    """Main function to run the benchmark from the command line."""
+    args = _parse_args()
+    if args.backend is not None:
+        serializer.set_backend(args.backend)
+    results = {}
+    for name, operation in all_cases():
+        if args.filter in name:
+            results[name] = measure(operation, args.iterations, args.repeat)
+            print(
+                f"{name:<40} {results[name]['ns_per_op']:>9.0f} ns/op"
+                f" {results[name]['blocks_per_op']:>6.1f} blocks/op"
+                f" {results[name]['peak_bytes_per_op']:>6} peak B/op"
+            )
+    report = {
+        "benchmark": "codec",
+        "environment": environment(),
+        "parameters": {
+            "iterations": args.iterations,
+            "repeat": args.repeat,
+            "filter": args.filter,
+            "json_backends": sorted(serializer.available_backends()),
+            "json_backend": serializer.get_backend().name,
+        },
+        "results": results,
+    }
+    write_report(report, args.json)
+    return report
+
+
+if __name__ == "__main__":
+    main()
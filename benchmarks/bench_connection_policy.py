@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Hit ratio and reconnection cost of an open-socket budget under skewed traffic.
+
+`--boxes` simulated STB8s run in a child process. One driver per box shares a
+`ConnectionPolicy` allowing `--max-open` simultaneous connections, and
+`--requests` status requests are sent one after the other to boxes drawn from a
+Zipf distribution of exponent `--skew`, so that a few boxes receive most of the
+traffic, as on a real installation. Reports the hit ratio, the number of
+evictions and the round-trip latency of hits (connection already open) and
+misses (connection reopened first).
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any
+from typing import Dict
+
+# Ensure the script can find the sfr_box_core and benchmarks modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks._common import SimulatorProcess  # noqa: E402
+from benchmarks._common import add_output_argument  # noqa: E402
+from benchmarks._common import environment  # noqa: E402
+from benchmarks._common import latency_summary  # noqa: E402
+from benchmarks._common import write_report  # noqa: E402
+from sfr_tv_box_core.connection_policy import ConnectionPolicy  # noqa: E402
+from sfr_tv_box_core.constants import CommandType  # noqa: E402
+from sfr_tv_box_core.stb8_driver import STB8Driver  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Hit ratio of an open-socket budget under skewed traffic.")
+    parser.add_argument("-b", "--boxes", type=int, default=100, help="Number of simulated boxes. Default is 100.")
+    parser.add_argument("-m", "--max-open", type=int, default=10, help="Connections open at once. Default is 10.")
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="Number of requests. Default is 2000.")
+    parser.add_argument("-s", "--skew", type=float, default=1.2, help="Zipf exponent of the box choice. Default is 1.2.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the box choice. Default is 0.")
+    add_output_argument(parser)
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs the benchmark and returns its report."""
+    weights = list(itertools.accumulate(1 / rank**args.skew for rank in range(1, args.boxes + 1)))
+    choices = random.Random(args.seed).choices(range(args.boxes), cum_weights=weights, k=args.requests)
+    policy = ConnectionPolicy(max_open=args.max_open)
+    hits, misses = [], []
+    with SimulatorProcess(args.boxes) as simulators:
+        drivers = [STB8Driver(host, port) for host, port in simulators.addresses]
+        for driver in drivers:
+            driver.set_connection_policy(policy)
+        try:
+            for index in choices:
+                reconnections = policy.misses
+                start = time.perf_counter()
+                await drivers[index].send_request(CommandType.GET_STATUS, timeout=5)
+                (misses if policy.misses > reconnections else hits).append(time.perf_counter() - start)
+        finally:
+            await asyncio.gather(*(driver.stop() for driver in drivers))
+
+    return {
+        "benchmark": "connection_policy",
+        "environment": environment(),
+        "parameters": {
+            "boxes": args.boxes,
+            "max_open": args.max_open,
+            "requests": args.requests,
+            "skew": args.skew,
+            "seed": args.seed,
+        },
+        "results": {
+            "hit_ratio": policy.hit_ratio,
+            "evictions": policy.evictions,
+            "distinct_boxes": len(set(choices)),
+            "hit": latency_summary(hits),
+            "miss": latency_summary(misses),
+        },
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    """Prints a human-readable summary of a report."""
+    parameters, results = report["parameters"], report["results"]
+    print(
+        f"Boxes: {parameters['boxes']} ({results['distinct_boxes']} used)  Budget: {parameters['max_open']}"
+        f"  Requests: {parameters['requests']}  Skew: {parameters['skew']}"
+    )
+    print(f"Hit ratio: {results['hit_ratio']:.1%}  Evictions: {results['evictions']}")
+    for name in ("hit", "miss"):
+        summary = results[name]
+        print(
+            f"{name.capitalize():<5} {summary['count']:>6} requests  p50 {summary['p50_ms']:.2f} ms"
+            f"  p95 {summary['p95_ms']:.2f} ms  p99 {summary['p99_ms']:.2f} ms"
+        )
+
+
+async def main() -> Dict[str, Any]:
+    """Main function to run the benchmark from the command line."""
+    args = _parse_args()
+    report = await run(args)
+    _print_report(report)
+    write_report(report, args.json)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""End-to-end load benchmark of the driver stack against simulated boxes.
+
+Reports, for `--connections` drivers each connected to its own simulated STB8:
+- commands per second per connection (request/acknowledgement round trips),
+- p50/p95/p99 round-trip latency,
+- recovery time after the box forcibly drops the connection,
+- memory allocated per connected driver.
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any
+from typing import Dict
+from typing import List
+
+# Ensure the script can find the sfr_box_core and benchmarks modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks._common import SimulatorProcess  # noqa: E402
+from benchmarks._common import add_output_argument  # noqa: E402
+from benchmarks._common import environment  # noqa: E402
+from benchmarks._common import latency_summary  # noqa: E402
+from benchmarks._common import write_report  # noqa: E402
+from sfr_tv_box_core.constants import CommandType  # noqa: E402
+from sfr_tv_box_core.constants import KeyCode  # noqa: E402
+from sfr_tv_box_core.stb8_driver import STB8Driver  # noqa: E402
+
+# Per-attempt timeout while waiting for a dropped connection to recover.
+_RECOVERY_PROBE_TIMEOUT = 0.2
+_RECOVERY_DEADLINE = 30.0
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Load benchmark of STB8Driver against simulated boxes.")
+    parser.add_argument("-c", "--connections", type=int, default=10, help="Number of drivers/boxes. Default is 10.")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds of load per connection. Default is 5.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated box latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Simulated box latency jitter in seconds.")
+    parser.add_argument("--reconnects", type=int, default=3, help="Forced disconnections to time. Default is 3.")
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="Keep the adaptive rate limiter of the drivers (disabled by default to measure the raw stack).",
+    )
+    add_output_argument(parser)
+    return parser.parse_args()
+
+
+async def _drive(driver: STB8Driver, duration: float) -> List[float]:
+    """Sends acknowledged key presses back to back and returns their round-trip times."""
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await driver.send_request(CommandType.SEND_KEY, key=KeyCode.OK)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _time_recovery(driver: STB8Driver, simulators: SimulatorProcess, index: int) -> float:
+    """Drops the connection of one box and measures when its driver works again."""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await loop.run_in_executor(None, simulators.disconnect, index)
+    while time.perf_counter() - start < _RECOVERY_DEADLINE:
+        try:
+            await driver.send_request(CommandType.GET_STATUS, timeout=_RECOVERY_PROBE_TIMEOUT)
+            return time.perf_counter() - start
+        except Exception:
+            await asyncio.sleep(0.01)
+    raise RuntimeError(f"Driver {index} did not recover within {_RECOVERY_DEADLINE} s.")
+
+
+async def _connect_drivers(addresses: List, rate_limit: bool) -> tuple:
+    """Connects one driver per box and measures the memory they hold."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    drivers = [STB8Driver(host=host, port=port) for host, port in addresses]
+    for driver in drivers:
+        if not rate_limit:
+            driver.set_rate_limiter(None)
+    await asyncio.gather(*(driver.start() for driver in drivers))
+    gc.collect()
+    per_driver = (tracemalloc.get_traced_memory()[0] - baseline) / len(drivers)
+    tracemalloc.stop()
+    return drivers, per_driver
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs the benchmark and returns its report."""
+    with SimulatorProcess(args.connections, latency=args.latency, jitter=args.jitter) as simulators:
+        drivers, memory_per_driver = await _connect_drivers(simulators.addresses, args.rate_limit)
+        try:
+            per_connection = await asyncio.gather(*(_drive(driver, args.duration) for driver in drivers))
+            recoveries = [
+                await _time_recovery(drivers[index], simulators, index) for index in range(min(args.reconnects, len(drivers)))
+            ]
+        finally:
+            await asyncio.gather(*(driver.stop() for driver in drivers))
+
+    rates = [len(samples) / args.duration for samples in per_connection]
+    rtts = [sample for samples in per_connection for sample in samples]
+    return {
+        "benchmark": "driver_load",
+        "environment": environment(),
+        "parameters": {
+            "connections": args.connections,
+            "duration_s": args.duration,
+            "latency_s": args.latency,
+            "jitter_s": args.jitter,
+            "rate_limit": args.rate_limit,
+        },
+        "results": {
+            "commands_per_sec_per_connection": {
+                "mean": sum(rates) / len(rates),
+                "min": min(rates),
+                "max": max(rates),
+            },
+            "commands_per_sec_total": sum(rates),
+            "round_trip": latency_summary(rtts),
+            "reconnect_recovery": latency_summary(recoveries),
+            "memory_per_driver_bytes": round(memory_per_driver),
+        },
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    """Prints a human-readable summary of a report."""
+    results = report["results"]
+    rates = results["commands_per_sec_per_connection"]
+    rtt = results["round_trip"]
+    recovery = results["reconnect_recovery"]
+    print(f"Connections:            {report['parameters']['connections']}")
+    print(f"Commands/s/connection:  mean {rates['mean']:.0f}  min {rates['min']:.0f}  max {rates['max']:.0f}")
+    print(f"Commands/s total:       {results['commands_per_sec_total']:.0f}")
+    print(f"Round trip (ms):        p50 {rtt['p50_ms']:.2f}  p95 {rtt['p95_ms']:.2f}  p99 {rtt['p99_ms']:.2f}")
+    print(f"Reconnect recovery (ms): p50 {recovery['p50_ms']:.1f}  max {recovery['max_ms']:.1f}")
+    print(f"Memory per driver:      {results['memory_per_driver_bytes']} bytes")
+
+
+async def main() -> Dict[str, Any]:
+    """Main function to run the benchmark from the command line."""
+    args = _parse_args()
+    report = await run(args)
+    _print_report(report)
+    write_report(report, args.json)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Scaling of the multi-process fleet runner with the number of workers.
+
+Serves `--boxes` simulated STB8s from `--simulator-processes` child processes,
+then, for each worker count of `--workers`, drives the whole fleet through a
+`FleetRunner` with back-to-back `request_all` status rounds for `--duration`
+seconds. Reports the requests per second of each worker count and its scaling
+efficiency relative to a single worker; efficiency can only stay near 1 while
+the machine has a spare core for every worker and simulator process.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+# Ensure the script can find the sfr_box_core and benchmarks modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks._common import SimulatorProcess  # noqa: E402
+from benchmarks._common import add_output_argument  # noqa: E402
+from benchmarks._common import environment  # noqa: E402
+from benchmarks._common import latency_summary  # noqa: E402
+from benchmarks._common import write_report  # noqa: E402
+from sfr_tv_box_core.constants import CommandType  # noqa: E402
+from sfr_tv_box_core.fleet import BoxSpec  # noqa: E402
+from sfr_tv_box_core.fleet import FleetRunner  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    cpus = os.cpu_count() or 1
+    default_workers = ",".join(str(count) for count in (1, 2, 4, 8, 16) if count <= cpus) or "1"
+    parser = argparse.ArgumentParser(description="Scaling of the fleet runner with the number of workers.")
+    parser.add_argument("-b", "--boxes", type=int, default=200, help="Number of simulated boxes. Default is 200.")
+    parser.add_argument("-w", "--workers", default=default_workers, help="Comma-separated worker counts to measure.")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds of load per worker count. Default is 5.")
+    parser.add_argument(
+        "--simulator-processes",
+        type=int,
+        default=None,
+        help="Processes serving the simulated boxes. Default is the largest worker count.",
+    )
+    add_output_argument(parser)
+    return parser.parse_args()
+
+
+async def _measure(specs: List[BoxSpec], workers: int, duration: float) -> Dict[str, Any]:
+    """Drives the fleet with status rounds on a number of workers."""
+    async with FleetRunner(specs, workers=workers) as runner:
+        # Warm the connections and the rate limiters up.
+        await runner.request_all(CommandType.GET_STATUS)
+        rounds, failures = [], 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            replies = await runner.request_all(CommandType.GET_STATUS)
+            rounds.append(time.perf_counter() - start)
+            failures += sum(isinstance(reply, Exception) for reply in replies.values())
+    elapsed = sum(rounds)
+    return {
+        "workers": workers,
+        "connected": runner.connected,
+        "requests_per_sec": len(rounds) * len(specs) / elapsed if elapsed else 0.0,
+        "failures": failures,
+        "round": latency_summary(rounds),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs the benchmark and returns its report."""
+    worker_counts = [int(count) for count in args.workers.split(",")]
+    processes = args.simulator_processes or max(worker_counts)
+    sizes = [args.boxes // processes + (index < args.boxes % processes) for index in range(processes)]
+    with contextlib.ExitStack() as stack:
+        simulators = [stack.enter_context(SimulatorProcess(size)) for size in sizes if size]
+        addresses = [address for process in simulators for address in process.addresses]
+        specs = [BoxSpec(f"box-{index}", host, port) for index, (host, port) in enumerate(addresses)]
+        runs = [await _measure(specs, workers, args.duration) for workers in worker_counts]
+
+    baseline = runs[0]["requests_per_sec"] / runs[0]["workers"]
+    for result in runs:
+        result["scaling_efficiency"] = result["requests_per_sec"] / (baseline * result["workers"]) if baseline else 0.0
+    return {
+        "benchmark": "fleet",
+        "environment": environment(),
+        "parameters": {
+            "boxes": args.boxes,
+            "workers": worker_counts,
+            "duration_s": args.duration,
+            "simulator_processes": processes,
+        },
+        "results": {"runs": runs},
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    """Prints a human-readable summary of a report."""
+    print(f"Boxes: {report['parameters']['boxes']}  CPUs: {report['environment']['cpu_count']}")
+    print("Workers  Requests/s  Efficiency  Round p50 (ms)  Failures")
+    for result in report["results"]["runs"]:
+        print(
+            f"{result['workers']:>7}  {result['requests_per_sec']:>10.0f}  {result['scaling_efficiency']:>10.0%}"
+            f"  {result['round']['p50_ms']:>14.1f}  {result['failures']:>8}"
+        )
+
+
+async def main() -> Dict[str, Any]:
+    """Main function to run the benchmark from the command line."""
+    args = _parse_args()
+    report = await run(args)
+    _print_report(report)
+    write_report(report, args.json)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Overhead of the WebSocket gateway compared to direct box connections.
+
+`--clients` drivers send acknowledged key presses back to back to one simulated
+STB8, first each over its own connection to the box, then all through a
+`BoxGateway` holding a single upstream connection. Reports, for both runs, the
+total commands per second and the p50/p95/p99 round-trip latency, and the
+latency and throughput the gateway costs.
+
+The gateway runs in the measured process, alongside the clients, so its CPU
+time is part of the figures; the simulated box runs in a child process.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+# Ensure the script can find the sfr_box_core and benchmarks modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks._common import SimulatorProcess  # noqa: E402
+from benchmarks._common import add_output_argument  # noqa: E402
+from benchmarks._common import environment  # noqa: E402
+from benchmarks._common import latency_summary  # noqa: E402
+from benchmarks._common import write_report  # noqa: E402
+from sfr_tv_box_core.constants import CommandType  # noqa: E402
+from sfr_tv_box_core.constants import KeyCode  # noqa: E402
+from sfr_tv_box_core.gateway import BoxGateway  # noqa: E402
+from sfr_tv_box_core.stb8_driver import STB8Driver  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Overhead of the gateway compared to direct box connections.")
+    parser.add_argument("-c", "--clients", type=int, default=5, help="Number of client drivers. Default is 5.")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds of load per run. Default is 5.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated box latency in seconds.")
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="Keep the adaptive rate limiters (disabled by default to measure the raw stack).",
+    )
+    add_output_argument(parser)
+    return parser.parse_args()
+
+
+async def _drive(driver: STB8Driver, duration: float) -> List[float]:
+    """Sends acknowledged key presses back to back and returns their round-trip times."""
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await driver.send_request(CommandType.SEND_KEY, key=KeyCode.OK)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _run_clients(host: str, port: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Connects the clients to an address, loads it and summarizes the round trips."""
+    drivers = [STB8Driver(host=host, port=port, device_id=f"client-{i}") for i in range(args.clients)]
+    for driver in drivers:
+        if not args.rate_limit:
+            driver.set_rate_limiter(None)
+    await asyncio.gather(*(driver.start() for driver in drivers))
+    try:
+        per_client = await asyncio.gather(*(_drive(driver, args.duration) for driver in drivers))
+    finally:
+        await asyncio.gather(*(driver.stop() for driver in drivers))
+    rtts = [sample for samples in per_client for sample in samples]
+    return {"commands_per_sec": len(rtts) / args.duration, "round_trip": latency_summary(rtts)}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs the benchmark and returns its report."""
+    with SimulatorProcess(1, latency=args.latency) as simulators:
+        ((box_host, box_port),) = simulators.addresses
+        direct = await _run_clients(box_host, box_port, args)
+        upstream = STB8Driver(host=box_host, port=box_port)
+        if not args.rate_limit:
+            upstream.set_rate_limiter(None)
+        async with BoxGateway(upstream, port=0) as gateway:
+            through_gateway = await _run_clients(gateway.host, gateway.port, args)
+
+    return {
+        "benchmark": "gateway",
+        "environment": environment(),
+        "parameters": {
+            "clients": args.clients,
+            "duration_s": args.duration,
+            "latency_s": args.latency,
+            "rate_limit": args.rate_limit,
+        },
+        "results": {
+            "direct": direct,
+            "gateway": through_gateway,
+            "added_p50_ms": through_gateway["round_trip"]["p50_ms"] - direct["round_trip"]["p50_ms"],
+            "added_p99_ms": through_gateway["round_trip"]["p99_ms"] - direct["round_trip"]["p99_ms"],
+            "throughput_ratio": through_gateway["commands_per_sec"] / direct["commands_per_sec"],
+        },
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    """Prints a human-readable summary of a report."""
+    results = report["results"]
+    print(f"Clients:           {report['parameters']['clients']}")
+    for name in ("direct", "gateway"):
+        run_results = results[name]
+        rtt = run_results["round_trip"]
+        print(
+            f"{name.capitalize() + ':':<18} {run_results['commands_per_sec']:>8.0f} commands/s"
+            f"  p50 {rtt['p50_ms']:.2f}  p95 {rtt['p95_ms']:.2f}  p99 {rtt['p99_ms']:.2f} ms"
+        )
+    print(f"Gateway overhead:  p50 {results['added_p50_ms']:+.2f} ms  p99 {results['added_p99_ms']:+.2f} ms")
+    print(f"                   {results['throughput_ratio']:.0%} of the direct throughput")
+
+
+async def main() -> Dict[str, Any]:
+    """Main function to run the benchmark from the command line."""
+    args = _parse_args()
+    report = await run(args)
+    _print_report(report)
+    write_report(report, args.json)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Overhead benchmark of the driver metrics.
+
+Times each metric primitive and the metrics bookkeeping done for one command
+(frame written, reply read and its latency observed), compared with the cost of
+building, writing and parsing the reply of that command, and the rendering of a
+shared registry holding `--drivers` drivers.
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+from typing import Any
+from typing import Dict
+
+# Ensure the script can find the sfr_box_core and benchmarks modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks._common import add_output_argument  # noqa: E402
+from benchmarks._common import environment  # noqa: E402
+from benchmarks._common import measure  # noqa: E402
+from benchmarks._common import write_report  # noqa: E402
+from sfr_tv_box_core.constants import CommandType  # noqa: E402
+from sfr_tv_box_core.constants import KeyCode  # noqa: E402
+from sfr_tv_box_core.metrics import DriverMetrics  # noqa: E402
+from sfr_tv_box_core.metrics import MetricsRegistry  # noqa: E402
+from sfr_tv_box_core.stb8_driver import STB8Driver  # noqa: E402
+
+_REPLY = '{"action":"buttonEvent","requestId":1700000000000,"remoteResponseCode":"OK","data":{}}'
+
+
+class _NullWebSocket:
+    """A connected WebSocket that writes nowhere."""
+
+    async def send(self, message: str) -> None:
+        pass
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Overhead benchmark of the driver metrics.")
+    parser.add_argument("-n", "--iterations", type=int, default=100000, help="Calls per timed run. Default is 100000.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed runs per case, the fastest is kept.")
+    parser.add_argument("--drivers", type=int, default=1000, help="Drivers in the rendered registry. Default is 1000.")
+    add_output_argument(parser)
+    return parser.parse_args()
+
+
+def _record_command(metrics: DriverMetrics) -> None:
+    """Does the metrics bookkeeping of one acknowledged command."""
+    metrics.frames_sent.inc()
+    metrics.bytes_sent.inc(80)
+    metrics.frames_received.inc()
+    metrics.bytes_received.inc(80)
+    metrics.reply_latency.observe(0.012)
+
+
+def main() -> Dict[str, Any]:
+    """Main function to run the benchmark from the command line."""
+    args = _parse_args()
+    metrics = DriverMetrics()
+    results = {
+        "counter_inc": measure(metrics.frames_sent.inc, args.iterations, args.repeat),
+        "gauge_set": measure(lambda: metrics.connected.set(1), args.iterations, args.repeat),
+        "histogram_observe": measure(lambda: metrics.reply_latency.observe(0.012), args.iterations, args.repeat),
+        "metrics_per_command": measure(lambda: _record_command(metrics), args.iterations, args.repeat),
+    }
+
+    # The driver's own work for one command, metrics included, to put the figures above in proportion.
+    driver = STB8Driver(host="localhost")
+    driver._websocket = _NullWebSocket()
+
+    def command_path():
+        payload = driver._build_command(CommandType.SEND_KEY, key=KeyCode.OK)
+        # The null WebSocket never suspends, so the coroutine completes on its first step.
+        with contextlib.suppress(StopIteration):
+            driver.send_message(payload).send(None)
+        driver._parse_message(_REPLY)
+
+    results["driver_per_command"] = measure(command_path, args.iterations, args.repeat)
+
+    registry = MetricsRegistry()
+    for index in range(args.drivers):
+        DriverMetrics(registry, host=f"10.0.{index // 256}.{index % 256}", port="7682")
+    render_iterations = max(1, args.iterations // 10000)
+    results["render_prometheus"] = measure(registry.render_prometheus, render_iterations, args.repeat)
+    results["render_prometheus"]["bytes"] = len(registry.render_prometheus())
+
+    share = results["metrics_per_command"]["ns_per_op"] / results["driver_per_command"]["ns_per_op"]
+    for name, result in results.items():
+        print(f"{name:<22} {result['ns_per_op']:>12.0f} ns/op")
+    print(f"Metrics share of the per-command driver work: {100 * share:.1f} %")
+
+    report = {
+        "benchmark": "metrics",
+        "environment": environment(),
+        "parameters": {"iterations": args.iterations, "repeat": args.repeat, "drivers": args.drivers},
+        "results": {**results, "metrics_share_per_command": share},
+    }
+    write_report(report, args.json)
+    return report
+
+
+if __name__ == "__main__":
+    main()
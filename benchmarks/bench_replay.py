@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark of the traffic capture, its indexing and its replay.
+
+Writes a synthetic capture of `--frames` STB8 frames spread over `--boxes`
+boxes (or uses an existing one with `--capture`), then measures the recording
+rate, the time to memory-map and index the capture, the iteration rate and the
+Python memory it needs, and the rate at which the received frames can be
+replayed into a driver.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any
+from typing import Dict
+
+# Ensure the script can find the sfr_box_core and benchmarks modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks._common import add_output_argument  # noqa: E402
+from benchmarks._common import environment  # noqa: E402
+from benchmarks._common import write_report  # noqa: E402
+from sfr_tv_box_core.frame_log import FrameDirection  # noqa: E402
+from sfr_tv_box_core.stb8_driver import STB8Driver  # noqa: E402
+from sfr_tv_box_core.traffic_log import TrafficLog  # noqa: E402
+from sfr_tv_box_core.traffic_log import TrafficRecorder  # noqa: E402
+from sfr_tv_box_core.traffic_log import replay  # noqa: E402
+
+_COMMAND = '{"action":"buttonEvent","deviceId":"bench","requestId":1700000000000,"params":{"key":"ok"}}'
+_REPLY = '{"action":"buttonEvent","requestId":1700000000000,"remoteResponseCode":"OK","data":{}}'
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark of the traffic capture and replay.")
+    parser.add_argument("--capture", default=None, help="Benchmark an existing capture instead of a synthetic one.")
+    parser.add_argument("-f", "--frames", type=int, default=200000, help="Frames of the synthetic capture.")
+    parser.add_argument("--boxes", type=int, default=100, help="Boxes of the synthetic capture. Default is 100.")
+    add_output_argument(parser)
+    return parser.parse_args()
+
+
+def _write_capture(path: str, frames: int, boxes: int) -> Dict[str, float]:
+    """Writes a synthetic capture alternating commands and replies."""
+    names = [f"10.0.{index // 256}.{index % 256}:7682" for index in range(boxes)]
+    start = time.perf_counter()
+    with TrafficRecorder(path) as recorder:
+        for index in range(frames):
+            if index % 2:
+                recorder.record(names[index // 2 % boxes], FrameDirection.RECEIVED, _REPLY)
+            else:
+                recorder.record(names[index // 2 % boxes], FrameDirection.SENT, _COMMAND)
+    elapsed = time.perf_counter() - start
+    return {"frames_per_sec": frames / elapsed, "seconds": elapsed}
+
+
+async def _replay_into_driver(log: TrafficLog) -> Dict[str, float]:
+    """Replays every received frame into a driver as fast as possible."""
+    driver = STB8Driver(host="localhost")
+    start = time.perf_counter()
+    count = await replay(log.records(direction=FrameDirection.RECEIVED), driver.feed_message, speed=0)
+    elapsed = time.perf_counter() - start
+    return {"frames": count, "frames_per_sec": count / elapsed}
+
+
+def run(args: argparse.Namespace, path: str) -> Dict[str, Any]:
+    """Runs the benchmark on a capture and returns its results."""
+    results: Dict[str, Any] = {}
+    if args.capture is None:
+        results["record"] = _write_capture(path, args.frames, args.boxes)
+    size = os.path.getsize(path)
+
+    start = time.perf_counter()
+    log = TrafficLog(path)
+    index_seconds = time.perf_counter() - start
+    # Reopened, the capture reuses the index saved next to it.
+    log.close()
+    start = time.perf_counter()
+    log = TrafficLog(path)
+    reopen_seconds = time.perf_counter() - start
+    try:
+        results["index"] = {
+            "seconds": index_seconds,
+            "reopen_seconds": reopen_seconds,
+            "frames": len(log),
+            "boxes": len(log.boxes),
+        }
+        start = time.perf_counter()
+        count = sum(1 for _ in log.records())
+        elapsed = time.perf_counter() - start
+        # A second pass, as tracing allocations slows the iteration down.
+        tracemalloc.start()
+        for _ in log.records():
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results["iterate"] = {
+            "frames_per_sec": count / elapsed,
+            "megabytes_per_sec": size / elapsed / 1e6,
+            "python_peak_bytes": peak,
+        }
+        results["replay_into_driver"] = asyncio.run(_replay_into_driver(log))
+    finally:
+        log.close()
+    results["capture_bytes"] = size
+    return results
+
+
+def main() -> Dict[str, Any]:
+    """Main function to run the benchmark from the command line."""
+    args = _parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.capture or os.path.join(directory, "bench.sfrtraffic")
+        results = run(args, path)
+
+    if "record" in results:
+        print(f"Record:   {results['record']['frames_per_sec']:>12.0f} frames/s")
+    print(f"Index:    {results['index']['seconds'] * 1000:>12.1f} ms for {results['index']['frames']} frames")
+    print(f"          {results['index']['reopen_seconds'] * 1000:>12.1f} ms reopened with the saved index")
+    print(f"Iterate:  {results['iterate']['frames_per_sec']:>12.0f} frames/s")
+    print(f"          {results['iterate']['megabytes_per_sec']:>12.1f} MB/s")
+    print(f"          {results['iterate']['python_peak_bytes']:>12} bytes of Python memory at peak")
+    print(f"Replay:   {results['replay_into_driver']['frames_per_sec']:>12.0f} frames/s into a driver")
+    report = {
+        "benchmark": "replay",
+        "environment": environment(),
+        "parameters": {"capture": args.capture, "frames": args.frames, "boxes": args.boxes},
+        "results": results,
+    }
+    write_report(report, args.json)
+    return report
+
+
+if __name__ == "__main__":
+    main()
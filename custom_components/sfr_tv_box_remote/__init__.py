@@ -0,0 +1,53 @@
+"""The SFR TV Box Remote integration.
+
+Each config entry owns one `BoxCoordinator`, and so one WebSocket connection
+to its box, shared by the `media_player` and `remote` entities. The state of
+the box is pushed by its notifications (`local_push`): nothing is polled.
+"""
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.const import CONF_MODEL
+from homeassistant.const import CONF_PORT
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.const import Platform
+from homeassistant.core import Event
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+
+from sfr_tv_box_core.coordinator import BoxCoordinator
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+
+from .const import CONNECT_TIMEOUT
+from .const import MODELS
+
+PLATFORMS = [Platform.MEDIA_PLAYER, Platform.REMOTE]
+
+SFRBoxConfigEntry = ConfigEntry[BoxCoordinator]
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: SFRBoxConfigEntry) -> bool:
+    """Connects to the box and sets up its entities."""
+    driver = MODELS[entry.data[CONF_MODEL]](entry.data[CONF_HOST], entry.data[CONF_PORT])
+    coordinator = BoxCoordinator(driver)
+    try:
+        await coordinator.start(CONNECT_TIMEOUT)
+    except BoxUnavailableError as e:
+        await coordinator.stop()
+        raise ConfigEntryNotReady(str(e)) from e
+    entry.runtime_data = coordinator
+
+    async def _async_stop(event: Event) -> None:
+        await coordinator.stop()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop))
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    return True
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: SFRBoxConfigEntry) -> bool:
+    """Removes the entities of the box and closes its connection."""
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        await entry.runtime_data.stop()
+    return unloaded
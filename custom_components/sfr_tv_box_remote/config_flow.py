@@ -0,0 +1,140 @@
+"""Config flow of the SFR TV Box Remote integration.
+
+Boxes announced on mDNS are discovered through the zeroconf instance shared by
+Home Assistant, both by the `zeroconf` matchers of the manifest and by the
+scan that pre-fills the form of a box added by hand.
+
+Both flows identify a box by its mDNS service instance name (e.g.
+`STB8-aabbcc`), which survives DHCP renewals: a box added by hand is looked up
+by address among the announced boxes, so that its later announces update it
+instead of adding it twice. Only a box that does not announce itself, and so
+is never discovered, is identified by its address.
+"""
+
+import asyncio
+import logging
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import voluptuous as vol
+from homeassistant.components import zeroconf
+from homeassistant.config_entries import ConfigFlow
+from homeassistant.config_entries import ConfigFlowResult
+from homeassistant.const import CONF_HOST
+from homeassistant.const import CONF_MODEL
+from homeassistant.const import CONF_PORT
+from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
+
+from sfr_tv_box_core.constants import DEFAULT_WEBSOCKET_PORT
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.discovery import DiscoveredBox
+from sfr_tv_box_core.discovery import async_discover_boxes
+from sfr_tv_box_core.discovery import box_id_from_service_name
+from sfr_tv_box_core.discovery import model_from_service_name
+
+from .const import CONNECT_TIMEOUT
+from .const import DISCOVERY_TIMEOUT
+from .const import DOMAIN
+from .const import MODELS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def _async_can_connect(host: str, port: int, model: str) -> bool:
+    """Checks that the box answers a status request."""
+    driver = MODELS[model](host, port)
+    try:
+        await asyncio.wait_for(driver.start(), CONNECT_TIMEOUT)
+        await driver.send_request(CommandType.GET_STATUS)
+    except Exception as e:
+        _LOGGER.debug("Cannot reach the %s box at %s:%d: %s", model, host, port, e)
+        return False
+    finally:
+        await driver.stop()
+    return True
+
+
+class SFRTVBoxConfigFlow(ConfigFlow, domain=DOMAIN):
+    """Adds a box, by hand or from its mDNS announce."""
+
+    VERSION = 1
+
+    def __init__(self) -> None:
+        """Initializes the flow."""
+        self._discovered: Optional[DiscoveredBox] = None
+        self._scanned: Optional[List[DiscoveredBox]] = None
+
+    async def async_step_user(self, user_input: Optional[Dict[str, Any]] = None) -> ConfigFlowResult:
+        """Asks for the address and model of the box, pre-filled with a discovered one."""
+        errors: Dict[str, str] = {}
+        if user_input is not None:
+            host, port, model = user_input[CONF_HOST], user_input[CONF_PORT], user_input[CONF_MODEL]
+            await self.async_set_unique_id(await self._async_box_id(host, port))
+            self._abort_if_unique_id_configured(updates={CONF_HOST: host, CONF_PORT: port})
+            if await _async_can_connect(host, port, model):
+                return self.async_create_entry(title=f"{model} ({host})", data=user_input)
+            errors["base"] = "cannot_connect"
+            defaults = user_input
+        else:
+            defaults = {CONF_PORT: DEFAULT_WEBSOCKET_PORT, CONF_MODEL: "STB8"}
+            box = await self._async_find_new_box()
+            if box is not None:
+                defaults = {CONF_HOST: box.ip_address, CONF_PORT: box.port, CONF_MODEL: box.identifier}
+
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_HOST, default=defaults.get(CONF_HOST, vol.UNDEFINED)): str,
+                vol.Required(CONF_PORT, default=defaults[CONF_PORT]): int,
+                vol.Required(CONF_MODEL, default=defaults[CONF_MODEL]): vol.In(list(MODELS)),
+            }
+        )
+        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+
+    async def async_step_zeroconf(self, discovery_info: ZeroconfServiceInfo) -> ConfigFlowResult:
+        """Offers to add a box announced on mDNS."""
+        model = model_from_service_name(discovery_info.name)
+        if model is None:
+            return self.async_abort(reason="not_supported")
+        # The service name survives DHCP renewals: the address of a known box is updated.
+        box_id = box_id_from_service_name(discovery_info.name)
+        port = discovery_info.port or DEFAULT_WEBSOCKET_PORT
+        await self.async_set_unique_id(box_id)
+        self._abort_if_unique_id_configured(updates={CONF_HOST: discovery_info.host, CONF_PORT: port})
+        self._discovered = DiscoveredBox(model, discovery_info.host, port, f"{model} ({discovery_info.host})", box_id)
+        self.context["title_placeholders"] = {"name": self._discovered.name}
+        return await self.async_step_zeroconf_confirm()
+
+    async def async_step_zeroconf_confirm(self, user_input: Optional[Dict[str, Any]] = None) -> ConfigFlowResult:
+        """Asks the user to confirm the discovered box."""
+        box = self._discovered
+        assert box is not None
+        if user_input is None:
+            return self.async_show_form(step_id="zeroconf_confirm", description_placeholders={"name": box.name})
+        return self.async_create_entry(
+            title=box.name,
+            data={CONF_HOST: box.ip_address, CONF_PORT: box.port, CONF_MODEL: box.identifier},
+        )
+
+    async def _async_scan(self) -> List[DiscoveredBox]:
+        """Scans for the announced boxes once per flow, with the shared zeroconf instance."""
+        if self._scanned is None:
+            aiozc = await zeroconf.async_get_async_instance(self.hass)
+            self._scanned = await async_discover_boxes(DISCOVERY_TIMEOUT, aiozc=aiozc)
+        return self._scanned
+
+    async def _async_find_new_box(self) -> Optional[DiscoveredBox]:
+        """Finds an announced box that is not configured yet."""
+        configured = self._async_current_ids()
+        for box in await self._async_scan():
+            if box.identifier in MODELS and box.box_id not in configured:
+                return box
+        return None
+
+    async def _async_box_id(self, host: str, port: int) -> str:
+        """Identifies a box added by hand like its announces do, or by its address if it is not announced."""
+        for box in await self._async_scan():
+            if box.ip_address == host and box.box_id:
+                return box.box_id
+        return f"{host}:{port}"
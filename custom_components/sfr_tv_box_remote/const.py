@@ -0,0 +1,23 @@
+"""Constants of the SFR TV Box Remote integration."""
+
+from typing import Dict
+from typing import Type
+
+from sfr_tv_box_core.base_driver import BaseSFRBoxDriver
+from sfr_tv_box_core.labox_driver import LaBoxDriver
+from sfr_tv_box_core.stb7_driver import STB7Driver
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+DOMAIN = "sfr_tv_box_remote"
+
+# Drivers of the supported models, keyed like `discovery.MODEL_PREFIXES`.
+MODELS: Dict[str, Type[BaseSFRBoxDriver]] = {
+    "STB8": STB8Driver,
+    "STB7": STB7Driver,
+    "LABOX": LaBoxDriver,
+}
+
+# Seconds to wait for a box to connect before retrying the setup later.
+CONNECT_TIMEOUT = 10.0
+# Seconds of mDNS scan when the integration is added by hand.
+DISCOVERY_TIMEOUT = 3
@@ -0,0 +1,75 @@
+"""Base entity of the SFR TV Box Remote integration."""
+
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_MODEL
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity import Entity
+
+from sfr_tv_box_core.coordinator import BoxCoordinator
+
+from .const import DOMAIN
+
+
+def _software_version(versions: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Finds the software version in a `GET_VERSIONS` reply, whatever the case of its keys."""
+    for name, value in (versions or {}).items():
+        if name.lower() == "softwareversion":
+            return str(value)
+    return None
+
+
+class SFRBoxEntity(Entity):
+    """An entity of a box, updated by the pushes of its shared coordinator."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    # Distinguishes the unique IDs of the entities of one box.
+    _unique_id_suffix = ""
+
+    def __init__(self, coordinator: BoxCoordinator, entry: ConfigEntry) -> None:
+        """Initializes the entity.
+
+        Args:
+            coordinator: The coordinator of the box.
+            entry: The config entry of the box.
+        """
+        self.coordinator = coordinator
+        box_id = entry.unique_id or entry.entry_id
+        self._box_id = box_id
+        self._attr_unique_id = f"{box_id}_{self._unique_id_suffix}"
+        self._sw_version = _software_version(coordinator.state.versions)
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, box_id)},
+            manufacturer="SFR",
+            model=entry.data[CONF_MODEL],
+            name=entry.title,
+            sw_version=self._sw_version,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether the box is connected."""
+        return self.coordinator.available
+
+    async def async_added_to_hass(self) -> None:
+        """Writes the state of the entity whenever the coordinator pushes a change."""
+        self.async_on_remove(self.coordinator.add_listener(self._handle_coordinator_update))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Writes the state of the entity, and the software version of its box once updated."""
+        sw_version = _software_version(self.coordinator.state.versions)
+        if sw_version is not None and sw_version != self._sw_version:
+            # The device info is only read when the entity is registered: update the registry itself.
+            self._sw_version = sw_version
+            registry = dr.async_get(self.hass)
+            device = registry.async_get_device(identifiers={(DOMAIN, self._box_id)})
+            if device is not None and device.sw_version != sw_version:
+                registry.async_update_device(device.id, sw_version=sw_version)
+        self.async_write_ha_state()
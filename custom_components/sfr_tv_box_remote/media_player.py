@@ -0,0 +1,87 @@
+"""Media player entity of an SFR TV box."""
+
+from typing import Optional
+
+from homeassistant.components.media_player import MediaPlayerDeviceClass
+from homeassistant.components.media_player import MediaPlayerEntity
+from homeassistant.components.media_player import MediaPlayerEntityFeature
+from homeassistant.components.media_player import MediaPlayerState
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from sfr_tv_box_core.constants import KeyCode
+
+from . import SFRBoxConfigEntry
+from .entity import SFRBoxEntity
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: SFRBoxConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
+    """Adds the media player of the box."""
+    async_add_entities([SFRBoxMediaPlayer(entry.runtime_data, entry)])
+
+
+class SFRBoxMediaPlayer(SFRBoxEntity, MediaPlayerEntity):
+    """The box seen as a media player: power, volume, playback and channels."""
+
+    _attr_name = None
+    _attr_device_class = MediaPlayerDeviceClass.RECEIVER
+    _attr_supported_features = (
+        MediaPlayerEntityFeature.TURN_ON
+        | MediaPlayerEntityFeature.TURN_OFF
+        | MediaPlayerEntityFeature.VOLUME_STEP
+        | MediaPlayerEntityFeature.VOLUME_MUTE
+        | MediaPlayerEntityFeature.PLAY
+        | MediaPlayerEntityFeature.PAUSE
+        | MediaPlayerEntityFeature.STOP
+        | MediaPlayerEntityFeature.NEXT_TRACK
+        | MediaPlayerEntityFeature.PREVIOUS_TRACK
+    )
+    _unique_id_suffix = "media_player"
+
+    @property
+    def state(self) -> Optional[MediaPlayerState]:
+        """The power state last reported by the box."""
+        is_on = self.coordinator.is_on
+        if is_on is None:
+            return None
+        return MediaPlayerState.ON if is_on else MediaPlayerState.OFF
+
+    async def async_turn_on(self) -> None:
+        """Switches the box on."""
+        await self.coordinator.set_power(True)
+
+    async def async_turn_off(self) -> None:
+        """Switches the box off."""
+        await self.coordinator.set_power(False)
+
+    async def async_volume_up(self) -> None:
+        """Turns the volume up by one step."""
+        await self.coordinator.send_key(KeyCode.VOL_UP)
+
+    async def async_volume_down(self) -> None:
+        """Turns the volume down by one step."""
+        await self.coordinator.send_key(KeyCode.VOL_DOWN)
+
+    async def async_mute_volume(self, mute: bool) -> None:
+        """Toggles the sound: the box does not report whether it is muted."""
+        await self.coordinator.send_key(KeyCode.MUTE)
+
+    async def async_media_play(self) -> None:
+        """Resumes playback."""
+        await self.coordinator.send_key(KeyCode.PLAY_PAUSE)
+
+    async def async_media_pause(self) -> None:
+        """Pauses playback."""
+        await self.coordinator.send_key(KeyCode.PLAY_PAUSE)
+
+    async def async_media_stop(self) -> None:
+        """Stops playback."""
+        await self.coordinator.send_key(KeyCode.STOP)
+
+    async def async_media_next_track(self) -> None:
+        """Switches to the next channel."""
+        await self.coordinator.send_key(KeyCode.CHAN_UP)
+
+    async def async_media_previous_track(self) -> None:
+        """Switches to the previous channel."""
+        await self.coordinator.send_key(KeyCode.CHAN_DOWN)
@@ -0,0 +1,79 @@
+"""Remote entity of an SFR TV box, sending any key of the remote control."""
+
+import asyncio
+from typing import Any
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from homeassistant.components.remote import ATTR_DELAY_SECS
+from homeassistant.components.remote import ATTR_HOLD_SECS
+from homeassistant.components.remote import ATTR_NUM_REPEATS
+from homeassistant.components.remote import DEFAULT_DELAY_SECS
+from homeassistant.components.remote import DEFAULT_HOLD_SECS
+from homeassistant.components.remote import DEFAULT_NUM_REPEATS
+from homeassistant.components.remote import RemoteEntity
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from sfr_tv_box_core.constants import KeyCode
+
+from . import SFRBoxConfigEntry
+from .entity import SFRBoxEntity
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: SFRBoxConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
+    """Adds the remote of the box."""
+    async_add_entities([SFRBoxRemote(entry.runtime_data, entry)])
+
+
+def _parse_keys(commands: Iterable[str]) -> List[KeyCode]:
+    """Maps command names (`VOL_UP`, `ok`...) to keys.
+
+    Raises:
+        ServiceValidationError: If a name is not a key of the remote.
+    """
+    keys = []
+    for command in commands:
+        try:
+            keys.append(KeyCode[command.strip().upper()])
+        except KeyError:
+            known = ", ".join(KeyCode.__members__)
+            raise ServiceValidationError(f"Unknown key '{command}', expected one of: {known}.") from None
+    return keys
+
+
+class SFRBoxRemote(SFRBoxEntity, RemoteEntity):
+    """The remote control of the box."""
+
+    _attr_name = None
+    _unique_id_suffix = "remote"
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """Whether the box is on, as last reported by it."""
+        return self.coordinator.is_on
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Switches the box on."""
+        await self.coordinator.set_power(True)
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Switches the box off."""
+        await self.coordinator.set_power(False)
+
+    async def async_send_command(self, command: Iterable[str], **kwargs: Any) -> None:
+        """Sends keys to the box, holding them down when `hold_secs` is given."""
+        keys = _parse_keys(command)
+        num_repeats = kwargs.get(ATTR_NUM_REPEATS, DEFAULT_NUM_REPEATS)
+        delay = kwargs.get(ATTR_DELAY_SECS, DEFAULT_DELAY_SECS)
+        hold = kwargs.get(ATTR_HOLD_SECS, DEFAULT_HOLD_SECS)
+        for repeat in range(num_repeats):
+            for index, key in enumerate(keys):
+                if repeat or index:
+                    await asyncio.sleep(delay)
+                if hold:
+                    await self.coordinator.hold_key(key, hold)
+                else:
+                    await self.coordinator.send_key(key)
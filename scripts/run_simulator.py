@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""A command-line utility to serve simulated STB8 boxes on localhost."""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Ensure the script can find the sfr_box_core module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from sfr_tv_box_core.simulator import SimulatorFleet  # noqa: E402
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+_LOGGER = logging.getLogger(__name__)
+
+
+def _parse_args() -> argparse.Namespace:
+    """Parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Serve simulated SFR STB8 boxes on localhost.")
+    parser.add_argument("-n", "--count", type=int, default=1, help="Number of simulated boxes. Default is 1.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on. Default is 127.0.0.1.")
+    parser.add_argument(
+        "--base-port",
+        type=int,
+        default=0,
+        help="Port of the first box, the others follow it. Default picks free ports.",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="Reply latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random latency deviation in seconds.")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Probability of never answering a command.")
+    parser.add_argument("--ko-rate", type=float, default=0.0, help="Probability of answering a command with KO.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible runs.")
+    parser.add_argument("--echo-request-id", action="store_true", help="Copy the requestId of each command into its reply.")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to serve for. Default runs until interrupted.")
+    return parser.parse_args()
+
+
+async def main():
+    """Main function to run the simulated boxes."""
+    args = _parse_args()
+    fleet = SimulatorFleet(
+        args.count,
+        host=args.host,
+        base_port=args.base_port,
+        seed=args.seed,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop_rate=args.drop_rate,
+        ko_rate=args.ko_rate,
+        echo_request_id=args.echo_request_id,
+    )
+    await fleet.start()
+    try:
+        addresses = fleet.addresses
+        _LOGGER.info("Serving %d simulated STB8 boxes on %s.", len(addresses), args.host)
+        if len(addresses) == 1:
+            _LOGGER.info("  ws://%s:%d/ws", *addresses[0])
+        else:
+            _LOGGER.info("  Ports %d to %d.", addresses[0][1], addresses[-1][1])
+        if args.duration is None:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.sleep(args.duration)
+    finally:
+        await fleet.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        _LOGGER.info("Simulator stopped by user.")
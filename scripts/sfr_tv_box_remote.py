@@ -2,14 +2,25 @@
 
 This script provides a way to send single commands to a discovered box
 to test and control it from the command line.
+
+Several boxes can be targeted at once, by repeating `--ip` (or giving a
+comma-separated list), with `--ip-file` or with `--all` to use the boxes
+found by mDNS discovery. The command is then sent to all of them over
+parallel connections, at most `--workers` at a time, and one result line
+per box is printed followed by a summary.
 """
 
 import argparse
 import asyncio
 import logging
 import os
+import statistics
 import sys
+import time
 from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
 from typing import Type
 
 # Ensure the script can find the sfr_box_core module
@@ -18,6 +29,9 @@ from sfr_tv_box_core.base_driver import BaseSFRBoxDriver
 from sfr_tv_box_core.constants import DEFAULT_WEBSOCKET_PORT
 from sfr_tv_box_core.constants import CommandType
 from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.discovery import async_discover_boxes
+from sfr_tv_box_core.labox_driver import LaBoxDriver
+from sfr_tv_box_core.stb7_driver import STB7Driver
 from sfr_tv_box_core.stb8_driver import STB8Driver
 
 # Configure logging
@@ -25,18 +39,178 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 _LOGGER = logging.getLogger(__name__)
 
 # Map model strings to driver classes
-# For now, only STB8 is implemented.
 DRIVER_MAP: Dict[str, Type[BaseSFRBoxDriver]] = {
     "STB8": STB8Driver,
-    # "STB7": V7Driver, # To be added in Phase 2.3
-    # "LaBox": LaBoxDriver, # To be added in Phase 5
+    "STB7": STB7Driver,
+    "LaBox": LaBoxDriver,
 }
 
+DEFAULT_WORKERS = 16
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_DISCOVERY_TIMEOUT = 5
+
+
+class Target(NamedTuple):
+    """A box to send the command to."""
+
+    host: str
+    port: int
+    model: str
+
+    def __str__(self) -> str:
+        """Formats the target as `host:port`, or `[host]:port` for an IPv6 address."""
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"{host}:{self.port}"
+
+
+class BoxResult(NamedTuple):
+    """The outcome of the command on one box.
+
+    Attributes:
+        target: The box.
+        ok: Whether the box answered.
+        latency: Seconds between sending the command and its first answer, or
+            until the failure when there was none.
+        detail: The answer of the box, or the reason of the failure.
+    """
+
+    target: Target
+    ok: bool
+    latency: float
+    detail: str
+
+
+def _parse_address(address: str, default_port: int, model: str) -> Target:
+    """Parses `host`, `host:port`, `[IPv6]` or `[IPv6]:port` into a target.
+
+    A bare IPv6 address, with more than one `:`, has no port.
+
+    Raises:
+        ValueError: If a bracketed address is not closed, or followed by something else than a port.
+    """
+    address = address.strip()
+    if address.startswith("["):
+        host, bracket, rest = address[1:].partition("]")
+        if not bracket or (rest and not (rest.startswith(":") and rest[1:].isdigit())):
+            raise ValueError(f"Invalid address '{address}': expected [IPv6] or [IPv6]:port.")
+        return Target(host, int(rest[1:]) if rest else default_port, model)
+    host, separator, port = address.rpartition(":")
+    if separator and ":" not in host and port.isdigit():
+        return Target(host, int(port), model)
+    return Target(address, default_port, model)
+
+
+def _read_targets_file(path: str, default_port: int, model: str) -> List[Target]:
+    """Reads one `host[:port]` per line, ignoring blank lines and `#` comments."""
+    with open(path, encoding="utf-8") as file:
+        lines = [line.split("#", 1)[0].strip() for line in file]
+    return [_parse_address(line, default_port, model) for line in lines if line]
+
+
+def _driver_model(identifier: str) -> Optional[str]:
+    """Maps a discovered model identifier to its `DRIVER_MAP` key."""
+    return next((model for model in DRIVER_MAP if model.upper() == identifier.upper()), None)
 
-async def main() -> None:
-    """Main function to parse arguments and run a single command."""
+
+async def _resolve_targets(args: argparse.Namespace) -> List[Target]:
+    """Builds the de-duplicated list of boxes selected on the command line."""
+    if args.all:
+        targets = []
+        for box in await async_discover_boxes(timeout=args.discovery_timeout):
+            model = _driver_model(box.identifier)
+            if model is None:
+                _LOGGER.warning("Skipping %s: model '%s' is not supported.", box.name, box.identifier)
+                continue
+            targets.append(Target(box.ip_address, box.port, model))
+    elif args.ip_file:
+        targets = _read_targets_file(args.ip_file, args.port, args.model)
+    else:
+        targets = [
+            _parse_address(address, args.port, args.model)
+            for value in args.ip
+            for address in value.split(",")
+            if address.strip()
+        ]
+    return list(dict.fromkeys(targets))
+
+
+async def _run_on_box(target: Target, command_type: CommandType, command_params: Dict, timeout: float) -> BoxResult:
+    """Connects to one box, sends the command and waits for its first answer."""
+    driver = DRIVER_MAP[target.model](host=target.host, port=target.port)
+
+    # Use an asyncio.Future to wait for the first message
+    first_message_received = asyncio.get_running_loop().create_future()
+
+    def message_callback(message: str) -> None:
+        if not first_message_received.done():
+            first_message_received.set_result(message)
+
+    driver.set_message_callback(message_callback)
+
+    start = time.perf_counter()
+    try:
+        try:
+            # The driver retries failed connections forever, the CLI gives up after the timeout.
+            await asyncio.wait_for(driver.start(), timeout)
+        except asyncio.TimeoutError:
+            return BoxResult(target, False, time.perf_counter() - start, f"Could not connect within {timeout:g} s.")
+        _LOGGER.debug("Connected to %s.", target)
+        start = time.perf_counter()
+        await driver.send_command(command_type, **command_params)
+        response = await asyncio.wait_for(first_message_received, timeout)
+        return BoxResult(target, True, time.perf_counter() - start, response)
+    except asyncio.TimeoutError:
+        return BoxResult(target, False, time.perf_counter() - start, f"No response within {timeout:g} s.")
+    except Exception as e:
+        _LOGGER.debug("Command failed on %s.", target, exc_info=True)
+        return BoxResult(target, False, time.perf_counter() - start, str(e) or type(e).__name__)
+    finally:
+        await driver.stop()
+
+
+async def _run_on_boxes(
+    targets: List[Target], command_type: CommandType, command_params: Dict, timeout: float, workers: int
+) -> List[BoxResult]:
+    """Runs the command on every box, with at most `workers` connections at a time."""
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run(target: Target) -> BoxResult:
+        async with semaphore:
+            return await _run_on_box(target, command_type, command_params, timeout)
+
+    return await asyncio.gather(*(run(target) for target in targets))
+
+
+def _print_results(results: List[BoxResult], elapsed: float) -> None:
+    """Prints one line per box and a summary."""
+    width = max(len(str(result.target)) for result in results)
+    for result in results:
+        status = "OK" if result.ok else "FAILED"
+        print(f"{str(result.target):<{width}}  {status:<6}  {1000 * result.latency:>8.1f} ms  {result.detail}")
+    latencies = [result.latency for result in results if result.ok]
+    succeeded = len(latencies)
+    summary = f"{len(results)} boxes: {succeeded} succeeded, {len(results) - succeeded} failed"
+    if latencies:
+        summary += f", latency median {1000 * statistics.median(latencies):.1f} ms, max {1000 * max(latencies):.1f} ms"
+    print(f"{summary}, {elapsed:.2f} s in total.")
+
+
+async def main() -> int:
+    """Main function to parse arguments and run a command on one or several boxes.
+
+    Returns:
+        The exit status: 0 when every box answered, 1 otherwise.
+    """
     parser = argparse.ArgumentParser(prog="sfr_tv_box_remote.py", description="A CLI to control SFR TV boxes.")
-    parser.add_argument("--ip", required=True, help="IP address of the set-top box.")
+    targets_group = parser.add_mutually_exclusive_group(required=True)
+    targets_group.add_argument(
+        "--ip",
+        action="append",
+        help="IP address of the set-top box, as `host` or `host:port`. Repeat it or separate addresses with commas "
+        "to target several boxes.",
+    )
+    targets_group.add_argument("--ip-file", help="File listing one `host[:port]` per line ('#' starts a comment).")
+    targets_group.add_argument("--all", action="store_true", help="Target every box found by mDNS discovery.")
     parser.add_argument(
         "--port",
         type=int,
@@ -44,6 +218,24 @@ async def main() -> None:
         help=f"Port for the WebSocket connection (default: {DEFAULT_WEBSOCKET_PORT}).",
     )
     parser.add_argument("--model", choices=DRIVER_MAP.keys(), default="STB8", help="The model of the box (default: STB8).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Maximum number of boxes contacted at the same time (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Seconds to wait for the connection, then for the response, of each box (default: {DEFAULT_TIMEOUT:g}).",
+    )
+    parser.add_argument(
+        "--discovery-timeout",
+        type=int,
+        default=DEFAULT_DISCOVERY_TIMEOUT,
+        help=f"Seconds of mDNS scan with --all (default: {DEFAULT_DISCOVERY_TIMEOUT}).",
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True, help="The command to execute.")
 
@@ -59,49 +251,47 @@ async def main() -> None:
 
     args = parser.parse_args()
 
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
     driver_class = DRIVER_MAP.get(args.model)
     if not driver_class:
         _LOGGER.error("Model '%s' is not supported.", args.model)
-        return
-
-    driver = driver_class(host=args.ip, port=args.port)
-
-    # Use an asyncio.Future to wait for the first message
-    first_message_received = asyncio.Future()
-
-    def message_callback(message: str) -> None:
-        if not first_message_received.done():
-            first_message_received.set_result(message)
-
-    driver.set_message_callback(message_callback)
+        return 1
 
     try:
-        await driver.start()
-        _LOGGER.info("Successfully connected to %s.", args.ip)
+        targets = await _resolve_targets(args)
+    except ValueError as e:
+        _LOGGER.error("%s", e)
+        return 1
+    except OSError as e:
+        _LOGGER.error("Could not read the list of boxes: %s", e)
+        return 1
+    if not targets:
+        _LOGGER.error("No box to send the command to.")
+        return 1
 
-        command_params = {}
-        if args.command == CommandType.SEND_KEY.value:
-            command_params["key"] = KeyCode[args.key]
+    command_params = {}
+    if args.command == CommandType.SEND_KEY.value:
+        command_params["key"] = KeyCode[args.key]
 
-        _LOGGER.info("Sending command: %s with params: %s", args.command, command_params or "None")
-        await driver.send_command(CommandType(args.command), **command_params)
+    _LOGGER.info("Sending command: %s with params: %s to %d box(es)", args.command, command_params or "None", len(targets))
+    start = time.perf_counter()
+    results = await _run_on_boxes(targets, CommandType(args.command), command_params, args.timeout, args.workers)
 
-        _LOGGER.info("Waiting for response...")
-        response = await asyncio.wait_for(first_message_received, timeout=5.0)
-        _LOGGER.info("Received response:\n%s", response)
-
-    except asyncio.TimeoutError:
-        _LOGGER.error("Did not receive a response within the timeout period.")
-    except Exception as e:
-        _LOGGER.error("An error occurred: %s", e, exc_info=True)
-    finally:
-        if driver:
-            await driver.stop()
-            _LOGGER.info("Connection closed.")
+    if len(results) == 1:
+        result = results[0]
+        if result.ok:
+            _LOGGER.info("Received response:\n%s", result.detail)
+        else:
+            _LOGGER.error("No response from %s: %s", result.target, result.detail)
+    else:
+        _print_results(results, time.perf_counter() - start)
+    return 0 if all(result.ok for result in results) else 1
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        sys.exit(asyncio.run(main()))
     except KeyboardInterrupt:
         _LOGGER.info("\nCLI cancelled by user.")
@@ -1,18 +1,119 @@
 """Abstract Base Class for SFR Box drivers."""
 
 import asyncio
+import functools
+import itertools
 import logging
+import time
 from abc import ABC
 from abc import abstractmethod
+from collections import deque
+from typing import Any
 from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import FrozenSet
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
 import websockets
+from websockets.protocol import State
 
+from sfr_tv_box_core.circuit_breaker import BreakerState
+from sfr_tv_box_core.circuit_breaker import CircuitBreaker
+from sfr_tv_box_core.connection_policy import ConnectionPolicy
+from sfr_tv_box_core.constants import DEFAULT_REQUEST_TIMEOUT
 from sfr_tv_box_core.constants import DEFAULT_WEBSOCKET_PORT
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.constants import PowerState
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+from sfr_tv_box_core.frame_log import FrameDirection
+from sfr_tv_box_core.frame_log import FrameRing
+from sfr_tv_box_core.frame_log import LogSampler
+from sfr_tv_box_core.heartbeat import Heartbeat
+from sfr_tv_box_core.key_hold import DEFAULT_HOLD_RATE
+from sfr_tv_box_core.key_hold import KeyHold
+from sfr_tv_box_core.macros import CompiledMacro
+from sfr_tv_box_core.macros import MacroStep
+from sfr_tv_box_core.macros import compile_macro
+from sfr_tv_box_core.macros import sleep_until
+from sfr_tv_box_core.metrics import DriverMetrics
+from sfr_tv_box_core.metrics import MetricsRegistry
+from sfr_tv_box_core.metrics import payload_size
+from sfr_tv_box_core.notifications import DEFAULT_NOTIFICATION_BUFFER
+from sfr_tv_box_core.notifications import NotificationStream
+from sfr_tv_box_core.notifications import OverflowPolicy
+from sfr_tv_box_core.rate_limiter import AdaptiveRateLimiter
+from sfr_tv_box_core.send_queue import LaneStats
+from sfr_tv_box_core.send_queue import PrioritySendQueue
+from sfr_tv_box_core.send_queue import QueuedFrame
+from sfr_tv_box_core.send_queue import SendPriority
+from sfr_tv_box_core.send_queue import command_priority
+from sfr_tv_box_core.tracing import Span
+from sfr_tv_box_core.tracing import SpanStage
+from sfr_tv_box_core.traffic_log import TrafficRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
+# Sent commands remembered per reply action while their reply is awaited.
+_MAX_PENDING_REPLIES = 64
+# Seconds a fire-and-forget command waits for its acknowledgement before it is forgotten.
+_UNTRACKED_REPLY_TIMEOUT = DEFAULT_REQUEST_TIMEOUT
+
+
+class BoxResponse(NamedTuple):
+    """A reply or an unsolicited notification parsed from a box message.
+
+    Attributes:
+        action: The action the reply answers, or None for notifications.
+        success: False when the box answered with the "KO" response code.
+        data: The payload carried by the message.
+    """
+
+    action: Optional[str]
+    success: bool
+    data: Dict[str, Any]
+
+
+class BoxState(NamedTuple):
+    """The last known state of a box.
+
+    Attributes:
+        power: The power state last reported by the box, or None if unknown.
+        versions: The data of the last successful GET_VERSIONS reply, or None.
+        last_seen: The time (`time.time()`) the last message was received, or None.
+    """
+
+    power: Optional[PowerState] = None
+    versions: Optional[Dict[str, Any]] = None
+    last_seen: Optional[float] = None
+
+
+class _PendingRequest:
+    """A sent command waiting for its reply.
+
+    The future is only set when a caller awaits the reply; fire-and-forget
+    commands are tracked too so that their acknowledgement latency is measured,
+    and so that their acknowledgement is not taken for the reply of a later
+    request, until `_UNTRACKED_REPLY_TIMEOUT`. A command whose write failed is
+    not tracked.
+    """
+
+    __slots__ = ("future", "sent_at", "trace_id", "probe")
+
+    def __init__(self, future: Optional[asyncio.Future] = None, trace_id: int = 0, probe: bool = False):
+        self.future = future
+        self.sent_at = 0.0
+        self.trace_id = trace_id
+        # Heartbeat probes are not paced by the rate limiter, nor measured by it.
+        self.probe = probe
+
 
 class BaseSFRBoxDriver(ABC):
     """Abstract Base Class for SFR Box drivers.
@@ -21,8 +122,49 @@ class BaseSFRBoxDriver(ABC):
     reconnection with exponential backoff, and message sending/receiving.
     Specific box implementations (V8, V7, LaBox) will inherit from this class
     and implement the abstract methods for their specific protocols.
+
+    Replies are correlated with the requests that caused them by action name:
+    each driver declares, in `_REPLY_ACTIONS`, the action carried by the reply
+    to every `CommandType` it supports, and each reply goes to the oldest
+    command sent with that action, whether its caller awaits the reply or not.
+
+    Commands are paced by an `AdaptiveRateLimiter` fed with the measured
+    latency and outcome of these replies, and queued in priority lanes so that
+    urgent commands (power, stop, status) overtake bulk traffic.
+
+    A `CircuitBreaker` opens after repeated connection failures or unanswered
+    requests; while it is open, commands fail at once with `BoxUnavailableError`
+    and reconnection attempts are limited to scheduled half-open probes.
+
+    Frames, bytes, failures, connections and reply latencies are recorded in a
+    `DriverMetrics`, see `metrics` and `attach_metrics`. For per-command timings,
+    a trace hook set with `set_trace_hook` receives a `Span` per stage.
+
+    Frames are not logged one by one: the last ones are kept in a `FrameRing`,
+    dumped to the log on errors and disconnections, and per-frame DEBUG logs
+    are rate-limited.
+
+    Keys can be held down with `press`/`release` or `hold_key`: one task
+    repeats a pre-encoded frame at a steady rate, without ever queueing more
+    than one repeat.
+
+    A `Heartbeat` set with `set_heartbeat` probes a silent box, tracks the
+    round-trip time of its probes and drops a connection left half-open by
+    a box that stopped answering, so that it is reopened at once.
+
+    The last known power state and versions of the box, and when it was last
+    heard from, are kept up to date from its messages in `state`.
+    Notifications can be consumed with `async for` from a bounded
+    `notifications()` stream instead of a listener.
     """
 
+    # Maps each supported CommandType to the action name carried by its reply.
+    _REPLY_ACTIONS: Dict[CommandType, str] = {}
+    # Read-only queries: identical requests made while one is in flight share its reply.
+    _SINGLE_FLIGHT_COMMANDS: FrozenSet[CommandType] = frozenset({CommandType.GET_STATUS, CommandType.GET_VERSIONS})
+    # Queries whose successful reply is kept until the next connection.
+    _CACHED_COMMANDS: FrozenSet[CommandType] = frozenset({CommandType.GET_VERSIONS})
+
     def __init__(self, host: str, port: int = DEFAULT_WEBSOCKET_PORT):
         """Initializes the BaseSFRBoxDriver.
 
@@ -36,6 +178,35 @@ class BaseSFRBoxDriver(ABC):
         self._reconnect_task: Optional[asyncio.Task] = None
         self._message_callback: Optional[Callable[[str], None]] = None
         self._listeners = []  # Placeholder for message listeners
+        self._notification_listeners: List[Callable[[BoxResponse], None]] = []
+        self._connection_listeners: List[Callable[[], None]] = []
+        self._pending: Dict[str, Deque[_PendingRequest]] = {}
+        # The request answered by the message being handed to the listeners, if any.
+        self._resolved_request: Optional[_PendingRequest] = None
+        self._rate_limiter: Optional[AdaptiveRateLimiter] = AdaptiveRateLimiter()
+        self._send_queue = PrioritySendQueue()
+        self._sender_task: Optional[asyncio.Task] = None
+        self._breaker = CircuitBreaker(on_state_change=self._on_breaker_state_change)
+        self._metrics = DriverMetrics()
+        self._trace_hook: Optional[Callable[[Span], None]] = None
+        self._trace_ids = itertools.count(1)
+        self._frames = FrameRing()
+        self._frame_log_sampler = LogSampler()
+        # Rate-limits the per-message logs of subclasses.
+        self._message_log_sampler = LogSampler()
+        self._traffic_recorder: Optional[TrafficRecorder] = None
+        self._connection_policy: Optional[ConnectionPolicy] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._holds: Dict[KeyCode, KeyHold] = {}
+        self._in_flight: Dict[CommandType, asyncio.Task] = {}
+        self._reply_cache: Dict[CommandType, BoxResponse] = {}
+        self._power: Optional[PowerState] = None
+        self._versions: Optional[Dict[str, Any]] = None
+        self._last_seen: Optional[float] = None
+        self._heartbeat: Optional[Heartbeat] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # The macros compiled by this driver when they cannot be shared, see `_macro_cache_key`.
+        self._macro_cache: Optional[Dict[Tuple[str, Tuple[MacroStep, ...]], CompiledMacro]] = None
 
     @abstractmethod
     async def _handle_message(self, message: str) -> None:
@@ -48,23 +219,85 @@ class BaseSFRBoxDriver(ABC):
         """
         pass
 
+    @abstractmethod
+    def _build_command(self, command_type: CommandType, **kwargs: Any) -> Optional[str]:
+        """Builds the wire payload for an abstract command.
+
+        Implement this in subclasses for specific box protocols.
+
+        Args:
+            command_type: The abstract CommandType to build.
+            **kwargs: Parameters for the command.
+
+        Returns:
+            The serialized payload, or None if the command cannot be built.
+        """
+
+    def _parse_message(self, message: str) -> Optional[BoxResponse]:
+        """Parses an incoming message into a `BoxResponse`.
+
+        Subclasses override this to enable request correlation.
+
+        Args:
+            message (str): The received message string.
+
+        Returns:
+            The parsed response, or None if the message is not understood.
+        """
+        return None
+
+    def _power_state(self, response: BoxResponse) -> Optional[PowerState]:
+        """Extracts the power state reported by a reply or a notification.
+
+        Subclasses override this to track the power state of the box.
+
+        Args:
+            response: The parsed message.
+
+        Returns:
+            The power state, or None if the message does not report it.
+        """
+        return None
+
+    async def _open_websocket(self) -> None:
+        """Makes a single attempt at connecting to the SFR Box."""
+        uri = f"ws://{self._host}:{self._port}/ws"
+        _LOGGER.info("Attempting to connect to %s", uri)
+        try:
+            # The frames are small JSON objects: per-message deflate would cost tens of kilobytes
+            # of compression state per connection for next to no bandwidth saved.
+            self._websocket = await websockets.connect(uri, compression=None)
+        except Exception:
+            self._breaker.record_failure()
+            self._metrics.connect_failures.inc()
+            raise
+        _LOGGER.info("Successfully connected to %s", uri)
+        # The box may have been updated or replaced while disconnected.
+        self._reply_cache.clear()
+        self._breaker.record_success()
+        self._metrics.connections.inc()
+        self._metrics.connected.set(1)
+        if self._connection_policy is not None:
+            self._connection_policy.connection_opened(self)
+        self._start_heartbeat()
+        self._notify_connection_listeners()
+
     async def _connect(self) -> None:
         """Establishes a WebSocket connection to the SFR Box with exponential backoff."""
-        uri = f"ws://{self._host}:{self._port}/ws"
         retry_delay = 1
         while True:
             try:
-                _LOGGER.info("Attempting to connect to %s", uri)
-                self._websocket = await websockets.connect(uri)
-                _LOGGER.info("Successfully connected to %s", uri)
+                await self._open_websocket()
                 break
             except Exception as e:
+                # While the breaker is open, only retry when the half-open probe is due.
+                delay = self._breaker.retry_in or retry_delay
                 _LOGGER.error(
                     "Connection failed: %s. Retrying in %d s...",
                     e,
-                    retry_delay,
+                    delay,
                 )
-                await asyncio.sleep(retry_delay)
+                await asyncio.sleep(delay)
                 retry_delay = min(retry_delay * 2, 60)  # Exponential backoff, max 60s
 
     async def start(self) -> None:
@@ -74,12 +307,30 @@ class BaseSFRBoxDriver(ABC):
             self._reconnect_task = asyncio.create_task(self._listen_for_messages())
 
     async def stop(self) -> None:
-        """Closes the WebSocket connection and stops reconnection attempts."""
-        if self._websocket:
+        """Closes the WebSocket connection and stops reconnection attempts.
+
+        Queued commands and requests waiting for a reply fail with `BoxUnavailableError`.
+        """
+        for hold in list(self._holds.values()):
+            await hold.release()
+        self._holds.clear()
+        if self._heartbeat_task is not None and self._heartbeat_task is not asyncio.current_task():
+            self._heartbeat_task.cancel()
+        self._heartbeat_task = None
+        # Forgotten before closing, so that the listening task does not reconnect.
+        websocket, self._websocket = self._websocket, None
+        # Nothing sent over the closed connection will be answered.
+        self._fail_waiting(BoxUnavailableError(f"The connection to {self._host} was closed."))
+        if websocket:
             _LOGGER.info("Closing WebSocket connection.")
-            await self._websocket.close()
-            self._websocket = None
-        if self._reconnect_task:
+            await websocket.close()
+            self._metrics.connected.set(0)
+            self._notify_connection_listeners()
+        if self._connection_policy is not None:
+            self._connection_policy.connection_closed(self)
+        # When called from the listening task itself (to reconnect), the task is
+        # kept so that a later stop() can still cancel the reconnection.
+        if self._reconnect_task and self._reconnect_task is not asyncio.current_task():
             _LOGGER.info("Cancelling reconnection task.")
             self._reconnect_task.cancel()
             self._reconnect_task = None
@@ -89,15 +340,706 @@ class BaseSFRBoxDriver(ABC):
 
         Args:
             message (str): The message string to send.
+
+        Raises:
+            BoxUnavailableError: If no connection is open.
         """
-        if self._websocket:
-            _LOGGER.debug("Sending message: %s", message)
+        if self._websocket is None:
+            self._metrics.send_failures.inc()
+            raise BoxUnavailableError(f"Cannot send to {self._host}: the WebSocket is not connected.")
+        try:
             await self._websocket.send(message)
+        except Exception as e:
+            self._metrics.send_failures.inc()
+            self._frames.dump(_LOGGER, f"send failure ({e!r})")
+            raise
+        self._frames.record(FrameDirection.SENT, message)
+        if self._traffic_recorder is not None:
+            self._traffic_recorder.record(self._traffic_box, FrameDirection.SENT, message)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            self._log_frame(FrameDirection.SENT, message)
+        self._metrics.frames_sent.inc()
+        self._metrics.bytes_sent.inc(payload_size(message))
+
+    async def send_command(self, command_type: CommandType, priority: Optional[SendPriority] = None, **kwargs: Any) -> None:
+        """Send a command to the box without waiting for its reply.
+
+        Args:
+            command_type: The abstract CommandType to send.
+            priority: The lane to queue the command in, classified from the command by default.
+            **kwargs: Parameters for the command.
+        """
+        action = self._REPLY_ACTIONS.get(command_type)
+        if self._trace_hook is None:
+            payload, trace_id = self._build_command(command_type, **kwargs), 0
         else:
-            _LOGGER.warning("Cannot send message: WebSocket not connected.")
+            payload, trace_id = self._build_traced_command(command_type, action, kwargs)
+        if payload:
+            if priority is None:
+                priority = command_priority(command_type, kwargs.get("key"))
+            await self._send_payload(payload, action, priority=priority, trace_id=trace_id)
+
+    async def send_request(
+        self,
+        command_type: CommandType,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        priority: Optional[SendPriority] = None,
+        **kwargs: Any,
+    ) -> BoxResponse:
+        """Send a command to the box and wait for its reply.
+
+        Args:
+            command_type: The abstract CommandType to send.
+            timeout: The number of seconds to wait for the reply, queueing included.
+            priority: The lane to queue the command in, classified from the command by default.
+            **kwargs: Parameters for the command.
+
+        Read-only queries without parameters (`_SINGLE_FLIGHT_COMMANDS`) made
+        while an identical one is waiting for its reply do not send another
+        frame, they share that reply; `GET_VERSIONS` replies are also cached
+        until the next connection. See the `collapsed_requests` and
+        `cached_replies` metrics.
+
+        Returns:
+            The parsed reply of the box.
+
+        Raises:
+            ValueError: If the command is not supported by this driver.
+            asyncio.TimeoutError: If no reply arrives within the timeout.
+        """
+        if not kwargs and command_type in self._SINGLE_FLIGHT_COMMANDS:
+            return await self._single_flight_request(command_type, timeout, priority)
+        return await self._request(command_type, timeout, priority, kwargs)
+
+    async def _single_flight_request(
+        self, command_type: CommandType, timeout: float, priority: Optional[SendPriority]
+    ) -> BoxResponse:
+        """Answers a read-only query from the cache or an identical request in flight, if any."""
+        cached = self._reply_cache.get(command_type)
+        if cached is not None:
+            self._metrics.cached_replies.inc()
+            return cached
+        task = self._in_flight.get(command_type)
+        if task is None:
+            # A task of its own, so that the request survives the cancellation of its first caller.
+            task = self._in_flight[command_type] = asyncio.create_task(self._request(command_type, timeout, priority, {}))
+            task.add_done_callback(functools.partial(self._on_request_landed, command_type))
+            # The request itself enforces the timeout of its first caller.
+            return await asyncio.shield(task)
+        self._metrics.collapsed_requests.inc()
+        async with asyncio.timeout(timeout):
+            return await asyncio.shield(task)
+
+    def _on_request_landed(self, command_type: CommandType, task: asyncio.Task) -> None:
+        """Forgets a finished single-flight request, caching its reply when relevant."""
+        if self._in_flight.get(command_type) is task:
+            del self._in_flight[command_type]
+        if task.cancelled() or task.exception() is not None:
+            return
+        reply = task.result()
+        if reply.success and command_type in self._CACHED_COMMANDS:
+            self._reply_cache[command_type] = reply
+
+    async def _request(
+        self, command_type: CommandType, timeout: float, priority: Optional[SendPriority], kwargs: Dict[str, Any]
+    ) -> BoxResponse:
+        """Builds a request and waits for its reply, see `send_request`."""
+        action = self._REPLY_ACTIONS.get(command_type)
+        payload, trace_id = None, 0
+        if action and self._trace_hook is None:
+            payload = self._build_command(command_type, **kwargs)
+        elif action:
+            payload, trace_id = self._build_traced_command(command_type, action, kwargs)
+        if not payload:
+            raise ValueError(f"Cannot build a request for command type {command_type}.")
+        if priority is None:
+            priority = command_priority(command_type, kwargs.get("key"))
+        return await self._send_and_wait(payload, action, timeout, priority, trace_id)
+
+    def _build_traced_command(
+        self, command_type: CommandType, action: Optional[str], kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[str], int]:
+        """Builds a command under a new trace and emits its encoding span.
+
+        Returns:
+            The serialized payload, or None, and the trace ID of the command.
+        """
+        trace_id = next(self._trace_ids)
+        start = time.monotonic()
+        payload = self._build_command(command_type, **kwargs)
+        self._emit_span(trace_id, SpanStage.ENCODE, start, action)
+        return payload, trace_id
+
+    def _emit_span(self, trace_id: int, stage: SpanStage, start: float, action: Optional[str]) -> None:
+        """Calls the trace hook with a span ending now, never letting it break the driver."""
+        hook = self._trace_hook
+        if hook is None:
+            return
+        try:
+            hook(Span(trace_id, stage, start, time.monotonic(), action))
+        except Exception:
+            _LOGGER.exception("Trace hook failed.")
+
+    async def _send_payload(
+        self,
+        payload: str,
+        action: Optional[str],
+        pending: Optional[_PendingRequest] = None,
+        priority: SendPriority = SendPriority.BULK,
+        trace_id: int = 0,
+    ) -> None:
+        """Queues an already built payload and waits until it is written.
+
+        Args:
+            payload: The serialized command.
+            action: The action carried by the reply, if the command has one.
+            pending: The entry to track, when a caller awaits or routes the reply.
+            priority: The lane to queue the payload in.
+            trace_id: The trace of the command, 0 when it is not traced.
+        """
+        if not self._breaker.allow_request():
+            if self._breaker.probing:
+                raise BoxUnavailableError(f"{self._host} is unreachable, a probe is in flight.")
+            raise BoxUnavailableError(f"{self._host} is unreachable, retrying in {self._breaker.retry_in:.0f} s.")
+        if self._connection_policy is not None:
+            await self._connection_policy.before_send(self)
+        await self._enqueue(payload, action, pending, priority, trace_id)
+
+    async def _enqueue(
+        self, payload: str, action: Optional[str], pending: Optional[_PendingRequest], priority: SendPriority, trace_id: int = 0
+    ) -> None:
+        """Queues a payload, starting the sender task if needed, and waits until it is written."""
+        frame = QueuedFrame(payload, action, pending, asyncio.get_running_loop().create_future(), time.monotonic(), trace_id)
+        self._send_queue.put(frame, priority)
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.create_task(self._drain_send_queue())
+        await frame.sent
+
+    async def _send_probe(self, timeout: float) -> BoxResponse:
+        """Sends a `GET_STATUS` probe of the heartbeat and waits for its reply.
+
+        Probes take the urgent lane without waiting for a rate limiter token,
+        are sent whatever the state of the circuit breaker, and are never
+        collapsed with other status requests. Their reply closes the breaker
+        like any other; a missed probe is only counted by the heartbeat.
+
+        Raises:
+            ValueError: If the driver cannot build a status request.
+            asyncio.TimeoutError: If no reply arrives within the timeout.
+        """
+        action = self._REPLY_ACTIONS.get(CommandType.GET_STATUS)
+        payload = self._build_command(CommandType.GET_STATUS) if action else None
+        if not payload:
+            raise ValueError(f"{type(self).__name__} cannot probe the box with status requests.")
+        pending = _PendingRequest(asyncio.get_running_loop().create_future(), probe=True)
+        try:
+            async with asyncio.timeout(timeout):
+                await self._enqueue(payload, action, pending, SendPriority.URGENT)
+                return await pending.future
+        finally:
+            self._forget_pending(action, pending)
+
+    async def _drain_send_queue(self) -> None:
+        """Writes queued frames, lane by lane, until the queue is empty.
+
+        The task only lives while frames are waiting, so idle drivers hold none.
+        """
+        while len(self._send_queue):
+            item = self._send_queue.pop()
+            if item is None:
+                return
+            frame, priority = item
+            if frame.sent.done():
+                # The caller gave up (cancelled or timed out) before its turn: it costs no token.
+                continue
+            if self._rate_limiter and not (frame.pending is not None and frame.pending.probe):
+                await self._rate_limiter.acquire()
+                if frame.sent.done():
+                    continue
+            traced = frame.trace_id and self._trace_hook is not None
+            if traced:
+                self._emit_span(frame.trace_id, SpanStage.QUEUE, frame.enqueued_at, frame.action)
+            write_start = time.monotonic()
+            if frame.action:
+                # Tracked before the write, as the reply can arrive while `send_message` waits for the socket.
+                pending = frame.pending or _PendingRequest(trace_id=frame.trace_id)
+                pending.sent_at = write_start
+                waiters = self._pending.setdefault(frame.action, deque(maxlen=_MAX_PENDING_REPLIES))
+                waiters.append(pending)
+            try:
+                await self.send_message(frame.payload)
+            except Exception as e:
+                if frame.action:
+                    # The frame never reached the box: no reply is awaited, and its timeout says nothing about it.
+                    pending.sent_at = 0.0
+                    if pending in waiters:
+                        waiters.remove(pending)
+                if not frame.sent.done():
+                    frame.sent.set_exception(e)
+                continue
+            if traced:
+                self._emit_span(frame.trace_id, SpanStage.WRITE, write_start, frame.action)
+            self._send_queue.record_sent(priority, time.monotonic() - frame.enqueued_at)
+            if not frame.sent.done():
+                frame.sent.set_result(None)
+
+    async def _send_and_wait(
+        self,
+        payload: str,
+        action: str,
+        timeout: float,
+        priority: SendPriority = SendPriority.BULK,
+        trace_id: int = 0,
+    ) -> BoxResponse:
+        """Send an already built payload and wait for the reply carrying `action`."""
+        pending = _PendingRequest(asyncio.get_running_loop().create_future(), trace_id)
+        try:
+            async with asyncio.timeout(timeout):
+                await self._send_payload(payload, action, pending, priority, trace_id)
+                return await pending.future
+        except asyncio.TimeoutError:
+            self._metrics.request_timeouts.inc()
+            # A request that timed out in the send queue never reached the box: it says nothing about it.
+            if pending.sent_at:
+                if self._rate_limiter:
+                    self._rate_limiter.record_ack(timeout, success=False)
+                self._breaker.record_failure()
+            raise
+        finally:
+            self._forget_pending(action, pending)
+
+    def _forget_pending(self, action: str, pending: _PendingRequest) -> None:
+        """Stops tracking a request whose caller is done waiting."""
+        if not pending.future.done():
+            pending.future.cancel()
+        waiters = self._pending.get(action)
+        if waiters and pending in waiters:
+            waiters.remove(pending)
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """The breaker tracking the reachability of this box."""
+        return self._breaker
+
+    def _on_breaker_state_change(self, state: BreakerState) -> None:
+        """Fails everything waiting on the box as soon as the breaker opens."""
+        self._notify_connection_listeners()
+        if state is BreakerState.OPEN:
+            self._fail_waiting(BoxUnavailableError(f"{self._host} is unreachable."))
+
+    def _fail_waiting(self, error: Exception) -> None:
+        """Fails the queued frames and the requests waiting for a reply, which can no longer come."""
+        for frame in self._send_queue.clear():
+            if not frame.sent.done():
+                frame.sent.set_exception(error)
+        for waiters in self._pending.values():
+            for pending in waiters:
+                if pending.future is not None and not pending.future.done():
+                    pending.future.set_exception(error)
+            waiters.clear()
+
+    @property
+    def connection_policy(self) -> Optional[ConnectionPolicy]:
+        """The policy closing and reopening the connection of this driver, if any."""
+        return self._connection_policy
+
+    def set_connection_policy(self, policy: Optional[ConnectionPolicy]) -> None:
+        """Lets a policy close the connection when idle and reopen it on demand.
+
+        With a policy, a lost connection is no longer reopened at once but by
+        the next command.
+
+        Args:
+            policy: The policy, usually shared by a fleet of drivers, or None to keep the connection open.
+        """
+        if self._connection_policy is not None:
+            self._connection_policy.connection_closed(self)
+        self._connection_policy = policy
+        if policy is not None and self._websocket is not None:
+            policy.connection_opened(self)
+
+    async def _ensure_connected(self) -> None:
+        """Reopens the connection with a single attempt, shared by concurrent callers.
+
+        Raises:
+            BoxUnavailableError: If the box could not be reached.
+        """
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._websocket is not None:
+                return
+            try:
+                await self._open_websocket()
+            except Exception as e:
+                raise BoxUnavailableError(f"Cannot connect to {self._host}: {e}") from e
+            self._reconnect_task = asyncio.create_task(self._listen_for_messages())
+
+    def _is_busy(self) -> bool:
+        """Whether commands are queued, awaiting their reply or a key is held."""
+        if len(self._send_queue) or any(hold.active for hold in self._holds.values()):
+            return True
+        return any(
+            pending.future is not None and not pending.future.done()
+            for waiters in self._pending.values()
+            for pending in waiters
+        )
+
+    @property
+    def host(self) -> str:
+        """The hostname or IP address of the box."""
+        return self._host
+
+    @property
+    def port(self) -> int:
+        """The WebSocket port of the box."""
+        return self._port
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """The keyword arguments the driver was built with besides `host` and `port`, e.g. `device_id`.
+
+        Passing them back to the driver class recreates an equivalent driver.
+        """
+        return {}
+
+    @property
+    def connected(self) -> bool:
+        """Whether the WebSocket connection to the box is open."""
+        return self._websocket is not None
+
+    @property
+    def peer_address(self) -> Optional[str]:
+        """The IP address the connection is open to, None while disconnected."""
+        address = getattr(self._websocket, "remote_address", None)
+        return address[0] if isinstance(address, tuple) and address else None
+
+    @property
+    def available(self) -> bool:
+        """Whether commands can be sent: the connection is open and the circuit breaker is not."""
+        return self._websocket is not None and self._breaker.state is not BreakerState.OPEN
+
+    @property
+    def state(self) -> BoxState:
+        """The last known state of the box."""
+        return BoxState(self._power, self._versions, self._last_seen)
+
+    def restore_state(self, state: BoxState) -> None:
+        """Seeds the last known state, e.g. from a snapshot, until the box reports its own.
+
+        Args:
+            state: The state to start from.
+        """
+        self._power, self._versions, self._last_seen = state
+
+    def _update_state(self, response: BoxResponse) -> None:
+        """Records the power state or versions carried by a message."""
+        power = self._power_state(response)
+        if power is not None:
+            self._power = power
+        elif (
+            response.success
+            and response.action is not None
+            and response.action == self._REPLY_ACTIONS.get(CommandType.GET_VERSIONS)
+        ):
+            self._versions = response.data
+
+    @property
+    def metrics(self) -> DriverMetrics:
+        """The metrics recorded by this driver."""
+        return self._metrics
+
+    def attach_metrics(self, registry: MetricsRegistry, **labels: str) -> DriverMetrics:
+        """Records this driver's metrics into a shared registry from now on.
+
+        Args:
+            registry: The registry to record into.
+            **labels: Extra labels, added to the `host` and `port` of the box.
+
+        Returns:
+            The new metrics of this driver.
+        """
+        self._metrics.close()
+        self._metrics = DriverMetrics(registry, host=self._host, port=str(self._port), **labels)
+        self._metrics.connected.set(1 if self._websocket else 0)
+        return self._metrics
+
+    @property
+    def heartbeat(self) -> Optional[Heartbeat]:
+        """The heartbeat watching the connection, if any."""
+        return self._heartbeat
+
+    def set_heartbeat(self, heartbeat: Optional[Heartbeat]) -> None:
+        """Probes the box while it is silent, and reconnects as soon as it stops answering.
+
+        Without a heartbeat, a half-open connection is only noticed by the
+        keepalive of the WebSocket library.
+
+        Args:
+            heartbeat: The heartbeat of this box, or None to stop probing it.
+        """
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        self._heartbeat = heartbeat
+        self._start_heartbeat()
+
+    def _start_heartbeat(self) -> None:
+        """Starts watching the current connection with the heartbeat, if any."""
+        if self._heartbeat is not None and self._websocket is not None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat.run(self, self._websocket))
+
+    @property
+    def trace_hook(self) -> Optional[Callable[[Span], None]]:
+        """The hook receiving the timing spans of each command, if any."""
+        return self._trace_hook
+
+    def set_trace_hook(self, hook: Optional[Callable[[Span], None]]) -> None:
+        """Sets the hook receiving the timing spans of each command.
+
+        Args:
+            hook: Called with every `Span`, or None to stop tracing.
+        """
+        self._trace_hook = hook
+
+    @property
+    def lane_stats(self) -> Dict[SendPriority, LaneStats]:
+        """The queue wait statistics of each priority lane."""
+        return self._send_queue.stats
+
+    @property
+    def rate_limiter(self) -> Optional[AdaptiveRateLimiter]:
+        """The limiter pacing the commands sent to this box, if any."""
+        return self._rate_limiter
+
+    @property
+    def send_rate(self) -> Optional[float]:
+        """The current command rate allowed for this box, None when unlimited."""
+        return self._rate_limiter.rate if self._rate_limiter else None
+
+    def set_rate_limiter(self, rate_limiter: Optional[AdaptiveRateLimiter]) -> None:
+        """Replaces the limiter pacing the commands sent to this box.
+
+        Args:
+            rate_limiter: The new limiter, or None to send without pacing.
+        """
+        self._rate_limiter = rate_limiter
+
+    def _macro_cache_key(self) -> Optional[Hashable]:
+        """Identifies the drivers able to share compiled macros with this one.
+
+        Subclasses return a key derived from their model and device identity.
+        The base implementation returns None: the macros of the driver are
+        then cached by the driver itself, and never shared.
+        """
+        return None
+
+    def compile_macro(self, name: str, steps: Iterable[Union[MacroStep, KeyCode]]) -> CompiledMacro:
+        """Compile a key sequence into pre-serialized frames.
+
+        Args:
+            name: A name identifying the macro.
+            steps: The key presses, as `MacroStep`s or bare `KeyCode`s.
+
+        Returns:
+            The compiled macro, shared with drivers of the same model.
+        """
+        return compile_macro(self, name, steps)
+
+    async def play_macro(self, macro: CompiledMacro, ack_timeout: float = DEFAULT_REQUEST_TIMEOUT) -> List[BoxResponse]:
+        """Replay a compiled macro.
+
+        Inter-key delays are scheduled against absolute loop deadlines, anchored
+        on the acknowledgement when a step waits for one.
+
+        Args:
+            macro: A macro compiled by a driver of the same model.
+            ack_timeout: The number of seconds to wait for each acknowledgement.
+
+        Returns:
+            The replies of the steps that waited for an acknowledgement.
+        """
+        loop = asyncio.get_running_loop()
+        replies = []
+        next_at = loop.time()
+        for frame in macro.frames:
+            await sleep_until(next_at)
+            # Macro frames are pre-built, so their traces start in the queue.
+            trace_id = next(self._trace_ids) if self._trace_hook is not None else 0
+            if frame.wait_for_ack:
+                replies.append(await self._send_and_wait(frame.payload, frame.reply_action, ack_timeout, trace_id=trace_id))
+                next_at = loop.time()
+            else:
+                await self._send_payload(frame.payload, frame.reply_action, trace_id=trace_id)
+            next_at += frame.delay
+        return replies
+
+    def press(self, key: KeyCode, rate: float = DEFAULT_HOLD_RATE) -> KeyHold:
+        """Starts holding a key: sends it at once, then repeats it until `release`.
+
+        The frame is built once and repeated from a single task on a steady
+        grid; see `KeyHold`. The hold also ends on `stop()` or when a frame
+        cannot be sent, see `KeyHold.error`.
+
+        Args:
+            key: The key to hold.
+            rate: The repeats per second.
+
+        Returns:
+            The hold, or the current one if the key is already held.
+
+        Raises:
+            ValueError: If the driver cannot build the key or `rate` is not positive.
+        """
+        hold = self._holds.get(key)
+        if hold is not None and hold.active:
+            return hold
+        frame = self.compile_macro(f"hold {key.name}", [key]).frames[0]
+        hold = self._holds[key] = KeyHold(self, key, frame, rate, command_priority(CommandType.SEND_KEY, key))
+        return hold
+
+    async def release(self, key: KeyCode) -> None:
+        """Stops holding a key, without letting any pending repeat through.
+
+        Args:
+            key: The key held with `press`, nothing happens if it is not held.
+        """
+        hold = self._holds.pop(key, None)
+        if hold is not None:
+            await hold.release()
+
+    async def hold_key(self, key: KeyCode, duration: float, rate: float = DEFAULT_HOLD_RATE) -> int:
+        """Holds a key for a number of seconds.
+
+        Args:
+            key: The key to hold.
+            duration: Seconds between the press and the release.
+            rate: The repeats per second.
+
+        Returns:
+            The number of frames sent, the first press included.
+
+        Raises:
+            Exception: The error that stopped the repeats before `duration`.
+        """
+        hold = self.press(key, rate)
+        try:
+            await hold.wait(duration)
+        finally:
+            await self.release(key)
+        if hold.error is not None:
+            raise hold.error
+        return hold.frames_sent
+
+    def _resolve_request(self, response: BoxResponse) -> Optional[_PendingRequest]:
+        """Hands a reply to the oldest request waiting on its action.
+
+        Args:
+            response: The parsed reply.
+
+        Returns:
+            The resolved request, or None if no request was waiting.
+        """
+        waiters = self._pending.get(response.action) if response.action else None
+        if not waiters:
+            return None
+        now = time.monotonic()
+        while waiters:
+            # The box answers in order: the reply belongs to the oldest command sent, awaited or not.
+            pending = waiters.popleft()
+            if pending.future is None:
+                # The acknowledgement of a fire-and-forget command may have been lost: it is not waited for forever.
+                if now - pending.sent_at > _UNTRACKED_REPLY_TIMEOUT:
+                    continue
+            elif pending.future.done():
+                continue
+            latency = time.monotonic() - pending.sent_at
+            self._metrics.reply_latency.observe(latency)
+            if pending.trace_id and self._trace_hook is not None:
+                self._emit_span(pending.trace_id, SpanStage.ACK, pending.sent_at, response.action)
+            if self._rate_limiter and not pending.probe:
+                self._rate_limiter.record_ack(latency, response.success)
+            # Even a "KO" reply proves the box is reachable.
+            self._breaker.record_success()
+            if pending.future is not None:
+                pending.future.set_result(response)
+            return pending
+        return None
+
+    async def feed_message(self, message: Union[str, bytes]) -> None:
+        """Processes a message as if the box had just sent it.
+
+        This is what the listening loop does with every message; it is public so
+        that captured traffic can be replayed into a driver.
+
+        Args:
+            message: The received message.
+        """
+        # Assuming message is a string, which is common.
+        # If it can be bytes, add handling for that.
+        if not isinstance(message, str):
+            return
+        dispatch_start = time.monotonic() if self._trace_hook is not None else 0.0
+        self._last_seen = time.time()
+        response = self._parse_message(message)
+        resolved = None
+        if response is not None:
+            resolved = self._resolve_request(response)
+            self._update_state(response)
+        # Listeners, such as a gateway routing replies, can tell which request the message answered.
+        self._resolved_request = resolved
+        try:
+            for listener in self._listeners:
+                listener(message)
+        finally:
+            self._resolved_request = None
+        if self._notification_listeners and response is not None and response.action is None:
+            for listener in self._notification_listeners:
+                listener(response)
+        await self._handle_message(message)
+        if dispatch_start and self._trace_hook is not None:
+            # Unsolicited messages are dispatched under trace ID 0.
+            self._emit_span(
+                resolved.trace_id if resolved else 0,
+                SpanStage.DISPATCH,
+                dispatch_start,
+                response.action if response else None,
+            )
+
+    def attach_traffic_recorder(self, recorder: Optional[TrafficRecorder]) -> None:
+        """Captures every frame sent and received into a traffic log.
+
+        Args:
+            recorder: The capture to append to, labelled with `host:port`, or None to stop capturing.
+        """
+        self._traffic_recorder = recorder
+        self._traffic_box = f"{self._host}:{self._port}"
+
+    def _log_frame(self, direction: FrameDirection, message: Any) -> None:
+        """Logs a frame at DEBUG level, at most once per sampling interval."""
+        suppressed = self._frame_log_sampler.sample()
+        if suppressed is not None:
+            _LOGGER.debug("Frame %s %s (%d frames not logged since the last one)", direction, message, suppressed)
+
+    @property
+    def frame_trace(self) -> FrameRing:
+        """The last frames sent to and received from the box."""
+        return self._frames
+
+    def dump_frames(self, reason: str = "dump request", level: int = logging.INFO) -> None:
+        """Logs the last frames sent to and received from the box.
+
+        Args:
+            reason: Why the frames are dumped, included in the message.
+            level: The logging level of the message.
+        """
+        self._frames.dump(_LOGGER, reason, level)
 
     def register_listener(self, listener: Callable[[str], None]) -> None:
-        """Registers a listener for incoming messages."""
+        """Registers a listener for incoming messages.
+
+        Listeners are called once the message resolved the request it answers, if any.
+        """
         self._listeners.append(listener)
 
     def unregister_listener(self, listener: Callable[[str], None]) -> None:
@@ -105,6 +1047,67 @@ class BaseSFRBoxDriver(ABC):
         if listener in self._listeners:
             self._listeners.remove(listener)
 
+    def register_notification_listener(self, listener: Callable[[BoxResponse], None]) -> None:
+        """Registers a listener for the parsed unsolicited notifications of the box."""
+        self._notification_listeners.append(listener)
+
+    def unregister_notification_listener(self, listener: Callable[[BoxResponse], None]) -> None:
+        """Unregisters a notification listener."""
+        if listener in self._notification_listeners:
+            self._notification_listeners.remove(listener)
+
+    def register_connection_listener(self, listener: Callable[[], None]) -> None:
+        """Registers a callback called whenever `available` may have changed.
+
+        It is called without arguments when the connection opens or closes, and
+        when the circuit breaker changes state.
+        """
+        self._connection_listeners.append(listener)
+
+    def unregister_connection_listener(self, listener: Callable[[], None]) -> None:
+        """Unregisters a connection listener."""
+        if listener in self._connection_listeners:
+            self._connection_listeners.remove(listener)
+
+    def _notify_connection_listeners(self) -> None:
+        """Calls every connection listener; they run within the connection handling, which they must not break."""
+        for listener in list(self._connection_listeners):
+            try:
+                listener()
+            except Exception:
+                _LOGGER.exception("Error in a connection listener of %s", self._host)
+
+    def notifications(
+        self,
+        policy: OverflowPolicy = OverflowPolicy.LATEST_PER_KEY,
+        maxsize: int = DEFAULT_NOTIFICATION_BUFFER,
+        key: Optional[Callable[[BoxResponse], Hashable]] = None,
+    ) -> NotificationStream:
+        """Streams the unsolicited notifications of the box, for `async for`.
+
+        Example:
+            async with driver.notifications() as stream:
+                async for notification in stream:
+                    ...
+
+        Args:
+            policy: What the stream gives up when its consumer falls behind.
+            maxsize: The most notifications buffered.
+            key: With `LATEST_PER_KEY`, maps a notification to the state it
+                reports; defaults to the power state, then to the fields of the
+                notification.
+
+        Returns:
+            A stream receiving notifications until it is closed.
+        """
+        return NotificationStream(self, policy, maxsize, key)
+
+    def _notification_key(self, response: BoxResponse) -> Hashable:
+        """Identifies the state reported by a notification, for latest-wins coalescing."""
+        if self._power_state(response) is not None:
+            return "power"
+        return tuple(sorted(response.data))
+
     def set_message_callback(self, callback: Callable[[str], None]) -> None:
         """Sets a single callback for incoming messages, clearing previous listeners.
 
@@ -116,25 +1119,36 @@ class BaseSFRBoxDriver(ABC):
 
     async def _listen_for_messages(self) -> None:
         """Listens for incoming messages from the WebSocket."""
-        if not self._websocket:
+        websocket = self._websocket
+        if not websocket:
             return
 
         try:
-            async for message in self._websocket:
-                _LOGGER.debug("Received message: %s", message)
-                # Assuming message is a string, which is common.
-                # If it can be bytes, add handling for that.
-                if isinstance(message, str):
-                    for listener in self._listeners:
-                        listener(message)
-                    await self._handle_message(message)
+            async for message in websocket:
+                self._frames.record(FrameDirection.RECEIVED, message)
+                if self._traffic_recorder is not None:
+                    self._traffic_recorder.record(self._traffic_box, FrameDirection.RECEIVED, message)
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    self._log_frame(FrameDirection.RECEIVED, message)
+                self._metrics.frames_received.inc()
+                self._metrics.bytes_received.inc(payload_size(message))
+                await self.feed_message(message)
+            # The iteration ends quietly when the box closes the connection cleanly.
+            if websocket.state is State.CLOSED and self._websocket is websocket:
+                _LOGGER.info("WebSocket connection closed by the box. Attempting to reconnect...")
+                self._frames.dump(_LOGGER, "the box closed the connection", logging.INFO)
+                await self._reconnect()
         except websockets.exceptions.ConnectionClosed:
             _LOGGER.info("WebSocket connection closed. Attempting to reconnect...")
-            await self.stop()
-            await self.start()  # Trigger reconnection logic
+            self._frames.dump(_LOGGER, "the connection was lost", logging.INFO)
+            await self._reconnect()
         except Exception as e:
             _LOGGER.error("Error during message listening: %s", e)
-            await self.stop()
-            # Depending on the desired behavior, you might want to trigger
-            # reconnection here too.
+            self._frames.dump(_LOGGER, f"listening error ({e!r})")
+            await self._reconnect()
+
+    async def _reconnect(self) -> None:
+        """Replaces a failed connection, or leaves it to the next command under a connection policy."""
+        await self.stop()
+        if self._connection_policy is None:
             await self.start()
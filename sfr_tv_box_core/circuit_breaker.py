@@ -0,0 +1,137 @@
+"""Circuit breaker failing fast on unreachable boxes.
+
+After `failure_threshold` consecutive failures (connection attempts or
+requests left unanswered) the breaker opens: commands are rejected at once
+with `BoxUnavailableError` instead of waiting for their own timeouts. Once
+`reset_timeout` seconds have passed the breaker becomes half-open and lets a
+single probe through; a success closes it again, a failure re-opens it for
+another period. Other commands are rejected while the probe is in flight, and
+a probe left without an outcome for `reset_timeout` seconds (a fire-and-forget
+command whose acknowledgement was lost) hands its turn to the next command.
+
+When the breaker opened on connection failures, the reconnection loop of the
+driver is the probe. When it opened on unanswered requests over a connection
+that is still up, nothing is sent on its own: the first command after
+`reset_timeout` is the probe, and a `Heartbeat` in `STATUS` mode keeps
+probing an idle box.
+"""
+
+import logging
+import time
+from enum import StrEnum
+from typing import Callable
+from typing import Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class BreakerState(StrEnum):
+    """The states of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Tracks the health of one box."""
+
+    __slots__ = (
+        "_failure_threshold",
+        "_reset_timeout",
+        "_on_state_change",
+        "_state",
+        "_failures",
+        "_opened_at",
+        "_probe_sent_at",
+    )
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        on_state_change: Optional[Callable[[BreakerState], None]] = None,
+    ):
+        """Initializes a closed breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker.
+            reset_timeout: Seconds the breaker stays open before a probe is allowed.
+            on_state_change: Called with the new state on every transition.
+        """
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._on_state_change = on_state_change
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        # When the probe of the half-open breaker was let through, None while no probe is in flight.
+        self._probe_sent_at: Optional[float] = None
+
+    @property
+    def state(self) -> BreakerState:
+        """The current state, turning half-open once the reset timeout has elapsed."""
+        if self._state is BreakerState.OPEN and self.retry_in == 0.0:
+            self._set_state(BreakerState.HALF_OPEN)
+        return self._state
+
+    @property
+    def failures(self) -> int:
+        """The number of consecutive failures."""
+        return self._failures
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds left before the next probe is allowed, 0 unless the breaker is open."""
+        if self._state is not BreakerState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._reset_timeout - time.monotonic())
+
+    @property
+    def probing(self) -> bool:
+        """Whether the probe of the half-open breaker is in flight."""
+        return self._probe_sent_at is not None
+
+    def allow_request(self) -> bool:
+        """Whether a command may be sent to the box.
+
+        While half-open, only the first caller is allowed: it is the probe.
+        """
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.OPEN:
+            return False
+        now = time.monotonic()
+        if self._probe_sent_at is not None and now - self._probe_sent_at < self._reset_timeout:
+            return False
+        self._probe_sent_at = now
+        return True
+
+    def record_success(self) -> None:
+        """Accounts for a successful connection or reply."""
+        self._failures = 0
+        self._probe_sent_at = None
+        if self._state is not BreakerState.CLOSED:
+            self._set_state(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        """Accounts for a failed connection or an unanswered request."""
+        self._failures += 1
+        self._probe_sent_at = None
+        if self.state is BreakerState.HALF_OPEN or (
+            self._state is BreakerState.CLOSED and self._failures >= self._failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            self._set_state(BreakerState.OPEN)
+
+    def _set_state(self, state: BreakerState) -> None:
+        """Switches to a new state and notifies the observer."""
+        _LOGGER.info("Circuit breaker %s -> %s (%d consecutive failures)", self._state, state, self._failures)
+        self._state = state
+        self._probe_sent_at = None
+        if self._on_state_change:
+            self._on_state_change(state)
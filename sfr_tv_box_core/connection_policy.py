@@ -0,0 +1,140 @@
+"""Idle-connection reaping and an open-socket budget shared by many drivers.
+
+Holding a WebSocket open to every box forever costs file descriptors and
+box-side resources, while most boxes are idle most of the day. Drivers given a
+`ConnectionPolicy` (see `BaseSFRBoxDriver.set_connection_policy`) instead:
+
+- close their connection once no command was sent for `idle_timeout` seconds,
+- reconnect lazily, with a single attempt, when the next command is sent,
+- share a budget of `max_open` simultaneously open connections; opening one
+  more closes the least recently used idle connection.
+
+A connection is idle when no command has been sent on it: notifications
+received from the box do not keep it open, so drivers whose notifications
+matter should not use a policy. Connections with commands queued or awaiting
+their reply are never closed by the policy.
+
+Each command records a hit when its connection was open and a miss when it had
+to be reopened, and the time spent reopening is observed in a histogram.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from typing import Optional
+from typing import Set
+
+from .metrics import Histogram
+
+if TYPE_CHECKING:
+    from .base_driver import BaseSFRBoxDriver
+
+_LOGGER = logging.getLogger(__name__)
+
+# Shortest pause of the idle reaper between two scans, in seconds.
+_MIN_REAP_INTERVAL = 0.01
+
+
+class ConnectionPolicy:
+    """Closes idle driver connections and caps the number of open ones."""
+
+    def __init__(self, idle_timeout: Optional[float] = None, max_open: Optional[int] = None):
+        """Initializes the policy.
+
+        Args:
+            idle_timeout: Seconds without a command before a connection is closed, None to keep it open.
+            max_open: The maximum number of connections open at once among the drivers of the policy,
+                None for no limit.
+
+        Raises:
+            ValueError: If `max_open` is lower than 1.
+        """
+        if max_open is not None and max_open < 1:
+            raise ValueError("max_open must be at least 1.")
+        self.idle_timeout = idle_timeout
+        self.max_open = max_open
+        # Open connections, least recently used first, with the time of their last command.
+        self._open: "OrderedDict[BaseSFRBoxDriver, float]" = OrderedDict()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.idle_closes = 0
+        self.reconnect_latency = Histogram()
+
+    @property
+    def open_count(self) -> int:
+        """The number of connections currently open."""
+        return len(self._open)
+
+    @property
+    def hit_ratio(self) -> float:
+        """The share of commands sent on an already open connection."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    async def before_send(self, driver: "BaseSFRBoxDriver") -> None:
+        """Reopens the connection of a driver if needed and marks it as used.
+
+        Called by the driver before queueing every command.
+
+        Raises:
+            BoxUnavailableError: If the connection could not be reopened.
+        """
+        if driver._websocket is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            start = time.monotonic()
+            await driver._ensure_connected()
+            self.reconnect_latency.observe(time.monotonic() - start)
+        if driver in self._open:
+            self._open[driver] = time.monotonic()
+            self._open.move_to_end(driver)
+
+    def connection_opened(self, driver: "BaseSFRBoxDriver") -> None:
+        """Tracks a new connection, closing the least recently used ones beyond the budget."""
+        self._open[driver] = time.monotonic()
+        self._open.move_to_end(driver)
+        if self.max_open is not None and len(self._open) > self.max_open:
+            for candidate in list(self._open):
+                if len(self._open) <= self.max_open:
+                    break
+                if candidate is not driver and not candidate._is_busy():
+                    self.evictions += 1
+                    self._close(candidate)
+        if self.idle_timeout is not None and (self._reaper is None or self._reaper.done()):
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    def connection_closed(self, driver: "BaseSFRBoxDriver") -> None:
+        """Stops tracking a connection."""
+        self._open.pop(driver, None)
+
+    def _close(self, driver: "BaseSFRBoxDriver") -> None:
+        """Forgets a connection at once and closes it in the background."""
+        del self._open[driver]
+        task = asyncio.create_task(driver.stop())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _reap_idle(self) -> None:
+        """Closes the connections idle for too long, while any is open."""
+        while self._open:
+            now = time.monotonic()
+            next_check = now + self.idle_timeout
+            for driver, last_used in list(self._open.items()):
+                if now - last_used < self.idle_timeout:
+                    # Least recently used first: the others are younger still.
+                    next_check = last_used + self.idle_timeout
+                    break
+                if driver._is_busy():
+                    self._open[driver] = now
+                    self._open.move_to_end(driver)
+                    continue
+                _LOGGER.debug("Closing the connection to %s, idle for %.0f s.", driver._host, now - last_used)
+                self.idle_closes += 1
+                self._close(driver)
+            await asyncio.sleep(max(next_check - time.monotonic(), _MIN_REAP_INTERVAL))
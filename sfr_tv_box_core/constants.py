@@ -4,6 +4,9 @@ from enum import StrEnum
 
 DEFAULT_WEBSOCKET_PORT = 7682
 
+# Seconds to wait for the reply to a request before giving up.
+DEFAULT_REQUEST_TIMEOUT = 5.0
+
 
 class CommandType(StrEnum):
     """Abstract CommandType names.
@@ -69,3 +72,10 @@ class KeyCode(StrEnum):
     # Other
     DELETE = "DELETE"
     OPTIONS = "OPTIONS"
+
+
+class PowerState(StrEnum):
+    """Power state of a box, as last reported by the box itself."""
+
+    ON = "on"
+    OFF = "off"
@@ -0,0 +1,191 @@
+"""One shared driver and state per box, pushed to any number of consumers.
+
+Home Assistant exposes a box as several entities (`media_player`, `remote`),
+and each of them opening its own connection, or polling the box for its
+state, would waste the few control connections a box accepts. A
+`BoxCoordinator` owns the only driver of a box: it connects it, queries the
+state of the box once, then follows its notifications and calls its listeners
+whenever the state changes, and whenever the box becomes available or
+unavailable (connection lost or reopened, circuit breaker opened or closed).
+Consumers read `state` and send their commands through the coordinator; none
+of them ever polls.
+
+The coordinator does not depend on Home Assistant, so it is exercised against
+the local simulator like the rest of the library.
+"""
+
+import asyncio
+import logging
+from typing import Callable
+from typing import List
+from typing import Optional
+
+from .base_driver import BaseSFRBoxDriver
+from .base_driver import BoxState
+from .constants import DEFAULT_REQUEST_TIMEOUT
+from .constants import CommandType
+from .constants import KeyCode
+from .constants import PowerState
+from .exceptions import BoxUnavailableError
+from .notifications import OverflowPolicy
+from .state_snapshot import reconcile
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for the first connection to the box.
+DEFAULT_COORDINATOR_CONNECT_TIMEOUT = 10.0
+
+
+class BoxCoordinator:
+    """Shares the driver of one box and pushes its state to listeners."""
+
+    def __init__(self, driver: BaseSFRBoxDriver, request_timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        """Initializes the coordinator; call `start` to connect.
+
+        Args:
+            driver: The driver of the box, owned by the coordinator from now on.
+            request_timeout: Seconds to wait for the replies of the box.
+        """
+        self._driver = driver
+        self._request_timeout = request_timeout
+        self._listeners: List[Callable[[], None]] = []
+        self._notification_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Whether the driver was connected when last seen, to tell reconnections apart.
+        self._connected = False
+
+    @property
+    def driver(self) -> BaseSFRBoxDriver:
+        """The driver of the box."""
+        return self._driver
+
+    @property
+    def state(self) -> BoxState:
+        """The last known state of the box."""
+        return self._driver.state
+
+    @property
+    def available(self) -> bool:
+        """Whether the box is connected and its circuit breaker closed."""
+        return self._driver.available
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """Whether the box is on, or None while its power state is unknown."""
+        power = self._driver.state.power
+        return None if power is None else power == PowerState.ON
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Registers a callback called whenever the state or availability of the box may have changed.
+
+        Args:
+            listener: The callback, called without arguments.
+
+        Returns:
+            A function unregistering the listener.
+        """
+        self._listeners.append(listener)
+
+        def remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return remove
+
+    async def start(self, connect_timeout: float = DEFAULT_COORDINATOR_CONNECT_TIMEOUT) -> None:
+        """Connects to the box, fetches its state and starts following its notifications.
+
+        Args:
+            connect_timeout: Seconds to wait for the connection.
+
+        Raises:
+            BoxUnavailableError: If the box could not be reached in time.
+        """
+        try:
+            await asyncio.wait_for(self._driver.start(), connect_timeout)
+        except asyncio.TimeoutError as e:
+            raise BoxUnavailableError(
+                f"Cannot connect to {self._driver.host}:{self._driver.port} within {connect_timeout:g} s."
+            ) from e
+        self._connected = self._driver.connected
+        self._driver.register_connection_listener(self._on_connection_change)
+        self._notification_task = asyncio.create_task(self._follow_notifications())
+        await self.refresh()
+
+    async def stop(self) -> None:
+        """Stops following the box and closes its connection."""
+        self._driver.unregister_connection_listener(self._on_connection_change)
+        for task in (self._notification_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.wait([task])
+        self._notification_task = self._refresh_task = None
+        await self._driver.stop()
+        self._notify()
+
+    async def refresh(self) -> None:
+        """Queries the power state and versions of the box, then notifies the listeners."""
+        await reconcile([self._driver], self._request_timeout)
+        self._notify()
+
+    async def send_key(self, key: KeyCode) -> None:
+        """Sends a key press to the box and waits for its acknowledgement.
+
+        Args:
+            key: The key to press.
+        """
+        await self._driver.send_request(CommandType.SEND_KEY, timeout=self._request_timeout, key=key)
+
+    async def hold_key(self, key: KeyCode, duration: float) -> None:
+        """Holds a key down on the box.
+
+        Args:
+            key: The key to hold.
+            duration: Seconds to hold it for.
+        """
+        await self._driver.hold_key(key, duration)
+
+    async def set_power(self, on: bool) -> None:
+        """Switches the box on or off, unless it already is.
+
+        The box only has a power toggle key, so nothing is sent while its
+        power state is unknown or already the requested one.
+
+        Args:
+            on: Whether the box should be on.
+        """
+        if self.is_on is None or self.is_on == on:
+            return
+        await self.send_key(KeyCode.POWER)
+        # Power changes are notified by some models only: ask for the new state.
+        await self.refresh()
+
+    async def _follow_notifications(self) -> None:
+        """Notifies the listeners of every state change pushed by the box."""
+        async with self._driver.notifications(OverflowPolicy.LATEST_PER_KEY) as stream:
+            async for _ in stream:
+                self._notify()
+
+    def _on_connection_change(self) -> None:
+        """Notifies the listeners of a change of availability, refreshing the state after a reconnection."""
+        reconnected = self._driver.connected and not self._connected
+        self._connected = self._driver.connected
+        self._notify()
+        if reconnected and self._refresh_task is None:
+            # The box may have changed while disconnected, without notifying it.
+            self._refresh_task = asyncio.create_task(self._refresh_after_reconnection())
+
+    async def _refresh_after_reconnection(self) -> None:
+        """Refreshes the state once the connection is back."""
+        try:
+            await self.refresh()
+        finally:
+            self._refresh_task = None
+
+    def _notify(self) -> None:
+        """Calls every listener."""
+        for listener in list(self._listeners):
+            try:
+                listener()
+            except Exception:
+                _LOGGER.exception("Error in a state listener of %s", self._driver.host)
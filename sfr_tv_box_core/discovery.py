@@ -25,6 +25,36 @@ MODEL_PREFIXES = {
 }
 
 
+def model_from_service_name(name: str) -> Optional[str]:
+    """Determines the box model from an mDNS service instance name.
+
+    Args:
+        name: The service instance name, e.g. `STB8-aabbcc._ws._tcp.local.`.
+
+    Returns:
+        The key of the model in `MODEL_PREFIXES`, or None for other services.
+    """
+    for model, prefix in MODEL_PREFIXES.items():
+        if name.startswith(prefix):
+            return model
+    return None
+
+
+def box_id_from_service_name(name: str) -> str:
+    """Extracts the stable identifier of a box from its mDNS service instance name.
+
+    The instance name is set by the box itself and survives DHCP renewals,
+    unlike its address.
+
+    Args:
+        name: The service instance name, e.g. `STB8-aabbcc._ws._tcp.local.`.
+
+    Returns:
+        The instance label, e.g. `STB8-aabbcc`.
+    """
+    return name.split(".", 1)[0]
+
+
 class DiscoveredBox(NamedTuple):
     """Represents a discovered SFR Box."""
 
@@ -32,6 +62,8 @@ class DiscoveredBox(NamedTuple):
     ip_address: str
     port: int
     name: str
+    # The stable identifier of the box, see `box_id_from_service_name`; empty if not discovered on mDNS.
+    box_id: str = ""
 
 
 class _DiscoveryListener:
@@ -66,7 +98,7 @@ class _DiscoveryListener:
         if not info or not info.server:
             return
 
-        model = self._get_model_from_name(name)
+        model = model_from_service_name(name)
         if not model:
             _LOGGER.debug("Ignoring service '%s' with unknown model", name)
             return
@@ -90,26 +122,25 @@ class _DiscoveryListener:
             ip_address=ip_address,
             port=port,
             name=friendly_name,
+            box_id=box_id_from_service_name(name),
         )
 
-    def _get_model_from_name(self, name: str) -> Optional[str]:
-        """Determine box model from the mDNS service instance name."""
-        for model, prefix in MODEL_PREFIXES.items():
-            if name.startswith(prefix):
-                return model
-        return None
-
 
-async def async_discover_boxes(timeout: int = 5) -> List[DiscoveredBox]:
+async def async_discover_boxes(timeout: int = 5, aiozc: Optional[AsyncZeroconf] = None) -> List[DiscoveredBox]:
     """Scan the network for SFR boxes using mDNS.
 
     Args:
         timeout: The number of seconds to scan for.
+        aiozc: A shared zeroconf instance to browse with, e.g. the one of Home
+            Assistant. It is left open; by default a private instance is opened
+            and closed around the scan.
 
     Returns:
         A list of DiscoveredBox objects.
     """
-    aiozc = AsyncZeroconf()
+    shared = aiozc is not None
+    if aiozc is None:
+        aiozc = AsyncZeroconf()
     listener = _DiscoveryListener()
     browser = AsyncServiceBrowser(aiozc.zeroconf, SERVICE_TYPE, listener=listener)
 
@@ -117,7 +148,8 @@ async def async_discover_boxes(timeout: int = 5) -> List[DiscoveredBox]:
     await asyncio.sleep(timeout)
 
     await browser.async_cancel()
-    await aiozc.async_close()
+    if not shared:
+        await aiozc.async_close()
 
     _LOGGER.info("mDNS scan finished. Found %d boxes.", len(listener.discovered_boxes))
     return list(listener.discovered_boxes.values())
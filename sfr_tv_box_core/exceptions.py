@@ -0,0 +1,9 @@
+"""Exceptions raised by the sfr-box-remote library."""
+
+
+class SFRBoxError(Exception):
+    """Base class for the errors raised by the library."""
+
+
+class BoxUnavailableError(SFRBoxError):
+    """Raised without touching the network while a box is considered unreachable."""
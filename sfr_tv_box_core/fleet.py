@@ -0,0 +1,471 @@
+"""Multi-process runner sharding a fleet of boxes across worker processes.
+
+One event loop driving thousands of boxes saturates a single core on JSON
+decoding and listener work. A `FleetRunner` shards the boxes across a pool of
+worker processes, each running its own event loop and drivers, and exposes a
+coordinator API in the calling process: commands and requests are routed to
+the worker owning the box, and the unsolicited notifications of every box are
+merged into one stream.
+
+Boxes are assigned to workers by rendezvous hashing of their name, so the
+assignment does not depend on the order the boxes are given in, and resizing
+the pool only moves the boxes of the added or removed workers.
+
+Workers are spawned, not forked, so the box specifications, command arguments
+and replies crossing the process boundary must be picklable. Pickling and
+writing them to a pipe can block on large messages or a slow reader, so each
+end of a pipe is written to from its own writer thread, never from an event
+loop; a reader thread per pipe hands the messages over to the loop.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Type
+from typing import Union
+
+from .base_driver import BaseSFRBoxDriver
+from .base_driver import BoxResponse
+from .constants import DEFAULT_REQUEST_TIMEOUT
+from .constants import DEFAULT_WEBSOCKET_PORT
+from .constants import CommandType
+from .exceptions import BoxUnavailableError
+from .stb8_driver import STB8Driver
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a worker waits for its boxes to connect before reporting ready.
+DEFAULT_CONNECT_TIMEOUT = 10.0
+# Notifications buffered for the consumer of the merged stream before the oldest are dropped.
+DEFAULT_NOTIFICATION_QUEUE_SIZE = 10000
+# Seconds granted to a worker to shut down before it is killed.
+_WORKER_STOP_TIMEOUT = 10.0
+# Seconds a stopping worker waits for the operations in flight to report their outcome.
+_OPERATIONS_STOP_TIMEOUT = _WORKER_STOP_TIMEOUT / 2
+
+
+def _pipe_writer(name: str) -> concurrent.futures.ThreadPoolExecutor:
+    """Creates the thread writing to one end of a pipe, in submission order."""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+
+def _post(loop: asyncio.AbstractEventLoop, callback: Callable[..., Any], *args: Any) -> bool:
+    """Schedules a callback on a loop from another thread, returning False if the loop is closed."""
+    try:
+        loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+        return False
+    return True
+
+
+class BoxSpec(NamedTuple):
+    """How a worker creates the driver of a box.
+
+    Attributes:
+        name: The name the box is addressed by, unique in the fleet.
+        host: The hostname or IP address of the box.
+        port: The WebSocket port of the box.
+        driver_class: The driver of the box's model.
+        options: Extra keyword arguments of the driver, e.g. `device_id`.
+    """
+
+    name: str
+    host: str
+    port: int = DEFAULT_WEBSOCKET_PORT
+    driver_class: Type[BaseSFRBoxDriver] = STB8Driver
+    options: Optional[Dict[str, Any]] = None
+
+
+class FleetNotification(NamedTuple):
+    """An unsolicited notification of a box of the fleet.
+
+    Attributes:
+        box: The name of the box.
+        data: The payload of the notification.
+    """
+
+    box: str
+    data: Dict[str, Any]
+
+
+def shard_for(name: str, workers: int) -> int:
+    """Assigns a box to a worker by rendezvous hashing.
+
+    Args:
+        name: The name of the box.
+        workers: The number of workers.
+
+    Returns:
+        The index of the worker owning the box.
+    """
+    key = name.encode()
+    return max(
+        range(workers),
+        key=lambda worker: hashlib.blake2b(key, digest_size=8, salt=worker.to_bytes(8, "little")).digest(),
+    )
+
+
+class FleetRunner:
+    """Drives a fleet of boxes from a pool of worker processes."""
+
+    def __init__(
+        self,
+        boxes: Iterable[BoxSpec],
+        workers: Optional[int] = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        notification_queue_size: int = DEFAULT_NOTIFICATION_QUEUE_SIZE,
+    ):
+        """Initializes the runner and shards the boxes.
+
+        Args:
+            boxes: The boxes of the fleet.
+            workers: The number of worker processes, one per CPU by default.
+            connect_timeout: The number of seconds `start` waits for the boxes to connect;
+                the ones still unreachable keep retrying in the background.
+            notification_queue_size: The number of notifications buffered for `notifications`.
+
+        Raises:
+            ValueError: If two boxes have the same name.
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._connect_timeout = connect_timeout
+        self._shards: List[List[BoxSpec]] = [[] for _ in range(self._workers)]
+        self._owners: Dict[str, int] = {}
+        for spec in boxes:
+            if spec.name in self._owners:
+                raise ValueError(f"Two boxes are named {spec.name!r}.")
+            self._owners[spec.name] = shard_for(spec.name, self._workers)
+            self._shards[self._owners[spec.name]].append(spec)
+        self._processes: List[Any] = []
+        self._conns: List[Any] = []
+        self._writers: List[concurrent.futures.ThreadPoolExecutor] = []
+        self._readers: List[threading.Thread] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: List[asyncio.Future] = []
+        self._calls: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._call_ids = itertools.count(1)
+        self._notifications: asyncio.Queue = asyncio.Queue(maxsize=notification_queue_size)
+        self.connected = 0
+        self.dropped_notifications = 0
+
+    @property
+    def workers(self) -> int:
+        """The number of worker processes."""
+        return self._workers
+
+    @property
+    def boxes(self) -> List[str]:
+        """The names of the boxes of the fleet."""
+        return list(self._owners)
+
+    def worker_for(self, box: str) -> int:
+        """Returns the index of the worker owning a box.
+
+        Raises:
+            ValueError: If the fleet has no such box.
+        """
+        worker = self._owners.get(box)
+        if worker is None:
+            raise ValueError(f"No box named {box!r} in the fleet.")
+        return worker
+
+    async def start(self) -> None:
+        """Spawns the workers and waits until they have connected their boxes."""
+        self._loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        for index, shard in enumerate(self._shards):
+            conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_run_worker, args=(child_conn, shard, self._connect_timeout), name=f"sfr-fleet-{index}", daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(conn)
+            self._writers.append(_pipe_writer(f"sfr-fleet-{index}-writer"))
+            self._processes.append(process)
+            self._ready.append(self._loop.create_future())
+            reader = threading.Thread(target=self._read_worker, args=(index, conn), daemon=True)
+            reader.start()
+            self._readers.append(reader)
+        self.connected = sum(await asyncio.gather(*self._ready))
+        _LOGGER.info("Fleet of %d boxes started on %d workers, %d connected.", len(self._owners), self._workers, self.connected)
+
+    async def stop(self) -> None:
+        """Disconnects every box and stops the workers."""
+        loop = asyncio.get_running_loop()
+        for writer, conn in zip(self._writers, self._conns, strict=True):
+            try:
+                await loop.run_in_executor(writer, conn.send, ("stop", 0))
+            except OSError:
+                pass  # The worker is already gone.
+        await asyncio.gather(*(loop.run_in_executor(None, _join_worker, process) for process in self._processes))
+        # The readers see the pipes close with their workers; they must be done before the loop can close.
+        await asyncio.gather(*(loop.run_in_executor(None, reader.join, _WORKER_STOP_TIMEOUT) for reader in self._readers))
+        for conn in self._conns:
+            conn.close()
+        for writer in self._writers:
+            writer.shutdown(wait=False)
+        self._processes.clear()
+        self._conns.clear()
+        self._writers.clear()
+        self._readers.clear()
+
+    async def __aenter__(self) -> "FleetRunner":
+        """Starts the fleet for the duration of an `async with` block."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Stops the fleet at the end of an `async with` block."""
+        await self.stop()
+
+    async def send_request(
+        self, box: str, command_type: CommandType, timeout: float = DEFAULT_REQUEST_TIMEOUT, **kwargs: Any
+    ) -> BoxResponse:
+        """Sends a command to a box and waits for its reply.
+
+        Args:
+            box: The name of the box.
+            command_type: The abstract CommandType to send.
+            timeout: The number of seconds the worker waits for the reply.
+            **kwargs: Parameters for the command.
+
+        Returns:
+            The parsed reply of the box.
+
+        Raises:
+            ValueError: If the fleet has no such box, or the command is not supported.
+            asyncio.TimeoutError: If no reply arrives within the timeout.
+            BoxUnavailableError: If the box is unreachable or its worker exited.
+        """
+        return await self._call(self.worker_for(box), "request", box, command_type, timeout, kwargs)
+
+    async def send_command(self, box: str, command_type: CommandType, **kwargs: Any) -> None:
+        """Sends a command to a box, waiting until it is written but not for its reply.
+
+        Args:
+            box: The name of the box.
+            command_type: The abstract CommandType to send.
+            **kwargs: Parameters for the command.
+        """
+        await self._call(self.worker_for(box), "command", box, command_type, None, kwargs)
+
+    async def request_all(
+        self, command_type: CommandType, timeout: float = DEFAULT_REQUEST_TIMEOUT, **kwargs: Any
+    ) -> Dict[str, Union[BoxResponse, Exception]]:
+        """Sends a command to every box of the fleet and waits for all the replies.
+
+        Each worker receives one message for all its boxes, so this scales with
+        the number of workers rather than being bound by the coordinator.
+
+        Args:
+            command_type: The abstract CommandType to send.
+            timeout: The number of seconds the workers wait for each reply.
+            **kwargs: Parameters for the command.
+
+        Returns:
+            The reply of each box, or the error it failed with.
+        """
+        results: Dict[str, Union[BoxResponse, Exception]] = {}
+        for shard in await asyncio.gather(
+            *(self._call(index, "request_all", None, command_type, timeout, kwargs) for index in range(self._workers))
+        ):
+            results.update(shard)
+        return results
+
+    async def notifications(self) -> AsyncIterator[FleetNotification]:
+        """Yields the notifications of every box, merged in arrival order."""
+        while True:
+            yield await self._notifications.get()
+
+    async def _call(
+        self, worker: int, kind: str, box: Optional[str], command_type: CommandType, timeout: Optional[float], kwargs: Any
+    ) -> Any:
+        """Sends an operation to a worker and waits for its outcome."""
+        call_id = next(self._call_ids)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._calls[call_id] = (worker, future)
+        try:
+            await loop.run_in_executor(
+                self._writers[worker], self._conns[worker].send, (kind, call_id, box, command_type, timeout, kwargs)
+            )
+        except OSError as e:
+            self._calls.pop(call_id, None)
+            raise BoxUnavailableError(f"Fleet worker {worker} is not running.") from e
+        except BaseException:
+            self._calls.pop(call_id, None)
+            raise
+        return await future
+
+    def _read_worker(self, index: int, conn: Any) -> None:
+        """Hands the messages of a worker over to the event loop, in a dedicated thread."""
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                _post(self._loop, self._on_worker_exit, index)
+                return
+            if not _post(self._loop, self._on_worker_message, index, message):
+                return
+
+    def _on_worker_message(self, index: int, message: Tuple[Any, ...]) -> None:
+        """Dispatches a message of a worker."""
+        kind = message[0]
+        if kind == "result":
+            _, call_id, ok, value = message
+            entry = self._calls.pop(call_id, None)
+            if entry is not None and not entry[1].done():
+                if ok:
+                    entry[1].set_result(value)
+                else:
+                    entry[1].set_exception(value)
+        elif kind == "notifications":
+            for box, data in message[1]:
+                if self._notifications.full():
+                    self._notifications.get_nowait()
+                    self.dropped_notifications += 1
+                self._notifications.put_nowait(FleetNotification(box, data))
+        elif kind == "ready" and not self._ready[index].done():
+            self._ready[index].set_result(message[1])
+
+    def _on_worker_exit(self, index: int) -> None:
+        """Fails the operations of a worker whose process exited."""
+        if not self._ready[index].done():
+            self._ready[index].set_result(0)
+        error = BoxUnavailableError(f"Fleet worker {index} exited.")
+        for call_id, (worker, future) in list(self._calls.items()):
+            if worker == index:
+                del self._calls[call_id]
+                if not future.done():
+                    future.set_exception(error)
+
+
+def _join_worker(process: Any) -> None:
+    """Waits for a worker process to exit, killing it if it does not."""
+    process.join(_WORKER_STOP_TIMEOUT)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def _run_worker(conn: Any, boxes: List[BoxSpec], connect_timeout: float) -> None:
+    """Entry point of a worker process."""
+    asyncio.run(_FleetWorker(conn, boxes).run(connect_timeout))
+
+
+class _FleetWorker:
+    """The drivers of one shard and the event loop of its worker process."""
+
+    def __init__(self, conn: Any, boxes: List[BoxSpec]):
+        self._conn = conn
+        self._drivers: Dict[str, BaseSFRBoxDriver] = {
+            spec.name: spec.driver_class(spec.host, spec.port, **(spec.options or {})) for spec in boxes
+        }
+        self._outbox: List[Tuple[str, Dict[str, Any]]] = []
+        self._operations: Set[asyncio.Task] = set()
+        self._writer = _pipe_writer("sfr-fleet-writer")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self, connect_timeout: float) -> None:
+        """Connects the boxes, then executes the coordinator's operations until told to stop."""
+        self._loop = asyncio.get_running_loop()
+        for name, driver in self._drivers.items():
+            driver.register_notification_listener(functools.partial(self._on_notification, name))
+        starts = [asyncio.create_task(driver.start()) for driver in self._drivers.values()]
+        if starts:
+            await asyncio.wait(starts, timeout=connect_timeout)
+        await self._send(("ready", sum(driver._websocket is not None for driver in self._drivers.values())))
+
+        stopped = self._loop.create_future()
+        threading.Thread(target=self._read_operations, args=(stopped,), daemon=True).start()
+        await stopped
+        for task in starts:
+            task.cancel()
+        await asyncio.gather(*(driver.stop() for driver in self._drivers.values()), return_exceptions=True)
+        # The operations in flight fail with their drivers: their outcomes are reported, unless they hang.
+        if self._operations:
+            _, hanging = await asyncio.wait(self._operations, timeout=_OPERATIONS_STOP_TIMEOUT)
+            for task in hanging:
+                task.cancel()
+            if hanging:
+                await asyncio.wait(hanging)
+        # Lets the messages already handed to the writer reach the coordinator.
+        await self._loop.run_in_executor(None, self._writer.shutdown)
+
+    async def _send(self, message: Tuple[Any, ...]) -> None:
+        """Pickles and writes a message to the coordinator from the writer thread."""
+        await self._loop.run_in_executor(self._writer, self._conn.send, message)
+
+    def _read_operations(self, stopped: asyncio.Future) -> None:
+        """Hands the coordinator's operations over to the event loop, in a dedicated thread."""
+        while True:
+            try:
+                operation = self._conn.recv()
+            except (EOFError, OSError):
+                operation = ("stop", 0)
+            self._loop.call_soon_threadsafe(self._dispatch, operation, stopped)
+            if operation[0] == "stop":
+                return
+
+    def _dispatch(self, operation: Tuple[Any, ...], stopped: asyncio.Future) -> None:
+        """Starts executing an operation."""
+        if operation[0] == "stop":
+            if not stopped.done():
+                stopped.set_result(None)
+            return
+        task = asyncio.create_task(self._execute(*operation))
+        self._operations.add(task)
+        task.add_done_callback(self._operations.discard)
+
+    async def _execute(
+        self, kind: str, call_id: int, box: Optional[str], command_type: CommandType, timeout: float, kwargs: Dict[str, Any]
+    ) -> None:
+        """Executes an operation and reports its outcome to the coordinator."""
+        try:
+            if kind == "request_all":
+                names = list(self._drivers)
+                replies = await asyncio.gather(
+                    *(self._drivers[name].send_request(command_type, timeout=timeout, **kwargs) for name in names),
+                    return_exceptions=True,
+                )
+                value: Any = dict(zip(names, replies, strict=True))
+            elif kind == "request":
+                value = await self._drivers[box].send_request(command_type, timeout=timeout, **kwargs)
+            else:
+                value = await self._drivers[box].send_command(command_type, **kwargs)
+            outcome = ("result", call_id, True, value)
+        except Exception as e:
+            outcome = ("result", call_id, False, e)
+        try:
+            await self._send(outcome)
+        except Exception as e:
+            # The outcome could not be pickled.
+            await self._send(("result", call_id, False, RuntimeError(repr(e))))
+
+    def _on_notification(self, box: str, response: BoxResponse) -> None:
+        """Batches a notification, flushed to the coordinator once the loop is idle."""
+        self._outbox.append((box, response.data))
+        if len(self._outbox) == 1:
+            self._loop.call_soon(self._flush_notifications)
+
+    def _flush_notifications(self) -> None:
+        """Sends the batched notifications to the coordinator."""
+        batch, self._outbox = self._outbox, []
+        self._writer.submit(self._conn.send, ("notifications", batch))
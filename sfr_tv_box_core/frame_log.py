@@ -0,0 +1,129 @@
+"""Cheap per-driver frame history and rate-limited frame logging.
+
+Logging every frame is the largest log cost of a fleet, yet the frames are
+what one needs when something goes wrong. Each driver therefore keeps its last
+frames in a fixed-size `FrameRing`, which costs one append per frame and is
+only formatted when dumped: on errors, on disconnections or on demand. The
+remaining per-frame logs go through a `LogSampler`, which lets one message
+through per interval and counts the ones it held back.
+"""
+
+import logging
+import time
+from collections import deque
+from enum import StrEnum
+from typing import Any
+from typing import Deque
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+DEFAULT_FRAME_RING_SIZE = 64
+# Seconds between two sampled per-frame log messages.
+DEFAULT_LOG_INTERVAL = 10.0
+
+
+class FrameDirection(StrEnum):
+    """Whether a frame was written to or read from the box."""
+
+    SENT = ">>"
+    RECEIVED = "<<"
+
+
+class FrameRecord(NamedTuple):
+    """A frame seen on the WebSocket.
+
+    Attributes:
+        timestamp: `time.time()` when the frame was written or read.
+        direction: Whether the frame was sent or received.
+        frame: The raw frame.
+    """
+
+    timestamp: float
+    direction: FrameDirection
+    frame: Any
+
+
+class FrameRing:
+    """The most recent frames of a driver, oldest first."""
+
+    __slots__ = ("_records",)
+
+    def __init__(self, capacity: int = DEFAULT_FRAME_RING_SIZE):
+        """Initializes an empty ring.
+
+        Args:
+            capacity: The number of frames kept, older ones are dropped.
+        """
+        self._records: Deque[FrameRecord] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        """Returns the number of frames kept."""
+        return len(self._records)
+
+    @property
+    def capacity(self) -> int:
+        """The number of frames kept."""
+        return self._records.maxlen
+
+    def record(self, direction: FrameDirection, frame: Any) -> None:
+        """Remembers a frame, dropping the oldest one when full."""
+        self._records.append(FrameRecord(time.time(), direction, frame))
+
+    def records(self) -> List[FrameRecord]:
+        """Returns the frames kept, oldest first."""
+        return list(self._records)
+
+    def clear(self) -> None:
+        """Forgets every frame."""
+        self._records.clear()
+
+    def format(self) -> str:
+        """Formats the frames kept, one per line."""
+        return "\n".join(
+            f"{time.strftime('%H:%M:%S', time.localtime(record.timestamp))}.{int(record.timestamp % 1 * 1000):03d}"
+            f" {record.direction} {record.frame}"
+            for record in self._records
+        )
+
+    def dump(self, logger: logging.Logger, reason: str, level: int = logging.WARNING) -> None:
+        """Logs the frames kept as a single message.
+
+        Args:
+            logger: The logger to write to.
+            reason: Why the frames are dumped, included in the message.
+            level: The logging level of the message.
+        """
+        if self._records and logger.isEnabledFor(level):
+            logger.log(level, "Last %d frames before %s:\n%s", len(self._records), reason, self.format())
+
+
+class LogSampler:
+    """Lets one log message through per interval."""
+
+    __slots__ = ("_interval", "_next_at", "_suppressed")
+
+    def __init__(self, interval: float = DEFAULT_LOG_INTERVAL):
+        """Initializes the sampler, letting the first message through.
+
+        Args:
+            interval: The minimum number of seconds between two messages.
+        """
+        self._interval = interval
+        self._next_at = 0.0
+        self._suppressed = 0
+
+    def sample(self) -> Optional[int]:
+        """Decides whether the current message is logged.
+
+        Returns:
+            None to drop the message, otherwise the number of messages dropped
+            since the last one logged.
+        """
+        now = time.monotonic()
+        if now < self._next_at:
+            self._suppressed += 1
+            return None
+        self._next_at = now + self._interval
+        suppressed, self._suppressed = self._suppressed, 0
+        return suppressed
@@ -0,0 +1,313 @@
+"""Local WebSocket gateway sharing one box connection between many clients.
+
+Boxes only accept a few control connections, while Home Assistant, the CLI and
+monitoring tools all want to talk to the same box. A `BoxGateway` keeps exactly
+one upstream connection, through a driver, and serves the same protocol on a
+local port: clients connect to the gateway as they would to the box.
+
+Commands from clients go through the upstream driver's send queue, so they are
+paced by its rate limiter, prioritized (status queries and power or stop keys
+first) and stopped by its circuit breaker like the driver's own commands. The
+driver does not wait for their replies: they are routed back by the gateway to
+the client that sent the command. Frames carrying a `requestId` (STB8) get a
+gateway-wide ID on the way up, and replies echoing it get the original ID back
+on the way down. Replies without one (STB7, LaBox, and STB8 boxes that do not
+echo it) are matched by the driver with the oldest command of the same action,
+the driver's own requests included, and get the ID of that command back if it
+had one. A command that cannot be sent, e.g. while the breaker is open, gets a
+"KO" reply at once. Notifications are broadcast to every client.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import websockets
+
+from . import serializer
+from .base_driver import BaseSFRBoxDriver
+from .base_driver import _PendingRequest
+from .constants import DEFAULT_WEBSOCKET_PORT
+from .constants import CommandType
+from .send_queue import URGENT_COMMANDS
+from .send_queue import URGENT_KEYS
+from .send_queue import SendPriority
+
+_LOGGER = logging.getLogger(__name__)
+
+# Frames waiting to be written to one client; a client too slow to keep up
+# loses frames rather than holding the box connection back.
+DEFAULT_CLIENT_QUEUE_SIZE = 256
+# Commands remembered while their reply is awaited, the oldest ones are forgotten first.
+_MAX_ROUTES = 4096
+
+
+def _command_of(frame: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Extracts the action of a command frame and the key it presses, if any.
+
+    Handles both the STB8 frames (`action`, `params.key`) and the STB7/LaBox
+    frames (`Params.Action`, `Params.Press`). Keys of an unexpected type are
+    ignored.
+    """
+    params = frame.get("Params")
+    if "action" in frame or not isinstance(params, dict):
+        inner = frame.get("params")
+        action, key = frame.get("action"), inner.get("key") if isinstance(inner, dict) else None
+    else:
+        press = params.get("Press")
+        action, key = params.get("Action"), press[0] if isinstance(press, list) and len(press) == 1 else None
+    return action, key if isinstance(key, (str, int)) else None
+
+
+def _error_reply(frame: Dict[str, Any], action: str, request_id: Any) -> str:
+    """Builds the "KO" reply of a command frame, in the shape of the replies of the box.
+
+    Args:
+        frame: The command frame, an STB8 or an STB7/LaBox one.
+        action: The action of the command.
+        request_id: The `requestId` of the command, echoed if not None.
+    """
+    if "action" not in frame and isinstance(frame.get("Params"), dict):
+        reply: Dict[str, Any] = {"Action": action, "RemoteResponseCode": "KO", "Data": {}}
+    else:
+        reply = {"remoteResponseCode": "KO", "action": action, "deviceId": frame.get("deviceId"), "data": {}}
+    if request_id is not None:
+        reply["requestId"] = request_id
+    return serializer.dumps(reply)
+
+
+class _Route:
+    """A forwarded command waiting for its reply."""
+
+    __slots__ = ("client", "request_id", "upstream_id", "pending")
+
+    def __init__(self, client: "_GatewayClient", request_id: Any):
+        self.client = client
+        self.request_id = request_id
+        # The gateway-wide ID the command was sent to the box with, if it had a request ID.
+        self.upstream_id: Optional[int] = None
+        # Tracks the command in the driver, in send order with the driver's own requests.
+        self.pending = _PendingRequest()
+
+
+def _remember(routes: Dict[Any, _Route], key: Any, route: _Route) -> None:
+    """Adds a route, forgetting the oldest one beyond `_MAX_ROUTES`."""
+    routes[key] = route
+    if len(routes) > _MAX_ROUTES:
+        del routes[next(iter(routes))]
+
+
+class _GatewayClient:
+    """A local client connection and the frames waiting to be written to it."""
+
+    def __init__(self, websocket: Any, queue_size: int):
+        self.websocket = websocket
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def deliver(self, frame: str) -> None:
+        """Queues a frame for the client, dropping it if the client lags too far behind."""
+        try:
+            self.outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def write_frames(self) -> None:
+        """Writes the queued frames until the connection closes."""
+        while True:
+            frame = await self.outbox.get()
+            try:
+                await self.websocket.send(frame)
+            except websockets.exceptions.ConnectionClosed:
+                return
+
+
+class BoxGateway:
+    """Serves the protocol of a box locally, multiplexing clients onto one driver."""
+
+    def __init__(
+        self,
+        driver: BaseSFRBoxDriver,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_WEBSOCKET_PORT,
+        client_queue_size: int = DEFAULT_CLIENT_QUEUE_SIZE,
+    ):
+        """Initializes the gateway.
+
+        Args:
+            driver: The driver of the box, started by the gateway if it is not connected yet.
+            host: The address to listen on.
+            port: The port to listen on, 0 to pick a free one.
+            client_queue_size: The number of frames buffered per client before dropping.
+        """
+        self._driver = driver
+        self._host = host
+        self._port = port
+        self._client_queue_size = client_queue_size
+        self._server: Optional[Any] = None
+        self._clients: Set[_GatewayClient] = set()
+        self._owns_connection = False
+        self._request_ids = itertools.count(1)
+        self._routes_by_id: Dict[int, _Route] = {}
+        self._routes_by_pending: Dict[_PendingRequest, _Route] = {}
+        self._urgent_actions = {
+            action for command_type, action in driver._REPLY_ACTIONS.items() if command_type in URGENT_COMMANDS
+        }
+        self._key_action = driver._REPLY_ACTIONS.get(CommandType.SEND_KEY)
+        # The keys of the urgent key presses as they appear in the frames of this model.
+        self._urgent_keys: Set[Any] = set()
+        for key in URGENT_KEYS:
+            payload = driver._build_command(CommandType.SEND_KEY, key=key)
+            if payload:
+                self._urgent_keys.add(_command_of(serializer.loads(payload))[1])
+        self.forwarded = 0
+        self.routed = 0
+        self.broadcast = 0
+
+    @property
+    def driver(self) -> BaseSFRBoxDriver:
+        """The driver holding the upstream connection."""
+        return self._driver
+
+    @property
+    def host(self) -> str:
+        """The address the gateway listens on."""
+        return self._host
+
+    @property
+    def port(self) -> int:
+        """The port the gateway listens on, resolved once started."""
+        return self._port
+
+    @property
+    def client_count(self) -> int:
+        """The number of connected clients."""
+        return len(self._clients)
+
+    @property
+    def dropped(self) -> int:
+        """The number of frames dropped because a connected client lagged behind."""
+        return sum(client.dropped for client in self._clients)
+
+    async def start(self) -> None:
+        """Connects to the box if needed, then starts listening."""
+        if self._driver._websocket is None:
+            await self._driver.start()
+            self._owns_connection = True
+        self._driver.register_listener(self._on_box_message)
+        self._server = await websockets.serve(self._serve_client, self._host, self._port)
+        self._port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.info("Gateway to %s listening on %s:%d", self._driver._host, self._host, self._port)
+
+    async def stop(self) -> None:
+        """Disconnects every client, stops listening and closes the connection it opened."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._driver.unregister_listener(self._on_box_message)
+        if self._owns_connection:
+            await self._driver.stop()
+            self._owns_connection = False
+
+    async def __aenter__(self) -> "BoxGateway":
+        """Starts the gateway for the duration of an `async with` block."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Stops the gateway at the end of an `async with` block."""
+        await self.stop()
+
+    async def _serve_client(self, websocket: Any, *_: Any) -> None:
+        """Forwards the commands of one client until it disconnects."""
+        client = _GatewayClient(websocket, self._client_queue_size)
+        self._clients.add(client)
+        writer = asyncio.create_task(client.write_frames())
+        try:
+            async for message in websocket:
+                await self._forward(client, message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.cancel()
+
+    async def _forward(self, client: _GatewayClient, message: Any) -> None:
+        """Sends a client command to the box, remembering where its reply goes."""
+        try:
+            frame = serializer.loads(message)
+        except ValueError:
+            _LOGGER.debug("Gateway ignored a malformed client frame: %s", message)
+            return
+        if not isinstance(frame, dict):
+            return
+        action, key = _command_of(frame)
+        route = None
+        if isinstance(action, str):
+            route = _Route(client, frame.get("requestId"))
+            if route.request_id is not None:
+                route.upstream_id = next(self._request_ids)
+                frame["requestId"] = route.upstream_id
+                message = serializer.dumps(frame)
+                _remember(self._routes_by_id, route.upstream_id, route)
+            _remember(self._routes_by_pending, route.pending, route)
+        else:
+            action = None
+        urgent = action in self._urgent_actions or (action == self._key_action and key in self._urgent_keys)
+        priority = SendPriority.URGENT if urgent else SendPriority.BULK
+        try:
+            # The driver tracks the command without waiting for its reply, which the gateway routes itself.
+            await self._driver._send_payload(message, action, route.pending if route else None, priority=priority)
+        except Exception as e:
+            _LOGGER.debug("Gateway could not forward a command to %s: %s", self._driver._host, e)
+            if route is not None:
+                self._routes_by_id.pop(route.upstream_id, None)
+                self._routes_by_pending.pop(route.pending, None)
+                self._deliver(client, _error_reply(frame, action, route.request_id))
+            return
+        self.forwarded += 1
+
+    def _on_box_message(self, message: str) -> None:
+        """Routes a box message to the client awaiting it, or to every client."""
+        try:
+            frame = serializer.loads(message)
+        except ValueError:
+            return
+        if not isinstance(frame, dict):
+            return
+        action = frame.get("action", frame.get("Action"))
+        request_id = frame.get("requestId")
+        if request_id is not None:
+            route = self._routes_by_id.pop(request_id, None) if isinstance(request_id, int) else None
+            if route is None:
+                # The reply of another command, e.g. one the gateway's own driver sent.
+                return
+            self._routes_by_pending.pop(route.pending, None)
+        elif action is None:
+            self.broadcast += 1
+            for client in self._clients:
+                client.deliver(message)
+            return
+        else:
+            # The driver matched the reply with the oldest command of its action, which may be one of its own requests.
+            resolved = self._driver._resolved_request
+            route = self._routes_by_pending.pop(resolved, None) if resolved is not None else None
+            if route is None:
+                return
+            self._routes_by_id.pop(route.upstream_id, None)
+        if route.request_id is not None:
+            frame["requestId"] = route.request_id
+            message = serializer.dumps(frame)
+        self._deliver(route.client, message)
+
+    def _deliver(self, client: _GatewayClient, frame: str) -> None:
+        """Queues a reply for a client, unless it disconnected in the meantime."""
+        if client in self._clients:
+            self.routed += 1
+            client.deliver(frame)
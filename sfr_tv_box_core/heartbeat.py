@@ -0,0 +1,231 @@
+"""Application-level heartbeat with round-trip time tracking.
+
+When a box loses power, its TCP connection is not closed: it is left
+half-open, and commands written to it vanish without an error until the
+operating system gives up on the socket, minutes later. A `Heartbeat` probes
+the box every `interval` seconds while it is silent, either with WebSocket
+pings or with `GET_STATUS` requests, and keeps a smoothed estimate of the
+round-trip time of these probes (SRTT and RTTVAR, as TCP does in RFC 6298).
+
+`GET_STATUS` probes take the urgent lane of the send queue, skip the rate
+limiter and are sent even while the circuit breaker is open: their reply
+closes it, while a missed probe only counts against the heartbeat.
+
+Each probe must be answered within `SRTT + 4 * RTTVAR`, clamped between
+`min_deadline` and `max_deadline`; a missed probe is retried at once with
+twice the deadline, and after `max_missed` misses in a row the box is
+declared dead: the connection is aborted, without a closing handshake the
+box would never answer, and the driver reconnects immediately.
+"""
+
+import asyncio
+import logging
+import time
+from enum import StrEnum
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Optional
+
+import websockets
+
+if TYPE_CHECKING:
+    from .base_driver import BaseSFRBoxDriver
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds of silence from the box before it is probed.
+DEFAULT_HEARTBEAT_INTERVAL = 15.0
+# Bounds of the deadline of a probe, in seconds; the lower one absorbs the scheduling jitter of a busy host.
+DEFAULT_MIN_DEADLINE = 1.0
+DEFAULT_MAX_DEADLINE = 10.0
+# Deadline of the probes sent before any round-trip time was measured.
+DEFAULT_INITIAL_DEADLINE = 3.0
+# Probes missed in a row before the box is declared dead.
+DEFAULT_MAX_MISSED = 2
+
+
+class HeartbeatMode(StrEnum):
+    """How a heartbeat probes the box."""
+
+    # WebSocket ping frames, answered by the WebSocket server of the box.
+    PING = "ping"
+    # GET_STATUS requests, answered by the application of the box, which also refresh its power state
+    # and close its circuit breaker.
+    STATUS = "status"
+
+
+class RttEstimator:
+    """Smoothed round-trip time and its variation (RFC 6298).
+
+    Attributes:
+        srtt: The smoothed round-trip time in seconds, None before the first sample.
+        rttvar: The round-trip time variation in seconds.
+        samples: The number of samples recorded.
+    """
+
+    __slots__ = ("srtt", "rttvar", "samples")
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self):
+        """Initializes an estimator without samples."""
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.samples = 0
+
+    def update(self, rtt: float) -> None:
+        """Records a measured round-trip time.
+
+        Args:
+            rtt: The round-trip time in seconds.
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.samples += 1
+
+    def timeout(self, minimum: float, maximum: float, initial: float) -> float:
+        """Returns the time a reply may take before it is considered lost.
+
+        Args:
+            minimum: The lower bound of the timeout.
+            maximum: The upper bound of the timeout.
+            initial: The timeout before the first sample.
+        """
+        if self.srtt is None:
+            return initial
+        return min(max(self.srtt + self.K * self.rttvar, minimum), maximum)
+
+
+class Heartbeat:
+    """Probes one box while it is silent and drops its connection once it stops answering.
+
+    Attributes:
+        interval: Seconds of silence from the box before it is probed.
+        mode: How the box is probed.
+        max_missed: Probes missed in a row before the box is declared dead.
+        probes: The probes sent.
+        missed: The probes that missed their deadline.
+        dead_peers: The connections dropped because the box stopped answering.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        mode: HeartbeatMode = HeartbeatMode.PING,
+        min_deadline: float = DEFAULT_MIN_DEADLINE,
+        max_deadline: float = DEFAULT_MAX_DEADLINE,
+        initial_deadline: float = DEFAULT_INITIAL_DEADLINE,
+        max_missed: int = DEFAULT_MAX_MISSED,
+    ):
+        """Initializes the heartbeat; `BaseSFRBoxDriver.set_heartbeat` runs it.
+
+        Args:
+            interval: Seconds of silence from the box before it is probed.
+            mode: How the box is probed.
+            min_deadline: The shortest time a probe may take.
+            max_deadline: The longest time a probe may take.
+            initial_deadline: The time a probe may take before any was measured.
+            max_missed: Probes missed in a row before the box is declared dead.
+
+        Raises:
+            ValueError: If a duration is not positive, or `max_missed` is below 1.
+        """
+        if min(interval, min_deadline, max_deadline, initial_deadline) <= 0:
+            raise ValueError("The heartbeat interval and deadlines must be positive.")
+        if min_deadline > max_deadline:
+            raise ValueError("The minimum deadline cannot exceed the maximum deadline.")
+        if max_missed < 1:
+            raise ValueError("At least one probe must be missed before declaring the box dead.")
+        self.interval = interval
+        self.mode = HeartbeatMode(mode)
+        self.max_missed = max_missed
+        self.probes = 0
+        self.missed = 0
+        self.dead_peers = 0
+        self._min_deadline = min_deadline
+        self._max_deadline = max_deadline
+        self._initial_deadline = initial_deadline
+        self._rtt = RttEstimator()
+
+    @property
+    def rtt(self) -> Optional[float]:
+        """The smoothed round-trip time of the probes in seconds, None until measured."""
+        return self._rtt.srtt
+
+    @property
+    def rttvar(self) -> float:
+        """The variation of the round-trip time of the probes in seconds."""
+        return self._rtt.rttvar
+
+    @property
+    def deadline(self) -> float:
+        """The time the next probe may take before it is considered missed."""
+        return self._rtt.timeout(self._min_deadline, self._max_deadline, self._initial_deadline)
+
+    async def run(self, driver: "BaseSFRBoxDriver", websocket: Any) -> None:
+        """Probes the box over one connection, until it is replaced or declared dead.
+
+        Args:
+            driver: The driver of the box.
+            websocket: The connection to watch.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            if driver._websocket is not websocket:
+                return
+            # Anything received from the box proves it is alive.
+            last_seen = driver._last_seen
+            if last_seen is not None and time.time() - last_seen < self.interval:
+                continue
+            if not await self._probe_until_answered(driver, websocket):
+                self._declare_dead(driver, websocket)
+                return
+
+    async def _probe_until_answered(self, driver: "BaseSFRBoxDriver", websocket: Any) -> bool:
+        """Probes the box, retrying with a doubled deadline, and returns whether it answered."""
+        deadline = self.deadline
+        for _ in range(self.max_missed):
+            self.probes += 1
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(self._probe(driver, websocket, deadline), deadline)
+            except websockets.exceptions.ConnectionClosed:
+                # Already lost: the listening task reconnects.
+                return True
+            except Exception as e:
+                self.missed += 1
+                _LOGGER.debug("Heartbeat of %s missed its %.2f s deadline: %r", driver.host, deadline, e)
+                deadline = min(2 * deadline, self._max_deadline)
+                continue
+            self._rtt.update(time.monotonic() - start)
+            driver._metrics.heartbeat_rtt.set(self._rtt.srtt)
+            return True
+        return False
+
+    async def _probe(self, driver: "BaseSFRBoxDriver", websocket: Any, deadline: float) -> None:
+        """Sends one probe and waits for its answer."""
+        if self.mode is HeartbeatMode.STATUS:
+            await driver._send_probe(deadline)
+        else:
+            pong = await websocket.ping()
+            await pong
+
+    def _declare_dead(self, driver: "BaseSFRBoxDriver", websocket: Any) -> None:
+        """Aborts the connection to a box that stopped answering, so that it is reopened."""
+        self.dead_peers += 1
+        driver._metrics.dead_peers.inc()
+        _LOGGER.warning(
+            "%s:%d missed %d heartbeats in a row (RTT %s): dropping the connection.",
+            driver.host,
+            driver.port,
+            self.max_missed,
+            f"{1000 * self.rtt:.1f} ms" if self.rtt is not None else "unknown",
+        )
+        # A closing handshake would wait for the dead box: the listening task sees the abort at once.
+        websocket.transport.abort()
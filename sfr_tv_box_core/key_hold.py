@@ -0,0 +1,116 @@
+"""Key holds streaming one pre-encoded frame at a steady rate.
+
+Holding volume or fast-forward on a remote repeats the key press for as long
+as the button is down. Firing a `SEND_KEY` per repeat rebuilds the payload
+every time and spaces the frames by however long each call took. A `KeyHold`
+instead encodes the frame once (through the shared macro cache) and resends it
+from a single task, against absolute deadlines of the event loop clock.
+
+The task waits for each frame to be written before scheduling the next one, so
+at most one repeat is ever queued: when the box or the rate limiter cannot keep
+up, ticks are skipped rather than piled up, and releasing the key cancels the
+only waiting frame. Nothing is left to drain once the user lets go.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+from typing import Optional
+
+from .constants import KeyCode
+from .macros import MacroFrame
+from .macros import sleep_until
+from .send_queue import SendPriority
+
+if TYPE_CHECKING:
+    from .base_driver import BaseSFRBoxDriver
+
+_LOGGER = logging.getLogger(__name__)
+
+# Repeats per second of a held key, close to the auto-repeat of the original remotes.
+DEFAULT_HOLD_RATE = 10.0
+
+
+class KeyHold:
+    """A key held down on one box, repeated until released.
+
+    Attributes:
+        key: The key held.
+        rate: The repeats per second.
+        frames_sent: The frames written so far, the first press included.
+        skipped: The repeats skipped because the previous frame was not written in time.
+    """
+
+    def __init__(
+        self,
+        driver: "BaseSFRBoxDriver",
+        key: KeyCode,
+        frame: MacroFrame,
+        rate: float = DEFAULT_HOLD_RATE,
+        priority: SendPriority = SendPriority.BULK,
+    ):
+        """Starts sending the frame, then repeating it.
+
+        Args:
+            driver: The driver sending the frames.
+            key: The key held.
+            frame: The pre-encoded frame of the key.
+            rate: The repeats per second.
+            priority: The lane the frames are queued in.
+
+        Raises:
+            ValueError: If `rate` is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("The hold rate must be positive.")
+        self.key = key
+        self.rate = rate
+        self.frames_sent = 0
+        self.skipped = 0
+        self._driver = driver
+        self._frame = frame
+        self._priority = priority
+        self._error: Optional[Exception] = None
+        self._task = asyncio.create_task(self._repeat())
+
+    @property
+    def active(self) -> bool:
+        """Whether the key is still held."""
+        return not self._task.done()
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """The error that ended the hold early, if any."""
+        return self._error
+
+    async def wait(self, timeout: Optional[float] = None) -> None:
+        """Waits until the hold ends by itself (on a send error), at most `timeout` seconds."""
+        await asyncio.wait([self._task], timeout=timeout)
+
+    async def release(self) -> None:
+        """Stops repeating the key at once, dropping the frame waiting to be written, if any."""
+        self._task.cancel()
+        await asyncio.wait([self._task])
+
+    async def _repeat(self) -> None:
+        """Sends the frame on a steady grid of deadlines until cancelled."""
+        loop = asyncio.get_running_loop()
+        driver = self._driver
+        interval = 1 / self.rate
+        next_at = loop.time()
+        try:
+            while True:
+                await sleep_until(next_at)
+                # Hold frames are pre-built, so their traces start in the queue.
+                trace_id = next(driver._trace_ids) if driver._trace_hook is not None else 0
+                await driver._send_payload(self._frame.payload, self._frame.reply_action, None, self._priority, trace_id)
+                self.frames_sent += 1
+                next_at += interval
+                late = loop.time() - next_at
+                if late > 0:
+                    missed = int(late // interval) + 1
+                    self.skipped += missed
+                    next_at += missed * interval
+        except Exception as e:
+            _LOGGER.warning("Stopped holding %s on %s: %s", self.key, driver._host, e)
+            self._error = e
@@ -0,0 +1,74 @@
+"""Driver implementation for the SFR LaBox set-top box."""
+
+from typing import Dict
+from typing import Mapping
+
+from .constants import DEFAULT_WEBSOCKET_PORT
+from .constants import KeyCode
+from .params_codec import DEFAULT_CLIENT_MODEL
+from .params_codec import DEFAULT_CLIENT_SOFT_VERSION
+from .params_codec import compile_key_templates
+from .stb7_driver import STB7Driver
+
+LABOX_KEYCODES: Dict[KeyCode, int] = {
+    KeyCode.VOL_UP: 63234,
+    KeyCode.VOL_DOWN: 63235,
+    KeyCode.CHAN_UP: 63237,
+    KeyCode.CHAN_DOWN: 63236,
+    KeyCode.HOME: 63270,
+    KeyCode.BACK: 63271,
+    KeyCode.POWER: 63232,
+    KeyCode.FFWD: 63244,
+    KeyCode.REWIND: 63243,
+    KeyCode.PLAY_PAUSE: 63241,
+    KeyCode.STOP: 63238,
+    KeyCode.RECORD: 63242,
+    KeyCode.MUTE: 63233,
+    KeyCode.UP: 38,
+    KeyCode.LEFT: 37,
+    KeyCode.RIGHT: 39,
+    KeyCode.DOWN: 40,
+    KeyCode.OK: 13,
+    KeyCode.NUM_0: 48,
+    KeyCode.NUM_1: 49,
+    KeyCode.NUM_2: 50,
+    KeyCode.NUM_3: 51,
+    KeyCode.NUM_4: 52,
+    KeyCode.NUM_5: 53,
+    KeyCode.NUM_6: 54,
+    KeyCode.NUM_7: 55,
+    KeyCode.NUM_8: 56,
+    KeyCode.NUM_9: 57,
+    KeyCode.DELETE: 8,
+    KeyCode.OPTIONS: 63273,
+}
+
+_LABOX_KEY_TEMPLATES = compile_key_templates(LABOX_KEYCODES)
+
+
+class LaBoxDriver(STB7Driver):
+    """Driver for LaBox.
+
+    The LaBox protocol is identical to the STB7 one, only the keycode values differ.
+    """
+
+    _KEY_TEMPLATES: Mapping[KeyCode, str] = _LABOX_KEY_TEMPLATES
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_WEBSOCKET_PORT,
+        device_id: str = "default-labox",
+        device_model: str = DEFAULT_CLIENT_MODEL,
+        device_soft_version: str = DEFAULT_CLIENT_SOFT_VERSION,
+    ):
+        """Initialize the driver.
+
+        Args:
+            host: The hostname or IP address of the SFR Box.
+            port: The port for the WebSocket connection.
+            device_id: The unique ID sent as `DeviceId` in every frame.
+            device_model: The client model sent as `DeviceModel`.
+            device_soft_version: The client version sent as `DeviceSoftVersion`.
+        """
+        super().__init__(host, port, device_id, device_model, device_soft_version)
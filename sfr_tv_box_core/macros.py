@@ -0,0 +1,162 @@
+"""Key sequences compiled once into ready-to-send frame batches.
+
+A macro is a named sequence of key presses, each followed by an optional delay
+and optionally waiting for the box to acknowledge it. Compiling a macro builds
+and serializes every frame up front, so replaying it never touches the codec.
+Compiled macros are cached per model and device identity, which lets every
+driver of the same model share them.
+
+Frames are frozen at compile time: for STB8 this includes the `requestId`,
+which the box does not use to answer key presses.
+"""
+
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from .constants import CommandType
+from .constants import KeyCode
+
+# Maximum number of compiled macros kept in the shared cache, and by each driver with its own cache.
+MACRO_CACHE_SIZE = 256
+
+
+class MacroStep(NamedTuple):
+    """One key press of a macro.
+
+    Attributes:
+        key: The key to press.
+        delay: Seconds to wait after this key before pressing the next one.
+        wait_for_ack: Whether to wait for the box to acknowledge this key
+            before starting the delay.
+    """
+
+    key: KeyCode
+    delay: float = 0.0
+    wait_for_ack: bool = False
+
+
+class MacroFrame(NamedTuple):
+    """A pre-serialized step of a compiled macro."""
+
+    payload: str
+    delay: float
+    reply_action: Optional[str]
+    wait_for_ack: bool
+
+
+class CompiledMacro(NamedTuple):
+    """A macro ready to be replayed by any driver of the model it was built for."""
+
+    name: str
+    frames: Tuple[MacroFrame, ...]
+
+    @property
+    def duration(self) -> float:
+        """The seconds spent in inter-key delays, acknowledgements not included."""
+        return sum(frame.delay for frame in self.frames)
+
+    @property
+    def acknowledged_steps(self) -> int:
+        """The number of steps that wait for an acknowledgement."""
+        return sum(1 for frame in self.frames if frame.wait_for_ack)
+
+
+_MACRO_CACHE: Dict[Tuple[Any, ...], CompiledMacro] = {}
+
+
+def channel_steps(channel: Union[int, str], delay: float = 0.0) -> List[MacroStep]:
+    """Build the digit key presses needed to tune to a channel number.
+
+    Args:
+        channel: The channel number, e.g. `123`.
+        delay: Seconds to wait between two digits.
+
+    Returns:
+        One step per digit.
+    """
+    digits = str(channel)
+    if not digits.isdigit():
+        raise ValueError(f"Invalid channel number: {channel!r}")
+    return [MacroStep(KeyCode[f"NUM_{digit}"], delay) for digit in digits]
+
+
+def compile_macro(driver: Any, name: str, steps: Iterable[Union[MacroStep, KeyCode]]) -> CompiledMacro:
+    """Compile a key sequence for a driver, reusing the shared cache when possible.
+
+    Args:
+        driver: The driver whose protocol the frames are built for.
+        name: A name identifying the macro.
+        steps: The key presses, as `MacroStep`s or bare `KeyCode`s.
+
+    Returns:
+        The compiled macro.
+
+    Raises:
+        ValueError: If the driver cannot build one of the keys.
+    """
+    normalized = tuple(step if isinstance(step, MacroStep) else MacroStep(step) for step in steps)
+    shared_key = driver._macro_cache_key()
+    if shared_key is None:
+        # Frames of a driver without a shared key are kept by that driver, and dropped with it.
+        if driver._macro_cache is None:
+            driver._macro_cache = {}
+        cache, cache_key = driver._macro_cache, (name, normalized)
+    else:
+        cache, cache_key = _MACRO_CACHE, (shared_key, name, normalized)
+    macro = cache.get(cache_key)
+    if macro is not None:
+        return macro
+
+    reply_action = driver._REPLY_ACTIONS.get(CommandType.SEND_KEY)
+    frames = []
+    for step in normalized:
+        payload = driver._build_command(CommandType.SEND_KEY, key=step.key)
+        if not payload:
+            raise ValueError(f"Macro '{name}': key {step.key} is not supported by {type(driver).__name__}.")
+        if step.wait_for_ack and not reply_action:
+            raise ValueError(f"Macro '{name}': {type(driver).__name__} cannot wait for key acknowledgements.")
+        frames.append(MacroFrame(payload, step.delay, reply_action, step.wait_for_ack))
+    macro = CompiledMacro(name, tuple(frames))
+
+    if len(cache) >= MACRO_CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[cache_key] = macro
+    return macro
+
+
+def clear_macro_cache() -> None:
+    """Forget every compiled macro."""
+    _MACRO_CACHE.clear()
+
+
+async def sleep_until(deadline: float) -> None:
+    """Sleep until an absolute event loop time.
+
+    Unlike chained `asyncio.sleep` calls, scheduling against absolute deadlines
+    does not accumulate the wake-up latency of each step.
+
+    Args:
+        deadline: The target `loop.time()` value.
+    """
+    loop = asyncio.get_running_loop()
+    if deadline <= loop.time():
+        return
+    future = loop.create_future()
+    handle = loop.call_at(deadline, _wake_up, future)
+    try:
+        await future
+    finally:
+        handle.cancel()
+
+
+def _wake_up(future: asyncio.Future) -> None:
+    """Timer callback resolving a `sleep_until` future."""
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,365 @@
+"""Lightweight metrics for the drivers, with Prometheus text exposition.
+
+A `MetricsRegistry` holds metric families (counters, gauges and fixed-bucket
+histograms), each with one child per label set. Updating a child is a couple
+of attribute operations, cheap enough to stay enabled on the hot path; all the
+formatting work is deferred to `snapshot()` and `render_prometheus()`.
+
+Every driver records into a `DriverMetrics`. By default it lives in a private
+registry; a service exposing many boxes passes a shared registry to
+`BaseSFRBoxDriver.attach_metrics`, where each driver is told apart by its
+`host` and `port` labels.
+"""
+
+from bisect import bisect_left
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# Upper bounds, in seconds, of the latency histograms (the +Inf bucket is implicit).
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """A monotonically increasing value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        """Initializes the counter at zero."""
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increases the counter."""
+        self.value += amount
+
+
+class Gauge:
+    """A value that can go up and down."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        """Initializes the gauge at zero."""
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        """Sets the gauge."""
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increases the gauge."""
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decreases the gauge."""
+        self.value -= amount
+
+
+class Histogram:
+    """Counts observations into fixed buckets.
+
+    Only the bucket an observation falls in is incremented; the cumulative
+    counts of the Prometheus format are computed when rendering.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """Initializes an empty histogram.
+
+        Args:
+            buckets: The sorted upper bounds of the buckets.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Records an observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """Returns the (upper bound, cumulative count) of every bucket, +Inf included."""
+        total = 0
+        cumulative = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts, strict=True):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class _MetricFamily:
+    """A named metric and its children, one per label set."""
+
+    __slots__ = ("name", "kind", "documentation", "buckets", "children", "label_pairs")
+
+    def __init__(self, name: str, kind: str, documentation: str, buckets: Optional[Sequence[float]] = None):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.buckets = buckets
+        self.children: Dict[LabelSet, Metric] = {}
+        # The formatted `key="value"` pairs of each child, so that rendering does not redo them.
+        self.label_pairs: Dict[LabelSet, str] = {}
+
+    def child(self, labels: LabelSet) -> Metric:
+        """Returns the child for a label set, creating it if needed."""
+        metric = self.children.get(labels)
+        if metric is None:
+            if self.kind == COUNTER:
+                metric = Counter()
+            elif self.kind == GAUGE:
+                metric = Gauge()
+            else:
+                metric = Histogram(self.buckets)
+            self.children[labels] = metric
+            self.label_pairs[labels] = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+        return metric
+
+    def remove(self, labels: LabelSet) -> None:
+        """Removes the child for a label set."""
+        del self.children[labels]
+        del self.label_pairs[labels]
+
+
+class MetricsRegistry:
+    """A collection of metric families that can be snapshotted and rendered."""
+
+    def __init__(self):
+        """Initializes an empty registry."""
+        self._families: Dict[str, _MetricFamily] = {}
+
+    def _family(self, name: str, kind: str, documentation: str, buckets: Optional[Sequence[float]] = None) -> _MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = _MetricFamily(name, kind, documentation, buckets)
+        elif family.kind != kind:
+            raise ValueError(f"Metric '{name}' is already registered as a {family.kind}.")
+        return family
+
+    def counter(self, name: str, documentation: str, **labels: str) -> Counter:
+        """Returns the counter with this name and labels, creating it if needed."""
+        return self._family(name, COUNTER, documentation).child(_label_set(labels))
+
+    def gauge(self, name: str, documentation: str, **labels: str) -> Gauge:
+        """Returns the gauge with this name and labels, creating it if needed."""
+        return self._family(name, GAUGE, documentation).child(_label_set(labels))
+
+    def histogram(
+        self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS, **labels: str
+    ) -> Histogram:
+        """Returns the histogram with this name and labels, creating it if needed."""
+        return self._family(name, HISTOGRAM, documentation, buckets).child(_label_set(labels))
+
+    def unregister(self, **labels: str) -> None:
+        """Removes the children of every family carrying all of these labels."""
+        wanted = set(_label_set(labels))
+        for family in self._families.values():
+            for label_set in [label_set for label_set in family.children if wanted <= set(label_set)]:
+                family.remove(label_set)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the current value of every metric.
+
+        Returns:
+            For each family name, its type, help text and samples. A sample holds
+            its labels and either a value or, for histograms, its cumulative
+            buckets, sum and count.
+        """
+        snapshot = {}
+        for name, family in self._families.items():
+            samples = []
+            for labels, metric in family.children.items():
+                if isinstance(metric, Histogram):
+                    samples.append(
+                        {
+                            "labels": dict(labels),
+                            "buckets": metric.cumulative_counts(),
+                            "sum": metric.sum,
+                            "count": metric.count,
+                        }
+                    )
+                else:
+                    samples.append({"labels": dict(labels), "value": metric.value})
+            snapshot[name] = {"type": family.kind, "help": family.documentation, "samples": samples}
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """Renders every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, family in self._families.items():
+            lines.append(f"# HELP {name} {_escape_help(family.documentation)}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            if family.kind == HISTOGRAM:
+                bounds = [_format_value(bound) for bound in tuple(family.buckets) + (float("inf"),)]
+            for labels, metric in family.children.items():
+                pairs = family.label_pairs[labels]
+                label_text = "{" + pairs + "}" if pairs else ""
+                if isinstance(metric, Histogram):
+                    prefix = f"{name}_bucket{{{pairs}," if pairs else f"{name}_bucket{{"
+                    for bound, (_, count) in zip(bounds, metric.cumulative_counts(), strict=True):
+                        lines.append(f'{prefix}le="{bound}"}} {count}')
+                    lines.append(f"{name}_sum{label_text} {_format_value(metric.sum)}")
+                    lines.append(f"{name}_count{label_text} {metric.count}")
+                else:
+                    lines.append(f"{name}{label_text} {_format_value(metric.value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+class DriverMetrics:
+    """The metrics recorded by one driver.
+
+    Attributes:
+        frames_sent: Frames written to the WebSocket.
+        frames_received: Frames read from the WebSocket.
+        bytes_sent: Bytes of frame payload written to the WebSocket, text frames counted in UTF-8.
+        bytes_received: Bytes of frame payload read from the WebSocket, text frames counted in UTF-8.
+        send_failures: Frames that could not be written.
+        request_timeouts: Requests whose reply never arrived.
+        connections: Successful connections, reconnections included.
+        connect_failures: Failed connection attempts.
+        connected: 1 while the WebSocket is open, 0 otherwise.
+        reply_latency: Seconds between writing a command and reading its reply.
+        collapsed_requests: Requests answered by the reply to an identical request in flight.
+        cached_replies: Requests answered from the reply cache, without a frame.
+        dead_peers: Connections dropped because the box stopped answering heartbeats.
+        heartbeat_rtt: Smoothed round-trip time of the heartbeat probes, in seconds.
+    """
+
+    __slots__ = (
+        "registry",
+        "labels",
+        "frames_sent",
+        "frames_received",
+        "bytes_sent",
+        "bytes_received",
+        "send_failures",
+        "request_timeouts",
+        "connections",
+        "connect_failures",
+        "connected",
+        "reply_latency",
+        "collapsed_requests",
+        "cached_replies",
+        "dead_peers",
+        "heartbeat_rtt",
+    )
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, **labels: str):
+        """Registers the driver metrics.
+
+        Args:
+            registry: The registry to record into, a private one by default.
+            **labels: The labels telling this driver apart in the registry.
+        """
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.labels = labels
+        registry = self.registry
+        self.frames_sent = registry.counter("sfr_box_frames_sent_total", "Frames written to the WebSocket.", **labels)
+        self.frames_received = registry.counter("sfr_box_frames_received_total", "Frames read from the WebSocket.", **labels)
+        self.bytes_sent = registry.counter("sfr_box_sent_bytes_total", "Payload bytes written to the WebSocket.", **labels)
+        self.bytes_received = registry.counter(
+            "sfr_box_received_bytes_total", "Payload bytes read from the WebSocket.", **labels
+        )
+        self.send_failures = registry.counter("sfr_box_send_failures_total", "Frames that could not be written.", **labels)
+        self.request_timeouts = registry.counter(
+            "sfr_box_request_timeouts_total", "Requests whose reply never arrived.", **labels
+        )
+        self.connections = registry.counter(
+            "sfr_box_connections_total", "Successful connections, reconnections included.", **labels
+        )
+        self.connect_failures = registry.counter("sfr_box_connect_failures_total", "Failed connection attempts.", **labels)
+        self.connected = registry.gauge("sfr_box_connected", "1 while the WebSocket is open.", **labels)
+        self.reply_latency = registry.histogram(
+            "sfr_box_reply_latency_seconds", "Seconds between writing a command and reading its reply.", **labels
+        )
+        self.collapsed_requests = registry.counter(
+            "sfr_box_collapsed_requests_total", "Requests answered by the reply to an identical request in flight.", **labels
+        )
+        self.cached_replies = registry.counter(
+            "sfr_box_cached_replies_total", "Requests answered from the reply cache, without a frame.", **labels
+        )
+        self.dead_peers = registry.counter(
+            "sfr_box_dead_peers_total", "Connections dropped because the box stopped answering heartbeats.", **labels
+        )
+        self.heartbeat_rtt = registry.gauge(
+            "sfr_box_heartbeat_rtt_seconds", "Smoothed round-trip time of the heartbeat probes.", **labels
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the values of this driver's metrics by attribute name."""
+        return {
+            "frames_sent": self.frames_sent.value,
+            "frames_received": self.frames_received.value,
+            "bytes_sent": self.bytes_sent.value,
+            "bytes_received": self.bytes_received.value,
+            "send_failures": self.send_failures.value,
+            "request_timeouts": self.request_timeouts.value,
+            "connections": self.connections.value,
+            "connect_failures": self.connect_failures.value,
+            "connected": self.connected.value,
+            "reply_latency_count": self.reply_latency.count,
+            "reply_latency_sum": self.reply_latency.sum,
+            "collapsed_requests": self.collapsed_requests.value,
+            "cached_replies": self.cached_replies.value,
+            "dead_peers": self.dead_peers.value,
+            "heartbeat_rtt": self.heartbeat_rtt.value,
+        }
+
+    def close(self) -> None:
+        """Removes this driver's metrics from the registry."""
+        if self.labels:
+            self.registry.unregister(**self.labels)
+
+
+def _label_set(labels: Dict[str, str]) -> LabelSet:
+    """Returns the hashable, ordered form of a label mapping."""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def payload_size(frame: Union[str, bytes]) -> int:
+    """Returns the size of a frame payload in bytes, text frames being sent as UTF-8.
+
+    ASCII text, the usual case, is measured without being encoded.
+    """
+    if isinstance(frame, str) and not frame.isascii():
+        return len(frame.encode())
+    return len(frame)
+
+
+def _format_value(value: float) -> str:
+    """Formats a sample value as Prometheus expects it."""
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
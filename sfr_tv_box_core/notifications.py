@@ -0,0 +1,154 @@
+"""Bounded asynchronous streams of the unsolicited notifications of a box.
+
+The listener API hands every notification to a callback as it is parsed,
+leaving any buffering to the consumer. A `NotificationStream` is that buffer:
+it registers itself as a listener and is consumed with `async for`. It holds
+at most `maxsize` notifications whatever the speed of the consumer, and its
+`OverflowPolicy` decides what a full buffer gives up:
+
+- `DROP_OLDEST` keeps the most recent notifications;
+- `DROP_NEWEST` keeps the oldest ones, refusing the new;
+- `LATEST_PER_KEY` keeps only the latest notification of each state key (the
+  power state, by default), so that a slow consumer sees the current state of
+  the box rather than a backlog of stale transitions.
+"""
+
+import asyncio
+import itertools
+from enum import StrEnum
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+
+if TYPE_CHECKING:
+    from .base_driver import BaseSFRBoxDriver
+    from .base_driver import BoxResponse
+
+# Notifications buffered by a stream before its overflow policy applies.
+DEFAULT_NOTIFICATION_BUFFER = 64
+
+
+class OverflowPolicy(StrEnum):
+    """What a full notification stream gives up for a new notification."""
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    LATEST_PER_KEY = "latest_per_key"
+
+
+class NotificationStream:
+    """The notifications of one box, buffered for an `async for` consumer.
+
+    Use it as an async context manager, or call `close`, to stop receiving
+    notifications: the stream survives the disconnections of the driver.
+
+    Attributes:
+        policy: What a full buffer gives up for a new notification.
+        maxsize: The most notifications buffered.
+        dropped: The notifications lost to the overflow policy.
+        coalesced: The notifications replaced by a later one with the same key.
+    """
+
+    def __init__(
+        self,
+        driver: "BaseSFRBoxDriver",
+        policy: OverflowPolicy = OverflowPolicy.LATEST_PER_KEY,
+        maxsize: int = DEFAULT_NOTIFICATION_BUFFER,
+        key: Optional[Callable[["BoxResponse"], Hashable]] = None,
+    ):
+        """Starts buffering the notifications of the driver.
+
+        Args:
+            driver: The driver of the box.
+            policy: What a full buffer gives up for a new notification.
+            maxsize: The most notifications buffered.
+            key: With `LATEST_PER_KEY`, maps a notification to the state it
+                reports. Defaults to the driver's own notification key.
+
+        Raises:
+            ValueError: If `maxsize` is not positive.
+        """
+        if maxsize < 1:
+            raise ValueError("The notification buffer must hold at least one notification.")
+        self.policy = OverflowPolicy(policy)
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.coalesced = 0
+        self._driver = driver
+        self._key = key or driver._notification_key
+        # Insertion-ordered: by state key with LATEST_PER_KEY, by arrival number otherwise.
+        self._buffer: Dict[Hashable, "BoxResponse"] = {}
+        self._sequence = itertools.count()
+        self._waiter: Optional[asyncio.Future] = None
+        self._closed = False
+        driver.register_notification_listener(self._on_notification)
+
+    def __len__(self) -> int:
+        """Returns the number of notifications waiting to be consumed."""
+        return len(self._buffer)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the stream stopped receiving notifications."""
+        return self._closed
+
+    def close(self) -> None:
+        """Stops receiving notifications, drops the buffered ones and ends the iteration."""
+        if self._closed:
+            return
+        self._closed = True
+        self._driver.unregister_notification_listener(self._on_notification)
+        self._buffer.clear()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self) -> "NotificationStream":
+        """Returns the stream itself."""
+        return self
+
+    async def __anext__(self) -> "BoxResponse":
+        """Waits for the next notification.
+
+        Raises:
+            StopAsyncIteration: Once the stream is closed.
+        """
+        while not self._buffer:
+            if self._closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._buffer.pop(next(iter(self._buffer)))
+
+    async def __aenter__(self) -> "NotificationStream":
+        """Returns the stream itself."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Closes the stream."""
+        self.close()
+
+    def _on_notification(self, response: "BoxResponse") -> None:
+        """Buffers a notification according to the overflow policy."""
+        buffer = self._buffer
+        if self.policy is OverflowPolicy.LATEST_PER_KEY:
+            key = self._key(response)
+            if key in buffer:
+                # Moved to the end: the notification is now the newest one.
+                del buffer[key]
+                self.coalesced += 1
+        else:
+            key = next(self._sequence)
+        if len(buffer) >= self.maxsize:
+            self.dropped += 1
+            if self.policy is OverflowPolicy.DROP_NEWEST:
+                return
+            del buffer[next(iter(buffer))]
+        buffer[key] = response
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
@@ -0,0 +1,118 @@
+"""Shared codec for the STB7 and LaBox `{"Params": ...}` protocol.
+
+Both models wrap every command in a `Params` object with PascalCase keys and
+only differ by the integer values of their keycodes. Nothing in a frame varies
+between two sends of the same command, so each model's keycode table is
+compiled once, at import time, into pre-serialized frame tails. Building a
+frame then only joins the per-device header with the right tail.
+"""
+
+from typing import Any
+from typing import Dict
+from typing import Mapping
+from typing import Optional
+
+from . import serializer
+from .base_driver import BoxResponse
+from .constants import CommandType
+from .constants import KeyCode
+
+PARAMS_TOKEN = "LAN"
+
+# Identity of the controlling client, sent in every frame as the APK does.
+DEFAULT_CLIENT_MODEL = "sfr-tv-box-remote"
+DEFAULT_CLIENT_SOFT_VERSION = "0.1.0"
+
+PARAMS_REPLY_ACTIONS: Dict[CommandType, str] = {
+    CommandType.SEND_KEY: "ButtonEvent",
+    CommandType.GET_STATUS: "GetSessionsStatus",
+    CommandType.GET_VERSIONS: "GetVersions",
+}
+
+
+def _compile_tail(fields: Dict[str, Any]) -> str:
+    """Serialize the trailing fields of a frame, closing both JSON objects."""
+    return serializer.dumps(fields)[1:] + "}"
+
+
+def compile_key_templates(keycodes: Mapping[KeyCode, int]) -> Dict[KeyCode, str]:
+    """Compile a model's keycode table into pre-serialized `ButtonEvent` tails.
+
+    Args:
+        keycodes: The mapping from abstract KeyCode to the model's integer value.
+
+    Returns:
+        The mapping from KeyCode to the serialized end of its frame.
+    """
+    return {key: _compile_tail({"Action": "ButtonEvent", "Press": [code]}) for key, code in keycodes.items()}
+
+
+_GET_STATUS_TAIL = _compile_tail({"Action": PARAMS_REPLY_ACTIONS[CommandType.GET_STATUS]})
+_GET_VERSIONS_TAIL = _compile_tail({"Action": PARAMS_REPLY_ACTIONS[CommandType.GET_VERSIONS]})
+
+
+class _ParamsCommandCodec:
+    """Builds and parses the JSON frames of the `{"Params": ...}` protocol."""
+
+    __slots__ = ("_key_templates", "_header")
+
+    def __init__(
+        self,
+        key_templates: Mapping[KeyCode, str],
+        device_id: str,
+        device_model: str = DEFAULT_CLIENT_MODEL,
+        device_soft_version: str = DEFAULT_CLIENT_SOFT_VERSION,
+    ):
+        self._key_templates = key_templates
+        header = serializer.dumps(
+            {
+                "Token": PARAMS_TOKEN,
+                "DeviceModel": device_model,
+                "DeviceSoftVersion": device_soft_version,
+                "DeviceId": device_id,
+            }
+        )
+        self._header = '{"Params":' + header[:-1] + ","
+
+    @property
+    def header(self) -> str:
+        """The serialized start of every frame built by this codec."""
+        return self._header
+
+    def build_send_key(self, key: KeyCode) -> Optional[str]:
+        """Build the payload for the SEND_KEY command."""
+        tail = self._key_templates.get(key)
+        if tail is None:
+            return None
+        return self._header + tail
+
+    def build_get_status(self) -> str:
+        """Build the payload for the GET_STATUS command."""
+        return self._header + _GET_STATUS_TAIL
+
+    def build_get_versions(self) -> str:
+        """Build the payload for the GET_VERSIONS command."""
+        return self._header + _GET_VERSIONS_TAIL
+
+    @staticmethod
+    def parse_response(message: str) -> Optional[BoxResponse]:
+        """Parse a reply or a `Notification` frame (PascalCase keys)."""
+        try:
+            frame = serializer.loads(message)
+        except ValueError:
+            return None
+        if not isinstance(frame, dict):
+            return None
+        if "Notification" in frame:
+            notification = frame["Notification"]
+            return BoxResponse(
+                action=None,
+                success=True,
+                data=notification if isinstance(notification, dict) else {},
+            )
+        data = frame.get("Data")
+        return BoxResponse(
+            action=frame.get("Action"),
+            success=frame.get("RemoteResponseCode") != "KO",
+            data=data if isinstance(data, dict) else {},
+        )
@@ -0,0 +1,137 @@
+"""Token bucket rate limiter adapting to the acknowledgement latency of a box.
+
+Boxes drop key presses when commands arrive faster than their UI processes
+them. Instead of fixed sleeps, each driver paces its commands with a token
+bucket whose refill rate follows an additive-increase/multiplicative-decrease
+rule: every fast and successful acknowledgement raises the rate a little, while
+a slow acknowledgement or a "KO" reply cuts it, at most once per measured
+latency period so a single congestion episode is not punished repeatedly.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+DEFAULT_SEND_RATE = 10.0
+DEFAULT_MIN_SEND_RATE = 1.0
+DEFAULT_MAX_SEND_RATE = 50.0
+DEFAULT_SEND_BURST = 5
+DEFAULT_TARGET_ACK_LATENCY = 0.25
+
+
+class AdaptiveRateLimiter:
+    """Paces outgoing commands for one box.
+
+    Rates are expressed in commands per second.
+    """
+
+    __slots__ = (
+        "_rate",
+        "_min_rate",
+        "_max_rate",
+        "_burst",
+        "_target_latency",
+        "_increase_step",
+        "_decrease_factor",
+        "_smoothing",
+        "_tokens",
+        "_refilled_at",
+        "_decreased_at",
+        "_latency",
+        "_ko_ratio",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_SEND_RATE,
+        min_rate: float = DEFAULT_MIN_SEND_RATE,
+        max_rate: float = DEFAULT_MAX_SEND_RATE,
+        burst: int = DEFAULT_SEND_BURST,
+        target_latency: float = DEFAULT_TARGET_ACK_LATENCY,
+        increase_step: float = 0.5,
+        decrease_factor: float = 0.5,
+        smoothing: float = 0.2,
+    ):
+        """Initializes the limiter.
+
+        Args:
+            rate: The initial rate.
+            min_rate: The rate never goes below this value.
+            max_rate: The rate never goes above this value.
+            burst: The number of commands that may be sent back to back.
+            target_latency: Acknowledgements slower than this (in seconds) slow the rate down.
+            increase_step: Rate added after each fast, successful acknowledgement.
+            decrease_factor: Factor applied to the rate when the box lags or fails.
+            smoothing: Weight of the newest sample in the latency and KO averages.
+        """
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("Rates must satisfy 0 < min_rate <= rate <= max_rate.")
+        if burst < 1:
+            raise ValueError("Burst must be at least 1.")
+        self._rate = rate
+        self._min_rate = min_rate
+        self._max_rate = max_rate
+        self._burst = burst
+        self._target_latency = target_latency
+        self._increase_step = increase_step
+        self._decrease_factor = decrease_factor
+        self._smoothing = smoothing
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._decreased_at = float("-inf")
+        self._latency: Optional[float] = None
+        self._ko_ratio = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        """The current rate, in commands per second."""
+        return self._rate
+
+    @property
+    def latency(self) -> Optional[float]:
+        """The smoothed acknowledgement latency in seconds, None before the first ack."""
+        return self._latency
+
+    @property
+    def ko_ratio(self) -> float:
+        """The smoothed share of acknowledgements that failed."""
+        return self._ko_ratio
+
+    def _refill(self) -> None:
+        """Adds the tokens earned since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    async def acquire(self) -> None:
+        """Waits until a command may be sent, in arrival order."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+                self._refill()
+            self._tokens -= 1
+
+    def record_ack(self, latency: float, success: bool) -> None:
+        """Adapts the rate to an acknowledgement.
+
+        Args:
+            latency: Seconds between sending the command and receiving its reply.
+                Timeouts are reported with the timeout as latency.
+            success: False for "KO" replies and timeouts.
+        """
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += self._smoothing * (latency - self._latency)
+        self._ko_ratio += self._smoothing * ((0.0 if success else 1.0) - self._ko_ratio)
+
+        if success and latency <= self._target_latency:
+            self._rate = min(self._max_rate, self._rate + self._increase_step)
+            return
+        now = time.monotonic()
+        if now - self._decreased_at >= self._latency:
+            self._rate = max(self._min_rate, self._rate * self._decrease_factor)
+            self._decreased_at = now
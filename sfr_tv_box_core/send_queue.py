@@ -0,0 +1,161 @@
+"""Priority lanes for the outbound commands of a driver.
+
+Power, stop and status commands must not wait behind long macros or bursts of
+navigation keys. Outgoing frames are queued in one of two lanes and the urgent
+lane is always served first, except that after `urgent_burst` consecutive
+urgent frames one waiting bulk frame goes through so bulk traffic is never
+starved.
+"""
+
+import asyncio
+from collections import deque
+from enum import IntEnum
+from typing import Deque
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .constants import CommandType
+from .constants import KeyCode
+
+DEFAULT_URGENT_BURST = 8
+
+URGENT_COMMANDS: FrozenSet[CommandType] = frozenset({CommandType.GET_STATUS})
+URGENT_KEYS: FrozenSet[KeyCode] = frozenset({KeyCode.POWER, KeyCode.STOP})
+
+
+class SendPriority(IntEnum):
+    """The lanes of the outbound path, most urgent first."""
+
+    URGENT = 0
+    BULK = 1
+
+
+def command_priority(command_type: CommandType, key: Optional[KeyCode] = None) -> SendPriority:
+    """Classify a command into its default lane.
+
+    Args:
+        command_type: The abstract CommandType being sent.
+        key: The key of a SEND_KEY command.
+
+    Returns:
+        URGENT for status queries and power/stop keys, BULK otherwise.
+    """
+    if command_type in URGENT_COMMANDS or key in URGENT_KEYS:
+        return SendPriority.URGENT
+    return SendPriority.BULK
+
+
+class QueuedFrame:
+    """An outgoing payload waiting for its turn on the socket.
+
+    Attributes:
+        payload: The serialized command.
+        action: The action carried by the reply, if the command has one.
+        pending: The reply tracking entry, when a caller awaits the reply.
+        sent: Resolved once the payload is written, or with the write error.
+        enqueued_at: `time.monotonic()` when the frame was queued.
+        trace_id: The trace of the command, 0 when it is not traced.
+    """
+
+    __slots__ = ("payload", "action", "pending", "sent", "enqueued_at", "trace_id")
+
+    def __init__(
+        self,
+        payload: str,
+        action: Optional[str],
+        pending,
+        sent: asyncio.Future,
+        enqueued_at: float,
+        trace_id: int = 0,
+    ):
+        """Initializes the frame."""
+        self.payload = payload
+        self.action = action
+        self.pending = pending
+        self.sent = sent
+        self.enqueued_at = enqueued_at
+        self.trace_id = trace_id
+
+
+class LaneStats:
+    """Queue wait statistics of one lane, in seconds."""
+
+    __slots__ = ("count", "total_wait", "max_wait")
+
+    def __init__(self):
+        """Initializes empty statistics."""
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """The average time frames spent in the lane."""
+        return self.total_wait / self.count if self.count else 0.0
+
+    def record(self, wait: float) -> None:
+        """Accounts for a frame that left the lane after `wait` seconds."""
+        self.count += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+
+class PrioritySendQueue:
+    """Two-lane queue of outgoing frames."""
+
+    __slots__ = ("_urgent_burst", "_lanes", "_stats", "_urgent_streak")
+
+    def __init__(self, urgent_burst: int = DEFAULT_URGENT_BURST):
+        """Initializes the queue.
+
+        Args:
+            urgent_burst: Consecutive urgent frames served before a waiting bulk frame.
+        """
+        self._urgent_burst = urgent_burst
+        # Lanes are created on first use, so that idle drivers hold no deque blocks.
+        self._lanes: Dict[SendPriority, Deque[QueuedFrame]] = {}
+        self._stats: Dict[SendPriority, LaneStats] = {priority: LaneStats() for priority in SendPriority}
+        self._urgent_streak = 0
+
+    def __len__(self) -> int:
+        """The number of frames waiting in all lanes."""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    @property
+    def stats(self) -> Dict[SendPriority, LaneStats]:
+        """The queue wait statistics of each lane."""
+        return self._stats
+
+    def put(self, frame: QueuedFrame, priority: SendPriority) -> None:
+        """Queues a frame in a lane."""
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = deque()
+        lane.append(frame)
+
+    def pop(self) -> Optional[Tuple[QueuedFrame, SendPriority]]:
+        """Takes the next frame to send, or None when all lanes are empty."""
+        urgent = self._lanes.get(SendPriority.URGENT)
+        bulk = self._lanes.get(SendPriority.BULK)
+        if urgent and (not bulk or self._urgent_streak < self._urgent_burst):
+            self._urgent_streak += 1
+            return urgent.popleft(), SendPriority.URGENT
+        self._urgent_streak = 0
+        if bulk:
+            return bulk.popleft(), SendPriority.BULK
+        return None
+
+    def clear(self) -> List[QueuedFrame]:
+        """Empties every lane and returns the frames that were waiting."""
+        frames = [frame for lane in self._lanes.values() for frame in lane]
+        for lane in self._lanes.values():
+            lane.clear()
+        return frames
+
+    def record_sent(self, priority: SendPriority, wait: float) -> None:
+        """Accounts for a frame written after waiting `wait` seconds."""
+        self._stats[priority].record(wait)
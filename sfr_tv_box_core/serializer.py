@@ -0,0 +1,94 @@
+"""Pluggable JSON serialization of the WebSocket frames.
+
+Every frame built or parsed by the drivers goes through `dumps` and `loads`.
+They use the fastest installed backend: `orjson` when available, the standard
+library `json` module otherwise. Both backends produce byte-identical compact
+frames, so the backend in use never shows on the wire.
+
+Call them as `serializer.dumps(...)` rather than importing the functions, so
+that `set_backend` also applies to modules imported before it is called.
+"""
+
+import json
+import logging
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from typing import Union
+
+_LOGGER = logging.getLogger(__name__)
+
+STDLIB_BACKEND = "json"
+ORJSON_BACKEND = "orjson"
+
+
+class JsonBackend(NamedTuple):
+    """A JSON library able to encode and decode frames."""
+
+    name: str
+    dumps: Callable[[Any], str]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+def _stdlib_backend() -> JsonBackend:
+    """Wraps the standard library `json` module to produce orjson's output."""
+    encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    return JsonBackend(STDLIB_BACKEND, encoder.encode, json.loads)
+
+
+def _orjson_backend() -> JsonBackend:
+    """Wraps `orjson`, raising ImportError if it is not installed."""
+    import orjson
+
+    orjson_dumps = orjson.dumps
+
+    def dumps(obj: Any) -> str:
+        return orjson_dumps(obj).decode()
+
+    return JsonBackend(ORJSON_BACKEND, dumps, orjson.loads)
+
+
+def available_backends() -> Dict[str, JsonBackend]:
+    """Returns the installed backends by name, the preferred one last."""
+    backends = {STDLIB_BACKEND: _stdlib_backend()}
+    try:
+        backends[ORJSON_BACKEND] = _orjson_backend()
+    except ImportError:
+        pass
+    return backends
+
+
+def get_backend() -> JsonBackend:
+    """Returns the backend in use."""
+    return _backend
+
+
+def set_backend(name: str) -> JsonBackend:
+    """Selects the backend used by `dumps` and `loads`.
+
+    Args:
+        name: The name of an installed backend.
+
+    Returns:
+        The backend now in use.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    global _backend, dumps, loads
+    backends = available_backends()
+    if name not in backends:
+        raise ValueError(f"JSON backend '{name}' is not available (installed: {', '.join(backends)}).")
+    _backend = backends[name]
+    dumps, loads = _backend.dumps, _backend.loads
+    _LOGGER.debug("Using the %s JSON backend.", name)
+    return _backend
+
+
+_backend: JsonBackend = list(available_backends().values())[-1]
+
+# Serializes an object to a compact JSON str.
+dumps: Callable[[Any], str] = _backend.dumps
+# Deserializes a JSON str or bytes, raising ValueError if it is malformed.
+loads: Callable[[Union[str, bytes]], Any] = _backend.loads
@@ -0,0 +1,253 @@
+"""Local simulator of the STB8 WebSocket protocol.
+
+`STB8Simulator` serves the protocol described in `docs/COMMANDS_SPEC.md` on a
+local port: it answers `buttonEvent`, `getStatus` and `getVersions` with the
+generic response wrapper, toggles its power state on the `power` key and
+pushes the matching unsolicited power notification to every connected client.
+Latency, jitter, dropped replies and "KO" replies can be configured to mimic
+slow or flaky boxes. Replies do not carry the `requestId` of the command,
+unless `echo_request_id` is set: no box is known to echo it.
+
+`SimulatorFleet` starts many simulators from one process, which is how the
+tests and benchmarks stand in for a wall of real hardware.
+"""
+
+import asyncio
+import logging
+import random
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import websockets
+
+from . import serializer
+
+_LOGGER = logging.getLogger(__name__)
+
+POWER_ON = "powerOn"
+POWER_OFF = "powerOff"
+SIMULATED_SOFTWARE_VERSION = "simulated-1.0"
+
+# Simulators started concurrently by a fleet, to stay clear of the accept backlog.
+_FLEET_START_BATCH = 256
+
+
+class STB8Simulator:
+    """A simulated STB8 serving the WebSocket protocol on a local port."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        device_id: str = "simulated-stb8",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        ko_rate: float = 0.0,
+        power: str = POWER_ON,
+        seed: Optional[int] = None,
+        echo_request_id: bool = False,
+    ):
+        """Initializes the simulator.
+
+        Args:
+            host: The address to listen on.
+            port: The port to listen on, 0 to pick a free one.
+            device_id: The `deviceId` reported in replies.
+            latency: Seconds the box takes to answer each command.
+            jitter: Maximum random deviation, in seconds, added to the latency.
+            drop_rate: Probability that a command is never answered.
+            ko_rate: Probability that a command is answered with "KO".
+            power: The initial power state.
+            seed: Seed of the random generator, for reproducible runs.
+            echo_request_id: Whether replies carry the `requestId` of their command.
+        """
+        self._host = host
+        self._port = port
+        self._device_id = device_id
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.ko_rate = ko_rate
+        self.power = power
+        self.echo_request_id = echo_request_id
+        self._rng = random.Random(seed)
+        self._server: Optional[Any] = None
+        self._clients: Set[Any] = set()
+        self._frozen: Set[Any] = set()
+        self.received = 0
+        self.replied = 0
+        self.dropped = 0
+
+    @property
+    def host(self) -> str:
+        """The address the simulator listens on."""
+        return self._host
+
+    @property
+    def port(self) -> int:
+        """The port the simulator listens on, resolved once started."""
+        return self._port
+
+    @property
+    def client_count(self) -> int:
+        """The number of connected clients."""
+        return len(self._clients)
+
+    async def start(self) -> None:
+        """Starts listening."""
+        self._server = await websockets.serve(self._serve_client, self._host, self._port)
+        self._port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.debug("STB8 simulator listening on %s:%d", self._host, self._port)
+
+    async def stop(self) -> None:
+        """Disconnects every client and stops listening."""
+        # Frozen connections would never complete the closing handshake.
+        for client in self._frozen:
+            client.transport.abort()
+        self._frozen.clear()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "STB8Simulator":
+        """Starts the simulator for the duration of an `async with` block."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Stops the simulator at the end of an `async with` block."""
+        await self.stop()
+
+    async def disconnect_clients(self) -> None:
+        """Drops every client connection, as a rebooting box would."""
+        await asyncio.gather(*(client.close() for client in list(self._clients)), return_exceptions=True)
+
+    def freeze(self) -> None:
+        """Stops reading the open connections without closing them, as a box losing power would.
+
+        Nothing is answered on these connections anymore, WebSocket pings
+        included, while new connections are served normally.
+        """
+        for client in self._clients:
+            client.transport.pause_reading()
+            self._frozen.add(client)
+
+    async def notify_power(self, power: str) -> None:
+        """Changes the power state and notifies every connected client.
+
+        Args:
+            power: `powerOn` or `powerOff`.
+        """
+        self.power = power
+        notification = serializer.dumps({"data": {"status": power}})
+        await asyncio.gather(*(client.send(notification) for client in list(self._clients)), return_exceptions=True)
+
+    async def _serve_client(self, websocket: Any, *_: Any) -> None:
+        """Serves one client connection until it closes."""
+        self._clients.add(websocket)
+        try:
+            async for message in websocket:
+                await self._handle_frame(websocket, message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(websocket)
+
+    async def _handle_frame(self, websocket: Any, message: Any) -> None:
+        """Answers one command frame."""
+        self.received += 1
+        try:
+            frame = serializer.loads(message)
+        except ValueError:
+            return
+        if not isinstance(frame, dict):
+            return
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            self.dropped += 1
+            return
+        delay = self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        action = frame.get("action")
+        params = frame.get("params") or {}
+        data = self._answer(action, params)
+        success = data is not None and not (self.ko_rate and self._rng.random() < self.ko_rate)
+        reply = {
+            "remoteResponseCode": "OK" if success else "KO",
+            "action": action,
+            "deviceId": self._device_id,
+            "data": data if success else {},
+        }
+        # Echoed on request only, to exercise the routing by ID of clients multiplexing a connection.
+        if self.echo_request_id and "requestId" in frame:
+            reply["requestId"] = frame["requestId"]
+        await websocket.send(serializer.dumps(reply))
+        self.replied += 1
+
+        if success and action == "buttonEvent" and params.get("key") == "power":
+            await self.notify_power(POWER_OFF if self.power == POWER_ON else POWER_ON)
+
+    def _answer(self, action: Optional[str], params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Computes the `data` of a reply, None for unknown commands."""
+        if action == "buttonEvent" and "key" in params:
+            return {}
+        if action == "getStatus":
+            return {"power": self.power}
+        if action == "getVersions":
+            return {"deviceName": params.get("deviceName"), "softwareVersion": SIMULATED_SOFTWARE_VERSION}
+        return None
+
+
+class SimulatorFleet:
+    """Many simulated boxes served from one process."""
+
+    def __init__(self, count: int, host: str = "127.0.0.1", base_port: int = 0, seed: Optional[int] = None, **options: Any):
+        """Initializes the fleet.
+
+        Args:
+            count: The number of simulated boxes.
+            host: The address every simulator listens on.
+            base_port: Port of the first box, the others follow it; 0 picks free ports.
+            seed: Base seed of the random generators, each box gets its own derived seed.
+            **options: Options passed to every `STB8Simulator`.
+        """
+        self.simulators: List[STB8Simulator] = [
+            STB8Simulator(
+                host=host,
+                port=base_port + i if base_port else 0,
+                device_id=f"simulated-stb8-{i}",
+                seed=None if seed is None else seed + i,
+                **options,
+            )
+            for i in range(count)
+        ]
+
+    @property
+    def addresses(self) -> List[Tuple[str, int]]:
+        """The (host, port) of every simulated box."""
+        return [(simulator.host, simulator.port) for simulator in self.simulators]
+
+    async def start(self) -> None:
+        """Starts every simulated box."""
+        for i in range(0, len(self.simulators), _FLEET_START_BATCH):
+            await asyncio.gather(*(simulator.start() for simulator in self.simulators[i : i + _FLEET_START_BATCH]))
+
+    async def stop(self) -> None:
+        """Stops every simulated box."""
+        await asyncio.gather(*(simulator.stop() for simulator in self.simulators))
+
+    async def __aenter__(self) -> "SimulatorFleet":
+        """Starts the fleet for the duration of an `async with` block."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Stops the fleet at the end of an `async with` block."""
+        await self.stop()
@@ -0,0 +1,315 @@
+"""Snapshots of the last known state of the boxes, for instant warm restarts.
+
+After a restart, an application knows nothing about its boxes until each of
+them is reconnected and queried, which takes seconds on a large installation
+and shows every box as unknown in the meantime. A `StateSnapshot` keeps the
+last known state of every box (address, model and driver options, power
+state, versions and when it was last heard from) in a small local file. The address kept is the one the
+box was actually reached at, so a warm restart does not depend on resolving
+its hostname:
+
+- `load` reads it on startup, so the connection targets (`box_specs`) and the
+  state of the boxes (`restore`) are available before any connection is open;
+- `start` then reconciles the restored state with the boxes in the background
+  and saves a new snapshot every `interval` seconds;
+- `stop` saves a last snapshot.
+
+The file is compact JSON, replaced atomically so that a crash never leaves a
+truncated snapshot behind, and only rewritten when the state changed.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Type
+
+from . import serializer
+from .base_driver import BaseSFRBoxDriver
+from .base_driver import BoxState
+from .constants import DEFAULT_REQUEST_TIMEOUT
+from .constants import CommandType
+from .constants import PowerState
+from .fleet import BoxSpec
+from .labox_driver import LaBoxDriver
+from .stb7_driver import STB7Driver
+from .stb8_driver import STB8Driver
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between two snapshots.
+DEFAULT_SNAPSHOT_INTERVAL = 60.0
+# Boxes queried at the same time when reconciling a restored state.
+DEFAULT_RECONCILE_CONCURRENCY = 16
+
+# Drivers the boxes of a snapshot can be restored with, by class name.
+DRIVER_CLASSES: Dict[str, Type[BaseSFRBoxDriver]] = {
+    driver_class.__name__: driver_class for driver_class in (STB8Driver, STB7Driver, LaBoxDriver)
+}
+
+# Bumped when the layout of the file changes; older snapshots are then ignored.
+_SNAPSHOT_FORMAT = 1
+
+
+class BoxRecord(NamedTuple):
+    """The snapshot of one box.
+
+    Attributes:
+        host: The IP address the box was last reached at, or its configured
+            host while it was never reached.
+        port: The WebSocket port of the box.
+        model: The class name of the driver of the box, e.g. `STB8Driver`.
+        state: The last known state of the box.
+        options: The options of the driver of the box, e.g. `device_id`.
+    """
+
+    host: str
+    port: int
+    model: str
+    state: BoxState
+    options: Optional[Dict[str, Any]] = None
+
+
+def _encode_record(record: BoxRecord) -> List[Any]:
+    """Flattens a record into the row stored in the file."""
+    power, versions, last_seen = record.state
+    return [record.host, record.port, record.model, power, versions, last_seen, record.options or {}]
+
+
+def _decode_record(row: List[Any]) -> BoxRecord:
+    """Rebuilds a record from its row in the file."""
+    # Rows saved before the options of the drivers were kept have no options.
+    host, port, model, power, versions, last_seen, options = row if len(row) != 6 else [*row, None]
+    if options is not None and not isinstance(options, dict):
+        raise ValueError(f"invalid driver options {options!r}")
+    state = BoxState(PowerState(power) if power else None, versions, last_seen)
+    return BoxRecord(host, int(port), model, state, options)
+
+
+async def reconcile(
+    drivers: Iterable[BaseSFRBoxDriver],
+    timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    concurrency: int = DEFAULT_RECONCILE_CONCURRENCY,
+) -> int:
+    """Refreshes the state of boxes by querying their status and versions.
+
+    The drivers must be started, or managed by a `ConnectionPolicy`. Boxes that
+    do not answer keep their restored state.
+
+    Args:
+        drivers: The drivers of the boxes.
+        timeout: Seconds to wait for each reply.
+        concurrency: Boxes queried at the same time.
+
+    Returns:
+        The number of boxes that answered both queries.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def refresh(driver: BaseSFRBoxDriver) -> bool:
+        async with semaphore:
+            try:
+                await driver.send_request(CommandType.GET_STATUS, timeout=timeout)
+                await driver.send_request(CommandType.GET_VERSIONS, timeout=timeout)
+            except Exception as e:
+                _LOGGER.debug("Could not reconcile the state of %s: %s", driver.host, e)
+                return False
+            return True
+
+    return sum(await asyncio.gather(*(refresh(driver) for driver in drivers)))
+
+
+class StateSnapshot:
+    """The last known state of a set of boxes, persisted to a local file."""
+
+    def __init__(self, path: str, interval: float = DEFAULT_SNAPSHOT_INTERVAL):
+        """Initializes an empty snapshot; call `load` to read the file.
+
+        Args:
+            path: The file the snapshot is kept in.
+            interval: Seconds between two snapshots once started.
+
+        Raises:
+            ValueError: If `interval` is not positive.
+        """
+        if interval <= 0:
+            raise ValueError("The snapshot interval must be positive.")
+        self._path = path
+        self._interval = interval
+        self._records: Dict[str, BoxRecord] = {}
+        self._saved: Optional[str] = None
+        self._drivers: Mapping[str, BaseSFRBoxDriver] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def path(self) -> str:
+        """The file the snapshot is kept in."""
+        return self._path
+
+    @property
+    def records(self) -> Dict[str, BoxRecord]:
+        """The snapshot of each box, by name."""
+        return dict(self._records)
+
+    def load(self) -> Dict[str, BoxRecord]:
+        """Reads the snapshot file, replacing the records in memory.
+
+        A missing, unreadable or outdated file gives an empty snapshot.
+
+        Returns:
+            The snapshot of each box, by name.
+        """
+        try:
+            with open(self._path, encoding="utf-8") as file:
+                text = file.read()
+        except FileNotFoundError:
+            self._records = {}
+            return {}
+        except OSError as e:
+            _LOGGER.warning("Could not read the state snapshot %s: %s", self._path, e)
+            self._records = {}
+            return {}
+        try:
+            snapshot = serializer.loads(text)
+            if snapshot.get("format") != _SNAPSHOT_FORMAT:
+                raise ValueError(f"unsupported format {snapshot.get('format')!r}")
+            self._records = {name: _decode_record(row) for name, row in snapshot["boxes"].items()}
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            _LOGGER.warning("Ignoring the invalid state snapshot %s: %s", self._path, e)
+            self._records = {}
+            return {}
+        self._saved = text
+        return self.records
+
+    def box_specs(self) -> List[BoxSpec]:
+        """The connection targets of the boxes of the snapshot, e.g. for a `FleetRunner`.
+
+        Boxes of an unknown model are skipped.
+        """
+        specs = []
+        for name, record in self._records.items():
+            driver_class = DRIVER_CLASSES.get(record.model)
+            if driver_class is None:
+                _LOGGER.warning("Skipping %s: model '%s' is not supported.", name, record.model)
+                continue
+            specs.append(BoxSpec(name, record.host, record.port, driver_class, record.options))
+        return specs
+
+    def restore(self, drivers: Mapping[str, BaseSFRBoxDriver]) -> int:
+        """Seeds the drivers with the state of their box in the snapshot.
+
+        Args:
+            drivers: The drivers, by box name.
+
+        Returns:
+            The number of drivers restored.
+        """
+        restored = 0
+        for name, driver in drivers.items():
+            record = self._records.get(name)
+            if record is not None:
+                driver.restore_state(record.state)
+                restored += 1
+        return restored
+
+    def capture(self, drivers: Mapping[str, BaseSFRBoxDriver]) -> None:
+        """Records the current state of the drivers into the snapshot.
+
+        Boxes that are not among the drivers keep their record, and
+        disconnected drivers the address their box was last reached at.
+
+        Args:
+            drivers: The drivers, by box name.
+        """
+        for name, driver in drivers.items():
+            host = driver.peer_address
+            if host is None:
+                previous = self._records.get(name)
+                host = previous.host if previous is not None and previous.port == driver.port else driver.host
+            self._records[name] = BoxRecord(host, driver.port, type(driver).__name__, driver.state, driver.options)
+
+    def forget(self, name: str) -> None:
+        """Removes a box from the snapshot.
+
+        Args:
+            name: The name of the box.
+        """
+        self._records.pop(name, None)
+
+    def save(self) -> bool:
+        """Writes the snapshot to its file, unless it did not change since the last save.
+
+        Returns:
+            Whether the file was written.
+        """
+        text = self._encode()
+        if text == self._saved:
+            return False
+        self._write(text)
+        self._saved = text
+        return True
+
+    async def start(self, drivers: Mapping[str, BaseSFRBoxDriver], reconcile_state: bool = True) -> None:
+        """Starts saving snapshots of the drivers periodically.
+
+        Args:
+            drivers: The drivers, by box name. They must be started, or managed
+                by a `ConnectionPolicy`, for their state to be reconciled.
+            reconcile_state: Whether to query every box in the background, to
+                replace the restored state with the current one.
+        """
+        await self.stop(save=False)
+        self._drivers = drivers
+        self._tasks.append(asyncio.create_task(self._save_periodically()))
+        if reconcile_state:
+            self._tasks.append(asyncio.create_task(reconcile(drivers.values())))
+
+    async def stop(self, save: bool = True) -> None:
+        """Stops saving snapshots periodically, then saves a last one.
+
+        Args:
+            save: Whether to save a last snapshot of the drivers.
+        """
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+        self._tasks = []
+        if save and self._drivers:
+            self.capture(self._drivers)
+            await self._save_in_thread()
+
+    async def _save_periodically(self) -> None:
+        """Captures and saves the state of the drivers every interval."""
+        while True:
+            await asyncio.sleep(self._interval)
+            self.capture(self._drivers)
+            try:
+                await self._save_in_thread()
+            except OSError as e:
+                _LOGGER.warning("Could not save the state snapshot %s: %s", self._path, e)
+
+    async def _save_in_thread(self) -> None:
+        """Saves the snapshot, writing the file outside of the event loop."""
+        text = self._encode()
+        if text != self._saved:
+            await asyncio.to_thread(self._write, text)
+            self._saved = text
+
+    def _encode(self) -> str:
+        """Serializes the records."""
+        boxes = {name: _encode_record(record) for name, record in self._records.items()}
+        return serializer.dumps({"format": _SNAPSHOT_FORMAT, "boxes": boxes})
+
+    def _write(self, text: str) -> None:
+        """Replaces the file atomically with the given content."""
+        temporary = f"{self._path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temporary, self._path)
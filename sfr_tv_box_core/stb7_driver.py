@@ -0,0 +1,140 @@
+"""Driver implementation for the SFR STB7 set-top box."""
+
+import logging
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Mapping
+from typing import Optional
+
+from .base_driver import BaseSFRBoxDriver
+from .base_driver import BoxResponse
+from .constants import DEFAULT_WEBSOCKET_PORT
+from .constants import CommandType
+from .constants import KeyCode
+from .constants import PowerState
+from .params_codec import DEFAULT_CLIENT_MODEL
+from .params_codec import DEFAULT_CLIENT_SOFT_VERSION
+from .params_codec import PARAMS_REPLY_ACTIONS
+from .params_codec import _ParamsCommandCodec
+from .params_codec import compile_key_templates
+
+_LOGGER = logging.getLogger(__name__)
+
+# `CurrentApplication` of the `GetSessionsStatus` reply of a box in standby.
+STANDBY_APPLICATION = "En Veille"
+
+STB7_KEYCODES: Dict[KeyCode, int] = {
+    KeyCode.VOL_UP: 308,
+    KeyCode.VOL_DOWN: 307,
+    KeyCode.CHAN_UP: 290,
+    KeyCode.CHAN_DOWN: 291,
+    KeyCode.HOME: 292,
+    KeyCode.BACK: 27,
+    KeyCode.POWER: 303,
+    KeyCode.FFWD: 305,
+    KeyCode.REWIND: 304,
+    KeyCode.PLAY_PAUSE: 306,
+    KeyCode.STOP: 19,
+    KeyCode.RECORD: 309,
+    KeyCode.MUTE: 302,
+    KeyCode.UP: 297,
+    KeyCode.LEFT: 293,
+    KeyCode.RIGHT: 222,
+    KeyCode.DOWN: 294,
+    KeyCode.OK: 13,
+    KeyCode.NUM_0: 48,
+    KeyCode.NUM_1: 49,
+    KeyCode.NUM_2: 50,
+    KeyCode.NUM_3: 51,
+    KeyCode.NUM_4: 52,
+    KeyCode.NUM_5: 53,
+    KeyCode.NUM_6: 54,
+    KeyCode.NUM_7: 55,
+    KeyCode.NUM_8: 56,
+    KeyCode.NUM_9: 57,
+    KeyCode.DELETE: 8,
+    KeyCode.OPTIONS: 301,
+}
+
+_STB7_KEY_TEMPLATES = compile_key_templates(STB7_KEYCODES)
+
+
+class STB7Driver(BaseSFRBoxDriver):
+    """Driver for the STB7.
+
+    Implements the `{"Params": ...}` protocol with the STB7 keycode table.
+    """
+
+    _REPLY_ACTIONS = PARAMS_REPLY_ACTIONS
+    _KEY_TEMPLATES: Mapping[KeyCode, str] = _STB7_KEY_TEMPLATES
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_WEBSOCKET_PORT,
+        device_id: str = "default-stb7",
+        device_model: str = DEFAULT_CLIENT_MODEL,
+        device_soft_version: str = DEFAULT_CLIENT_SOFT_VERSION,
+    ):
+        """Initialize the driver.
+
+        Args:
+            host: The hostname or IP address of the SFR Box.
+            port: The port for the WebSocket connection.
+            device_id: The unique ID sent as `DeviceId` in every frame.
+            device_model: The client model sent as `DeviceModel`.
+            device_soft_version: The client version sent as `DeviceSoftVersion`.
+        """
+        super().__init__(host, port)
+        self._codec = _ParamsCommandCodec(self._KEY_TEMPLATES, device_id, device_model, device_soft_version)
+        self._options = {"device_id": device_id, "device_model": device_model, "device_soft_version": device_soft_version}
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """The per-device header fields of the driver."""
+        return dict(self._options)
+
+    async def _handle_message(self, message: str) -> None:
+        """Handle incoming messages from the WebSocket."""
+        suppressed = self._message_log_sampler.sample()
+        if suppressed is not None:
+            _LOGGER.info("%s received message: %s (%d not logged since the last one)", type(self).__name__, message, suppressed)
+
+    def _macro_cache_key(self) -> Hashable:
+        """Frames only depend on the keycode table and the per-device header."""
+        return (type(self), self._codec.header)
+
+    def _parse_message(self, message: str) -> Optional[BoxResponse]:
+        """Parse an incoming `{"Params": ...}` protocol message."""
+        return self._codec.parse_response(message)
+
+    def _power_state(self, response: BoxResponse) -> Optional[PowerState]:
+        """Read the power state of `GetSessionsStatus` replies.
+
+        The box is in standby when its current application is "En Veille", and
+        considered on otherwise.
+        """
+        if response.action != PARAMS_REPLY_ACTIONS[CommandType.GET_STATUS] or not response.success:
+            return None
+        return PowerState.OFF if response.data.get("CurrentApplication") == STANDBY_APPLICATION else PowerState.ON
+
+    def _build_command(self, command_type: CommandType, **kwargs: Any) -> Optional[str]:
+        """Build the payload for a command.
+
+        Args:
+            command_type: The abstract CommandType to build.
+            **kwargs: Parameters for the command.
+        """
+        if command_type == CommandType.SEND_KEY:
+            key = kwargs.get("key")
+            if not isinstance(key, KeyCode):
+                _LOGGER.error("send_command for SEND_KEY requires a 'key' of type KeyCode.")
+                return None
+            return self._codec.build_send_key(key)
+        if command_type == CommandType.GET_STATUS:
+            return self._codec.build_get_status()
+        if command_type == CommandType.GET_VERSIONS:
+            return self._codec.build_get_versions()
+        _LOGGER.warning("Unsupported command type: %s", command_type)
+        return None
@@ -1,26 +1,61 @@
 """Driver implementation for the SFR STB8 set-top box."""
 
-import json
 import logging
 import time
 from typing import Any
 from typing import Dict
+from typing import Hashable
 from typing import Optional
 
+from . import serializer
 from .base_driver import BaseSFRBoxDriver
+from .base_driver import BoxResponse
 from .constants import DEFAULT_WEBSOCKET_PORT
 from .constants import CommandType
 from .constants import KeyCode
+from .constants import PowerState
 
 _LOGGER = logging.getLogger(__name__)
 
+STB8_KEYCODES: Dict[KeyCode, str] = {
+    KeyCode.VOL_UP: "volUp",
+    KeyCode.VOL_DOWN: "volDown",
+    KeyCode.CHAN_UP: "channelUp",
+    KeyCode.CHAN_DOWN: "channelDown",
+    KeyCode.HOME: "home",
+    KeyCode.BACK: "back",
+    KeyCode.POWER: "power",
+    KeyCode.FFWD: "fastForward",
+    KeyCode.REWIND: "fastBackward",
+    KeyCode.PLAY_PAUSE: "playPause",
+    KeyCode.STOP: "stop",
+    KeyCode.RECORD: "record",
+    KeyCode.MUTE: "mute",
+    KeyCode.UP: "up",
+    KeyCode.LEFT: "left",
+    KeyCode.RIGHT: "right",
+    KeyCode.DOWN: "down",
+    KeyCode.OK: "ok",
+    KeyCode.NUM_0: "0",
+    KeyCode.NUM_1: "1",
+    KeyCode.NUM_2: "2",
+    KeyCode.NUM_3: "3",
+    KeyCode.NUM_4: "4",
+    KeyCode.NUM_5: "5",
+    KeyCode.NUM_6: "6",
+    KeyCode.NUM_7: "7",
+    KeyCode.NUM_8: "8",
+    KeyCode.NUM_9: "9",
+}
+
 
 class _STB8CommandBuilder:
     """Builds the JSON payloads for STB8 commands."""
 
+    __slots__ = ("_device_id",)
+
     def __init__(self, device_id: str):
         self._device_id = device_id
-        self._keycode_map = self._create_keycode_map()
 
     def _create_base_payload(self, action: str) -> Dict[str, Any]:
         """Creates the base dictionary for all commands."""
@@ -32,58 +67,44 @@ class _STB8CommandBuilder:
 
     def build_send_key(self, key: KeyCode) -> Optional[str]:
         """Build the payload for the SEND_KEY command."""
-        key_str = self._keycode_map.get(key)
+        key_str = STB8_KEYCODES.get(key)
         if key_str is None:
             return None
 
         payload = self._create_base_payload("buttonEvent")
         payload["params"] = {"key": key_str}
-        return json.dumps(payload)
+        return serializer.dumps(payload)
 
     def build_get_status(self) -> str:
         """Build the payload for the GET_STATUS command."""
         payload = self._create_base_payload("getStatus")
-        return json.dumps(payload)
+        return serializer.dumps(payload)
 
     def build_get_versions(self, device_name: str) -> str:
         """Build the payload for the GET_VERSIONS command."""
         payload = self._create_base_payload("getVersions")
         payload["params"] = {"deviceName": device_name}
-        return json.dumps(payload)
+        return serializer.dumps(payload)
 
     @staticmethod
-    def _create_keycode_map() -> Dict[KeyCode, str]:
-        """Creates the mapping from abstract KeyCode to STB8 string value."""
-        return {
-            KeyCode.VOL_UP: "volUp",
-            KeyCode.VOL_DOWN: "volDown",
-            KeyCode.CHAN_UP: "channelUp",
-            KeyCode.CHAN_DOWN: "channelDown",
-            KeyCode.HOME: "home",
-            KeyCode.BACK: "back",
-            KeyCode.POWER: "power",
-            KeyCode.FFWD: "fastForward",
-            KeyCode.REWIND: "fastBackward",
-            KeyCode.PLAY_PAUSE: "playPause",
-            KeyCode.STOP: "stop",
-            KeyCode.RECORD: "record",
-            KeyCode.MUTE: "mute",
-            KeyCode.UP: "up",
-            KeyCode.LEFT: "left",
-            KeyCode.RIGHT: "right",
-            KeyCode.DOWN: "down",
-            KeyCode.OK: "ok",
-            KeyCode.NUM_0: "0",
-            KeyCode.NUM_1: "1",
-            KeyCode.NUM_2: "2",
-            KeyCode.NUM_3: "3",
-            KeyCode.NUM_4: "4",
-            KeyCode.NUM_5: "5",
-            KeyCode.NUM_6: "6",
-            KeyCode.NUM_7: "7",
-            KeyCode.NUM_8: "8",
-            KeyCode.NUM_9: "9",
-        }
+    def parse_response(message: str) -> Optional[BoxResponse]:
+        """Parse an STB8 reply or notification (camelCase keys)."""
+        try:
+            frame = serializer.loads(message)
+        except ValueError:
+            return None
+        if not isinstance(frame, dict):
+            return None
+        data = frame.get("data")
+        return BoxResponse(
+            action=frame.get("action"),
+            success=frame.get("remoteResponseCode") != "KO",
+            data=data if isinstance(data, dict) else {},
+        )
+
+
+# Power values of `getStatus` replies (`power`) and power notifications (`status`).
+_STB8_POWER_STATES: Dict[Any, PowerState] = {"powerOn": PowerState.ON, "powerOff": PowerState.OFF}
 
 
 class STB8Driver(BaseSFRBoxDriver):
@@ -92,6 +113,12 @@ class STB8Driver(BaseSFRBoxDriver):
     Implements the command building and response parsing specific to this model.
     """
 
+    _REPLY_ACTIONS = {
+        CommandType.SEND_KEY: "buttonEvent",
+        CommandType.GET_STATUS: "getStatus",
+        CommandType.GET_VERSIONS: "getVersions",
+    }
+
     def __init__(self, host: str, port: int = DEFAULT_WEBSOCKET_PORT, device_id: str = "default-stb8"):
         """Initialize the STB8Driver.
 
@@ -104,34 +131,52 @@ class STB8Driver(BaseSFRBoxDriver):
         self._builder = _STB8CommandBuilder(device_id)
         self._device_id = device_id  # Store device_id for use in get_versions
 
+    @property
+    def options(self) -> Dict[str, Any]:
+        """The device ID of the driver."""
+        return {"device_id": self._device_id}
+
     async def _handle_message(self, message: str) -> None:
         """Handle incoming messages from the WebSocket."""
-        # For now, we just log the message.
+        # For now, we just log the message, sampled to keep fleets quiet.
         # In the future, this will parse the message and update state.
-        _LOGGER.info("STB8 received message: %s", message)
+        suppressed = self._message_log_sampler.sample()
+        if suppressed is not None:
+            _LOGGER.info("STB8 received message: %s (%d not logged since the last one)", message, suppressed)
+
+    def _macro_cache_key(self) -> Hashable:
+        """STB8 frames only depend on the model and the device ID."""
+        return (type(self), self._device_id)
 
-    async def send_command(self, command_type: CommandType, **kwargs: Any) -> None:
-        """Send a command to the box.
+    def _parse_message(self, message: str) -> Optional[BoxResponse]:
+        """Parse an incoming STB8 message."""
+        return self._builder.parse_response(message)
+
+    def _power_state(self, response: BoxResponse) -> Optional[PowerState]:
+        """Read the power state of `getStatus` replies and power notifications."""
+        if response.action is None:
+            return _STB8_POWER_STATES.get(response.data.get("status"))
+        if response.action == "getStatus" and response.success:
+            return _STB8_POWER_STATES.get(response.data.get("power"))
+        return None
+
+    def _build_command(self, command_type: CommandType, **kwargs: Any) -> Optional[str]:
+        """Build the STB8 payload for a command.
 
         Args:
-            command_type: The abstract CommandType to send.
+            command_type: The abstract CommandType to build.
             **kwargs: Parameters for the command.
         """
-        payload: Optional[str] = None
         if command_type == CommandType.SEND_KEY:
             key = kwargs.get("key")
             if not isinstance(key, KeyCode):
                 _LOGGER.error("send_command for SEND_KEY requires a 'key' of type KeyCode.")
-                return
-            payload = self._builder.build_send_key(key)
-        elif command_type == CommandType.GET_STATUS:
-            payload = self._builder.build_get_status()
-        elif command_type == CommandType.GET_VERSIONS:
+                return None
+            return self._builder.build_send_key(key)
+        if command_type == CommandType.GET_STATUS:
+            return self._builder.build_get_status()
+        if command_type == CommandType.GET_VERSIONS:
             # For GET_VERSIONS, the deviceName parameter for the payload is the same as device_id
-            payload = self._builder.build_get_versions(self._device_id)
-        else:
-            _LOGGER.warning("Unsupported command type: %s", command_type)
-            return
-
-        if payload:
-            await self.send_message(payload)
+            return self._builder.build_get_versions(self._device_id)
+        _LOGGER.warning("Unsupported command type: %s", command_type)
+        return None
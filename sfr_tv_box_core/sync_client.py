@@ -0,0 +1,253 @@
+"""Blocking client for synchronous code, backed by a background event loop.
+
+Calling `asyncio.run()` per command costs a new event loop and a new
+connection every time. A `SyncSFRBoxClient` instead runs one event loop in a
+daemon thread that owns warm, connected drivers; its blocking methods submit
+coroutines to that loop and wait for their result. The drivers are only ever
+touched from the loop thread, so the client can be shared by any number of
+threads.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any
+from typing import Awaitable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import TypeVar
+
+from .base_driver import BaseSFRBoxDriver
+from .base_driver import BoxResponse
+from .constants import DEFAULT_REQUEST_TIMEOUT
+from .constants import CommandType
+from .constants import KeyCode
+from .macros import CompiledMacro
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds granted to the event loop, beyond the timeout of a call, to report it.
+_TIMEOUT_GRACE = 1.0
+
+_T = TypeVar("_T")
+
+
+class SyncSFRBoxClient:
+    """Thread-safe blocking facade over drivers running in a background event loop."""
+
+    def __init__(self, default_timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        """Starts the background event loop.
+
+        Args:
+            default_timeout: The number of seconds a call waits when no timeout is given.
+        """
+        self._default_timeout = default_timeout
+        self._drivers: Dict[str, BaseSFRBoxDriver] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="sfr-box-client", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "SyncSFRBoxClient":
+        """Returns the client."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Closes the client."""
+        self.close()
+
+    @property
+    def boxes(self) -> List[str]:
+        """The names of the boxes added to the client."""
+        with self._lock:
+            return list(self._drivers)
+
+    def run(self, coroutine: Awaitable[_T], timeout: Optional[float] = None) -> _T:
+        """Runs a coroutine on the background loop and waits for its result.
+
+        Args:
+            coroutine: The coroutine to run.
+            timeout: The number of seconds to wait, the default timeout if None.
+
+        Returns:
+            The result of the coroutine.
+
+        Raises:
+            TimeoutError: If the coroutine did not finish in time; it is cancelled.
+            RuntimeError: If the client is closed, or if called from the loop thread itself.
+        """
+        error = None
+        if threading.current_thread() is self._thread:
+            error = "SyncSFRBoxClient cannot be called from its own event loop."
+        elif self._closed:
+            error = "SyncSFRBoxClient is closed."
+        if error is not None:
+            if asyncio.iscoroutine(coroutine):
+                coroutine.close()
+            raise RuntimeError(error)
+        return self._submit(coroutine, timeout)
+
+    def _submit(self, coroutine: Awaitable[_T], timeout: Optional[float]) -> _T:
+        """Runs a coroutine on the background loop and waits for its result, without checking the caller."""
+        timeout = self._default_timeout if timeout is None else timeout
+        future = asyncio.run_coroutine_threadsafe(self._with_timeout(coroutine, timeout), self._loop)
+        try:
+            return future.result(timeout + _TIMEOUT_GRACE)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"The call did not complete within {timeout} s.") from None
+
+    @staticmethod
+    async def _with_timeout(coroutine: Awaitable[_T], timeout: float) -> _T:
+        """Bounds a coroutine by a timeout measured on the loop."""
+        async with asyncio.timeout(timeout):
+            return await coroutine
+
+    def add_box(self, name: str, driver: BaseSFRBoxDriver, timeout: Optional[float] = None) -> None:
+        """Connects a driver and keeps it connected until the client is closed.
+
+        Args:
+            name: The name the box is addressed by in the other calls.
+            driver: The driver of the box, not started yet.
+            timeout: The number of seconds to wait for the connection.
+
+        Raises:
+            ValueError: If a box already has this name.
+            TimeoutError: If the box could not be reached in time.
+        """
+        with self._lock:
+            if name in self._drivers:
+                raise ValueError(f"A box named {name!r} was already added.")
+            self._drivers[name] = driver
+        try:
+            self.run(driver.start(), timeout)
+        except BaseException:
+            with self._lock:
+                del self._drivers[name]
+            self.run(driver.stop())
+            raise
+
+    def remove_box(self, name: str, timeout: Optional[float] = None) -> None:
+        """Disconnects a box and forgets it.
+
+        Args:
+            name: The name of the box.
+            timeout: The number of seconds to wait for the disconnection.
+        """
+        with self._lock:
+            driver = self._drivers.pop(name, None)
+        if driver is not None:
+            self.run(driver.stop(), timeout)
+
+    def driver(self, name: str) -> BaseSFRBoxDriver:
+        """Returns the driver of a box, to be used on the background loop only.
+
+        Raises:
+            ValueError: If no box has this name.
+        """
+        with self._lock:
+            driver = self._drivers.get(name)
+        if driver is None:
+            raise ValueError(f"No box named {name!r}.")
+        return driver
+
+    def send_request(self, name: str, command_type: CommandType, timeout: Optional[float] = None, **kwargs: Any) -> BoxResponse:
+        """Sends a command to a box and waits for its reply.
+
+        Args:
+            name: The name of the box.
+            command_type: The abstract CommandType to send.
+            timeout: The number of seconds to wait for the reply.
+            **kwargs: Parameters for the command.
+
+        Returns:
+            The parsed reply of the box.
+
+        Raises:
+            TimeoutError: If no reply arrives within the timeout.
+            BoxUnavailableError: If the box is considered unreachable.
+        """
+        timeout = self._default_timeout if timeout is None else timeout
+        driver = self.driver(name)
+        # The driver times the request itself, so that its metrics and breaker see the timeout.
+        return self.run(driver.send_request(command_type, timeout=timeout, **kwargs), timeout + _TIMEOUT_GRACE)
+
+    def send_command(self, name: str, command_type: CommandType, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        """Sends a command to a box, waiting until it is written but not for its reply.
+
+        Args:
+            name: The name of the box.
+            command_type: The abstract CommandType to send.
+            timeout: The number of seconds to wait for the command to be written.
+            **kwargs: Parameters for the command.
+        """
+        self.run(self.driver(name).send_command(command_type, **kwargs), timeout)
+
+    def send_key(self, name: str, key: KeyCode, timeout: Optional[float] = None) -> BoxResponse:
+        """Presses a key and waits for the box to acknowledge it."""
+        return self.send_request(name, CommandType.SEND_KEY, timeout, key=key)
+
+    def get_status(self, name: str, timeout: Optional[float] = None) -> BoxResponse:
+        """Queries the status of a box."""
+        return self.send_request(name, CommandType.GET_STATUS, timeout)
+
+    def get_versions(self, name: str, timeout: Optional[float] = None) -> BoxResponse:
+        """Queries the software versions of a box."""
+        return self.send_request(name, CommandType.GET_VERSIONS, timeout)
+
+    def play_macro(self, name: str, macro: CompiledMacro, timeout: Optional[float] = None) -> List[BoxResponse]:
+        """Replays a compiled macro on a box.
+
+        Args:
+            name: The name of the box.
+            macro: A macro compiled by a driver of the same model.
+            timeout: The number of seconds the whole macro may take. Defaults to
+                its delays, plus the default timeout for each acknowledgement
+                and once more for the rest.
+
+        Returns:
+            The replies of the steps that waited for an acknowledgement.
+        """
+        if timeout is None:
+            timeout = macro.duration + self._default_timeout * (macro.acknowledged_steps + 1)
+        return self.run(self.driver(name).play_macro(macro, ack_timeout=self._default_timeout), timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Disconnects every box and stops the background loop.
+
+        Only the first call closes the client, the others return at once.
+
+        Args:
+            timeout: The number of seconds to wait for the disconnections.
+
+        Raises:
+            RuntimeError: If called from the loop thread itself.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("SyncSFRBoxClient cannot be closed from its own event loop.")
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            drivers = list(self._drivers.values())
+            self._drivers.clear()
+        try:
+            self._submit(self._shutdown(drivers), timeout)
+        except TimeoutError:
+            _LOGGER.warning("Timed out disconnecting the boxes of a SyncSFRBoxClient.")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    @staticmethod
+    async def _shutdown(drivers: List[BaseSFRBoxDriver]) -> None:
+        """Stops the drivers, then waits for every task left on the loop."""
+        await asyncio.gather(*(driver.stop() for driver in drivers), return_exceptions=True)
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
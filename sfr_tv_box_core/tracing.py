@@ -0,0 +1,129 @@
+"""Per-command timing spans, emitted to an optional hook.
+
+When a trace hook is set on a driver (`BaseSFRBoxDriver.set_trace_hook`), each
+command gets a trace ID and the hook is called with one `Span` per stage of its
+life: encoding, waiting in the send queue, writing to the socket, waiting for
+the box acknowledgement and dispatching that reply to the listeners. Without a
+hook the driver only pays for an `is None` check per stage.
+
+`SlowCommandCollector` is a ready-made hook that reassembles the spans of each
+command and keeps, and logs, those slower than a threshold.
+"""
+
+import logging
+from collections import OrderedDict
+from collections import deque
+from enum import StrEnum
+from typing import Deque
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SLOW_THRESHOLD = 0.5
+DEFAULT_MAX_SLOW_TRACES = 100
+# Traces still waiting for their last span; the oldest are dropped beyond this.
+DEFAULT_MAX_IN_FLIGHT = 1024
+
+
+class SpanStage(StrEnum):
+    """The stages of a command's life, in order."""
+
+    ENCODE = "encode"
+    QUEUE = "queue"
+    WRITE = "write"
+    ACK = "ack"
+    DISPATCH = "dispatch"
+
+
+class Span(NamedTuple):
+    """The timing of one stage of a command.
+
+    Attributes:
+        trace_id: Identifies the command, unique per driver.
+        stage: The stage timed by this span.
+        start: `time.monotonic()` when the stage started.
+        end: `time.monotonic()` when the stage ended.
+        action: The action carried by the reply to the command, if any.
+    """
+
+    trace_id: int
+    stage: SpanStage
+    start: float
+    end: float
+    action: Optional[str]
+
+    @property
+    def duration(self) -> float:
+        """The duration of the stage, in seconds."""
+        return self.end - self.start
+
+
+def is_last_span(span: Span) -> bool:
+    """Tells whether a span ends its command's trace.
+
+    Commands expecting a reply end when the reply is dispatched, the others
+    once they are written.
+    """
+    return span.stage is SpanStage.DISPATCH or (span.stage is SpanStage.WRITE and span.action is None)
+
+
+def format_trace(spans: List[Span]) -> str:
+    """Formats the spans of a command as a per-stage breakdown in milliseconds."""
+    return ", ".join(f"{span.stage} {1000 * span.duration:.1f} ms" for span in spans)
+
+
+class SlowCommandCollector:
+    """A trace hook keeping the commands slower than a threshold.
+
+    A command's duration runs from the start of its first span to the end of
+    its last one. Slow traces are logged at WARNING level and kept, most recent
+    last, in `slow_traces`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_SLOW_THRESHOLD,
+        max_traces: int = DEFAULT_MAX_SLOW_TRACES,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        """Initializes the collector.
+
+        Args:
+            threshold: The duration, in seconds, from which a command is slow.
+            max_traces: The number of slow traces kept.
+            max_in_flight: The number of unfinished traces tracked at once.
+        """
+        self.threshold = threshold
+        self._max_in_flight = max_in_flight
+        self._in_flight: OrderedDict[int, List[Span]] = OrderedDict()
+        self.slow_traces: Deque[List[Span]] = deque(maxlen=max_traces)
+
+    def __call__(self, span: Span) -> None:
+        """Records a span, completing its trace if it is the last one."""
+        spans = self._in_flight.get(span.trace_id)
+        if spans is None:
+            spans = self._in_flight[span.trace_id] = []
+            if len(self._in_flight) > self._max_in_flight:
+                # Commands that never got their reply.
+                self._in_flight.popitem(last=False)
+        spans.append(span)
+        if not is_last_span(span):
+            return
+        del self._in_flight[span.trace_id]
+        duration = span.end - spans[0].start
+        if duration >= self.threshold:
+            self.slow_traces.append(spans)
+            _LOGGER.warning(
+                "Slow command #%d (%s) took %.1f ms: %s",
+                span.trace_id,
+                span.action,
+                1000 * duration,
+                format_trace(spans),
+            )
+
+    def clear(self) -> None:
+        """Forgets every trace."""
+        self._in_flight.clear()
+        self.slow_traces.clear()
@@ -0,0 +1,382 @@
+"""Compact capture and replay of the WebSocket traffic of the drivers.
+
+A `TrafficRecorder` appends every frame a driver sends or receives to a binary
+log. Each record is a fixed 23-byte header followed by the frame bytes:
+
+    timestamp  float64  `time.time()` when the frame was seen
+    monotonic  float64  `time.monotonic()` when the frame was seen
+    kind       uint8    0 sent, 1 received, 2 box declaration; +0x80 for binary frames
+    box        uint16   the box ID, declared once per log by a kind 2 record
+    length     uint32   the number of bytes that follow
+
+all little-endian, after an 8-byte file signature. A `TrafficLog` memory-maps
+such a capture and only reads the record headers to build a sparse timestamp
+index, so multi-gigabyte captures can be seeked and iterated without being
+loaded into memory. The index is saved next to the capture (`<capture>.idx`)
+and reused by the next `TrafficLog` as long as the capture only grew since:
+only the records appended in the meantime are read.
+
+`replay` feeds the frames of a capture back into a driver (`feed_message`) or
+towards a box or simulator (`send_message`), at their original pace or faster.
+The pace follows the monotonic clock, so that a wall clock stepped by NTP
+while capturing does not stall or rush the replay; wall-clock timestamps only
+locate frames in time.
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Union
+
+from .frame_log import FrameDirection
+from .macros import sleep_until
+
+SIGNATURE = b"SFRTRAF2"
+# Frame records between two entries of the timestamp index.
+DEFAULT_INDEX_INTERVAL = 1024
+
+_HEADER = struct.Struct("<ddBHI")
+# Captures written before the monotonic clock was recorded.
+_OLD_SIGNATURES = (b"SFRTRAF1",)
+_INDEX_SIGNATURE = b"SFRTIDX1"
+# Index interval, valid size, frame count, index entries and metadata length of a saved index.
+_INDEX_HEADER = struct.Struct("<IQQQI")
+# Bytes of the capture hashed at each end of the indexed part, to tell a saved index is stale.
+_FINGERPRINT_BYTES = 4096
+_SENT = 0
+_RECEIVED = 1
+_BOX = 2
+_BINARY = 0x80
+_MAX_BOXES = 0x10000
+
+_KINDS = {FrameDirection.SENT: _SENT, FrameDirection.RECEIVED: _RECEIVED}
+_DIRECTIONS = {_SENT: FrameDirection.SENT, _RECEIVED: FrameDirection.RECEIVED}
+
+
+class TrafficRecord(NamedTuple):
+    """A frame read back from a capture.
+
+    Attributes:
+        timestamp: `time.time()` when the frame was seen.
+        monotonic: `time.monotonic()` when the frame was seen.
+        direction: Whether the driver sent or received the frame.
+        box: The box the frame was exchanged with.
+        frame: The frame, as str for text frames and bytes for binary ones.
+    """
+
+    timestamp: float
+    monotonic: float
+    direction: FrameDirection
+    box: str
+    frame: Union[str, bytes]
+
+
+class TrafficRecorder:
+    """Appends frames to a capture file.
+
+    Writes are buffered; call `flush` to make them visible to readers.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        """Opens a capture for appending, creating it if needed.
+
+        A record left incomplete by a crash at the end of an existing capture
+        is discarded.
+
+        Args:
+            path: The capture file.
+        """
+        self._box_ids: Dict[str, int] = {}
+        if os.path.exists(path) and os.path.getsize(path):
+            with TrafficLog(path) as log:
+                self._box_ids = {box: box_id for box_id, box in enumerate(log.boxes)}
+                valid_size = log.valid_size
+            self._file = open(path, "r+b")
+            self._file.truncate(valid_size)
+            self._file.seek(valid_size)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(SIGNATURE)
+
+    def __enter__(self) -> "TrafficRecorder":
+        """Returns the recorder."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Closes the capture."""
+        self.close()
+
+    def record(self, box: str, direction: FrameDirection, frame: Union[str, bytes]) -> None:
+        """Appends a frame.
+
+        Args:
+            box: The box the frame was exchanged with.
+            direction: Whether the driver sent or received the frame.
+            frame: The frame.
+        """
+        box_id = self._box_ids.get(box)
+        if box_id is None:
+            box_id = self._declare_box(box)
+        kind = _KINDS[direction]
+        if isinstance(frame, str):
+            frame = frame.encode()
+        else:
+            kind |= _BINARY
+        self._file.write(_HEADER.pack(time.time(), time.monotonic(), kind, box_id, len(frame)))
+        self._file.write(frame)
+
+    def _declare_box(self, box: str) -> int:
+        box_id = len(self._box_ids)
+        if box_id >= _MAX_BOXES:
+            raise ValueError(f"A capture holds at most {_MAX_BOXES} boxes.")
+        name = box.encode()
+        self._file.write(_HEADER.pack(time.time(), time.monotonic(), _BOX, box_id, len(name)))
+        self._file.write(name)
+        self._box_ids[box] = box_id
+        return box_id
+
+    def flush(self) -> None:
+        """Writes the buffered records to the file."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flushes and closes the capture."""
+        self._file.close()
+
+
+class TrafficLog:
+    """A memory-mapped, read-only capture."""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        index_interval: int = DEFAULT_INDEX_INTERVAL,
+        persist_index: bool = True,
+    ):
+        """Maps a capture and indexes it.
+
+        Args:
+            path: The capture file.
+            index_interval: The number of frames between two timestamp index entries.
+            persist_index: Whether to reuse the index saved next to the capture,
+                and save it there when it had to be built or extended.
+
+        Raises:
+            ValueError: If the file is not a capture, or a capture of an older format.
+        """
+        with open(path, "rb") as capture:
+            self._map = mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ)
+        signature = self._map[: len(SIGNATURE)]
+        if signature != SIGNATURE:
+            self._map.close()
+            if signature in _OLD_SIGNATURES:
+                raise ValueError(f"{path} is a traffic capture of an older format, without monotonic timestamps.")
+            raise ValueError(f"{path} is not a traffic capture.")
+        self.boxes: List[str] = []
+        self._index_times = array("d")
+        self._index_offsets = array("Q")
+        self._count = 0
+        self.valid_size = len(SIGNATURE)
+        index_path = f"{os.fspath(path)}.idx" if persist_index else None
+        loaded = index_path is not None and self._load_index(index_path, index_interval)
+        indexed = self.valid_size
+        self._build_index(index_interval)
+        if index_path is not None and (not loaded or self.valid_size != indexed):
+            self._save_index(index_path, index_interval)
+
+    def __enter__(self) -> "TrafficLog":
+        """Returns the log."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Unmaps the capture."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Returns the number of frames in the capture."""
+        return self._count
+
+    def _build_index(self, index_interval: int) -> None:
+        """Reads the record headers after the indexed part once, collecting boxes and index entries."""
+        data, unpack_from, header_size = self._map, _HEADER.unpack_from, _HEADER.size
+        size = len(data)
+        offset = self.valid_size
+        while offset + header_size <= size:
+            timestamp, _, kind, box_id, length = unpack_from(data, offset)
+            end = offset + header_size + length
+            if end > size:
+                break  # A record cut short by a crash.
+            if kind == _BOX:
+                self.boxes.append(data[offset + header_size : end].decode())
+            else:
+                if self._count % index_interval == 0:
+                    self._index_times.append(timestamp)
+                    self._index_offsets.append(offset)
+                self._count += 1
+            offset = end
+        self.valid_size = offset
+
+    def _fingerprint(self, size: int) -> bytes:
+        """Hashes both ends of the first `size` bytes of the capture, to recognize it cheaply."""
+        digest = hashlib.blake2b(self._map[: min(size, _FINGERPRINT_BYTES)], digest_size=16)
+        digest.update(self._map[max(size - _FINGERPRINT_BYTES, 0) : size])
+        return digest.digest()
+
+    def _load_index(self, index_path: str, index_interval: int) -> bool:
+        """Restores the index saved next to the capture, unless it is missing or stale."""
+        try:
+            with open(index_path, "rb") as file:
+                content = file.read()
+            if not content.startswith(_INDEX_SIGNATURE):
+                return False
+            offset = len(_INDEX_SIGNATURE)
+            interval, valid_size, count, entries, meta_length = _INDEX_HEADER.unpack_from(content, offset)
+            offset += _INDEX_HEADER.size
+            meta = json.loads(content[offset : offset + meta_length])
+            offset += meta_length
+            # A capture is only ever appended to: any other change makes the index stale.
+            if (
+                interval != index_interval
+                or valid_size > len(self._map)
+                or meta["byteorder"] != sys.byteorder
+                or bytes.fromhex(meta["fingerprint"]) != self._fingerprint(valid_size)
+            ):
+                return False
+            times = array("d", content[offset : offset + 8 * entries])
+            offsets = array("Q", content[offset + 8 * entries : offset + 16 * entries])
+            if len(times) != entries or len(offsets) != entries:
+                return False
+            boxes = meta["boxes"]
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return False
+        self.boxes = boxes
+        self._index_times = times
+        self._index_offsets = offsets
+        self._count = count
+        self.valid_size = valid_size
+        return True
+
+    def _save_index(self, index_path: str, index_interval: int) -> None:
+        """Saves the index next to the capture, replacing it atomically; a read-only location is not an error."""
+        meta = json.dumps(
+            {"boxes": self.boxes, "byteorder": sys.byteorder, "fingerprint": self._fingerprint(self.valid_size).hex()}
+        ).encode()
+        header = _INDEX_HEADER.pack(index_interval, self.valid_size, self._count, len(self._index_times), len(meta))
+        temporary = f"{index_path}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(_INDEX_SIGNATURE + header + meta)
+                file.write(self._index_times.tobytes())
+                file.write(self._index_offsets.tobytes())
+            os.replace(temporary, index_path)
+        except OSError:
+            pass
+
+    @property
+    def start_time(self) -> Optional[float]:
+        """The timestamp of the first frame, None for an empty capture."""
+        return self._index_times[0] if self._index_times else None
+
+    def offset_at(self, timestamp: float) -> int:
+        """Returns the offset of the last index entry before a timestamp.
+
+        Frames are appended in time order, so reading from this offset and
+        skipping earlier frames finds the first frame at or after `timestamp`.
+        """
+        position = max(bisect_left(self._index_times, timestamp) - 1, 0)
+        return self._index_offsets[position] if self._index_offsets else self.valid_size
+
+    def records(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        direction: Optional[FrameDirection] = None,
+        box: Optional[str] = None,
+    ) -> Iterator[TrafficRecord]:
+        """Iterates over the frames of the capture, in order.
+
+        Args:
+            start: Skip the frames before this timestamp.
+            end: Stop at the first frame after this timestamp.
+            direction: Only yield the frames going this way.
+            box: Only yield the frames of this box.
+        """
+        data, unpack_from, header_size = self._map, _HEADER.unpack_from, _HEADER.size
+        boxes = self.boxes
+        offset = self.offset_at(start) if start is not None else len(SIGNATURE)
+        while offset < self.valid_size:
+            timestamp, monotonic, kind, box_id, length = unpack_from(data, offset)
+            body = offset + header_size
+            offset = body + length
+            if kind == _BOX or (start is not None and timestamp < start):
+                continue
+            if end is not None and timestamp > end:
+                return
+            record_direction = _DIRECTIONS[kind & ~_BINARY]
+            if (direction is not None and record_direction is not direction) or (box is not None and boxes[box_id] != box):
+                continue
+            frame = data[body:offset]
+            frame = frame if kind & _BINARY else frame.decode()
+            yield TrafficRecord(timestamp, monotonic, record_direction, boxes[box_id], frame)
+
+    def close(self) -> None:
+        """Unmaps the capture."""
+        self._map.close()
+
+
+async def replay(
+    records: Iterable[TrafficRecord],
+    sink: Callable[[Union[str, bytes]], Awaitable[None]],
+    speed: float = 1.0,
+) -> int:
+    """Feeds captured frames to a coroutine, reproducing their timing.
+
+    Frames are spaced by the monotonic clock of the capture. Where it went
+    backwards, because the capture was appended to after a reboot, the wall
+    clock spaces them instead.
+
+    Args:
+        records: The frames to replay, typically from `TrafficLog.records`.
+        sink: Awaited with each frame, e.g. `driver.feed_message` to replay what
+            a box sent, or `driver.send_message` to replay commands to a box.
+        speed: The acceleration factor; 1 keeps the original pace, 0 replays
+            as fast as possible.
+
+    Returns:
+        The number of frames replayed.
+    """
+    loop = asyncio.get_running_loop()
+    count = 0
+    deadline = 0.0
+    previous: Optional[TrafficRecord] = None
+    for record in records:
+        if speed > 0:
+            if previous is None:
+                deadline = loop.time()
+            else:
+                elapsed = record.monotonic - previous.monotonic
+                if elapsed < 0:
+                    elapsed = max(record.timestamp - previous.timestamp, 0.0)
+                # Accumulated rather than measured from each frame, so that late wake-ups do not add up.
+                deadline += elapsed / speed
+            previous = record
+            await sleep_until(deadline)
+        await sink(record.frame)
+        count += 1
+    return count
@@ -2,6 +2,8 @@
 
 import asyncio
 import logging
+import time
+from collections import deque
 from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import call
@@ -9,8 +11,13 @@ from unittest.mock import call
 import pytest
 import websockets
 
+from sfr_tv_box_core.base_driver import _UNTRACKED_REPLY_TIMEOUT
 from sfr_tv_box_core.base_driver import BaseSFRBoxDriver
+from sfr_tv_box_core.base_driver import BoxResponse
+from sfr_tv_box_core.base_driver import _PendingRequest
 from sfr_tv_box_core.constants import DEFAULT_WEBSOCKET_PORT
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.exceptions import BoxUnavailableError
 
 
 # Since we are testing the abstract base class, we need a concrete implementation.
@@ -26,6 +33,10 @@ class ConcreteDriver(BaseSFRBoxDriver):
         """Handles a message by appending it to the `handled_messages` list."""
         self.handled_messages.append(message)
 
+    def _build_command(self, command_type: CommandType, **kwargs):
+        """Builds nothing: the tests patch it when they send commands."""
+        return None
+
 
 @pytest.fixture
 def driver():
@@ -39,6 +50,7 @@ async def test_driver_initialization(driver):
     assert driver._host == "localhost"
     assert driver._port == 1234
     assert driver._websocket is None
+    assert driver.options == {}
 
 
 @pytest.mark.asyncio
@@ -52,7 +64,7 @@ async def test_connect_success(driver, monkeypatch):
 
     await driver._connect()
 
-    mock_connect.assert_called_once_with("ws://localhost:1234/ws")
+    mock_connect.assert_called_once_with("ws://localhost:1234/ws", compression=None)
     assert driver._websocket is mock_ws
 
 
@@ -152,11 +164,12 @@ async def test_set_message_callback(driver):
 
 
 @pytest.mark.asyncio
-async def test_send_message_when_not_connected(driver, caplog):
-    """Test that `send_message` logs a warning when not connected."""
+async def test_send_message_when_not_connected(driver):
+    """Test that `send_message` fails fast when not connected."""
     assert driver._websocket is None  # Ensure we start disconnected
-    await driver.send_message("this should not be sent")
-    assert "Cannot send message: WebSocket not connected." in caplog.text
+    with pytest.raises(BoxUnavailableError, match="not connected"):
+        await driver.send_message("this should not be sent")
+    assert driver.metrics.send_failures.value == 1
 
 
 @pytest.mark.asyncio
@@ -315,3 +328,104 @@ async def test_listen_loop_restarts_on_handler_exception(monkeypatch, caplog):
     # Verify the reconnection logic was triggered
     stop_mock.assert_awaited_once()
     start_mock.assert_awaited_once()
+
+
+def test_drivers_must_build_commands():
+    """Test that a driver cannot be created without a command builder."""
+
+    class IncompleteDriver(BaseSFRBoxDriver):
+        async def _handle_message(self, message: str):
+            pass
+
+    with pytest.raises(TypeError, match="_build_command"):
+        IncompleteDriver(host="localhost")
+
+
+@pytest.mark.asyncio
+async def test_send_request_resolved_by_reply(driver, monkeypatch):
+    """Test that a request is resolved by the first reply carrying its action."""
+    monkeypatch.setattr(driver, "_REPLY_ACTIONS", {CommandType.GET_STATUS: "getStatus"})
+    monkeypatch.setattr(driver, "_build_command", lambda command_type, **kwargs: "payload")
+    reply = BoxResponse(action="getStatus", success=True, data={"power": "powerOn"})
+
+    async def send_and_reply(message):
+        # An unrelated reply must not resolve the request.
+        assert not driver._resolve_request(BoxResponse(action="other", success=True, data={}))
+        assert driver._resolve_request(reply)
+
+    driver.send_message = AsyncMock(side_effect=send_and_reply)
+
+    response = await driver.send_request(CommandType.GET_STATUS)
+
+    assert response is reply
+    driver.send_message.assert_awaited_once_with("payload")
+    assert not driver._pending["getStatus"]
+
+
+@pytest.mark.asyncio
+async def test_send_request_timeout_cleans_up(driver, monkeypatch):
+    """Test that a request without reply times out and leaves nothing pending."""
+    monkeypatch.setattr(driver, "_REPLY_ACTIONS", {CommandType.GET_STATUS: "getStatus"})
+    monkeypatch.setattr(driver, "_build_command", lambda command_type, **kwargs: "payload")
+    driver.send_message = AsyncMock()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await driver.send_request(CommandType.GET_STATUS, timeout=0.01)
+
+    assert not driver._pending["getStatus"]
+    assert not driver._resolve_request(BoxResponse(action="getStatus", success=True, data={}))
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_not_tracked(driver, monkeypatch):
+    """Test that a request whose write failed leaves no pending entry, nor a mark on the limiter and the breaker."""
+    monkeypatch.setattr(driver, "_REPLY_ACTIONS", {CommandType.GET_STATUS: "getStatus"})
+    monkeypatch.setattr(driver, "_build_command", lambda command_type, **kwargs: "payload")
+    driver.send_message = AsyncMock(side_effect=OSError("broken pipe"))
+    rate = driver.rate_limiter.rate
+
+    with pytest.raises(OSError):
+        await driver.send_request(CommandType.GET_STATUS, timeout=0.5)
+    with pytest.raises(OSError):
+        await driver.send_command(CommandType.GET_STATUS)
+
+    assert not driver._pending["getStatus"]
+    assert driver.rate_limiter.rate == rate
+    assert driver.circuit_breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_send_request_unsupported_command(driver):
+    """Test that a command without a known reply action is rejected."""
+    with pytest.raises(ValueError):
+        await driver.send_request(CommandType.GET_STATUS)
+
+
+@pytest.mark.asyncio
+async def test_listen_for_messages_resolves_requests(driver, monkeypatch):
+    """Test that parsed incoming messages are handed to pending requests."""
+    reply = BoxResponse(action="getStatus", success=True, data={})
+    monkeypatch.setattr(driver, "_parse_message", lambda message: reply if message == "reply" else None)
+    future = asyncio.get_running_loop().create_future()
+    driver._pending["getStatus"] = deque([_PendingRequest(future)])
+    mock_ws = AsyncMock()
+    mock_ws.__aiter__.return_value = ["noise", "reply"]
+    driver._websocket = mock_ws
+
+    await driver._listen_for_messages()
+
+    assert future.result() is reply
+    assert driver.handled_messages == ["noise", "reply"]
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_commands_expire(driver):
+    """Test that a fire-and-forget command whose reply was lost is forgotten once it expired."""
+    expired = _PendingRequest()
+    expired.sent_at = time.monotonic() - _UNTRACKED_REPLY_TIMEOUT - 1
+    recent = _PendingRequest()
+    recent.sent_at = time.monotonic()
+    driver._pending["getStatus"] = deque([expired, recent])
+
+    assert driver._resolve_request(BoxResponse(action="getStatus", success=True, data={})) is recent
+    assert not driver._pending["getStatus"]
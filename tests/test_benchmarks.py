@@ -0,0 +1,120 @@
+"""Smoke tests for the benchmark scripts (benchmarks/)."""
+
+import json
+
+import pytest
+
+from benchmarks import bench_replay
+from benchmarks._common import latency_summary
+from benchmarks._common import percentile
+from benchmarks.bench_codec import main as bench_codec_main
+from benchmarks.bench_connection_policy import main as bench_connection_policy_main
+from benchmarks.bench_driver_load import main as bench_driver_load_main
+from benchmarks.bench_fleet import main as bench_fleet_main
+from benchmarks.bench_gateway import main as bench_gateway_main
+from benchmarks.bench_metrics import main as bench_metrics_main
+from benchmarks.bench_replay import main as bench_replay_main
+
+
+def test_percentile_and_summary():
+    """Test the nearest-rank percentiles used by every report."""
+    samples = [i / 1000 for i in range(1, 101)]
+    assert percentile(samples, 50) == 0.05
+    assert percentile(samples, 99) == 0.099
+    assert percentile([], 50) == 0.0
+
+    summary = latency_summary(samples)
+    assert summary["count"] == 100
+    assert summary["max_ms"] == pytest.approx(100.0)
+    assert latency_summary([])["mean_ms"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_bench_driver_load(monkeypatch, tmp_path, capsys):
+    """Test a short run of the load benchmark and its JSON report."""
+    output = tmp_path / "report.json"
+    monkeypatch.setattr(
+        "sys.argv",
+        ["benchmarks/bench_driver_load.py", "-c", "2", "-d", "0.2", "--reconnects", "1", "--json", str(output)],
+    )
+    await bench_driver_load_main()
+
+    report = json.loads(output.read_text())
+    results = report["results"]
+    assert report["parameters"]["connections"] == 2
+    assert results["round_trip"]["count"] > 0
+    assert results["reconnect_recovery"]["count"] == 1
+    assert results["memory_per_driver_bytes"] > 0
+    assert "Commands/s/connection" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_bench_fleet(monkeypatch, capsys):
+    """Test a short run of the fleet scaling benchmark."""
+    monkeypatch.setattr("sys.argv", ["benchmarks/bench_fleet.py", "-b", "4", "-w", "1,2", "-d", "0.2"])
+    runs = (await bench_fleet_main())["results"]["runs"]
+    assert [run["workers"] for run in runs] == [1, 2]
+    assert all(run["connected"] == 4 and run["failures"] == 0 for run in runs)
+    assert runs[0]["scaling_efficiency"] == 1.0
+    assert "Efficiency" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_bench_connection_policy(monkeypatch, capsys):
+    """Test a short run of the open-socket budget benchmark."""
+    monkeypatch.setattr("sys.argv", ["benchmarks/bench_connection_policy.py", "-b", "6", "-m", "2", "-n", "40"])
+    results = (await bench_connection_policy_main())["results"]
+    assert results["hit"]["count"] + results["miss"]["count"] == 40
+    assert results["miss"]["count"] >= results["distinct_boxes"]
+    assert 0 < results["hit_ratio"] < 1
+    assert "Hit ratio" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_bench_gateway(monkeypatch, capsys):
+    """Test a short run of the gateway overhead benchmark."""
+    monkeypatch.setattr("sys.argv", ["benchmarks/bench_gateway.py", "-c", "2", "-d", "0.2"])
+    results = (await bench_gateway_main())["results"]
+    assert results["direct"]["round_trip"]["count"] > 0
+    assert results["gateway"]["round_trip"]["count"] > 0
+    assert results["throughput_ratio"] > 0
+    assert "Gateway overhead" in capsys.readouterr().out
+
+
+def test_bench_codec(monkeypatch, tmp_path):
+    """Test a short run of the codec microbenchmarks and their JSON report."""
+    output = tmp_path / "report.json"
+    monkeypatch.setattr("sys.argv", ["benchmarks/bench_codec.py", "-n", "10", "-r", "1", "--json", str(output)])
+    bench_codec_main()
+
+    results = json.loads(output.read_text())["results"]
+    assert "stb8.encode.SEND_KEY.OK" in results
+    assert "stb7.encode.SEND_KEY.DELETE" in results
+    assert "labox.decode.notification" in results
+    assert "backend.json.loads.params.reply" in results
+    assert all(case["ns_per_op"] > 0 for case in results.values())
+
+
+def test_bench_metrics(monkeypatch):
+    """Test a short run of the metrics overhead benchmark."""
+    monkeypatch.setattr("sys.argv", ["benchmarks/bench_metrics.py", "-n", "10", "-r", "1", "--drivers", "3"])
+    results = bench_metrics_main()["results"]
+    assert results["metrics_per_command"]["ns_per_op"] > 0
+    assert results["render_prometheus"]["bytes"] > 0
+    assert 0 < results["metrics_share_per_command"]
+
+
+def test_bench_replay(monkeypatch, tmp_path):
+    """Test a short run of the capture and replay benchmark, then on the capture it wrote."""
+    capture = tmp_path / "capture.sfrtraffic"
+    monkeypatch.setattr("sys.argv", ["benchmarks/bench_replay.py", "-f", "100", "--boxes", "3"])
+    results = bench_replay_main()["results"]
+    index = results["index"]
+    assert index == {"seconds": index["seconds"], "reopen_seconds": index["reopen_seconds"], "frames": 100, "boxes": 3}
+    assert results["replay_into_driver"]["frames"] == 50
+
+    bench_replay._write_capture(str(capture), 10, 2)
+    monkeypatch.setattr("sys.argv", ["benchmarks/bench_replay.py", "--capture", str(capture)])
+    results = bench_replay_main()["results"]
+    assert "record" not in results
+    assert results["index"]["frames"] == 10
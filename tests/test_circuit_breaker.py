@@ -0,0 +1,190 @@
+"""Tests for the circuit breaker (circuit_breaker.py) and its use by the drivers."""
+
+import asyncio
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+import websockets
+
+from sfr_tv_box_core import circuit_breaker
+from sfr_tv_box_core.base_driver import BoxResponse
+from sfr_tv_box_core.circuit_breaker import BreakerState
+from sfr_tv_box_core.circuit_breaker import CircuitBreaker
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+from sfr_tv_box_core.exceptions import SFRBoxError
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+class _Clock:
+    """A controllable replacement for time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drives the breaker's notion of time."""
+    fake = _Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    return fake
+
+
+def test_breaker_opens_after_threshold_and_probes(clock):
+    """Test the closed -> open -> half-open -> closed cycle."""
+    transitions = MagicMock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, on_state_change=transitions)
+
+    breaker.record_failure()
+    assert breaker.state is BreakerState.CLOSED
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_in == 10
+
+    clock.now += 10
+    assert breaker.retry_in == 0
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.failures == 0
+    assert [call.args[0] for call in transitions.call_args_list] == [
+        BreakerState.OPEN,
+        BreakerState.HALF_OPEN,
+        BreakerState.CLOSED,
+    ]
+
+
+def test_failed_probe_reopens_immediately(clock):
+    """Test that a failure while half-open re-opens the breaker for a full period."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.state is BreakerState.HALF_OPEN
+
+    breaker.record_failure()
+
+    assert breaker.state is BreakerState.OPEN
+    assert breaker.retry_in == 5
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    """Test that a half-open breaker rejects other commands while its probe is in flight."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    clock.now += 5
+
+    assert breaker.allow_request()
+    assert breaker.probing
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert not breaker.probing
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+    # A probe whose outcome never comes hands its turn over after a reset timeout.
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow_request()
+    clock.now += 4
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.probing
+
+
+@pytest.mark.asyncio
+async def test_half_open_driver_rejects_commands_behind_the_probe():
+    """Test that the driver sends the probe only, and fails the other commands at once."""
+    driver = STB8Driver(host="10.0.0.1")
+    driver.set_rate_limiter(None)
+    driver.send_message = AsyncMock()
+    for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD):
+        driver.circuit_breaker.record_failure()
+    # Opened a reset timeout ago, without faking the clock of the event loop.
+    driver.circuit_breaker._opened_at -= circuit_breaker.DEFAULT_RESET_TIMEOUT
+
+    probe = asyncio.create_task(driver.send_request(CommandType.GET_VERSIONS, timeout=10))
+    await asyncio.sleep(0.01)
+    with pytest.raises(BoxUnavailableError, match="probe"):
+        await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+
+    driver._resolve_request(BoxResponse(action="getVersions", success=True, data={}))
+    await probe
+    assert driver.circuit_breaker.state is BreakerState.CLOSED
+    driver.send_message.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_fails_fast(clock):
+    """Test that commands are rejected with a typed error while the breaker is open."""
+    driver = STB8Driver(host="10.0.0.1")
+    driver.send_message = AsyncMock()
+    for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD):
+        driver.circuit_breaker.record_failure()
+
+    with pytest.raises(BoxUnavailableError) as excinfo:
+        await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+
+    assert isinstance(excinfo.value, SFRBoxError)
+    driver.send_message.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_tripping_fails_waiting_requests():
+    """Test that requests waiting for replies fail as soon as the breaker opens."""
+    driver = STB8Driver(host="10.0.0.1")
+    driver.send_message = AsyncMock()
+    request = asyncio.create_task(driver.send_request(CommandType.GET_STATUS, timeout=10))
+    await asyncio.sleep(0.01)
+
+    for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD):
+        driver.circuit_breaker.record_failure()
+
+    with pytest.raises(BoxUnavailableError):
+        await request
+    assert not driver._pending["getStatus"]
+
+
+@pytest.mark.asyncio
+async def test_replies_and_timeouts_feed_the_breaker():
+    """Test that unanswered requests count as failures and any reply resets them."""
+    driver = STB8Driver(host="10.0.0.1")
+    driver.set_rate_limiter(None)
+    driver.send_message = AsyncMock()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await driver.send_request(CommandType.GET_STATUS, timeout=0.01)
+    assert driver.circuit_breaker.failures == 1
+
+    await driver.send_command(CommandType.GET_STATUS)
+    driver._resolve_request(BoxResponse(action="getStatus", success=False, data={}))
+    assert driver.circuit_breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_connect_waits_for_probe_while_open(monkeypatch):
+    """Test that an open breaker spaces reconnection attempts by its reset timeout."""
+    driver = STB8Driver(host="10.0.0.1")
+    failures = [OSError("unreachable")] * circuit_breaker.DEFAULT_FAILURE_THRESHOLD
+    mock_connect = AsyncMock(side_effect=[*failures, AsyncMock()])
+    monkeypatch.setattr(websockets, "connect", mock_connect)
+    sleep_mock = AsyncMock()
+    monkeypatch.setattr(asyncio, "sleep", sleep_mock)
+
+    await driver._connect()
+
+    delays = [call.args[0] for call in sleep_mock.await_args_list]
+    assert delays[:4] == [1, 2, 4, 8]
+    assert delays[4] == pytest.approx(circuit_breaker.DEFAULT_RESET_TIMEOUT, abs=1)
+    assert driver.circuit_breaker.state is BreakerState.CLOSED
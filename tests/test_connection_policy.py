@@ -0,0 +1,105 @@
+"""Tests for the idle reaper and open-socket budget (connection_policy.py), against simulated boxes."""
+
+import asyncio
+
+import pytest
+
+from sfr_tv_box_core.connection_policy import ConnectionPolicy
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+from sfr_tv_box_core.simulator import SimulatorFleet
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+async def _wait_for(condition):
+    async with asyncio.timeout(2):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_idle_connection_is_closed_and_reopened_on_demand():
+    """Test that an idle driver disconnects, then reconnects for its next command."""
+    policy = ConnectionPolicy(idle_timeout=0.05)
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        driver.set_connection_policy(policy)
+        assert driver.connection_policy is policy
+        await driver.start()
+        try:
+            await driver.send_request(CommandType.GET_STATUS, timeout=2)
+            await _wait_for(lambda: simulator.client_count == 0)
+            assert driver._websocket is None
+            assert policy.idle_closes == 1
+
+            reply = await driver.send_request(CommandType.SEND_KEY, key=KeyCode.OK, timeout=2)
+            assert reply.success is True
+            assert simulator.client_count == 1
+        finally:
+            await driver.stop()
+
+    assert (policy.hits, policy.misses) == (1, 1)
+    assert policy.hit_ratio == 0.5
+    assert policy.reconnect_latency.count == 1
+    assert policy.open_count == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_evicts_the_least_recently_used_connection():
+    """Test that opening a connection beyond the budget closes the least recently used one."""
+    policy = ConnectionPolicy(max_open=2)
+    async with SimulatorFleet(3) as fleet:
+        drivers = [STB8Driver(host, port) for host, port in fleet.addresses]
+        for driver in drivers:
+            driver.set_connection_policy(policy)
+        try:
+            await asyncio.gather(*(driver.send_request(CommandType.GET_STATUS, timeout=2) for driver in drivers[:2]))
+            await drivers[0].send_request(CommandType.GET_STATUS, timeout=2)
+            # drivers[1] is now the least recently used.
+            await drivers[2].send_request(CommandType.GET_STATUS, timeout=2)
+            await _wait_for(lambda: fleet.simulators[1].client_count == 0)
+            assert [simulator.client_count for simulator in fleet.simulators] == [1, 0, 1]
+            assert policy.evictions == 1
+            assert policy.open_count == 2
+
+            # Concurrent commands on a closed driver share one reconnection.
+            await asyncio.gather(*(drivers[1].send_request(CommandType.SEND_KEY, key=KeyCode.OK, timeout=2) for _ in range(3)))
+            assert fleet.simulators[1].client_count == 1
+            await _wait_for(lambda: sum(simulator.client_count for simulator in fleet.simulators) == 2)
+        finally:
+            await asyncio.gather(*(driver.stop() for driver in drivers))
+    assert policy.misses == 6
+    assert policy.reconnect_latency.count == 6
+
+
+@pytest.mark.asyncio
+async def test_busy_connections_are_kept_and_failures_surface():
+    """Test that connections awaiting replies are not closed, and that a failed reconnection raises."""
+    policy = ConnectionPolicy(idle_timeout=0.01, max_open=1)
+    with pytest.raises(ValueError, match="max_open"):
+        ConnectionPolicy(max_open=0)
+    async with STB8Simulator(latency=0.2) as slow, STB8Simulator() as fast:
+        slow_driver = STB8Driver(slow.host, slow.port)
+        fast_driver = STB8Driver(fast.host, fast.port)
+        await slow_driver.start()
+        slow_driver.set_connection_policy(policy)
+        fast_driver.set_connection_policy(policy)
+        try:
+            pending = asyncio.create_task(slow_driver.send_request(CommandType.GET_STATUS, timeout=2))
+            await asyncio.sleep(0.05)
+            await fast_driver.send_request(CommandType.GET_STATUS, timeout=2)
+            # Over budget and past the idle timeout, but still awaiting its reply.
+            assert (await pending).success is True
+            assert policy.evictions == 0
+            await _wait_for(lambda: slow.client_count == 0 and fast.client_count == 0)
+        finally:
+            await asyncio.gather(slow_driver.stop(), fast_driver.stop())
+
+    # The box is gone: the command fails at once instead of retrying forever.
+    with pytest.raises(BoxUnavailableError, match="Cannot connect"):
+        await fast_driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+
+    fast_driver.set_connection_policy(None)
+    assert fast_driver.connection_policy is None
@@ -0,0 +1,130 @@
+"""Tests for the box coordinator shared by the consumers of a box (coordinator.py)."""
+
+import asyncio
+import socket
+
+import pytest
+
+from sfr_tv_box_core import circuit_breaker
+from sfr_tv_box_core.circuit_breaker import BreakerState
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.constants import PowerState
+from sfr_tv_box_core.coordinator import BoxCoordinator
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+from sfr_tv_box_core.simulator import POWER_OFF
+from sfr_tv_box_core.simulator import POWER_ON
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+async def _wait_for(condition) -> None:
+    """Waits up to a second for a condition to hold."""
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_consumers_share_one_connection_and_receive_pushed_state():
+    """Test that two consumers share one socket, and get state changes without polling."""
+    async with STB8Simulator() as simulator:
+        coordinator = BoxCoordinator(STB8Driver(simulator.host, simulator.port))
+        media_player, remote = [], []
+        coordinator.add_listener(lambda: media_player.append(coordinator.is_on))
+        remove_remote = coordinator.add_listener(lambda: remote.append(coordinator.is_on))
+        coordinator.add_listener(lambda: 1 / 0)
+        await coordinator.start()
+        try:
+            assert coordinator.available
+            assert simulator.client_count == 1
+            assert media_player == remote == [True]
+            assert coordinator.state.versions is not None
+            queries = simulator.received
+
+            await simulator.notify_power(POWER_OFF)
+            await _wait_for(lambda: len(media_player) == 2)
+            assert media_player == remote == [True, False]
+            assert coordinator.state.power == PowerState.OFF
+            # State arrives by push only.
+            await asyncio.sleep(0.1)
+            assert simulator.received == queries
+
+            remove_remote()
+            remove_remote()
+            await coordinator.set_power(False)
+            assert simulator.received == queries
+            await coordinator.set_power(True)
+            assert simulator.power == POWER_ON
+            assert coordinator.is_on
+            await coordinator.send_key(KeyCode.VOL_UP)
+            await coordinator.hold_key(KeyCode.VOL_DOWN, 0.05)
+            assert simulator.client_count == 1
+            assert remote == [True, False]
+        finally:
+            await coordinator.stop()
+        assert not coordinator.available
+
+
+@pytest.mark.asyncio
+async def test_start_fails_when_the_box_is_unreachable():
+    """Test that the first connection is bounded by a timeout."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    coordinator = BoxCoordinator(STB8Driver("127.0.0.1", port))
+    assert coordinator.is_on is None
+    with pytest.raises(BoxUnavailableError, match="Cannot connect"):
+        await coordinator.start(connect_timeout=0.1)
+    await coordinator.set_power(True)
+    await coordinator.stop()
+
+
+@pytest.mark.asyncio
+async def test_listeners_follow_the_availability_of_the_box():
+    """Test that disconnections, reconnections and breaker changes are pushed to the listeners."""
+    async with STB8Simulator() as simulator:
+        coordinator = BoxCoordinator(STB8Driver(simulator.host, simulator.port))
+        await coordinator.start()
+        availability = []
+        coordinator.add_listener(lambda: availability.append(coordinator.available))
+        try:
+            queries = simulator.received
+            await simulator.disconnect_clients()
+            await _wait_for(lambda: availability[-1:] == [True] and simulator.received > queries)
+            assert availability[:2] == [False, True]
+            # The state is queried again after the reconnection.
+            assert simulator.received == queries + 2
+
+            breaker = coordinator.driver.circuit_breaker
+            for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD):
+                breaker.record_failure()
+            assert breaker.state is BreakerState.OPEN
+            assert availability[-1] is False
+            breaker.record_success()
+            assert availability[-1] is True
+        finally:
+            await coordinator.stop()
+        assert availability[-1] is False
+
+
+@pytest.mark.asyncio
+async def test_commands_fail_fast_while_the_box_is_unavailable():
+    """Test that an open breaker makes the coordinator unavailable and its commands fail at once."""
+    async with STB8Simulator() as simulator:
+        coordinator = BoxCoordinator(STB8Driver(simulator.host, simulator.port), request_timeout=2)
+        await coordinator.start()
+        try:
+            for _ in range(circuit_breaker.DEFAULT_FAILURE_THRESHOLD):
+                coordinator.driver.circuit_breaker.record_failure()
+            assert coordinator.driver.connected
+            assert not coordinator.available
+            queries = simulator.received
+            with pytest.raises(BoxUnavailableError):
+                await coordinator.send_key(KeyCode.OK)
+            # Boxes that do not answer keep their last known state.
+            await coordinator.refresh()
+            assert coordinator.is_on
+            assert simulator.received == queries
+        finally:
+            await coordinator.stop()
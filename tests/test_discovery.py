@@ -9,6 +9,8 @@ from zeroconf import ServiceInfo
 
 from sfr_tv_box_core.discovery import _DiscoveryListener
 from sfr_tv_box_core.discovery import async_discover_boxes
+from sfr_tv_box_core.discovery import box_id_from_service_name
+from sfr_tv_box_core.discovery import model_from_service_name
 
 
 @pytest.fixture
@@ -54,6 +56,8 @@ async def test_discover_single_box_async(mock_async_zeroconf, monkeypatch):
     assert box.identifier == "STB8"
     assert box.ip_address == "192.168.1.10"
     assert box.port == 7682
+    assert box.box_id == "STB8-aabbcc"
+    assert box_id_from_service_name("STB8-aabbcc._ws._tcp.local.") == "STB8-aabbcc"
 
 
 @pytest.mark.asyncio
@@ -90,3 +94,22 @@ async def test_discover_multiple_boxes_async(mock_async_zeroconf, monkeypatch):
     identifiers = {box.identifier for box in result}
     assert "STB7" in identifiers
     assert "LABOX" in identifiers
+
+
+@pytest.mark.asyncio
+async def test_discover_with_shared_zeroconf(monkeypatch):
+    """Test that a shared zeroconf instance is browsed with and left open."""
+    shared = MagicMock(async_close=AsyncMock())
+    browser = MagicMock(async_cancel=AsyncMock())
+    create_browser = MagicMock(return_value=browser)
+    monkeypatch.setattr("sfr_tv_box_core.discovery.AsyncServiceBrowser", create_browser)
+
+    with patch("sfr_tv_box_core.discovery.AsyncZeroconf") as private:
+        assert await async_discover_boxes(timeout=0, aiozc=shared) == []
+
+    private.assert_not_called()
+    assert create_browser.call_args.args[0] is shared.zeroconf
+    browser.async_cancel.assert_awaited_once()
+    shared.async_close.assert_not_awaited()
+    assert model_from_service_name("ws_server-123456._ws._tcp.local.") == "LABOX"
+    assert model_from_service_name("printer._ws._tcp.local.") is None
@@ -0,0 +1,170 @@
+"""Tests for the multi-process fleet runner (fleet.py), against simulated boxes."""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+from sfr_tv_box_core.fleet import BoxSpec
+from sfr_tv_box_core.fleet import FleetNotification
+from sfr_tv_box_core.fleet import FleetRunner
+from sfr_tv_box_core.fleet import _FleetWorker
+from sfr_tv_box_core.fleet import _pipe_writer
+from sfr_tv_box_core.fleet import shard_for
+from sfr_tv_box_core.simulator import POWER_OFF
+from sfr_tv_box_core.simulator import SimulatorFleet
+
+
+def _specs(fleet):
+    return [
+        BoxSpec(f"box-{i}", host, port, options={"device_id": f"device-{i}"}) for i, (host, port) in enumerate(fleet.addresses)
+    ]
+
+
+def test_consistent_assignment():
+    """Test that the assignment is stable, balanced, and mostly kept when a worker is added."""
+    names = [f"box-{i}" for i in range(2000)]
+    four = [shard_for(name, 4) for name in names]
+    five = [shard_for(name, 5) for name in names]
+
+    assert four == [shard_for(name, 4) for name in names]
+    assert all(350 < four.count(worker) < 650 for worker in range(4))
+    # Only the boxes taken over by the new worker move.
+    assert all(old == new for old, new in zip(four, five, strict=True) if new != 4)
+    assert 300 < five.count(4) < 500
+    with pytest.raises(ValueError, match="Two boxes"):
+        FleetRunner([BoxSpec("a", "localhost"), BoxSpec("a", "localhost")], workers=2)
+
+
+@pytest.mark.asyncio
+async def test_fleet_across_worker_processes():
+    """Test requests, fleet-wide requests and the merged notification stream over two workers."""
+    async with SimulatorFleet(6) as simulators:
+        runner = FleetRunner(_specs(simulators), workers=2)
+        assert {runner.worker_for(name) for name in runner.boxes} == {0, 1}
+        async with runner:
+            assert runner.connected == 6
+            reply = await runner.send_request("box-3", CommandType.GET_VERSIONS, timeout=2)
+            assert reply.data["deviceName"] == "device-3"
+
+            replies = await runner.request_all(CommandType.GET_STATUS, timeout=2)
+            assert sorted(replies) == runner.boxes
+            assert all(reply.success for reply in replies.values())
+
+            stream = runner.notifications()
+            await runner.send_command("box-1", CommandType.SEND_KEY, key=KeyCode.POWER)
+            await runner.send_command("box-4", CommandType.SEND_KEY, key=KeyCode.POWER)
+            async with asyncio.timeout(5):
+                received = [await anext(stream), await anext(stream)]
+            assert sorted(received) == [
+                FleetNotification("box-1", {"status": POWER_OFF}),
+                FleetNotification("box-4", {"status": POWER_OFF}),
+            ]
+
+            with pytest.raises(ValueError, match="Cannot build a request"):
+                await runner.send_request("box-0", "UNKNOWN", timeout=2)
+            with pytest.raises(ValueError, match="No box named"):
+                await runner.send_request("box-9", CommandType.GET_STATUS)
+
+            # A worker that dies fails its calls instead of leaving them hanging.
+            runner._processes[0].kill()
+            box = next(name for name in runner.boxes if runner.worker_for(name) == 0)
+            with pytest.raises(BoxUnavailableError):
+                async with asyncio.timeout(5):
+                    while True:
+                        await runner.send_request(box, CommandType.GET_STATUS, timeout=2)
+            readers = list(runner._readers)
+        assert simulators.simulators[3].client_count == 0
+        # The reader threads are done before the loop may close.
+        assert readers and not any(reader.is_alive() for reader in readers)
+
+
+class _SlowConn:
+    """One end of a pipe whose writes block, as with a full pipe, and that is closed once read."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = threading.Event()
+
+    def send(self, message):
+        time.sleep(0.2)
+        self.sent.append(message)
+
+    def recv(self):
+        self.closed.wait()
+        raise EOFError
+
+
+@pytest.mark.asyncio
+async def test_pipe_writes_do_not_block_the_loop():
+    """Test that calls are written from the writer thread, and that readers give up once the loop is closed."""
+    runner = FleetRunner([BoxSpec("box-0", "192.0.2.1")], workers=1)
+    runner._loop = asyncio.get_running_loop()
+    conn = _SlowConn()
+    runner._conns.append(conn)
+    runner._writers.append(_pipe_writer("test-writer"))
+    try:
+        call = asyncio.create_task(runner.send_request("box-0", CommandType.GET_STATUS))
+        start = time.monotonic()
+        await asyncio.sleep(0.01)
+        assert time.monotonic() - start < 0.15
+        async with asyncio.timeout(2):
+            while not conn.sent:
+                await asyncio.sleep(0.01)
+        call_id = conn.sent[0][1]
+        runner._on_worker_message(0, ("result", call_id, True, "reply"))
+        assert await call == "reply"
+    finally:
+        runner._writers[0].shutdown()
+
+    closed_loop = asyncio.new_event_loop()
+    closed_loop.close()
+    runner._loop = closed_loop
+    conn.closed.set()
+    runner._read_worker(0, conn)
+
+
+@pytest.mark.asyncio
+async def test_worker_in_process():
+    """Test the worker side of the protocol in the current process."""
+    coordinator, worker_conn = multiprocessing.Pipe()
+    async with SimulatorFleet(2) as simulators:
+        worker = _FleetWorker(worker_conn, _specs(simulators))
+        task = asyncio.create_task(worker.run(connect_timeout=2))
+        loop = asyncio.get_running_loop()
+
+        async def receive():
+            return await loop.run_in_executor(None, coordinator.recv)
+
+        assert await receive() == ("ready", 2)
+        coordinator.send(("request", 1, "box-0", CommandType.GET_STATUS, 2, {}))
+        kind, call_id, ok, reply = await receive()
+        assert (kind, call_id, ok, reply.success) == ("result", 1, True, True)
+
+        coordinator.send(("command", 2, "box-1", CommandType.SEND_KEY, None, {"key": KeyCode.POWER}))
+        outcomes = [await receive(), await receive()]
+        assert ("result", 2, True, None) in outcomes
+        assert ("notifications", [("box-1", {"status": POWER_OFF})]) in outcomes
+
+        coordinator.send(("request", 3, "box-0", "UNKNOWN", 2, {}))
+        kind, call_id, ok, error = await receive()
+        assert (call_id, ok) == (3, False)
+        assert isinstance(error, ValueError)
+
+        # A request in flight when the worker stops is reported as failed, and its task is not left behind.
+        simulators.simulators[0].latency = 3
+        coordinator.send(("request", 4, "box-0", CommandType.GET_STATUS, 5, {}))
+        while not worker._operations:
+            await asyncio.sleep(0.01)
+        coordinator.send(("stop", 0))
+        kind, call_id, ok, error = await asyncio.wait_for(receive(), 2)
+        assert (call_id, ok) == (4, False)
+        assert isinstance(error, BoxUnavailableError)
+        await asyncio.wait_for(task, 5)
+        assert not worker._operations
+    assert simulators.simulators[0].client_count == 0
@@ -0,0 +1,101 @@
+"""Tests for the frame ring buffer and log sampling (frame_log.py) and their use by the drivers."""
+
+import logging
+from unittest.mock import AsyncMock
+
+import pytest
+
+from sfr_tv_box_core import frame_log
+from sfr_tv_box_core.frame_log import FrameDirection
+from sfr_tv_box_core.frame_log import FrameRing
+from sfr_tv_box_core.frame_log import LogSampler
+from sfr_tv_box_core.stb7_driver import STB7Driver
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+def test_ring_keeps_the_last_frames(caplog):
+    """Test that the ring drops its oldest frames and dumps the others in order."""
+    ring = FrameRing(capacity=2)
+    logger = logging.getLogger("test_frame_log")
+    ring.dump(logger, "nothing")
+    assert not caplog.text
+
+    for frame in ("a", "b", "c"):
+        ring.record(FrameDirection.SENT, frame)
+    ring.record(FrameDirection.RECEIVED, "d")
+
+    assert ring.capacity == 2
+    assert [(record.direction, record.frame) for record in ring.records()] == [
+        (FrameDirection.SENT, "c"),
+        (FrameDirection.RECEIVED, "d"),
+    ]
+    ring.dump(logger, "a test")
+    assert "Last 2 frames before a test:" in caplog.text
+    assert caplog.text.index(">> c") < caplog.text.index("<< d")
+
+    ring.clear()
+    assert len(ring) == 0
+
+
+def test_sampler_lets_one_message_through_per_interval(monkeypatch):
+    """Test that the sampler counts the messages it drops."""
+    now = [100.0]
+    monkeypatch.setattr(frame_log.time, "monotonic", lambda: now[0])
+    sampler = LogSampler(interval=10)
+
+    assert sampler.sample() == 0
+    assert sampler.sample() is None
+    assert sampler.sample() is None
+    now[0] = 110.0
+    assert sampler.sample() == 2
+
+
+@pytest.mark.asyncio
+async def test_driver_records_frames_and_dumps_on_error(caplog):
+    """Test that frames are recorded in both directions and dumped when listening fails."""
+    driver = STB8Driver(host="localhost")
+    driver.start = AsyncMock()
+    websocket = AsyncMock()
+    websocket.__aiter__.return_value = ["in-1", b"in-2"]
+    driver._websocket = websocket
+    await driver.send_message("out-1")
+    driver._handle_message = AsyncMock(side_effect=RuntimeError("boom"))
+
+    await driver._listen_for_messages()
+
+    assert [record.frame for record in driver.frame_trace.records()] == ["out-1", "in-1"]
+    assert "Last 2 frames before listening error (RuntimeError('boom'))" in caplog.text
+
+    caplog.clear()
+    driver.dump_frames(level=logging.WARNING)
+    assert "Last 2 frames before dump request" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_driver_dumps_frames_on_send_failure(caplog):
+    """Test that a failed write dumps the frames that preceded it."""
+    driver = STB7Driver(host="localhost")
+    driver._websocket = AsyncMock()
+    await driver.send_message("first")
+    driver._websocket.send.side_effect = ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        await driver.send_message("second")
+
+    assert "Last 1 frames before send failure (ConnectionError('reset'))" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_received_messages_are_logged_sampled(caplog):
+    """Test that the per-message INFO and DEBUG logs are rate-limited."""
+    caplog.set_level(logging.DEBUG)
+    driver = STB8Driver(host="localhost")
+    driver._websocket = AsyncMock()
+    for index in range(3):
+        await driver._handle_message(f"message {index}")
+        await driver.send_message(f"frame {index}")
+
+    assert "STB8 received message: message 0 (0 not logged since the last one)" in caplog.text
+    assert "message 1" not in caplog.text
+    assert "Frame >> frame 0" in caplog.text
+    assert "frame 2" not in caplog.text
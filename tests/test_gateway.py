@@ -0,0 +1,220 @@
+"""Tests for the WebSocket gateway (gateway.py), over real sockets against the simulator."""
+
+import asyncio
+import json
+
+import pytest
+import websockets
+
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.gateway import BoxGateway
+from sfr_tv_box_core.gateway import _command_of
+from sfr_tv_box_core.gateway import _GatewayClient
+from sfr_tv_box_core.send_queue import SendPriority
+from sfr_tv_box_core.simulator import POWER_OFF
+from sfr_tv_box_core.simulator import POWER_ON
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb7_driver import STB7_KEYCODES
+from sfr_tv_box_core.stb7_driver import STB7Driver
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+async def _receive(websocket, predicate):
+    """Reads frames until one matches."""
+    async with asyncio.timeout(2):
+        while True:
+            frame = json.loads(await websocket.recv())
+            if predicate(frame):
+                return frame
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_upstream_connection():
+    """Test that replies go back to the right client and notifications to every client."""
+    async with STB8Simulator() as simulator, BoxGateway(STB8Driver(simulator.host, simulator.port), port=0) as gateway:
+        clients = [STB8Driver(gateway.host, gateway.port, device_id=f"client-{i}") for i in range(3)]
+        notifications = [[] for _ in clients]
+        for client, received in zip(clients, notifications, strict=True):
+            client.register_listener(lambda message, received=received: "status" in message and received.append(message))
+            await client.start()
+        try:
+            # Identical queries are collapsed by each client, key presses are not.
+            versions, _ = await asyncio.gather(
+                asyncio.gather(*(client.send_request(CommandType.GET_VERSIONS, timeout=2) for client in clients)),
+                asyncio.gather(
+                    *(
+                        client.send_request(CommandType.SEND_KEY, key=KeyCode.OK, timeout=2)
+                        for client in clients
+                        for _ in range(4)
+                    )
+                ),
+            )
+            await clients[0].send_request(CommandType.SEND_KEY, key=KeyCode.POWER, timeout=2)
+            async with asyncio.timeout(2):
+                while not all(notifications):
+                    await asyncio.sleep(0.01)
+        finally:
+            for client in clients:
+                await client.stop()
+
+        assert simulator.client_count == 1
+        assert [reply.data["deviceName"] for reply in versions] == [f"client-{i}" for i in range(3)]
+        assert all(json.loads(received[0])["data"]["status"] == POWER_OFF for received in notifications)
+        assert gateway.forwarded == 16
+        assert gateway.broadcast == 1
+    assert simulator.client_count == 0
+
+
+@pytest.mark.asyncio
+async def test_request_ids_are_rewritten_and_restored():
+    """Test that clients reusing the same requestId still get their own reply."""
+    async with STB8Simulator(echo_request_id=True) as simulator:
+        upstream = STB8Driver(simulator.host, simulator.port)
+        await upstream.start()
+        gateway = BoxGateway(upstream, port=0)
+        await gateway.start()
+        try:
+            async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as first:
+                async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as second:
+                    await first.send(json.dumps({"action": "getVersions", "requestId": 7, "params": {"deviceName": "a"}}))
+                    await second.send(json.dumps({"action": "getVersions", "requestId": 7, "params": {"deviceName": "b"}}))
+                    first_reply = await _receive(first, lambda frame: "action" in frame)
+                    second_reply = await _receive(second, lambda frame: "action" in frame)
+
+                    # Replies to the gateway's own driver are not forwarded.
+                    await upstream.send_request(CommandType.GET_STATUS, timeout=2)
+                    await first.send("not json")
+                    await first.send("[]")
+                    await first.send(json.dumps({"action": "getStatus", "requestId": 8}))
+                    status = await _receive(first, lambda frame: "action" in frame)
+        finally:
+            await gateway.stop()
+        # The gateway leaves a connection it did not open alone.
+        assert upstream._websocket is not None
+        await upstream.stop()
+
+    assert (first_reply["requestId"], first_reply["data"]["deviceName"]) == (7, "a")
+    assert (second_reply["requestId"], second_reply["data"]["deviceName"]) == (7, "b")
+    assert (status["action"], status["requestId"]) == ("getStatus", 8)
+
+
+@pytest.mark.asyncio
+async def test_replies_not_echoing_the_request_id_are_routed_by_action():
+    """Test that STB8 replies without the requestId of their command go to its client, with its ID restored."""
+    async with STB8Simulator() as simulator, BoxGateway(STB8Driver(simulator.host, simulator.port), port=0) as gateway:
+        async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as first:
+            async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as second:
+                await first.send(json.dumps({"action": "getVersions", "requestId": 7, "params": {"deviceName": "a"}}))
+                first_reply = await _receive(first, lambda frame: "action" in frame)
+                await second.send(json.dumps({"action": "getVersions", "requestId": 7, "params": {"deviceName": "b"}}))
+                second_reply = await _receive(second, lambda frame: "action" in frame)
+                await second.send(json.dumps({"action": "getStatus"}))
+                status = await _receive(second, lambda frame: "action" in frame)
+        assert not gateway._routes_by_id
+
+    assert (first_reply["requestId"], first_reply["data"]["deviceName"]) == (7, "a")
+    assert (second_reply["requestId"], second_reply["data"]["deviceName"]) == (7, "b")
+    assert "requestId" not in status
+    assert gateway.routed == 3
+
+
+@pytest.mark.asyncio
+async def test_replies_without_request_id_are_routed_by_action():
+    """Test the routing of STB7/LaBox frames, which carry no requestId."""
+    async with STB8Simulator() as simulator, BoxGateway(STB7Driver(simulator.host, simulator.port), port=0) as gateway:
+        async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as first:
+            async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as second:
+                await first.send(json.dumps({"Params": {"Action": "GetVersions"}}))
+                await second.send(json.dumps({"Params": {"Action": "GetVersions"}}))
+                async with asyncio.timeout(2):
+                    while gateway.forwarded < 2:
+                        await asyncio.sleep(0.01)
+                await gateway.driver.feed_message(json.dumps({"Action": "GetVersions", "Data": {"n": 1}}))
+                await gateway.driver.feed_message(json.dumps({"Action": "GetVersions", "Data": {"n": 2}}))
+                # An unsolicited reply nobody waits for is dropped.
+                await gateway.driver.feed_message(json.dumps({"Action": "GetVersions", "Data": {"n": 3}}))
+                await gateway.driver.feed_message("not json")
+
+                assert (await _receive(first, lambda frame: "Action" in frame))["Data"] == {"n": 1}
+                assert (await _receive(second, lambda frame: "Action" in frame))["Data"] == {"n": 2}
+    assert gateway.routed == 2
+
+
+@pytest.mark.asyncio
+async def test_forwarded_commands_are_prioritized_and_not_awaited_by_the_driver():
+    """Test that power keys take the urgent lane and that the driver tracks no forwarded command."""
+    async with STB8Simulator() as simulator:
+        upstream = STB8Driver(simulator.host, simulator.port)
+        async with BoxGateway(upstream, port=0) as gateway:
+            async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as client:
+                for request_id, key in enumerate(("ok", "power", "stop", "ok")):
+                    await client.send(json.dumps({"action": "buttonEvent", "requestId": request_id, "params": {"key": key}}))
+                    await _receive(client, lambda frame: "action" in frame)
+                await client.send(json.dumps({"action": "buttonEvent", "params": {"key": {"unexpected": 1}}}))
+                await _receive(client, lambda frame: "action" in frame)
+            assert not any(upstream._pending.values())
+            assert upstream.lane_stats[SendPriority.URGENT].count == 2
+            assert upstream.lane_stats[SendPriority.BULK].count == 3
+
+    # STB7 and LaBox frames press keycodes.
+    params_gateway = BoxGateway(STB7Driver("192.0.2.1"), port=0)
+    assert _command_of({"Params": {"Action": "ButtonEvent", "Press": [STB7_KEYCODES[KeyCode.POWER]]}}) == (
+        "ButtonEvent",
+        STB7_KEYCODES[KeyCode.POWER],
+    )
+    assert params_gateway._urgent_keys == {STB7_KEYCODES[KeyCode.POWER], STB7_KEYCODES[KeyCode.STOP]}
+
+
+@pytest.mark.asyncio
+async def test_unavailable_box_and_slow_clients():
+    """Test that commands get a KO reply while the breaker is open and that lagging clients lose frames."""
+    async with STB8Simulator() as simulator, BoxGateway(STB8Driver(simulator.host, simulator.port), port=0) as gateway:
+        for _ in range(5):
+            gateway.driver.circuit_breaker.record_failure()
+        async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as client:
+            await client.send(json.dumps({"action": "getStatus", "deviceId": "tablet", "requestId": 1}))
+            await client.send(json.dumps({"action": "getStatus"}))
+            await client.send(json.dumps({"Params": {"Action": "GetSessionsStatus"}}))
+            replies = [await _receive(client, lambda frame: True) for _ in range(3)]
+        assert gateway.forwarded == 0
+        assert not gateway._routes_by_id
+        assert not gateway._routes_by_pending
+        assert simulator.received == 0
+
+    assert replies == [
+        {"remoteResponseCode": "KO", "action": "getStatus", "deviceId": "tablet", "data": {}, "requestId": 1},
+        {"remoteResponseCode": "KO", "action": "getStatus", "deviceId": None, "data": {}},
+        {"Action": "GetSessionsStatus", "RemoteResponseCode": "KO", "Data": {}},
+    ]
+
+    lagging = _GatewayClient(websocket=None, queue_size=2)
+    for _ in range(5):
+        lagging.deliver("{}")
+    assert (lagging.outbox.qsize(), lagging.dropped) == (2, 3)
+
+
+@pytest.mark.asyncio
+async def test_replies_to_the_driver_stay_with_the_driver():
+    """Test that the reply to a heartbeat probe is not routed to a client whose status query is in flight."""
+    async with STB8Simulator(drop_rate=1.0) as simulator:
+        upstream = STB8Driver(simulator.host, simulator.port)
+        async with BoxGateway(upstream, port=0) as gateway:
+            async with websockets.connect(f"ws://{gateway.host}:{gateway.port}/ws") as client:
+                probe = asyncio.create_task(upstream._send_probe(timeout=2))
+                async with asyncio.timeout(2):
+                    while not upstream._pending.get("getStatus"):
+                        await asyncio.sleep(0.01)
+                    await client.send(json.dumps({"action": "getStatus", "requestId": 5}))
+                    while not gateway.forwarded:
+                        await asyncio.sleep(0.01)
+                # The box answers in order: the probe first, then the client.
+                await upstream.feed_message(json.dumps({"action": "getStatus", "data": {"power": POWER_ON}}))
+                await upstream.feed_message(json.dumps({"action": "getStatus", "data": {"power": POWER_OFF}}))
+                reply = await _receive(client, lambda frame: "action" in frame)
+                probed = await probe
+            assert not any(upstream._pending.values())
+
+    assert probed.data == {"power": POWER_ON}
+    assert (reply["requestId"], reply["data"]) == (5, {"power": POWER_OFF})
+    assert gateway.routed == 1
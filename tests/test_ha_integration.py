@@ -0,0 +1,130 @@
+"""Tests for the Home Assistant integration, against the local simulator.
+
+They need `pytest-homeassistant-custom-component` and are skipped without it.
+"""
+
+import asyncio
+from ipaddress import ip_address
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.const import CONF_HOST  # noqa: E402
+from homeassistant.const import CONF_MODEL  # noqa: E402
+from homeassistant.const import CONF_PORT  # noqa: E402
+from homeassistant.data_entry_flow import FlowResultType  # noqa: E402
+from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo  # noqa: E402
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from custom_components.sfr_tv_box_remote.const import DOMAIN  # noqa: E402
+from sfr_tv_box_core.discovery import DiscoveredBox  # noqa: E402
+from sfr_tv_box_core.simulator import POWER_OFF  # noqa: E402
+from sfr_tv_box_core.simulator import STB8Simulator  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Lets Home Assistant load the integration from `custom_components`."""
+    yield
+
+
+async def _wait_for_state(hass, entity_id: str, state: str) -> None:
+    """Waits up to a second for an entity to reach a state."""
+    for _ in range(100):
+        if hass.states.get(entity_id).state == state:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_entities_share_one_connection_and_receive_pushed_state(hass):
+    """Test that both entities use the same socket and follow the notifications of the box."""
+    async with STB8Simulator() as simulator:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title="Salon",
+            unique_id="STB8-salon",
+            data={CONF_HOST: simulator.host, CONF_PORT: simulator.port, CONF_MODEL: "STB8"},
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        assert simulator.client_count == 1
+        assert hass.states.get("media_player.salon").state == "on"
+        assert hass.states.get("remote.salon").state == "on"
+        queries = simulator.received
+
+        await simulator.notify_power(POWER_OFF)
+        await _wait_for_state(hass, "media_player.salon", "off")
+        assert hass.states.get("media_player.salon").state == "off"
+        assert hass.states.get("remote.salon").state == "off"
+        assert simulator.received == queries
+
+        await hass.services.async_call(
+            "remote", "send_command", {"entity_id": "remote.salon", "command": ["vol_up", "OK"]}, blocking=True
+        )
+        await hass.services.async_call("media_player", "turn_on", {"entity_id": "media_player.salon"}, blocking=True)
+        assert hass.states.get("media_player.salon").state == "on"
+        assert simulator.client_count == 1
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        assert not entry.runtime_data.available
+
+
+async def test_zeroconf_discovery_creates_an_entry(hass):
+    """Test that an mDNS announce from HA's shared zeroconf is turned into an entry."""
+    discovery = ZeroconfServiceInfo(
+        ip_address=ip_address("192.0.2.10"),
+        ip_addresses=[ip_address("192.0.2.10")],
+        hostname="STB8-aabbcc.local.",
+        name="STB8-aabbcc._ws._tcp.local.",
+        port=7682,
+        properties={},
+        type="_ws._tcp.local.",
+    )
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "zeroconf"}, data=discovery)
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "zeroconf_confirm"
+
+    with patch("custom_components.sfr_tv_box_remote.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {})
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["data"] == {CONF_HOST: "192.0.2.10", CONF_PORT: 7682, CONF_MODEL: "STB8"}
+    assert result["result"].unique_id == "STB8-aabbcc"
+
+
+async def test_box_added_by_hand_is_identified_like_its_announces(hass):
+    """Test that the manual and zeroconf flows give a box the same unique ID."""
+    announced = DiscoveredBox("STB8", "192.0.2.10", 7682, "STB8 (192.0.2.10)", "STB8-aabbcc")
+    with (
+        patch("custom_components.sfr_tv_box_remote.config_flow.zeroconf.async_get_async_instance"),
+        patch("custom_components.sfr_tv_box_remote.config_flow.async_discover_boxes", return_value=[announced]),
+        patch("custom_components.sfr_tv_box_remote.config_flow._async_can_connect", return_value=True),
+        patch("custom_components.sfr_tv_box_remote.async_setup_entry", return_value=True),
+    ):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"})
+        assert result["type"] is FlowResultType.FORM
+        user_input = {CONF_HOST: "192.0.2.10", CONF_PORT: 7682, CONF_MODEL: "STB8"}
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["result"].unique_id == "STB8-aabbcc"
+
+    # Announced again after a DHCP renewal: the existing entry is updated.
+    discovery = ZeroconfServiceInfo(
+        ip_address=ip_address("192.0.2.11"),
+        ip_addresses=[ip_address("192.0.2.11")],
+        hostname="STB8-aabbcc.local.",
+        name="STB8-aabbcc._ws._tcp.local.",
+        port=7683,
+        properties={},
+        type="_ws._tcp.local.",
+    )
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "zeroconf"}, data=discovery)
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    (entry,) = hass.config_entries.async_entries(DOMAIN)
+    assert entry.data[CONF_HOST] == "192.0.2.11"
+    assert entry.data[CONF_PORT] == 7683
@@ -0,0 +1,135 @@
+"""Tests for the application-level heartbeat (heartbeat.py)."""
+
+import asyncio
+
+import pytest
+
+from sfr_tv_box_core.circuit_breaker import BreakerState
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.heartbeat import Heartbeat
+from sfr_tv_box_core.heartbeat import HeartbeatMode
+from sfr_tv_box_core.heartbeat import RttEstimator
+from sfr_tv_box_core.rate_limiter import AdaptiveRateLimiter
+from sfr_tv_box_core.send_queue import SendPriority
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+def test_rtt_estimator_follows_rfc_6298():
+    """Test the smoothed RTT, its variation and the clamped timeout."""
+    estimator = RttEstimator()
+    assert estimator.timeout(1.0, 10.0, 3.0) == 3.0
+    estimator.update(0.1)
+    assert (estimator.srtt, estimator.rttvar) == (0.1, 0.05)
+    estimator.update(0.5)
+    assert estimator.rttvar == pytest.approx(0.75 * 0.05 + 0.25 * 0.4)
+    assert estimator.srtt == pytest.approx(0.875 * 0.1 + 0.125 * 0.5)
+    assert estimator.timeout(0.01, 10.0, 3.0) == pytest.approx(estimator.srtt + 4 * estimator.rttvar)
+    assert estimator.timeout(1.0, 10.0, 3.0) == 1.0
+    assert estimator.timeout(0.01, 0.2, 3.0) == 0.2
+    assert estimator.samples == 2
+
+    for kwargs in ({"interval": 0}, {"min_deadline": 2, "max_deadline": 1}, {"max_missed": 0}):
+        with pytest.raises(ValueError):
+            Heartbeat(**kwargs)
+
+
+async def _wait_for(condition, timeout: float = 3.0) -> None:
+    """Waits for a condition to hold."""
+    for _ in range(int(timeout * 100)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", [HeartbeatMode.PING, HeartbeatMode.STATUS])
+async def test_dead_peer_detected_and_reconnected(mode):
+    """Test that a box that stops answering is dropped after the heartbeat deadline, then reconnected."""
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        heartbeat = Heartbeat(interval=0.05, mode=mode, min_deadline=0.1, max_deadline=0.2, initial_deadline=0.2)
+        driver.set_heartbeat(heartbeat)
+        assert driver.heartbeat is heartbeat
+        await driver.start()
+        try:
+            await _wait_for(lambda: heartbeat.rtt is not None)
+            assert heartbeat.rtt < 0.1
+            assert heartbeat.deadline == 0.1
+            assert driver.metrics.heartbeat_rtt.value == heartbeat.rtt
+
+            simulator.freeze()
+            loop = asyncio.get_running_loop()
+            frozen_at = loop.time()
+            await _wait_for(lambda: driver.metrics.connections.value == 2)
+            # Silence interval, then a 0.1 s probe and its 0.2 s retry, plus scheduling slack.
+            assert loop.time() - frozen_at < 1.0
+            assert heartbeat.dead_peers == driver.metrics.dead_peers.value == 1
+            assert heartbeat.missed == 2
+            assert driver.connected
+
+            reply = await driver.send_request(CommandType.GET_STATUS, timeout=2)
+            assert reply.success
+        finally:
+            await driver.stop()
+
+
+@pytest.mark.asyncio
+async def test_busy_box_is_not_probed():
+    """Test that traffic from the box replaces the probes, and that the heartbeat can be removed."""
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        await driver.start()
+        try:
+            heartbeat = Heartbeat(interval=0.1, mode=HeartbeatMode.STATUS)
+            driver.set_heartbeat(heartbeat)
+            for _ in range(5):
+                await driver.send_request(CommandType.SEND_KEY, timeout=2, key=KeyCode.OK)
+                await asyncio.sleep(0.04)
+            assert heartbeat.probes == 0
+
+            await _wait_for(lambda: heartbeat.probes > 0)
+            assert heartbeat.missed == 0
+            driver.set_heartbeat(None)
+            probes = heartbeat.probes
+            await asyncio.sleep(0.3)
+            assert heartbeat.probes == probes
+        finally:
+            await driver.stop()
+
+
+@pytest.mark.asyncio
+async def test_status_probes_close_the_breaker_of_an_idle_box():
+    """Test that status probes bypass an open breaker and an empty rate limiter, and that only their replies count."""
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        limiter = AdaptiveRateLimiter(rate=0.01, min_rate=0.01, max_rate=0.01, burst=1)
+        driver.set_rate_limiter(limiter)
+        await driver.start()
+        try:
+            await driver.send_request(CommandType.SEND_KEY, timeout=2, key=KeyCode.OK)
+            samples = limiter._latency
+            # Requests left unanswered over a connection that is still up.
+            for _ in range(5):
+                driver.circuit_breaker.record_failure()
+            assert driver.circuit_breaker.state is BreakerState.OPEN
+
+            simulator.drop_rate = 1.0
+            with pytest.raises(asyncio.TimeoutError):
+                await driver._send_probe(0.1)
+            assert driver.circuit_breaker.failures == 5
+            assert driver.metrics.request_timeouts.value == 0
+            assert not any(driver._pending.values())
+
+            simulator.drop_rate = 0.0
+            heartbeat = Heartbeat(interval=0.05, mode=HeartbeatMode.STATUS, initial_deadline=1.0)
+            driver.set_heartbeat(heartbeat)
+            await _wait_for(lambda: heartbeat.rtt is not None)
+            assert driver.circuit_breaker.state is BreakerState.CLOSED
+            assert heartbeat.missed == 0
+            assert driver.lane_stats[SendPriority.URGENT].count >= 1
+            # Probes are paced by nothing and measure nothing for the limiter.
+            assert limiter._latency == samples
+        finally:
+            await driver.stop()
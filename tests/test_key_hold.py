@@ -0,0 +1,83 @@
+"""Tests for the key-hold streaming mode (key_hold.py)."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.rate_limiter import AdaptiveRateLimiter
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+@pytest.mark.asyncio
+async def test_held_key_streams_one_frame_at_a_steady_rate():
+    """Test that a held key is repeated with the same frame until released."""
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        driver.set_rate_limiter(None)
+        await driver.start()
+        try:
+            hold = driver.press(KeyCode.VOL_UP, rate=50)
+            assert driver.press(KeyCode.VOL_UP) is hold
+            assert driver._is_busy()
+            await asyncio.sleep(0.2)
+            await driver.release(KeyCode.VOL_UP)
+            assert not hold.active
+            sent = hold.frames_sent
+            assert 6 <= sent + hold.skipped <= 12
+
+            await asyncio.sleep(0.1)
+            assert simulator.received == sent
+            frames = [record.frame for record in driver.frame_trace.records() if record.direction == ">>"]
+            assert len(frames) == sent
+            assert len(set(frames)) == 1
+            assert not driver._is_busy()
+
+            assert await driver.hold_key(KeyCode.FFWD, 0.05, rate=100) >= 2
+        finally:
+            await driver.stop()
+
+
+@pytest.mark.asyncio
+async def test_release_leaves_no_backlog():
+    """Test that repeats the driver cannot keep up with are skipped, and dropped on release."""
+    driver = STB8Driver(host="localhost")
+    # One frame every 50 ms at most, while the key repeats every 10 ms.
+    driver.set_rate_limiter(AdaptiveRateLimiter(rate=20, min_rate=20, max_rate=20, burst=1))
+    driver.send_message = AsyncMock()
+
+    hold = driver.press(KeyCode.RIGHT, rate=100)
+    await asyncio.sleep(0.12)
+    await driver.release(KeyCode.RIGHT)
+    written = driver.send_message.await_count
+    assert written == hold.frames_sent
+    assert hold.skipped > hold.frames_sent
+
+    await asyncio.sleep(0.1)
+    assert driver.send_message.await_count == written
+    assert len(driver._send_queue) == 0
+    await driver.release(KeyCode.RIGHT)
+
+
+@pytest.mark.asyncio
+async def test_hold_errors():
+    """Test invalid holds and a hold stopped by a send error."""
+    driver = STB8Driver(host="localhost")
+    driver.send_message = AsyncMock(side_effect=OSError("socket broke"))
+    with pytest.raises(ValueError, match="not supported"):
+        driver.press(KeyCode.DELETE)
+    with pytest.raises(ValueError, match="rate"):
+        driver.press(KeyCode.UP, rate=0)
+
+    with pytest.raises(OSError, match="socket broke"):
+        await driver.hold_key(KeyCode.UP, 5)
+
+    driver.send_message = AsyncMock()
+    hold = driver.press(KeyCode.DOWN)
+    await asyncio.sleep(0.01)
+    await driver.stop()
+    assert not hold.active
+    assert hold.error is None
+    assert hold.frames_sent == 1
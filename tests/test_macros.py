@@ -0,0 +1,137 @@
+"""Tests for the macro engine (macros.py)."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from sfr_tv_box_core import macros
+from sfr_tv_box_core.base_driver import BoxResponse
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.macros import MacroStep
+from sfr_tv_box_core.macros import channel_steps
+from sfr_tv_box_core.macros import clear_macro_cache
+from sfr_tv_box_core.macros import sleep_until
+from sfr_tv_box_core.stb7_driver import STB7Driver
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test with an empty macro cache."""
+    clear_macro_cache()
+    yield
+    clear_macro_cache()
+
+
+def test_channel_steps():
+    """Test that a channel number becomes one digit key per character."""
+    assert channel_steps(123, delay=0.2) == [
+        MacroStep(KeyCode.NUM_1, 0.2),
+        MacroStep(KeyCode.NUM_2, 0.2),
+        MacroStep(KeyCode.NUM_3, 0.2),
+    ]
+    with pytest.raises(ValueError):
+        channel_steps("12a")
+
+
+def test_compile_macro_builds_frames_once():
+    """Test that a macro is compiled into frames and then served from the cache."""
+    driver = STB8Driver(host="localhost", device_id="stb8")
+    macro = driver.compile_macro("tf1", [KeyCode.NUM_1, MacroStep(KeyCode.OK, wait_for_ack=True)])
+
+    assert macro.name == "tf1"
+    assert [json.loads(frame.payload)["params"]["key"] for frame in macro.frames] == ["1", "ok"]
+    assert [frame.wait_for_ack for frame in macro.frames] == [False, True]
+    assert {frame.reply_action for frame in macro.frames} == {"buttonEvent"}
+    assert driver.compile_macro("tf1", [KeyCode.NUM_1, MacroStep(KeyCode.OK, wait_for_ack=True)]) is macro
+
+
+def test_compiled_macro_shared_by_same_model_only():
+    """Test that drivers of the same model and device share compiled macros."""
+    steps = channel_steps(42)
+    macro = STB8Driver(host="a", device_id="stb8").compile_macro("42", steps)
+
+    assert STB8Driver(host="b", device_id="stb8").compile_macro("42", steps) is macro
+    assert STB8Driver(host="c", device_id="other").compile_macro("42", steps) is not macro
+    assert STB7Driver(host="a").compile_macro("42", steps) is not macro
+
+
+def test_drivers_without_a_shared_key_cache_their_own_macros():
+    """Test that the macros of drivers that cannot share them are kept per driver."""
+    first, second = STB8Driver(host="a"), STB8Driver(host="b")
+    first._macro_cache_key = second._macro_cache_key = lambda: None
+
+    macro = first.compile_macro("ok", [KeyCode.OK])
+
+    assert first.compile_macro("ok", [KeyCode.OK]) is macro
+    assert second.compile_macro("ok", [KeyCode.OK]) is not macro
+    assert not macros._MACRO_CACHE
+    assert list(first._macro_cache.values()) == [macro]
+
+
+def test_compile_macro_rejects_unsupported_key():
+    """Test that a key unknown to the model fails at compile time."""
+    driver = STB8Driver(host="localhost")
+    with pytest.raises(ValueError, match="DELETE"):
+        driver.compile_macro("bad", [KeyCode.DELETE])
+
+
+def test_macro_cache_is_bounded(monkeypatch):
+    """Test that the oldest compiled macro is evicted once the cache is full."""
+    monkeypatch.setattr(macros, "MACRO_CACHE_SIZE", 2)
+    driver = STB7Driver(host="localhost")
+    first = driver.compile_macro("a", [KeyCode.OK])
+    driver.compile_macro("b", [KeyCode.OK])
+    driver.compile_macro("c", [KeyCode.OK])
+
+    assert len(macros._MACRO_CACHE) == 2
+    assert driver.compile_macro("a", [KeyCode.OK]) is not first
+
+
+@pytest.mark.asyncio
+async def test_play_macro_sends_frames_without_encoding(monkeypatch):
+    """Test that replaying a macro sends the compiled frames as they are."""
+    driver = STB7Driver(host="localhost")
+    macro = driver.compile_macro("123", channel_steps(123))
+    driver.send_message = AsyncMock()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("replay must not encode")
+
+    monkeypatch.setattr(driver, "_build_command", fail)
+
+    assert await driver.play_macro(macro) == []
+    assert [call.args[0] for call in driver.send_message.await_args_list] == [frame.payload for frame in macro.frames]
+
+
+@pytest.mark.asyncio
+async def test_play_macro_waits_for_ack_and_delays():
+    """Test that ack steps wait for the reply and delays separate the keys."""
+    driver = STB8Driver(host="localhost")
+    macro = driver.compile_macro("ack", [MacroStep(KeyCode.OK, delay=0.05, wait_for_ack=True), KeyCode.BACK])
+    loop = asyncio.get_running_loop()
+    reply = BoxResponse(action="buttonEvent", success=True, data={})
+    sent_at = []
+
+    async def send_message(payload):
+        sent_at.append(loop.time())
+        if len(sent_at) == 1:
+            loop.call_soon(driver._resolve_request, reply)
+
+    driver.send_message = send_message
+
+    assert await driver.play_macro(macro) == [reply]
+    assert len(sent_at) == 2
+    assert sent_at[1] - sent_at[0] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_sleep_until_past_deadline_returns_immediately():
+    """Test that a deadline in the past does not yield a timer."""
+    loop = asyncio.get_running_loop()
+    await sleep_until(loop.time() - 1)
+    start = loop.time()
+    await sleep_until(start + 0.01)
+    assert loop.time() >= start + 0.01
@@ -0,0 +1,44 @@
+"""Memory budget of idle drivers, against simulated boxes served from a child process."""
+
+import asyncio
+import gc
+import tracemalloc
+
+import pytest
+
+from benchmarks._common import SimulatorProcess
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+# Bytes allocated per idle STB8Driver connected to its box, WebSocket included.
+# About 25 KB; it was 75 KB before the compression state was dropped.
+IDLE_DRIVER_MEMORY_BUDGET = 32 * 1024
+
+_DRIVERS = 20
+
+
+@pytest.mark.asyncio
+async def test_idle_connected_driver_stays_within_budget():
+    """Test the memory held by idle connected drivers, measured with tracemalloc."""
+    with SimulatorProcess(_DRIVERS) as simulators:
+        # A first connection imports and caches what every later one reuses.
+        warm_up = STB8Driver(*simulators.addresses[0])
+        await warm_up.start()
+        await warm_up.stop()
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            drivers = [STB8Driver(host, port) for host, port in simulators.addresses]
+            await asyncio.gather(*(driver.start() for driver in drivers))
+            gc.collect()
+            per_driver = (tracemalloc.get_traced_memory()[0] - baseline) / _DRIVERS
+        finally:
+            tracemalloc.stop()
+        try:
+            assert per_driver < IDLE_DRIVER_MEMORY_BUDGET
+            # The per-model tables are shared and the send lanes only exist once used.
+            assert not hasattr(drivers[0]._builder, "__dict__")
+            assert drivers[0]._send_queue._lanes == {}
+        finally:
+            await asyncio.gather(*(driver.stop() for driver in drivers))
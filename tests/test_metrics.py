@@ -0,0 +1,156 @@
+"""Tests for the metrics registry (metrics.py) and the metrics recorded by the drivers."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+import websockets
+
+from sfr_tv_box_core.base_driver import BoxResponse
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+from sfr_tv_box_core.metrics import DriverMetrics
+from sfr_tv_box_core.metrics import Histogram
+from sfr_tv_box_core.metrics import MetricsRegistry
+from sfr_tv_box_core.metrics import payload_size
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+def test_histogram_buckets():
+    """Test that observations land in the first bucket whose bound they do not exceed."""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.cumulative_counts() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(3.65)
+
+
+def test_registry_reuses_children_and_rejects_kind_conflicts():
+    """Test that the same name and labels give the same metric."""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", host="a")
+    assert registry.counter("requests_total", "Requests.", host="a") is counter
+    assert registry.counter("requests_total", "Requests.", host="b") is not counter
+    with pytest.raises(ValueError, match="already registered as a counter"):
+        registry.gauge("requests_total", "Requests.")
+
+
+def test_render_prometheus():
+    """Test the Prometheus text exposition of every metric type."""
+    registry = MetricsRegistry()
+    assert registry.render_prometheus() == ""
+    registry.counter("frames_total", "Frames.", host='box "1"').inc(3)
+    gauge = registry.gauge("connected", "Open\nconnections.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    registry.histogram("latency_seconds", "Latency.", buckets=(0.5,)).observe(0.25)
+
+    assert registry.render_prometheus() == (
+        "# HELP frames_total Frames.\n"
+        "# TYPE frames_total counter\n"
+        'frames_total{host="box \\"1\\""} 3\n'
+        "# HELP connected Open\\nconnections.\n"
+        "# TYPE connected gauge\n"
+        "connected 1\n"
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.5"} 1\n'
+        'latency_seconds_bucket{le="+Inf"} 1\n'
+        "latency_seconds_sum 0.25\n"
+        "latency_seconds_count 1\n"
+    )
+
+
+def test_render_special_values():
+    """Test that non-finite gauge values are rendered as Prometheus spells them."""
+    registry = MetricsRegistry()
+    for name, value in (("nan", float("nan")), ("up", float("inf")), ("down", float("-inf")), ("half", 0.5)):
+        registry.gauge(name, "Value.").set(value)
+
+    samples = [line for line in registry.render_prometheus().splitlines() if not line.startswith("#")]
+
+    assert samples == ["nan NaN", "up +Inf", "down -Inf", "half 0.5"]
+    assert payload_size("abc") == payload_size(b"abc") == 3
+    assert payload_size("é€") == 5
+
+
+def test_snapshot_and_unregister():
+    """Test the snapshot of a shared registry and the removal of one driver's metrics."""
+    registry = MetricsRegistry()
+    first = DriverMetrics(registry, host="a")
+    DriverMetrics(registry, host="b")
+    first.frames_sent.inc()
+    first.reply_latency.observe(0.02)
+
+    samples = registry.snapshot()["sfr_box_frames_sent_total"]["samples"]
+    assert samples == [{"labels": {"host": "a"}, "value": 1.0}, {"labels": {"host": "b"}, "value": 0.0}]
+    latency = registry.snapshot()["sfr_box_reply_latency_seconds"]
+    assert latency["type"] == "histogram"
+    assert latency["samples"][0]["count"] == 1
+    assert first.snapshot()["frames_sent"] == 1
+
+    first.close()
+    samples = registry.snapshot()["sfr_box_frames_sent_total"]["samples"]
+    assert [sample["labels"] for sample in samples] == [{"host": "b"}]
+
+
+@pytest.mark.asyncio
+async def test_driver_records_frames_and_replies(monkeypatch):
+    """Test the metrics fed by sending, receiving and resolving replies."""
+    driver = STB8Driver(host="localhost")
+    driver._websocket = AsyncMock()
+    driver._websocket.__aiter__.return_value = ['{"action": "getStatus", "data": {}}']
+    registry = MetricsRegistry()
+    metrics = driver.attach_metrics(registry, site="lab")
+
+    await driver.send_message("12345")
+    await driver.send_message("é")
+    driver._websocket.send.side_effect = RuntimeError("broken pipe")
+    with pytest.raises(RuntimeError):
+        await driver.send_message("x")
+    await driver._listen_for_messages()
+
+    assert metrics.frames_sent.value == 2
+    assert metrics.bytes_sent.value == 7
+    assert metrics.send_failures.value == 1
+    assert metrics.frames_received.value == 1
+    assert metrics.connected.value == 1
+    assert 'sfr_box_frames_sent_total{host="localhost",port="7682",site="lab"} 2' in registry.render_prometheus()
+
+    driver._pending.clear()
+    monkeypatch.setattr(driver, "send_message", AsyncMock())
+    task = asyncio.create_task(driver.send_request(CommandType.GET_STATUS, timeout=1))
+    while not driver._pending.get("getStatus"):
+        await asyncio.sleep(0)
+    driver._resolve_request(BoxResponse(action="getStatus", success=True, data={}))
+    await task
+    assert metrics.reply_latency.count == 1
+
+    with pytest.raises(asyncio.TimeoutError):
+        await driver.send_request(CommandType.GET_STATUS, timeout=0.01)
+    assert metrics.request_timeouts.value == 1
+
+
+@pytest.mark.asyncio
+async def test_driver_records_connections(monkeypatch):
+    """Test the connection counters and the connected gauge."""
+    driver = STB8Driver(host="localhost")
+    monkeypatch.setattr(websockets, "connect", AsyncMock(side_effect=[OSError("refused"), AsyncMock()]))
+    monkeypatch.setattr(asyncio, "sleep", AsyncMock())
+
+    await driver._connect()
+    assert driver.metrics.connect_failures.value == 1
+    assert driver.metrics.connections.value == 1
+    assert driver.metrics.connected.value == 1
+
+    await driver.stop()
+    assert driver.metrics.connected.value == 0
+
+    with pytest.raises(BoxUnavailableError):
+        await driver.send_message("unsent")
+    assert driver.metrics.send_failures.value == 1
+    assert driver.metrics.frames_sent.value == 0
@@ -0,0 +1,97 @@
+"""Tests for the asynchronous notification streams (notifications.py)."""
+
+import asyncio
+
+import pytest
+
+from sfr_tv_box_core.constants import PowerState
+from sfr_tv_box_core.notifications import OverflowPolicy
+from sfr_tv_box_core.simulator import POWER_OFF
+from sfr_tv_box_core.simulator import POWER_ON
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+def _power(power: str) -> str:
+    """Builds an STB8 power notification."""
+    return f'{{"data":{{"status":"{power}"}}}}'
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_sees_the_current_power_state():
+    """Test that latest-wins coalescing replaces stale power transitions."""
+    driver = STB8Driver(host="localhost")
+    async with driver.notifications(maxsize=4) as stream:
+        for index in range(1001):
+            await driver.feed_message(_power(POWER_ON if index % 2 == 0 else POWER_OFF))
+            await driver.feed_message(f'{{"data":{{"channel":{index}}}}}')
+        assert len(stream) == 2
+        assert stream.coalesced == 2000
+        assert stream.dropped == 0
+
+        power = await anext(stream)
+        assert power.data == {"status": POWER_ON}
+        assert driver._power_state(power) == PowerState.ON
+        assert (await anext(stream)).data == {"channel": 1000}
+
+        # Distinct keys beyond the buffer evict the oldest one.
+        for name in ("a", "b", "c", "d", "e"):
+            await driver.feed_message(f'{{"data":{{"{name}":1}}}}')
+        assert [notification.data for notification in (await anext(stream), await anext(stream))] == [{"b": 1}, {"c": 1}]
+        assert stream.dropped == 1
+    assert stream.closed
+    assert driver._notification_listeners == []
+
+
+@pytest.mark.asyncio
+async def test_drop_policies_keep_the_buffer_bounded():
+    """Test the drop-oldest and drop-newest policies and a custom key."""
+    driver = STB8Driver(host="localhost")
+    oldest = driver.notifications(OverflowPolicy.DROP_OLDEST, maxsize=3)
+    newest = driver.notifications("drop_newest", maxsize=3)
+    by_field = driver.notifications(key=lambda response: "all", maxsize=3)
+    for index in range(10000):
+        await driver.feed_message(f'{{"data":{{"n":{index}}}}}')
+    # Replies are not notifications.
+    await driver.feed_message('{"action":"getStatus","data":{"power":"powerOn"}}')
+
+    assert (len(oldest), len(newest), len(by_field)) == (3, 3, 1)
+    assert [(await anext(oldest)).data["n"] for _ in range(3)] == [9997, 9998, 9999]
+    assert [(await anext(newest)).data["n"] for _ in range(3)] == [0, 1, 2]
+    assert (await anext(by_field)).data["n"] == 9999
+    assert oldest.dropped == newest.dropped == 9997
+    assert by_field.coalesced == 9999
+    for stream in (oldest, newest, by_field):
+        stream.close()
+        stream.close()
+
+    with pytest.raises(ValueError):
+        driver.notifications(maxsize=0)
+
+
+@pytest.mark.asyncio
+async def test_stream_follows_the_box_until_closed():
+    """Test a consumer waiting on the notifications of a simulated box."""
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        await driver.start()
+        stream = driver.notifications()
+        received = []
+
+        async def consume() -> None:
+            async for notification in stream:
+                received.append(notification.data["status"])
+
+        consumer = asyncio.create_task(consume())
+        try:
+            await simulator.notify_power(POWER_OFF)
+            for _ in range(100):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+            assert received == [POWER_OFF]
+        finally:
+            await driver.stop()
+        stream.close()
+        await asyncio.wait_for(consumer, 1)
+        assert consumer.done() and consumer.exception() is None
@@ -0,0 +1,103 @@
+"""Tests for the adaptive rate limiter (rate_limiter.py)."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from sfr_tv_box_core.base_driver import BoxResponse
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.rate_limiter import AdaptiveRateLimiter
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+def test_invalid_configuration():
+    """Test that inconsistent rates or bursts are rejected."""
+    with pytest.raises(ValueError):
+        AdaptiveRateLimiter(rate=100, max_rate=50)
+    with pytest.raises(ValueError):
+        AdaptiveRateLimiter(burst=0)
+
+
+def test_fast_acks_increase_rate():
+    """Test that fast, successful acknowledgements raise the rate up to the maximum."""
+    limiter = AdaptiveRateLimiter(rate=10, max_rate=11, increase_step=0.5, target_latency=0.1)
+    limiter.record_ack(0.01, success=True)
+    assert limiter.rate == 10.5
+    limiter.record_ack(0.01, success=True)
+    limiter.record_ack(0.01, success=True)
+    assert limiter.rate == 11
+    assert limiter.latency == pytest.approx(0.01)
+    assert limiter.ko_ratio == 0.0
+
+
+def test_slow_or_failed_acks_decrease_rate_once_per_latency_period():
+    """Test that lagging or KO acknowledgements cut the rate, once per latency period."""
+    limiter = AdaptiveRateLimiter(rate=8, min_rate=1, decrease_factor=0.5, target_latency=0.1)
+    limiter.record_ack(10.0, success=True)
+    assert limiter.rate == 4
+    # Still within the latency period of the previous decrease.
+    limiter.record_ack(10.0, success=False)
+    assert limiter.rate == 4
+    assert limiter.ko_ratio > 0
+
+    limiter = AdaptiveRateLimiter(rate=2, min_rate=1, decrease_factor=0.1)
+    limiter.record_ack(0.0, success=False)
+    assert limiter.rate == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_paces_after_burst():
+    """Test that commands beyond the burst wait for new tokens."""
+    limiter = AdaptiveRateLimiter(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await limiter.acquire()
+    # Two commands beyond the burst at 20/s take at least ~0.1 s.
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_driver_feeds_limiter_with_ack_latency():
+    """Test that replies to fire-and-forget commands adapt the driver's rate."""
+    driver = STB8Driver(host="localhost")
+    driver.send_message = AsyncMock()
+    initial_rate = driver.send_rate
+
+    await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+    assert driver._resolve_request(BoxResponse(action="buttonEvent", success=True, data={}))
+    assert driver.send_rate > initial_rate
+
+    await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+    assert driver._resolve_request(BoxResponse(action="buttonEvent", success=False, data={}))
+    assert driver.send_rate < initial_rate
+    assert driver.rate_limiter.ko_ratio > 0
+
+
+@pytest.mark.asyncio
+async def test_driver_request_timeout_slows_down():
+    """Test that a request timing out counts as a failed acknowledgement."""
+    driver = STB8Driver(host="localhost")
+    driver.send_message = AsyncMock()
+    initial_rate = driver.send_rate
+
+    with pytest.raises(asyncio.TimeoutError):
+        await driver.send_request(CommandType.GET_STATUS, timeout=0.01)
+
+    assert driver.send_rate < initial_rate
+
+
+@pytest.mark.asyncio
+async def test_driver_without_limiter():
+    """Test that the limiter can be removed to send without pacing."""
+    driver = STB8Driver(host="localhost")
+    driver.send_message = AsyncMock()
+    driver.set_rate_limiter(None)
+
+    await driver.send_command(CommandType.GET_STATUS)
+
+    assert driver.send_rate is None
+    assert driver.rate_limiter is None
+    assert driver._resolve_request(BoxResponse(action="getStatus", success=True, data={}))
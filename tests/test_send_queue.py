@@ -0,0 +1,123 @@
+"""Tests for the priority lanes of the send path (send_queue.py)."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.rate_limiter import AdaptiveRateLimiter
+from sfr_tv_box_core.send_queue import PrioritySendQueue
+from sfr_tv_box_core.send_queue import QueuedFrame
+from sfr_tv_box_core.send_queue import SendPriority
+from sfr_tv_box_core.send_queue import command_priority
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+def _frame(payload):
+    return QueuedFrame(payload, None, None, None, 0.0)
+
+
+def test_command_priority():
+    """Test the default classification of commands into lanes."""
+    assert command_priority(CommandType.GET_STATUS) == SendPriority.URGENT
+    assert command_priority(CommandType.SEND_KEY, KeyCode.POWER) == SendPriority.URGENT
+    assert command_priority(CommandType.SEND_KEY, KeyCode.STOP) == SendPriority.URGENT
+    assert command_priority(CommandType.SEND_KEY, KeyCode.UP) == SendPriority.BULK
+    assert command_priority(CommandType.GET_VERSIONS) == SendPriority.BULK
+
+
+def test_urgent_lane_served_first_without_starving_bulk():
+    """Test that urgent frames go first but a bulk frame passes after each urgent burst."""
+    queue = PrioritySendQueue(urgent_burst=2)
+    queue.put(_frame("b1"), SendPriority.BULK)
+    queue.put(_frame("b2"), SendPriority.BULK)
+    for i in range(5):
+        queue.put(_frame(f"u{i}"), SendPriority.URGENT)
+    assert len(queue) == 7
+
+    order = []
+    while (item := queue.pop()) is not None:
+        order.append(item[0].payload)
+
+    assert order == ["u0", "u1", "b1", "u2", "u3", "b2", "u4"]
+    assert len(queue) == 0
+
+
+def test_lane_stats():
+    """Test the per-lane wait statistics."""
+    queue = PrioritySendQueue()
+    assert queue.stats[SendPriority.URGENT].mean_wait == 0.0
+    queue.record_sent(SendPriority.URGENT, 0.1)
+    queue.record_sent(SendPriority.URGENT, 0.3)
+
+    stats = queue.stats[SendPriority.URGENT]
+    assert stats.count == 2
+    assert stats.mean_wait == pytest.approx(0.2)
+    assert stats.max_wait == 0.3
+    assert queue.stats[SendPriority.BULK].count == 0
+
+
+@pytest.mark.asyncio
+async def test_power_overtakes_queued_bulk_keys():
+    """Test that POWER jumps ahead of a navigation burst waiting on the rate limiter."""
+    driver = STB8Driver(host="localhost")
+    driver.set_rate_limiter(AdaptiveRateLimiter(rate=100, max_rate=100, burst=1))
+    driver.send_message = AsyncMock()
+
+    bulk = [asyncio.create_task(driver.send_command(CommandType.SEND_KEY, key=KeyCode.RIGHT)) for _ in range(5)]
+    await asyncio.sleep(0)
+    await driver.send_command(CommandType.SEND_KEY, key=KeyCode.POWER)
+    await asyncio.gather(*bulk)
+
+    keys = [json.loads(call.args[0])["params"]["key"] for call in driver.send_message.await_args_list]
+    assert keys.index("power") < 3
+    assert len(keys) == 6
+    assert driver.lane_stats[SendPriority.URGENT].count == 1
+    assert driver.lane_stats[SendPriority.BULK].count == 5
+
+
+@pytest.mark.asyncio
+async def test_explicit_priority_overrides_classification():
+    """Test that a caller can force the lane of a command."""
+    driver = STB8Driver(host="localhost")
+    driver.send_message = AsyncMock()
+
+    await driver.send_command(CommandType.GET_STATUS, priority=SendPriority.BULK)
+
+    assert driver.lane_stats[SendPriority.BULK].count == 1
+    assert driver.lane_stats[SendPriority.URGENT].count == 0
+
+
+@pytest.mark.asyncio
+async def test_abandoned_frame_is_not_sent():
+    """Test that a frame whose caller timed out while queued is dropped."""
+    driver = STB8Driver(host="localhost")
+    driver.set_rate_limiter(AdaptiveRateLimiter(rate=1, burst=1))
+    driver.send_message = AsyncMock()
+
+    await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+    with pytest.raises(asyncio.TimeoutError):
+        await driver.send_request(CommandType.GET_VERSIONS, timeout=0.01)
+    await asyncio.sleep(0)
+
+    driver.send_message.assert_awaited_once()
+    assert not driver._pending.get("getVersions")
+    # The box never saw the request: its timeout is not held against it.
+    assert driver.send_rate == 1
+    assert driver.circuit_breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_send_error_reaches_the_caller():
+    """Test that a failed write is raised to the caller and the queue keeps draining."""
+    driver = STB8Driver(host="localhost")
+    driver.send_message = AsyncMock(side_effect=[RuntimeError("socket broke"), None])
+
+    with pytest.raises(RuntimeError, match="socket broke"):
+        await driver.send_command(CommandType.GET_STATUS)
+    await driver.send_command(CommandType.GET_STATUS)
+
+    assert driver.send_message.await_count == 2
@@ -0,0 +1,109 @@
+"""Tests for the JSON serialization backends (serializer.py)."""
+
+import json
+
+import pytest
+
+from sfr_tv_box_core import serializer
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.labox_driver import LaBoxDriver
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb7_driver import STB7Driver
+from sfr_tv_box_core.stb8_driver import STB8Driver
+from sfr_tv_box_core.stb8_driver import _STB8CommandBuilder
+
+
+@pytest.fixture
+def restore_backend():
+    """Restores the backend in use after the test."""
+    backend = serializer.get_backend()
+    yield
+    serializer.set_backend(backend.name)
+
+
+def _all_frames(monkeypatch):
+    """Builds every frame of every driver, with a fixed request ID."""
+    monkeypatch.setattr("time.time", lambda: 1700000000.0)
+    frames = []
+    for driver in (STB8Driver("localhost", device_id="Salon é"), STB7Driver("localhost"), LaBoxDriver("localhost")):
+        frames += [driver._build_command(command_type) for command_type in CommandType if command_type != CommandType.SEND_KEY]
+        frames += [driver._build_command(CommandType.SEND_KEY, key=key) for key in KeyCode]
+    return [frame for frame in frames if frame is not None]
+
+
+def test_stdlib_backend_is_always_available(restore_backend):
+    """Test the stdlib backend and the compact frames it produces."""
+    backend = serializer.set_backend(serializer.STDLIB_BACKEND)
+    assert serializer.get_backend() is backend
+    assert serializer.dumps({"a": [1, "é"], "b": None}) == '{"a":[1,"é"],"b":null}'
+    assert serializer.loads(b'{"a": 1}') == {"a": 1}
+    with pytest.raises(ValueError):
+        serializer.loads("not json")
+
+
+def test_unknown_backend_is_rejected():
+    """Test that selecting a backend that is not installed raises."""
+    with pytest.raises(ValueError, match="not available"):
+        serializer.set_backend("simdjson")
+
+
+def test_backends_produce_identical_frames(monkeypatch, restore_backend):
+    """Test that every frame is byte-identical whatever the backend."""
+    pytest.importorskip("orjson")
+    assert serializer.ORJSON_BACKEND in serializer.available_backends()
+
+    serializer.set_backend(serializer.STDLIB_BACKEND)
+    stdlib_frames = _all_frames(monkeypatch)
+    serializer.set_backend(serializer.ORJSON_BACKEND)
+    orjson_frames = _all_frames(monkeypatch)
+
+    assert orjson_frames == stdlib_frames
+    samples = [{"s": '\x00\n"\\ é🎉', "i": -12, "n": None, "l": [True, False], "d": {}}]
+    assert [serializer.dumps(sample) for sample in samples] == [
+        serializer.available_backends()[serializer.STDLIB_BACKEND].dumps(sample) for sample in samples
+    ]
+
+
+def test_backends_parse_identically(restore_backend):
+    """Test that both backends parse replies into the same responses."""
+    pytest.importorskip("orjson")
+    message = '{"action": "getStatus", "remoteResponseCode": "OK", "data": {"power": "powerOn"}}'
+    responses = []
+    for name in (serializer.STDLIB_BACKEND, serializer.ORJSON_BACKEND):
+        serializer.set_backend(name)
+        responses.append(_STB8CommandBuilder.parse_response(message))
+        assert _STB8CommandBuilder.parse_response("{oops") is None
+    assert responses[0] == responses[1]
+
+
+@pytest.mark.asyncio
+async def test_all_dialects_accept_compact_frames(monkeypatch, restore_backend):
+    """Test that compact frames carry the same JSON as the spaced ones, and are answered and parsed alike."""
+    for name in serializer.available_backends():
+        serializer.set_backend(name)
+        for frame in _all_frames(monkeypatch):
+            # Same members in the same order as the spaced frame json.dumps used to send.
+            spaced = json.dumps(json.loads(frame))
+            assert list(json.loads(frame).items()) == list(json.loads(spaced).items())
+            assert frame == json.dumps(json.loads(spaced), separators=(",", ":"), ensure_ascii=False)
+
+        replies = [
+            (STB8Driver, '{"action":"getStatus","remoteResponseCode":"OK","data":{"power":"powerOn"}}'),
+            (STB7Driver, '{"Action":"GetSessionsStatus","Data":{"CurrentApplication":"Live"}}'),
+            (LaBoxDriver, '{"Action":"GetVersions","Data":{"SoftwareVersion":"é"}}'),
+        ]
+        for driver_class, reply in replies:
+            driver = driver_class("localhost")
+            assert driver._parse_message(reply) == driver._parse_message(json.dumps(json.loads(reply)))
+
+        async with STB8Simulator() as simulator:
+            driver = STB8Driver(simulator.host, simulator.port)
+            await driver.start()
+            try:
+                await driver.send_request(CommandType.GET_STATUS, timeout=2)
+                await driver.send_request(CommandType.GET_VERSIONS, timeout=2)
+                await driver.send_request(CommandType.SEND_KEY, timeout=2, key=KeyCode.OK)
+            finally:
+                await driver.stop()
+            assert simulator.received == 3
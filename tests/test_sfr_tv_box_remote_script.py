@@ -2,7 +2,9 @@
 
 import asyncio
 import logging
+import socket
 from typing import Any  # Import Any
+from typing import Optional
 from unittest.mock import AsyncMock
 
 import pytest
@@ -11,7 +13,11 @@ from sfr_tv_box_core.base_driver import BaseSFRBoxDriver  # Import BaseSFRBoxDri
 from sfr_tv_box_core.constants import DEFAULT_WEBSOCKET_PORT
 from sfr_tv_box_core.constants import CommandType
 from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.discovery import DiscoveredBox
+from sfr_tv_box_core.simulator import SimulatorFleet
 
+from scripts.sfr_tv_box_remote import Target
+from scripts.sfr_tv_box_remote import _parse_address
 from scripts.sfr_tv_box_remote import main as sfr_tv_box_remote_main
 
 
@@ -30,6 +36,10 @@ class _TestDriver(BaseSFRBoxDriver):  # Renamed to _TestDriver
         """Implementation for the abstract method."""
         pass
 
+    def _build_command(self, command_type: CommandType, **kwargs: Any) -> Optional[str]:
+        """Implementation for the abstract method."""
+        return None
+
     async def start(self) -> None:
         self.started = True
 
@@ -141,3 +151,100 @@ async def test_sfr_tv_box_remote_unsupported_model(monkeypatch, capsys):
     # Check stderr which is where argparse prints errors
     outerr = capsys.readouterr()
     assert "invalid choice: 'STB7'" in outerr.err
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_sfr_tv_box_remote_multiple_targets(monkeypatch, capsys, tmp_path):
+    """Test a command sent to several boxes at once, one of them unreachable."""
+    async with SimulatorFleet(3) as fleet:
+        (host, first), (_, second), (_, third) = fleet.addresses
+        unreachable = _free_port()
+        monkeypatch.setattr(
+            "sys.argv",
+            [
+                "sfr_tv_box_remote.py",
+                "--ip",
+                f"{host}:{first},{host}:{second}",
+                "--ip",
+                f"{host}:{third}",
+                "--ip",
+                f"{host}:{unreachable}",
+                "--workers",
+                "2",
+                "--timeout",
+                "0.5",
+                "GET_STATUS",
+            ],
+        )
+        assert await sfr_tv_box_remote_main() == 1
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split()[:2] for line in lines[:4]] == [
+            [f"{host}:{first}", "OK"],
+            [f"{host}:{second}", "OK"],
+            [f"{host}:{third}", "OK"],
+            [f"{host}:{unreachable}", "FAILED"],
+        ]
+        assert "Could not connect within 0.5 s." in lines[3]
+        assert lines[4].startswith("4 boxes: 3 succeeded, 1 failed, latency median")
+        assert all(simulator.client_count == 0 for simulator in fleet.simulators)
+
+        targets = tmp_path / "boxes.txt"
+        targets.write_text(f"# Living room\n{host}:{first}\n\n{host}:{second}  # Bedroom\n{host}:{first}\n")
+        monkeypatch.setattr("sys.argv", ["sfr_tv_box_remote.py", "--ip-file", str(targets), "SEND_KEY", "OK"])
+        assert await sfr_tv_box_remote_main() == 0
+        assert capsys.readouterr().out.splitlines()[-1].startswith("2 boxes: 2 succeeded, 0 failed")
+
+
+@pytest.mark.asyncio
+async def test_sfr_tv_box_remote_all_discovered_boxes(monkeypatch, capsys):
+    """Test that --all targets the discovered boxes of supported models."""
+    async with SimulatorFleet(2) as fleet:
+        boxes = [DiscoveredBox("STB8", host, port, f"STB8 ({host})") for host, port in fleet.addresses]
+        boxes.append(DiscoveredBox("STB6", "127.0.0.1", 1, "STB6 (127.0.0.1)"))
+        mock_discover = AsyncMock(return_value=boxes)
+        monkeypatch.setattr("scripts.sfr_tv_box_remote.async_discover_boxes", mock_discover)
+        monkeypatch.setattr("sys.argv", ["sfr_tv_box_remote.py", "--all", "--discovery-timeout", "1", "GET_VERSIONS"])
+        assert await sfr_tv_box_remote_main() == 0
+    mock_discover.assert_awaited_once_with(timeout=1)
+    assert capsys.readouterr().out.splitlines()[-1].startswith("2 boxes: 2 succeeded, 0 failed")
+
+    mock_discover.return_value = []
+    assert await sfr_tv_box_remote_main() == 1
+
+
+def test_parse_address_accepts_ipv6():
+    """Test host, host:port and IPv6 addresses, bracketed or not."""
+    assert _parse_address(" 192.168.1.2 ", 7682, "STB8") == Target("192.168.1.2", 7682, "STB8")
+    assert _parse_address("box.local:7700", 7682, "STB8") == Target("box.local", 7700, "STB8")
+    assert _parse_address("[fe80::1]:7700", 7682, "STB8") == Target("fe80::1", 7700, "STB8")
+    assert _parse_address("[fe80::1]", 7682, "STB8") == Target("fe80::1", 7682, "STB8")
+    # Without brackets, the last group of an IPv6 address is not a port.
+    assert _parse_address("fe80::1:7700", 7682, "STB8") == Target("fe80::1:7700", 7682, "STB8")
+    assert str(_parse_address("[fe80::1]:7700", 7682, "STB8")) == "[fe80::1]:7700"
+    for address in ("[fe80::1", "[fe80::1]7700", "[fe80::1]:port"):
+        with pytest.raises(ValueError, match="Invalid address"):
+            _parse_address(address, 7682, "STB8")
+
+
+@pytest.mark.asyncio
+async def test_sfr_tv_box_remote_rejects_invalid_addresses(monkeypatch, caplog):
+    """Test that a malformed bracketed address is reported instead of crashing."""
+    monkeypatch.setattr("sys.argv", ["sfr_tv_box_remote.py", "--ip", "[fe80::1", "GET_STATUS"])
+    assert await sfr_tv_box_remote_main() == 1
+    assert "Invalid address '[fe80::1'" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_sfr_tv_box_remote_reports_unreadable_ip_files(monkeypatch, caplog, tmp_path):
+    """Test that a missing or unreadable `--ip-file` is reported instead of crashing."""
+    for path in (tmp_path / "missing.txt", tmp_path):
+        monkeypatch.setattr("sys.argv", ["sfr_tv_box_remote.py", "--ip-file", str(path), "GET_STATUS"])
+        assert await sfr_tv_box_remote_main() == 1
+        assert "Could not read the list of boxes: [Errno" in caplog.text and str(path) in caplog.text
+        caplog.clear()
@@ -0,0 +1,244 @@
+"""Tests for the STB8 simulator (simulator.py), exercising the driver over real sockets."""
+
+import asyncio
+import json
+import logging
+
+import pytest
+import websockets
+
+from sfr_tv_box_core.base_driver import _UNTRACKED_REPLY_TIMEOUT
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.exceptions import BoxUnavailableError
+from sfr_tv_box_core.simulator import POWER_OFF
+from sfr_tv_box_core.simulator import POWER_ON
+from sfr_tv_box_core.simulator import SimulatorFleet
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+from scripts.run_simulator import main as run_simulator_main
+
+
+async def _connected_driver(simulator):
+    driver = STB8Driver(host=simulator.host, port=simulator.port, device_id="sim")
+    await driver.start()
+    return driver
+
+
+@pytest.mark.asyncio
+async def test_status_and_versions_over_real_socket():
+    """Test that the driver gets correlated replies from the simulator."""
+    async with STB8Simulator() as simulator:
+        driver = await _connected_driver(simulator)
+        try:
+            status = await driver.send_request(CommandType.GET_STATUS, timeout=2)
+            versions = await driver.send_request(CommandType.GET_VERSIONS, timeout=2)
+        finally:
+            await driver.stop()
+
+    assert status.success is True
+    assert status.data == {"power": POWER_ON}
+    assert versions.data["deviceName"] == "sim"
+    assert simulator.received == 2
+
+
+@pytest.mark.asyncio
+async def test_power_key_pushes_notification():
+    """Test that the power key is acknowledged and followed by a power notification."""
+    async with STB8Simulator() as simulator:
+        driver = await _connected_driver(simulator)
+        messages = []
+        notified = asyncio.Event()
+
+        def listener(message):
+            messages.append(json.loads(message))
+            if "status" in messages[-1].get("data", {}):
+                notified.set()
+
+        driver.register_listener(listener)
+        try:
+            ack = await driver.send_request(CommandType.SEND_KEY, key=KeyCode.POWER, timeout=2)
+            await asyncio.wait_for(notified.wait(), timeout=2)
+        finally:
+            await driver.stop()
+
+    assert ack.action == "buttonEvent"
+    assert messages[-1] == {"data": {"status": POWER_OFF}}
+    assert simulator.power == POWER_OFF
+
+
+@pytest.mark.asyncio
+async def test_ko_and_drop_rates():
+    """Test that the simulator can answer KO or not answer at all."""
+    async with STB8Simulator(ko_rate=1.0) as simulator:
+        driver = await _connected_driver(simulator)
+        try:
+            reply = await driver.send_request(CommandType.SEND_KEY, key=KeyCode.OK, timeout=2)
+        finally:
+            await driver.stop()
+    assert reply.success is False
+
+    async with STB8Simulator(drop_rate=1.0) as simulator:
+        driver = await _connected_driver(simulator)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await driver.send_request(CommandType.GET_STATUS, timeout=0.1)
+        finally:
+            await driver.stop()
+    assert simulator.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_lost_ack_does_not_steal_the_next_reply():
+    """Test that a request is answered once the dropped acknowledgement of a fire-and-forget key expired."""
+    async with STB8Simulator(drop_rate=1.0) as simulator:
+        driver = await _connected_driver(simulator)
+        try:
+            await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+            for _ in range(100):
+                if simulator.dropped:
+                    break
+                await asyncio.sleep(0.01)
+            simulator.drop_rate = 0.0
+            driver._pending["buttonEvent"][0].sent_at -= _UNTRACKED_REPLY_TIMEOUT
+
+            reply = await driver.send_request(CommandType.SEND_KEY, key=KeyCode.OK, timeout=2)
+            await asyncio.sleep(0.05)
+        finally:
+            await driver.stop()
+    assert simulator.dropped == 1
+    assert reply.success is True
+    assert not driver._pending["buttonEvent"]
+
+
+@pytest.mark.asyncio
+async def test_latency_and_unknown_frames():
+    """Test the configured latency and the handling of malformed or unknown frames."""
+    async with STB8Simulator(latency=0.05, jitter=0.01, seed=1) as simulator:
+        async with websockets.connect(f"ws://{simulator.host}:{simulator.port}/ws") as client:
+            await client.send("not json")
+            await client.send("[]")
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await client.send(json.dumps({"action": "unknown", "requestId": 7}))
+            reply = json.loads(await client.recv())
+            # The request ID is only echoed on request.
+            simulator.echo_request_id = True
+            await client.send(json.dumps({"action": "getStatus", "requestId": 8}))
+            echoed = json.loads(await client.recv())
+
+    assert loop.time() - start >= 0.04
+    assert reply["remoteResponseCode"] == "KO"
+    assert "requestId" not in reply
+    assert echoed["requestId"] == 8
+    assert simulator.received == 4
+
+
+@pytest.mark.asyncio
+async def test_driver_reconnects_after_box_disconnect(caplog):
+    """Test that the driver reconnects by itself when the box drops the connection."""
+    caplog.set_level(logging.INFO)
+    async with STB8Simulator() as simulator:
+        driver = await _connected_driver(simulator)
+        try:
+            await simulator.disconnect_clients()
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if simulator.client_count:
+                    break
+            status = await driver.send_request(CommandType.GET_STATUS, timeout=2)
+        finally:
+            await driver.stop()
+
+    assert status.success is True
+    assert "Attempting to reconnect" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_fleet_serves_many_boxes():
+    """Test that a fleet serves independent boxes on distinct ports."""
+    async with SimulatorFleet(20, seed=3) as fleet:
+        addresses = fleet.addresses
+        drivers = [STB8Driver(host=host, port=port) for host, port in addresses]
+        await asyncio.gather(*(driver.start() for driver in drivers))
+        try:
+            replies = await asyncio.gather(*(driver.send_request(CommandType.GET_STATUS, timeout=2) for driver in drivers))
+        finally:
+            await asyncio.gather(*(driver.stop() for driver in drivers))
+
+    assert len({port for _, port in addresses}) == 20
+    assert all(reply.success for reply in replies)
+
+
+@pytest.mark.asyncio
+async def test_run_simulator_script(monkeypatch, caplog):
+    """Test the run_simulator.py script for a short duration."""
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr("sys.argv", ["scripts/run_simulator.py", "-n", "2", "--duration", "0.01"])
+    await run_simulator_main()
+    assert "Serving 2 simulated STB8 boxes" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setattr("sys.argv", ["scripts/run_simulator.py", "--duration", "0.01"])
+    await run_simulator_main()
+    assert "ws://127.0.0.1:" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_requests_fail_fast_without_a_connection():
+    """Test that a request to a disconnected driver fails at once instead of waiting for its timeout."""
+    driver = STB8Driver(host="192.0.2.1")
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    with pytest.raises(BoxUnavailableError, match="not connected"):
+        await driver.send_request(CommandType.GET_STATUS, timeout=1.5)
+    with pytest.raises(BoxUnavailableError):
+        await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+    assert loop.time() - start < 0.5
+    assert not any(driver._pending.values())
+
+
+@pytest.mark.asyncio
+async def test_stop_and_connection_loss_fail_requests_in_flight():
+    """Test that stopping the driver, or losing the connection, fails the requests waiting for a reply."""
+    async with STB8Simulator(latency=2.0) as simulator:
+        driver = await _connected_driver(simulator)
+        loop = asyncio.get_running_loop()
+        try:
+            request = asyncio.create_task(driver.send_request(CommandType.GET_STATUS, timeout=3.0))
+            await asyncio.sleep(0.1)
+            start = loop.time()
+            await driver.stop()
+            with pytest.raises(BoxUnavailableError, match="closed"):
+                await request
+            assert loop.time() - start < 0.5
+
+            await driver.start()
+            request = asyncio.create_task(driver.send_request(CommandType.GET_VERSIONS, timeout=3.0))
+            await asyncio.sleep(0.1)
+            start = loop.time()
+            await simulator.disconnect_clients()
+            with pytest.raises(BoxUnavailableError):
+                await request
+            assert loop.time() - start < 1.0
+        finally:
+            await driver.stop()
+
+
+@pytest.mark.asyncio
+async def test_acks_are_matched_in_send_order():
+    """Test that the acknowledgement of an earlier fire-and-forget key does not resolve a later request."""
+    async with STB8Simulator(latency=0.2) as simulator:
+        driver = await _connected_driver(simulator)
+        replies = []
+        driver.register_listener(replies.append)
+        try:
+            await driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+            reply = await driver.send_request(CommandType.SEND_KEY, key=KeyCode.UP, timeout=2)
+            # The box answers one frame at a time: the request's reply is the second one.
+            assert len(replies) == 2
+        finally:
+            await driver.stop()
+    assert reply.success is True
+    assert not driver._pending["buttonEvent"]
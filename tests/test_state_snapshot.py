@@ -0,0 +1,179 @@
+"""Tests for the last known state of the drivers and its snapshots (state_snapshot.py)."""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from sfr_tv_box_core.base_driver import BoxState
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import PowerState
+from sfr_tv_box_core.labox_driver import LaBoxDriver
+from sfr_tv_box_core.simulator import POWER_OFF
+from sfr_tv_box_core.simulator import SIMULATED_SOFTWARE_VERSION
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.state_snapshot import StateSnapshot
+from sfr_tv_box_core.state_snapshot import reconcile
+from sfr_tv_box_core.stb7_driver import STB7Driver
+from sfr_tv_box_core.stb8_driver import STB8Driver
+
+
+@pytest.mark.asyncio
+async def test_stb8_driver_tracks_the_state_of_its_box():
+    """Test that replies and notifications update the state of an STB8 driver."""
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        assert driver.state == BoxState()
+        await driver.start()
+        try:
+            before = time.time()
+            await driver.send_request(CommandType.GET_STATUS, timeout=2)
+            await driver.send_request(CommandType.GET_VERSIONS, timeout=2)
+            state = driver.state
+            assert state.power == PowerState.ON
+            assert state.versions["softwareVersion"] == SIMULATED_SOFTWARE_VERSION
+            assert state.last_seen >= before
+
+            await simulator.notify_power(POWER_OFF)
+            for _ in range(100):
+                if driver.state.power == PowerState.OFF:
+                    break
+                await asyncio.sleep(0.01)
+            assert driver.state.power == PowerState.OFF
+            assert driver.state.versions == state.versions
+        finally:
+            await driver.stop()
+
+
+@pytest.mark.asyncio
+async def test_params_drivers_read_the_standby_application():
+    """Test the power state of STB7 and LaBox status replies."""
+    for driver_class in (STB7Driver, LaBoxDriver):
+        driver = driver_class(host="localhost")
+        await driver.feed_message('{"Action":"GetSessionsStatus","Data":{"CurrentApplication":"En Veille"}}')
+        assert driver.state.power == PowerState.OFF
+        await driver.feed_message('{"Action":"GetSessionsStatus","Data":{"CurrentApplication":"Live"}}')
+        assert driver.state.power == PowerState.ON
+        await driver.feed_message('{"Action":"GetSessionsStatus","RemoteResponseCode":"KO","Data":{}}')
+        await driver.feed_message('{"Notification":{"Event":"Zapping"}}')
+        assert driver.state.power == PowerState.ON
+        await driver.feed_message('{"Action":"GetVersions","Data":{"SoftwareVersion":"7.1"}}')
+        assert driver.state.versions == {"SoftwareVersion": "7.1"}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restores_state_before_connecting_then_reconciles(tmp_path):
+    """Test a warm restart: state and targets from the file, then refreshed from the box."""
+    path = str(tmp_path / "state.json")
+    async with STB8Simulator() as simulator:
+        # Configured by name, saved with the address it resolved to.
+        driver = STB8Driver("localhost", simulator.port)
+        await driver.start()
+        snapshot = StateSnapshot(path)
+        try:
+            assert driver.peer_address == simulator.host
+            assert await reconcile([driver]) == 1
+            snapshot.capture({"living room": driver})
+            assert snapshot.save()
+            assert not snapshot.save()
+        finally:
+            await driver.stop()
+        saved = driver.state
+        assert driver.peer_address is None
+        snapshot.capture({"living room": driver})
+        assert snapshot.records["living room"].host == simulator.host
+
+        # The box is switched off while the application is down.
+        simulator.power = POWER_OFF
+        restarted = StateSnapshot(path)
+        records = restarted.load()
+        assert records["living room"].state == saved
+        (spec,) = restarted.box_specs()
+        assert spec[:4] == ("living room", simulator.host, simulator.port, STB8Driver)
+
+        drivers = {spec.name: spec.driver_class(spec.host, spec.port)}
+        assert restarted.restore(drivers) == 1
+        assert drivers["living room"].state == saved
+
+        await drivers["living room"].start()
+        try:
+            await restarted.start(drivers)
+            for _ in range(200):
+                if drivers["living room"].state.power == PowerState.OFF:
+                    break
+                await asyncio.sleep(0.01)
+            assert drivers["living room"].state.power == PowerState.OFF
+            await restarted.stop()
+        finally:
+            await drivers["living room"].stop()
+
+    assert StateSnapshot(path).load()["living room"].state.power == PowerState.OFF
+    assert not os.path.exists(f"{path}.tmp")
+
+
+@pytest.mark.asyncio
+async def test_snapshot_saved_periodically_and_invalid_files_ignored(tmp_path):
+    """Test the periodic saves, box removal and the files that cannot be loaded."""
+    path = str(tmp_path / "state.json")
+    with pytest.raises(ValueError, match="interval"):
+        StateSnapshot(path, interval=0)
+    snapshot = StateSnapshot(path, interval=0.02)
+    assert snapshot.load() == {}
+
+    driver = STB8Driver(host="192.0.2.1")
+    driver.restore_state(BoxState(PowerState.ON, {"softwareVersion": "1"}, 1.0))
+    await snapshot.start({"bedroom": driver}, reconcile_state=False)
+    try:
+        for _ in range(100):
+            if os.path.exists(path):
+                break
+            await asyncio.sleep(0.01)
+        assert StateSnapshot(path).load()["bedroom"].state == driver.state
+    finally:
+        await snapshot.stop()
+
+    snapshot.forget("bedroom")
+    snapshot.forget("unknown")
+    assert snapshot.save()
+    assert StateSnapshot(path).load() == {}
+
+    for content in (
+        "not json",
+        '{"format": 99, "boxes": {}}',
+        '{"format": 1, "boxes": {"b": [1]}}',
+        '{"format": 1, "boxes": {"b": ["192.0.2.2", 7682, "STB8Driver", null, null, null, ["x"]]}}',
+        "[]",
+    ):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        assert StateSnapshot(path).load() == {}
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"format": 1, "boxes": {"old": ["192.0.2.2", 7682, "STB6Driver", None, None, None]}}, file)
+    snapshot = StateSnapshot(path)
+    assert snapshot.records == {}
+    assert snapshot.load()["old"].state == BoxState()
+    assert snapshot.box_specs() == []
+    assert StateSnapshot(str(tmp_path)).load() == {}
+
+
+def test_snapshot_keeps_the_driver_options(tmp_path):
+    """Test that boxes come back with the options of their driver, e.g. a non-default device ID."""
+    path = str(tmp_path / "state.json")
+    snapshot = StateSnapshot(path)
+    drivers = {
+        "stb8": STB8Driver("192.0.2.1", device_id="salon-8"),
+        "labox": LaBoxDriver("192.0.2.2", device_id="salon-labox", device_model="Tablet"),
+    }
+    snapshot.capture(drivers)
+    assert snapshot.save()
+
+    restarted = StateSnapshot(path)
+    assert restarted.load()["stb8"].options == {"device_id": "salon-8"}
+    specs = {spec.name: spec for spec in restarted.box_specs()}
+    restored = {name: spec.driver_class(spec.host, spec.port, **spec.options) for name, spec in specs.items()}
+    assert restored["stb8"].options == {"device_id": "salon-8"}
+    assert restored["labox"].options == drivers["labox"].options
+    assert restored["labox"].options["device_model"] == "Tablet"
@@ -0,0 +1,143 @@
+"""Tests for the STB7 and LaBox drivers (stb7_driver.py, labox_driver.py)."""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from sfr_tv_box_core import serializer
+from sfr_tv_box_core.constants import DEFAULT_WEBSOCKET_PORT
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.labox_driver import LABOX_KEYCODES
+from sfr_tv_box_core.labox_driver import LaBoxDriver
+from sfr_tv_box_core.params_codec import _ParamsCommandCodec
+from sfr_tv_box_core.params_codec import compile_key_templates
+from sfr_tv_box_core.stb7_driver import STB7_KEYCODES
+from sfr_tv_box_core.stb7_driver import STB7Driver
+
+
+@pytest.fixture
+def stb7_driver():
+    """Provides a STB7Driver instance with a mocked send_message."""
+    driver = STB7Driver(host="localhost", port=DEFAULT_WEBSOCKET_PORT, device_id="test-stb7")
+    driver.send_message = AsyncMock()
+    return driver
+
+
+def test_codec_frames_match_plain_serialization():
+    """Test that the pre-serialized templates produce the same bytes as serializing the whole frame."""
+    codec = _ParamsCommandCodec(compile_key_templates(STB7_KEYCODES), "dev", "model", "1.2")
+    expected = serializer.dumps(
+        {
+            "Params": {
+                "Token": "LAN",
+                "DeviceModel": "model",
+                "DeviceSoftVersion": "1.2",
+                "DeviceId": "dev",
+                "Action": "ButtonEvent",
+                "Press": [303],
+            }
+        }
+    )
+    assert codec.build_send_key(KeyCode.POWER) == expected
+
+
+def test_codec_covers_every_keycode():
+    """Test that both keycode tables cover every abstract KeyCode."""
+    assert set(STB7_KEYCODES) == set(KeyCode)
+    assert set(LABOX_KEYCODES) == set(KeyCode)
+
+
+def test_codec_get_status_and_versions():
+    """Test building GET_STATUS and GET_VERSIONS payloads."""
+    codec = _ParamsCommandCodec(compile_key_templates(STB7_KEYCODES), "dev")
+    status = json.loads(codec.build_get_status())["Params"]
+    versions = json.loads(codec.build_get_versions())["Params"]
+
+    assert status["Action"] == "GetSessionsStatus"
+    assert status["Token"] == "LAN"
+    assert status["DeviceId"] == "dev"
+    assert versions["Action"] == "GetVersions"
+    assert "Press" not in versions
+
+
+def test_codec_unknown_key_returns_none():
+    """Test that a key missing from the table cannot be built."""
+    codec = _ParamsCommandCodec({}, "dev")
+    assert codec.build_send_key(KeyCode.POWER) is None
+
+
+def test_codec_parse_reply_and_notification():
+    """Test parsing a PascalCase reply, a KO reply, a notification and garbage."""
+    parse = _ParamsCommandCodec.parse_response
+
+    reply = parse('{"RemoteResponseCode": "OK", "Action": "GetSessionsStatus", "Data": {"CurrentApplication": "En Veille"}}')
+    assert reply.action == "GetSessionsStatus"
+    assert reply.success is True
+    assert reply.data == {"CurrentApplication": "En Veille"}
+
+    assert parse('{"RemoteResponseCode": "KO", "Action": "ButtonEvent"}').success is False
+
+    notification = parse('{"Notification": {"CurrentApplication": "Netflix"}}')
+    assert notification.action is None
+    assert notification.data == {"CurrentApplication": "Netflix"}
+
+    assert parse("not json") is None
+    assert parse("[1, 2]") is None
+
+
+@pytest.mark.asyncio
+async def test_stb7_driver_send_key(stb7_driver):
+    """Test STB7Driver's send_command with SEND_KEY."""
+    await stb7_driver.send_command(CommandType.SEND_KEY, key=KeyCode.OK)
+    stb7_driver.send_message.assert_awaited_once()
+    params = json.loads(stb7_driver.send_message.call_args[0][0])["Params"]
+    assert params["Action"] == "ButtonEvent"
+    assert params["Press"] == [13]
+    assert params["DeviceId"] == "test-stb7"
+
+
+@pytest.mark.asyncio
+async def test_stb7_driver_get_versions(stb7_driver):
+    """Test STB7Driver's send_command with GET_VERSIONS."""
+    await stb7_driver.send_command(CommandType.GET_VERSIONS)
+    params = json.loads(stb7_driver.send_message.call_args[0][0])["Params"]
+    assert params["Action"] == "GetVersions"
+
+
+@pytest.mark.asyncio
+async def test_stb7_driver_rejects_invalid_key(stb7_driver, caplog):
+    """Test that SEND_KEY without a KeyCode is not sent."""
+    await stb7_driver.send_command(CommandType.SEND_KEY, key="POWER")
+    stb7_driver.send_message.assert_not_awaited()
+    assert "requires a 'key' of type KeyCode" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_labox_driver_uses_its_own_keycodes():
+    """Test that LaBoxDriver shares the STB7 envelope with its own key values."""
+    driver = LaBoxDriver(host="localhost")
+    driver.send_message = AsyncMock()
+
+    await driver.send_command(CommandType.SEND_KEY, key=KeyCode.POWER)
+
+    params = json.loads(driver.send_message.call_args[0][0])["Params"]
+    assert params["Press"] == [63232]
+    assert params["DeviceId"] == "default-labox"
+
+
+@pytest.mark.asyncio
+async def test_stb7_driver_request_is_correlated(stb7_driver):
+    """Test that a GET_STATUS request is resolved by the matching reply."""
+
+    async def reply(_payload):
+        response = stb7_driver._parse_message('{"RemoteResponseCode": "OK", "Action": "GetSessionsStatus", "Data": {}}')
+        stb7_driver._resolve_request(response)
+
+    stb7_driver.send_message.side_effect = reply
+
+    response = await stb7_driver.send_request(CommandType.GET_STATUS, timeout=1)
+
+    assert response.action == "GetSessionsStatus"
+    assert response.success is True
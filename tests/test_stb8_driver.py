@@ -1,5 +1,6 @@
 """Tests for the STB8 driver (stb8_driver.py)."""
 
+import asyncio
 import json
 from unittest.mock import AsyncMock
 
@@ -8,6 +9,7 @@ import pytest
 from sfr_tv_box_core.constants import DEFAULT_WEBSOCKET_PORT
 from sfr_tv_box_core.constants import CommandType
 from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.simulator import STB8Simulator
 from sfr_tv_box_core.stb8_driver import STB8Driver
 from sfr_tv_box_core.stb8_driver import _STB8CommandBuilder
 
@@ -91,3 +93,81 @@ async def test_stb8_driver_get_versions(stb8_driver):
     sent_payload = json.loads(stb8_driver.send_message.call_args[0][0])
     assert sent_payload["action"] == "getVersions"
     assert sent_payload["params"]["deviceName"] == "test-stb8"
+
+
+def test_stb8_parse_response():
+    """Test parsing STB8 replies, KO replies and power notifications."""
+    parse = _STB8CommandBuilder.parse_response
+
+    reply = parse('{"remoteResponseCode": "OK", "action": "getStatus", "deviceId": "x", "data": {"power": "powerOn"}}')
+    assert reply.action == "getStatus"
+    assert reply.success is True
+    assert reply.data == {"power": "powerOn"}
+
+    assert parse('{"remoteResponseCode": "KO", "action": "buttonEvent"}').success is False
+
+    notification = parse('{"data": {"status": "powerOff"}}')
+    assert notification.action is None
+    assert notification.data == {"status": "powerOff"}
+
+    assert parse("garbage") is None
+    assert parse('"a string"') is None
+
+
+@pytest.mark.asyncio
+async def test_stb8_driver_rejects_invalid_key(stb8_driver, caplog):
+    """Test that SEND_KEY without a KeyCode is not sent."""
+    await stb8_driver.send_command(CommandType.SEND_KEY, key="POWER")
+    stb8_driver.send_message.assert_not_awaited()
+    assert "requires a 'key' of type KeyCode" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_stb8_notification_listeners(stb8_driver):
+    """Test that only unsolicited notifications reach the notification listeners."""
+    notifications = []
+    stb8_driver.register_notification_listener(notifications.append)
+    await stb8_driver.feed_message(json.dumps({"data": {"status": "powerOff"}}))
+    await stb8_driver.feed_message(json.dumps({"action": "getStatus", "remoteResponseCode": "OK", "data": {}}))
+    stb8_driver.unregister_notification_listener(notifications.append)
+    await stb8_driver.feed_message(json.dumps({"data": {"status": "powerOn"}}))
+
+    assert [notification.data for notification in notifications] == [{"status": "powerOff"}]
+
+
+@pytest.mark.asyncio
+async def test_stb8_concurrent_queries_share_one_request():
+    """Test that identical read-only queries in flight are sent once, and versions cached until reconnecting."""
+    async with STB8Simulator(latency=0.05) as simulator:
+        driver = STB8Driver(simulator.host, simulator.port)
+        await driver.start()
+        try:
+            statuses = await asyncio.gather(*(driver.send_request(CommandType.GET_STATUS, timeout=2) for _ in range(5)))
+            assert simulator.received == 1
+            assert all(status is statuses[0] for status in statuses)
+            assert driver.metrics.collapsed_requests.value == 4
+
+            # The first caller giving up does not cancel the request of the others.
+            first = asyncio.create_task(driver.send_request(CommandType.GET_STATUS, timeout=2))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(driver.send_request(CommandType.GET_STATUS, timeout=2))
+            too_short = driver.send_request(CommandType.GET_STATUS, timeout=0.01)
+            with pytest.raises(TimeoutError):
+                await too_short
+            first.cancel()
+            assert (await second).success is True
+            assert simulator.received == 2
+
+            versions = await driver.send_request(CommandType.GET_VERSIONS, timeout=2)
+            assert await driver.send_request(CommandType.GET_VERSIONS, timeout=2) is versions
+            assert simulator.received == 3
+            assert driver.metrics.cached_replies.value == 1
+
+            await simulator.disconnect_clients()
+            async with asyncio.timeout(5):
+                while simulator.client_count == 0:
+                    await asyncio.sleep(0.01)
+            await driver.send_request(CommandType.GET_VERSIONS, timeout=2)
+            assert simulator.received == 4
+        finally:
+            await driver.stop()
@@ -0,0 +1,132 @@
+"""Tests for the blocking client (sync_client.py), against the simulator."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.macros import MacroStep
+from sfr_tv_box_core.simulator import POWER_ON
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+from sfr_tv_box_core.sync_client import SyncSFRBoxClient
+
+
+@pytest.fixture
+def client():
+    """A client with a simulated box named "salon", served from the client's own loop."""
+    with SyncSFRBoxClient(default_timeout=2) as client:
+        simulator = STB8Simulator()
+        client.run(simulator.start())
+        client.add_box("salon", STB8Driver(simulator.host, simulator.port, device_id="salon"))
+        client.simulator = simulator
+        yield client
+        client.run(simulator.stop())
+
+
+def test_calls_from_many_threads_share_one_connection(client):
+    """Test concurrent blocking calls from several threads over the same warm driver."""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        replies = list(executor.map(lambda _: client.get_status("salon"), range(40)))
+    assert all(reply.data == {"power": POWER_ON} for reply in replies)
+    assert client.send_key("salon", KeyCode.OK).success is True
+    assert client.get_versions("salon").data["deviceName"] == "salon"
+    client.send_command("salon", CommandType.SEND_KEY, key=KeyCode.HOME)
+    macro = client.driver("salon").compile_macro("ok", [KeyCode.OK])
+    assert client.play_macro("salon", macro) == []
+    assert client.simulator.client_count == 1
+    assert client.boxes == ["salon"]
+
+
+def test_per_call_timeouts(client):
+    """Test that a slow box makes the call fail after its own timeout, not the default one."""
+    client.simulator.latency = 0.5
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.get_status("salon", timeout=0.1)
+    assert time.monotonic() - start < 0.4
+    assert client.driver("salon").metrics.request_timeouts.value == 1
+
+    event = threading.Event()
+    with pytest.raises(TimeoutError):
+        client.run(_wait_forever(event), timeout=0.05)
+    # The coroutine is cancelled on timeout.
+    assert event.wait(1)
+
+
+async def _wait_forever(event):
+    try:
+        await asyncio.sleep(3600)
+    finally:
+        event.set()
+
+
+def test_box_management_errors(client):
+    """Test the errors of the box registry and of a closed client."""
+    with pytest.raises(ValueError, match="already added"):
+        client.add_box("salon", STB8Driver("localhost"))
+    with pytest.raises(ValueError, match="No box named"):
+        client.get_status("cuisine")
+    with pytest.raises(TimeoutError):
+        client.add_box("unreachable", STB8Driver("127.0.0.1", port=1), timeout=0.1)
+    assert client.boxes == ["salon"]
+
+    with pytest.raises(RuntimeError, match="own event loop"):
+        client.run(_call_back_into(client))
+    client.remove_box("salon")
+    assert client.boxes == []
+
+
+async def _call_back_into(client):
+    return client.boxes and client.get_status("salon")
+
+
+def test_default_macro_timeout_covers_its_delays():
+    """Test that a macro outlasting the default timeout still completes when no timeout is given."""
+    with SyncSFRBoxClient(default_timeout=0.2) as client:
+        simulator = STB8Simulator()
+        client.run(simulator.start())
+        try:
+            client.add_box("salon", STB8Driver(simulator.host, simulator.port))
+            steps = [MacroStep(KeyCode.OK, 0.15), MacroStep(KeyCode.OK, 0.15, wait_for_ack=True), MacroStep(KeyCode.OK)]
+            macro = client.driver("salon").compile_macro("slow", steps)
+            assert macro.duration == 0.3
+            assert macro.acknowledged_steps == 1
+            assert [reply.success for reply in client.play_macro("salon", macro)] == [True]
+            with pytest.raises(TimeoutError):
+                client.play_macro("salon", macro, timeout=0.1)
+        finally:
+            client.run(simulator.stop())
+
+
+def test_closed_client(monkeypatch):
+    """Test that a closed client refuses calls, and that concurrent closes shut it down once."""
+    client = SyncSFRBoxClient()
+    shutdown = SyncSFRBoxClient._shutdown
+    calls = []
+
+    async def counting_shutdown(drivers):
+        calls.append(drivers)
+        await asyncio.sleep(0.05)
+        await shutdown(drivers)
+
+    monkeypatch.setattr(client, "_shutdown", counting_shutdown)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: client.close(), range(4)))
+    client.close()
+    assert len(calls) == 1
+    with pytest.raises(RuntimeError, match="closed"):
+        client.run(asyncio.sleep(0))
+
+    looping = SyncSFRBoxClient()
+    with pytest.raises(RuntimeError, match="own event loop"):
+        looping._submit(_close_from_the_loop(looping), None)
+    looping.close()
+
+
+async def _close_from_the_loop(client):
+    client.close()
@@ -0,0 +1,89 @@
+"""Tests for the command tracing hooks (tracing.py) and the spans emitted by the drivers."""
+
+import logging
+
+import pytest
+
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.constants import KeyCode
+from sfr_tv_box_core.macros import MacroStep
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+from sfr_tv_box_core.tracing import SlowCommandCollector
+from sfr_tv_box_core.tracing import Span
+from sfr_tv_box_core.tracing import SpanStage
+from sfr_tv_box_core.tracing import format_trace
+
+
+def test_collector_keeps_slow_traces(caplog):
+    """Test that only traces slower than the threshold are kept and logged."""
+    collector = SlowCommandCollector(threshold=0.1)
+    collector(Span(1, SpanStage.ENCODE, 0.0, 0.001, "getStatus"))
+    collector(Span(2, SpanStage.ENCODE, 0.0, 0.001, None))
+    collector(Span(2, SpanStage.WRITE, 0.001, 0.002, None))
+    collector(Span(1, SpanStage.QUEUE, 0.001, 0.2, "getStatus"))
+    collector(Span(1, SpanStage.ACK, 0.2, 0.25, "getStatus"))
+    assert not collector.slow_traces
+    collector(Span(1, SpanStage.DISPATCH, 0.25, 0.26, "getStatus"))
+
+    assert [[span.stage for span in trace] for trace in collector.slow_traces] == [
+        [SpanStage.ENCODE, SpanStage.QUEUE, SpanStage.ACK, SpanStage.DISPATCH]
+    ]
+    assert "Slow command #1 (getStatus) took 260.0 ms: encode 1.0 ms, queue 199.0 ms" in caplog.text
+    collector.clear()
+    assert not collector.slow_traces
+
+
+def test_collector_drops_unfinished_traces():
+    """Test that traces whose reply never comes do not accumulate."""
+    collector = SlowCommandCollector(threshold=0.0, max_in_flight=2)
+    for trace_id in (1, 2, 3):
+        collector(Span(trace_id, SpanStage.WRITE, 0.0, 1.0, "getStatus"))
+    collector(Span(1, SpanStage.DISPATCH, 1.0, 1.0, "getStatus"))
+
+    assert [span.stage for span in collector.slow_traces[0]] == [SpanStage.DISPATCH]
+    assert format_trace([Span(1, SpanStage.ACK, 0.0, 0.0125, None)]) == "ack 12.5 ms"
+
+
+@pytest.mark.asyncio
+async def test_driver_emits_every_stage(caplog):
+    """Test the spans of a request, a fire-and-forget key and a macro over a real socket."""
+    caplog.set_level(logging.WARNING)
+    collector = SlowCommandCollector(threshold=0.0)
+    spans = []
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(host=simulator.host, port=simulator.port)
+        driver.set_trace_hook(lambda span: (spans.append(span), collector(span)))
+        assert driver.trace_hook is not None
+        await driver.start()
+        try:
+            await driver.send_request(CommandType.GET_STATUS, timeout=2)
+            macro = driver.compile_macro("ok", [MacroStep(KeyCode.OK, wait_for_ack=True)])
+            await driver.play_macro(macro, ack_timeout=2)
+        finally:
+            await driver.stop()
+
+    request, macro_trace = collector.slow_traces
+    assert [span.stage for span in request] == list(SpanStage)
+    assert all(span.trace_id == 1 and span.end >= span.start for span in request)
+    assert [span.stage for span in macro_trace] == [SpanStage.QUEUE, SpanStage.WRITE, SpanStage.ACK, SpanStage.DISPATCH]
+    assert "Slow command #1 (getStatus)" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_tracing_disabled_and_failing_hook(caplog):
+    """Test that no trace is started without a hook and that a failing hook is contained."""
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(host=simulator.host, port=simulator.port)
+        await driver.start()
+        try:
+            await driver.send_request(CommandType.GET_STATUS, timeout=2)
+            assert next(driver._trace_ids) == 1
+
+            driver.set_trace_hook(lambda span: 1 / 0)
+            reply = await driver.send_request(CommandType.GET_STATUS, timeout=2)
+        finally:
+            await driver.stop()
+
+    assert reply.success is True
+    assert "Trace hook failed" in caplog.text
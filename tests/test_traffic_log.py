@@ -0,0 +1,229 @@
+"""Tests for the traffic capture and replay (traffic_log.py)."""
+
+import asyncio
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+
+from sfr_tv_box_core import traffic_log
+from sfr_tv_box_core.constants import CommandType
+from sfr_tv_box_core.frame_log import FrameDirection
+from sfr_tv_box_core.simulator import STB8Simulator
+from sfr_tv_box_core.stb8_driver import STB8Driver
+from sfr_tv_box_core.traffic_log import TrafficLog
+from sfr_tv_box_core.traffic_log import TrafficRecord
+from sfr_tv_box_core.traffic_log import TrafficRecorder
+from sfr_tv_box_core.traffic_log import replay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Makes the recorder timestamp frames 1, 2, 3... seconds, and 101, 102, 103... on the monotonic clock."""
+    ticks = iter(range(1, 1000))
+    monotonic_ticks = iter(range(101, 1100))
+    fake_time = SimpleNamespace(time=lambda: float(next(ticks)), monotonic=lambda: float(next(monotonic_ticks)))
+    monkeypatch.setattr(traffic_log, "time", fake_time)
+
+
+def _record_sample(path):
+    with TrafficRecorder(path) as recorder:
+        recorder.record("box-a", FrameDirection.SENT, "cmd-1")
+        recorder.record("box-b", FrameDirection.RECEIVED, b"\x00binary")
+        recorder.record("box-a", FrameDirection.RECEIVED, "réponse")
+        recorder.record("box-a", FrameDirection.SENT, "cmd-2")
+
+
+def test_capture_round_trip(tmp_path, clock):
+    """Test that frames are read back with their metadata, in order, and can be filtered."""
+    path = tmp_path / "capture.sfrtraffic"
+    _record_sample(path)
+
+    with TrafficLog(path, index_interval=2) as log:
+        records = list(log.records())
+        assert len(log) == 4
+        assert log.boxes == ["box-a", "box-b"]
+        assert log.start_time == 2.0
+        assert [(record.box, record.direction, record.frame) for record in records] == [
+            ("box-a", FrameDirection.SENT, "cmd-1"),
+            ("box-b", FrameDirection.RECEIVED, b"\x00binary"),
+            ("box-a", FrameDirection.RECEIVED, "réponse"),
+            ("box-a", FrameDirection.SENT, "cmd-2"),
+        ]
+        assert [record.frame for record in log.records(direction=FrameDirection.SENT)] == ["cmd-1", "cmd-2"]
+        assert [record.frame for record in log.records(box="box-b")] == [b"\x00binary"]
+        # Timestamps: box-a declared at 1, frames at 2, then box-b at 3 and frames at 4, 5, 6.
+        assert [record.timestamp for record in log.records(start=4.5, end=5.0)] == [5.0]
+        assert [record.monotonic for record in log.records(box="box-a")] == [102.0, 105.0, 106.0]
+        assert [record.frame for record in log.records(start=6.0)] == ["cmd-2"]
+
+
+def test_truncated_capture_is_repaired_on_append(tmp_path, clock):
+    """Test that a record cut short by a crash is ignored, then overwritten when appending."""
+    path = tmp_path / "capture.sfrtraffic"
+    _record_sample(path)
+    with open(path, "ab") as capture:
+        capture.write(b"\x01\x02\x03")
+
+    with TrafficLog(path) as log:
+        assert len(log) == 4
+    with TrafficRecorder(path) as recorder:
+        recorder.record("box-b", FrameDirection.SENT, "cmd-3")
+        recorder.record("box-c", FrameDirection.SENT, "cmd-4")
+    with TrafficLog(path) as log:
+        assert log.boxes == ["box-a", "box-b", "box-c"]
+        assert [(record.box, record.frame) for record in log.records()][-2:] == [("box-b", "cmd-3"), ("box-c", "cmd-4")]
+
+
+def test_rejects_files_that_are_not_captures(tmp_path):
+    """Test that an unrelated file is refused."""
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a capture at all")
+    with pytest.raises(ValueError, match="not a traffic capture"):
+        TrafficLog(path)
+    path.write_bytes(b"SFRTRAF1")
+    with pytest.raises(ValueError, match="older format"):
+        TrafficLog(path)
+
+    empty = tmp_path / "empty.sfrtraffic"
+    TrafficRecorder(empty).close()
+    with TrafficLog(empty) as log:
+        assert len(log) == 0
+        assert log.start_time is None
+        assert list(log.records(start=1.0)) == []
+
+
+def test_index_is_saved_and_reused_until_stale(tmp_path, clock, monkeypatch):
+    """Test that the index saved next to a capture is reused, extended, and rebuilt once stale."""
+    path = tmp_path / "capture.sfrtraffic"
+    index_path = tmp_path / "capture.sfrtraffic.idx"
+    _record_sample(path)
+    with TrafficLog(path) as log:
+        expected = (log.boxes, len(log), log.valid_size)
+    saved = index_path.read_bytes()
+
+    build_index = traffic_log.TrafficLog._build_index
+    scanned = []
+
+    def spy(log, interval):
+        scanned.append(log.valid_size)
+        build_index(log, interval)
+
+    monkeypatch.setattr(traffic_log.TrafficLog, "_build_index", spy)
+
+    def reopen(**kwargs):
+        with TrafficLog(path, **kwargs) as log:
+            return (log.boxes, len(log), log.valid_size), [record.frame for record in log.records()]
+
+    # Reused as is: the headers already indexed are not read again, and nothing is saved.
+    assert reopen()[0] == expected
+    assert scanned == [expected[2]]
+    assert index_path.read_bytes() == saved
+
+    # Extended with the records appended since.
+    with TrafficRecorder(path) as recorder:
+        recorder.record("box-c", FrameDirection.SENT, "cmd-3")
+    (boxes, count, _), frames = reopen()
+    assert (boxes, count) == (["box-a", "box-b", "box-c"], 5)
+    assert frames[-1] == "cmd-3"
+    assert scanned[-1] == expected[2]
+    assert index_path.read_bytes() != saved
+
+    # Rebuilt from the start for another interval, a rewritten capture or a corrupted index.
+    signature_size = len(traffic_log.SIGNATURE)
+    with TrafficLog(path, index_interval=2) as log:
+        assert scanned[-1] == signature_size
+        assert (len(log), log.offset_at(5.5)) == (5, TrafficLog(path, 2, persist_index=False).offset_at(5.5))
+    os.remove(path)
+    with TrafficRecorder(path) as recorder:
+        recorder.record("box-z", FrameDirection.RECEIVED, "x" * 100)
+    assert reopen()[0][:2] == (["box-z"], 1)
+    assert scanned[-1] == signature_size
+    index_path.write_bytes(b"SFRTIDX1 truncated")
+    assert reopen()[1] == ["x" * 100]
+    assert scanned[-1] == signature_size
+    assert not os.path.exists(f"{index_path}.tmp")
+
+
+@pytest.mark.asyncio
+async def test_replay_pacing(tmp_path, clock):
+    """Test that replay keeps the relative timing of the frames, scaled by the speed."""
+    path = tmp_path / "capture.sfrtraffic"
+    _record_sample(path)
+    loop = asyncio.get_running_loop()
+    received = []
+
+    async def sink(frame):
+        received.append((loop.time(), frame))
+
+    with TrafficLog(path) as log:
+        count = await replay(log.records(box="box-a"), sink, speed=100)
+        assert await replay(log.records(), AsyncMock(), speed=0) == 4
+
+    assert count == 3
+    # box-a frames were captured at 2, 5 and 6 s, hence replayed 30 ms then 10 ms apart.
+    assert received[2][0] - received[0][0] >= 0.035
+    assert [frame for _, frame in received] == ["cmd-1", "réponse", "cmd-2"]
+
+
+@pytest.mark.asyncio
+async def test_replay_follows_the_monotonic_clock():
+    """Test that a stepped wall clock does not change the pace, unlike a reboot in the middle of a capture."""
+    loop = asyncio.get_running_loop()
+    received = []
+
+    async def sink(frame):
+        received.append(loop.time())
+
+    records = [
+        TrafficRecord(1000.0, 10.0, FrameDirection.SENT, "box", "before"),
+        # The wall clock was stepped back by an hour: 20 ms later on the monotonic clock.
+        TrafficRecord(-2600.0, 12.0, FrameDirection.SENT, "box", "stepped"),
+        # The box rebooted: the monotonic clock restarted, the wall clock says 30 ms later.
+        TrafficRecord(-2597.0, 1.0, FrameDirection.SENT, "box", "rebooted"),
+    ]
+    assert await replay(records, sink, speed=100) == 3
+    # Deadlines accumulate from the first frame, so a late wake-up shortens the next gap.
+    assert received[1] - received[0] >= 0.019
+    assert 0.049 <= received[2] - received[0] < 0.5
+
+
+@pytest.mark.asyncio
+async def test_capture_and_replay_through_drivers(tmp_path):
+    """Test capturing a driver's traffic and replaying it into a driver and towards a box."""
+    path = tmp_path / "capture.sfrtraffic"
+    async with STB8Simulator() as simulator:
+        driver = STB8Driver(host=simulator.host, port=simulator.port)
+        recorder = TrafficRecorder(path)
+        driver.attach_traffic_recorder(recorder)
+        await driver.start()
+        try:
+            await driver.send_request(CommandType.GET_STATUS, timeout=2)
+        finally:
+            await driver.stop()
+        recorder.close()
+
+        with TrafficLog(path) as log:
+            assert log.boxes == [f"{simulator.host}:{simulator.port}"]
+            assert [record.direction for record in log.records()] == [FrameDirection.SENT, FrameDirection.RECEIVED]
+
+            # Replay what the box sent into a fresh driver.
+            listener = MagicMock()
+            offline = STB8Driver(host="localhost")
+            offline.register_listener(listener)
+            await replay(log.records(direction=FrameDirection.RECEIVED), offline.feed_message, speed=0)
+            assert '"getStatus"' in listener.call_args.args[0]
+            await offline.feed_message(b"binary frames are ignored")
+            assert listener.call_count == 1
+
+            # Replay the commands towards the box.
+            replayer = STB8Driver(host=simulator.host, port=simulator.port)
+            await replayer.start()
+            try:
+                await replay(log.records(direction=FrameDirection.SENT), replayer.send_message, speed=0)
+                await replayer.send_request(CommandType.GET_STATUS, timeout=2)
+            finally:
+                await replayer.stop()
+    assert simulator.received == 3